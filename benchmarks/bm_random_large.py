@@ -0,0 +1,68 @@
+"""
+Cost of binomial, hypergeometric and Poisson draws with large parameters.
+
+Above a small threshold, these distributions are sampled with rejection
+methods (BTPE, HRUA, PTRS) whose cost per draw doesn't grow with the
+parameters.  Run this script directly to time draws over a range of
+parameters.
+"""
+from __future__ import print_function, division, absolute_import
+import numpy as np
+from numba import jit
+from numba.utils import benchmark
+
+
+N_DRAWS = 10**4
+PARAMS = [10, 100, 10**3, 10**4, 10**6, 10**9]
+
+
+def py_draw_all(n, out):
+    for i in range(out.size):
+        out[i] = (np.random.binomial(n, 0.3) +
+                  np.random.hypergeometric(n, n, n // 2 + 1) +
+                  np.random.poisson(n * 0.3))
+
+
+@jit("void(int64, int64[:])", nopython=True)
+def draw_all(n, out):
+    for i in range(out.size):
+        out[i] = (np.random.binomial(n, 0.3) +
+                  np.random.hypergeometric(n, n, n // 2 + 1) +
+                  np.random.poisson(n * 0.3))
+
+
+@jit("void(int64, int64[:])", nopython=True)
+def draw_binomial(n, out):
+    for i in range(out.size):
+        out[i] = np.random.binomial(n, 0.3)
+
+
+@jit("void(int64, int64[:])", nopython=True)
+def draw_hypergeometric(n, out):
+    for i in range(out.size):
+        out[i] = np.random.hypergeometric(n, n, n // 2 + 1)
+
+
+@jit("void(int64, int64[:])", nopython=True)
+def draw_poisson(n, out):
+    for i in range(out.size):
+        out[i] = np.random.poisson(n * 0.3)
+
+
+def numba_main():
+    out = np.empty(N_DRAWS, dtype=np.int64)
+    draw_all(10**6, out)
+
+
+def python_main():
+    out = np.empty(N_DRAWS, dtype=np.int64)
+    py_draw_all(10**6, out)
+
+
+if __name__ == '__main__':
+    out = np.empty(N_DRAWS, dtype=np.int64)
+    for func in (draw_binomial, draw_hypergeometric, draw_poisson):
+        for n in PARAMS:
+            bmr = benchmark(lambda: func(n, out))
+            print("%-20s n=%-12d %.3g s per draw"
+                  % (func.__name__, n, bmr.best / N_DRAWS))
@@ -0,0 +1,52 @@
+"""
+Throughput of random number generation from several threads at once.
+
+The numba version runs nogil functions concurrently, each thread drawing
+from its own random state.
+"""
+from __future__ import print_function, division, absolute_import
+import threading
+import numpy as np
+from numba import jit
+from numba.utils import benchmark
+
+
+N_THREADS = 32
+N_NUMBERS = 10**5
+
+
+def py_fill_random(out):
+    for i in range(out.size):
+        out[i] = np.random.random()
+
+
+@jit("void(float64[:])", nopython=True, nogil=True)
+def fill_random(out):
+    for i in range(out.size):
+        out[i] = np.random.random()
+
+
+def run_threads(func):
+    results = [np.empty(N_NUMBERS) for i in range(N_THREADS)]
+    threads = [threading.Thread(target=func, args=(out,))
+               for out in results]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return results
+
+
+def numba_main():
+    results = run_threads(fill_random)
+    assert all(0.0 <= out.mean() <= 1.0 for out in results)
+
+
+def python_main():
+    results = run_threads(py_fill_random)
+    assert all(0.0 <= out.mean() <= 1.0 for out in results)
+
+
+if __name__ == '__main__':
+    print(benchmark(python_main))
+    print(benchmark(numba_main))
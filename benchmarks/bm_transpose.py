@@ -0,0 +1,69 @@
+from __future__ import absolute_import, print_function, division
+
+import numpy as np
+from numba import jit
+from numba.utils import benchmark
+
+
+def column_stencil(A, B):
+    n = B.shape[0]
+    m = B.shape[1]
+
+    # Walks the C-contiguous arrays along their columns
+    for j in range(1, m - 1):
+        for i in range(1, n - 1):
+            B[i, j] = 0.25 * (A[i - 1, j] + A[i + 1, j]
+                              + A[i, j - 1] + A[i, j + 1])
+
+
+def transpose(A, B):
+    # Either A or B is walked along its columns, whatever the loop order
+    for i in range(B.shape[0]):
+        for j in range(B.shape[1]):
+            B[i, j] = A[j, i]
+
+
+def kernels(**options):
+    signature = "void(float64[:,::1], float64[:,::1])"
+    return [jit(signature, nopython=True, **options)(fn)
+            for fn in (column_stencil, transpose)]
+
+
+numba_kernels = kernels(interchange=True)
+tiled_kernels = kernels(interchange=True, tile=True)
+plain_kernels = kernels()
+
+
+def run(fns):
+    N = 1024
+    iter_max = 5
+
+    A = np.arange(N * N, dtype=np.float64).reshape((N, N))
+    B = np.zeros_like(A)
+    for it in range(iter_max):
+        for fn in fns:
+            fn(A, B)
+            A, B = B, A
+
+
+def python_main():
+    run([column_stencil, transpose])
+
+
+def numba_main():
+    run(numba_kernels)
+
+
+def numba_plain_main():
+    run(plain_kernels)
+
+
+def numba_tiled_main():
+    run(tiled_kernels)
+
+
+if __name__ == '__main__':
+    print(benchmark(python_main))
+    print(benchmark(numba_main))
+    print(benchmark(numba_plain_main))
+    print(benchmark(numba_tiled_main))
@@ -0,0 +1,79 @@
+"""
+Measure the time and peak memory taken to compile 200 jitted functions
+sharing the same helpers (the implementations of array.sum(),
+array.mean(), etc., which are compiled once and linked into each
+library using them; see CodeLibrary._link_dependencies()).
+
+The functions are compiled with the JIT's default linkage for the
+linked-in helpers ("available_externally", so that they are never
+emitted again) and with "linkonce_odr" copies.  Each configuration runs
+in a subprocess, since the peak RSS of a process can't be reset.  Run
+the script on two checkouts to compare other changes.
+
+Not named bm_*.py since it doesn't measure execution speed (see README).
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import resource
+import subprocess
+import sys
+import time
+
+
+NFUNCS = 200
+
+methods = ['sum', 'mean', 'std', 'var', 'min', 'max', 'prod']
+
+func_template = """
+@jit("float64(float64[:])", nopython=True)
+def func{index}(a):
+    return a.{meth1}() * {index} + a.{meth2}() - a[{index} % a.shape[0]]
+"""
+
+
+def make_source(nfuncs):
+    lines = ["from numba import jit"]
+    for i in range(nfuncs):
+        lines.append(func_template.format(
+            index=i, meth1=methods[i % len(methods)],
+            meth2=methods[(i // len(methods)) % len(methods)]))
+    return "\n".join(lines)
+
+
+def compile_funcs(linkage):
+    from numba.targets import codegen
+    if linkage != 'default':
+        codegen.JITCPUCodegen._shared_linkage = linkage
+    source = make_source(NFUNCS)
+    # Compile the helpers once, so that only the linking is measured
+    exec(compile(make_source(len(methods) ** 2), "<warmup>", "exec"), {})
+    start = time.time()
+    exec(compile(source, "<funcs>", "exec"), {})
+    elapsed = time.time() - start
+    # Kilobytes under Linux, bytes under OS X
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(elapsed, peak)
+
+
+def run(linkage):
+    out = subprocess.check_output([sys.executable, __file__, linkage])
+    elapsed, peak = out.split()
+    return float(elapsed), int(peak)
+
+
+def main():
+    results = []
+    for linkage in ('default', 'linkonce_odr'):
+        elapsed, peak = run(linkage)
+        results.append((elapsed, peak))
+        print('%-14s %.3f seconds, peak RSS %d' % (linkage, elapsed, peak))
+    (t1, m1), (t2, m2) = results
+    print('ratio:         %.3f seconds, %.3f peak RSS' % (t1 / t2, m1 / m2))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        compile_funcs(sys.argv[1])
+    else:
+        main()
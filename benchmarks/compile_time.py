@@ -0,0 +1,87 @@
+"""
+Compare the compilation times of a few nopython functions with and
+without lowering their variables to LLVM registers in SSA form
+(see NUMBA_REGISTER_VARIABLES).
+
+Not named bm_*.py since it doesn't measure execution speed (see README).
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import math
+
+from numba import config, types
+from numba.compiler import compile_isolated, Flags
+from numba.utils import benchmark
+
+
+def straight_line(x, y):
+    a = x * y + 1.0
+    b = a * a - x
+    c = math.sqrt(abs(b)) + a
+    d = c * 0.5 + b * 0.25
+    e = math.sin(d) * math.cos(c)
+    f = e + d * c - b / (a + 1.0)
+    g = f * f + e * e
+    h = math.exp(-g) + math.log(1.0 + abs(f))
+    return h + g - f + e - d + c - b + a
+
+
+def laplace(u, v):
+    for i in range(1, u.shape[0] - 1):
+        for j in range(1, u.shape[1] - 1):
+            v[i, j] = ((u[i - 1, j] + u[i + 1, j]) * 0.25
+                       + (u[i, j - 1] + u[i, j + 1]) * 0.25)
+
+
+def branches(a):
+    total = 0.0
+    for i in range(a.shape[0]):
+        x = a[i]
+        y = x * 2.0
+        if x > 0.5:
+            z = y + 1.0
+        elif x > 0.25:
+            z = y - 1.0
+        else:
+            z = -y
+        total += z * y
+    return total
+
+
+float_array_1d = types.Array(types.float64, 1, 'A')
+float_array_2d = types.Array(types.float64, 2, 'A')
+
+cases = [
+    (straight_line, (types.float64, types.float64)),
+    (laplace, (float_array_2d, float_array_2d)),
+    (branches, (float_array_1d,)),
+]
+
+flags = Flags()
+
+
+def compile_all():
+    for pyfunc, argtys in cases:
+        compile_isolated(pyfunc, argtys, flags=flags)
+
+
+def time_compile(register_variables):
+    old = config.REGISTER_VARIABLES
+    config.REGISTER_VARIABLES = register_variables
+    try:
+        return benchmark(compile_all, maxsec=5).best
+    finally:
+        config.REGISTER_VARIABLES = old
+
+
+def main():
+    without = time_compile(0)
+    with_ = time_compile(1)
+    print('stack slots only:   %.4f seconds' % without)
+    print('register variables: %.4f seconds' % with_)
+    print('ratio:              %.3f' % (with_ / without))
+
+
+if __name__ == '__main__':
+    main()
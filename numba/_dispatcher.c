@@ -182,6 +182,48 @@ Dispatcher_Insert(DispatcherObject *self, PyObject *args)
     Py_RETURN_NONE;
 }
 
+static
+PyObject*
+Dispatcher_SetCountdown(DispatcherObject *self, PyObject *args)
+{
+    PyObject *cfunc;
+    long ncalls;
+
+    if (!PyArg_ParseTuple(args, "Ol", &cfunc, &ncalls)) {
+        return NULL;
+    }
+    if (!dispatcher_set_countdown(self->dispatcher, (void*) cfunc, ncalls)) {
+        PyErr_SetString(PyExc_KeyError, "unknown definition");
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static
+PyObject*
+Dispatcher_Replace(DispatcherObject *self, PyObject *args)
+{
+    PyObject *oldfunc, *newfunc;
+
+    if (!PyArg_ParseTuple(args, "OO!", &oldfunc,
+                          &PyCFunction_Type, &newfunc)) {
+        return NULL;
+    }
+    /* As in Dispatcher_Insert(), the reference to newfunc is borrowed */
+    if (!dispatcher_replace_defn(self->dispatcher, (void*) oldfunc,
+                                 (void*) newfunc)) {
+        PyErr_SetString(PyExc_KeyError, "unknown definition");
+        return NULL;
+    }
+    if (self->firstdef == oldfunc) {
+        self->firstdef = newfunc;
+    }
+    if (self->fallbackdef == oldfunc) {
+        self->fallbackdef = newfunc;
+    }
+    Py_RETURN_NONE;
+}
+
 static PyObject *str_typeof_pyval = NULL;
 
 /* For void types, we need to keep a reference to the returned type object so
@@ -458,6 +500,20 @@ void explain_ambiguous(PyObject *dispatcher, PyObject *args, PyObject *kws) {
     Py_XDECREF(callback);
 }
 
+/* Tell the Python derived class that *cfunc* has been called often
+   enough (see Dispatcher_SetCountdown()). */
+static int
+notify_hot(DispatcherObject *self, PyObject *cfunc)
+{
+    PyObject *result;
+    result = PyObject_CallMethod((PyObject*)self, "_on_hot_overload", "O",
+                                 cfunc);
+    if (result == NULL)
+        return -1;
+    Py_DECREF(result);
+    return 0;
+}
+
 /* A custom, fast, inlinable version of PyCFunction_Call() */
 static PyObject *
 call_cfunc(PyObject *cfunc, PyObject *args, PyObject *kws)
@@ -553,6 +609,7 @@ Dispatcher_call(DispatcherObject *self, PyObject *args, PyObject *kws)
     int i;
     int prealloc[24];
     int matches;
+    int hot;
     PyObject *cfunc;
 
     if (find_named_args(self, &args, &kws))
@@ -576,10 +633,12 @@ Dispatcher_call(DispatcherObject *self, PyObject *args, PyObject *kws)
     /* We only allow unsafe conversions if compilation of new specializations
        has been disabled. */
     cfunc = dispatcher_resolve(self->dispatcher, tys, &matches,
-                               !self->can_compile);
+                               !self->can_compile, &hot);
 
     if (matches == 1) {
         /* Definition is found */
+        if (hot && notify_hot(self, cfunc))
+            goto CLEANUP;
         retval = call_cfunc(cfunc, args, kws);
     } else if (matches == 0) {
         /* No matching definition */
@@ -614,6 +673,10 @@ static PyMethodDef Dispatcher_methods[] = {
     { "_clear", (PyCFunction)Dispatcher_clear, METH_NOARGS, NULL },
     { "_insert", (PyCFunction)Dispatcher_Insert, METH_VARARGS,
       "insert new definition"},
+    { "_set_countdown", (PyCFunction)Dispatcher_SetCountdown, METH_VARARGS,
+      "call _on_hot_overload() after a number of calls to a definition"},
+    { "_replace", (PyCFunction)Dispatcher_Replace, METH_VARARGS,
+      "replace the callable of a definition"},
     { NULL },
 };
 
@@ -19,9 +19,16 @@ dispatcher_del(dispatcher_t *obj);
 void
 dispatcher_add_defn(dispatcher_t *obj, int tys[], void* callable);
 
+int
+dispatcher_set_countdown(dispatcher_t *obj, void* callable, long ncalls);
+
+int
+dispatcher_replace_defn(dispatcher_t *obj, void* old_callable,
+                        void* new_callable);
+
 void*
 dispatcher_resolve(dispatcher_t *obj, int sig[], int *matches,
-                   int allow_unsafe);
+                   int allow_unsafe, int *hot);
 
 int
 dispatcher_count(dispatcher_t *obj);
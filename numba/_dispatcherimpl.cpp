@@ -4,6 +4,7 @@
 
 typedef std::vector<Type> TypeTable;
 typedef std::vector<void*> Functions;
+typedef std::vector<long> Counters;
 
 struct _opaque_dispatcher {};
 
@@ -17,12 +18,42 @@ public:
             overloads.push_back(args[i]);
         }
         functions.push_back(callable);
+        countdowns.push_back(0);
     }
 
-    void* resolve(Type sig[], int &matches, bool allow_unsafe) {
+    int find(void *callable) const {
+        for (size_t i = 0; i < functions.size(); ++i) {
+            if (functions[i] == callable)
+                return i;
+        }
+        return -1;
+    }
+
+    /* Count the calls to the given definition: resolve() flags it as
+       hot after *ncalls* calls (0 disables counting). */
+    bool setCountdown(void *callable, long ncalls) {
+        int index = find(callable);
+        if (index < 0)
+            return false;
+        countdowns[index] = ncalls;
+        return true;
+    }
+
+    /* Swap the callable of a definition, keeping its signature. */
+    bool replaceDefinition(void *old_callable, void *new_callable) {
+        int index = find(old_callable);
+        if (index < 0)
+            return false;
+        functions[index] = new_callable;
+        countdowns[index] = 0;
+        return true;
+    }
+
+    void* resolve(Type sig[], int &matches, bool allow_unsafe, bool &hot) {
         const int ovct = functions.size();
         int selected;
         matches = 0;
+        hot = false;
         if (0 == ovct) {
             return NULL;
         }
@@ -34,6 +65,9 @@ public:
             selected = 0;
         }
         if (matches == 1){
+            if (countdowns[selected] > 0 && --countdowns[selected] == 0) {
+                hot = true;
+            }
             return functions[selected];
         }
         return NULL;
@@ -44,6 +78,7 @@ public:
     void clear() {
         functions.clear();
         overloads.clear();
+        countdowns.clear();
     }
 
 private:
@@ -51,6 +86,7 @@ private:
     TypeManager *tm;
     TypeTable overloads;
     Functions functions;
+    Counters countdowns;
 };
 
 
@@ -83,11 +119,27 @@ dispatcher_add_defn(dispatcher_t *obj, int tys[], void* callable) {
     disp->addDefinition(args, callable);
 }
 
+int
+dispatcher_set_countdown(dispatcher_t *obj, void* callable, long ncalls) {
+    Dispatcher *disp = static_cast<Dispatcher*>(obj);
+    return disp->setCountdown(callable, ncalls);
+}
+
+int
+dispatcher_replace_defn(dispatcher_t *obj, void* old_callable,
+                        void* new_callable) {
+    Dispatcher *disp = static_cast<Dispatcher*>(obj);
+    return disp->replaceDefinition(old_callable, new_callable);
+}
+
 void*
-dispatcher_resolve(dispatcher_t *obj, int sig[], int *count, int allow_unsafe) {
+dispatcher_resolve(dispatcher_t *obj, int sig[], int *count, int allow_unsafe,
+                   int *hot) {
     Dispatcher *disp = static_cast<Dispatcher*>(obj);
     Type *args = reinterpret_cast<Type*>(sig);
-    void *callable = disp->resolve(args, *count, (bool) allow_unsafe );
+    bool is_hot;
+    void *callable = disp->resolve(args, *count, (bool) allow_unsafe, is_hot);
+    *hot = is_hot;
     return callable;
 }
 
@@ -39,6 +39,68 @@ typedef struct {
 static rnd_state_t py_random_state;
 static rnd_state_t np_random_state;
 
+/* Per-thread random states.
+ *
+ * The thread which imported this module uses the global states above.
+ * Every other thread lazily gets its own states, derived from a snapshot
+ * of the global state taken when it was last seeded: thread number k
+ * (counting from 1, in order of first use) is seeded with the snapshot
+ * words followed by k.  Reseeding the global state therefore also resets
+ * the streams of all other threads, in a reproducible way.
+ */
+
+#if defined(_MSC_VER)
+#include <windows.h>
+#define NUMBA_THREAD_LOCAL __declspec(thread)
+#define NUMBA_MEMORY_BARRIER() MemoryBarrier()
+#define NUMBA_ATOMIC_INC(ptr) InterlockedIncrement(ptr)
+#else
+#define NUMBA_THREAD_LOCAL __thread
+#define NUMBA_MEMORY_BARRIER() __sync_synchronize()
+#define NUMBA_ATOMIC_INC(ptr) __sync_add_and_fetch(ptr, 1)
+#endif
+
+typedef struct {
+    /* Sequence counter: odd while the snapshot is being written */
+    volatile long seq;
+    /* Number of thread states derived from this snapshot */
+    volatile long nthreads;
+    unsigned int mt[MT_N];
+} rnd_seed_t;
+
+typedef struct {
+    rnd_state_t state;
+    /* Value of the seed's sequence counter the state was derived from */
+    long seq;
+} rnd_thread_state_t;
+
+static rnd_seed_t py_random_seed;
+static rnd_seed_t np_random_seed;
+
+static NUMBA_THREAD_LOCAL int rnd_is_main_thread = 0;
+static NUMBA_THREAD_LOCAL rnd_thread_state_t py_thread_state;
+static NUMBA_THREAD_LOCAL rnd_thread_state_t np_thread_state;
+
+/* Record the new seed of *state*, if it is one of the global states */
+static void
+rnd_record_seed(rnd_state_t *state)
+{
+    rnd_seed_t *seed;
+
+    if (state == &py_random_state)
+        seed = &py_random_seed;
+    else if (state == &np_random_state)
+        seed = &np_random_seed;
+    else
+        return;
+    seed->seq++;
+    NUMBA_MEMORY_BARRIER();
+    memcpy(seed->mt, state->mt, sizeof(seed->mt));
+    seed->nthreads = 0;
+    NUMBA_MEMORY_BARRIER();
+    seed->seq++;
+}
+
 /* Some code portions below from CPython's _randommodule.c, some others
    from Numpy's and Jean-Sebastien Roy's randomkit.c. */
 
@@ -78,6 +140,7 @@ Numba_rnd_init(rnd_state_t *state, unsigned int seed)
     state->index = MT_N;
     state->has_gauss = 0;
     state->gauss = 0.0;
+    rnd_record_seed(state);
 }
 
 /* Perturb mt[] with a key array */
@@ -110,6 +173,49 @@ rnd_init_by_array(rnd_state_t *state, unsigned int init_key[], size_t key_length
     state->index = MT_N;
     state->has_gauss = 0;
     state->gauss = 0.0;
+    rnd_record_seed(state);
+}
+
+/* Return the calling thread's state for the given global state */
+static rnd_state_t *
+rnd_thread_state(rnd_state_t *global, rnd_seed_t *seed,
+                 rnd_thread_state_t *local)
+{
+    unsigned int key[MT_N + 1];
+    long seq;
+
+    if (rnd_is_main_thread)
+        return global;
+    seq = seed->seq;
+    if (local->seq == seq)
+        return &local->state;
+    /* First use in this thread, or the global state was reseeded:
+       derive a new state from a consistent snapshot of the seed */
+    do {
+        while ((seq = seed->seq) & 1)
+            ;
+        NUMBA_MEMORY_BARRIER();
+        memcpy(key, seed->mt, sizeof(seed->mt));
+        NUMBA_MEMORY_BARRIER();
+    } while (seq != seed->seq);
+    key[MT_N] = (unsigned int) NUMBA_ATOMIC_INC(&seed->nthreads);
+    rnd_init_by_array(&local->state, key, MT_N + 1);
+    local->seq = seq;
+    return &local->state;
+}
+
+static rnd_state_t *
+Numba_rnd_get_py_state(void)
+{
+    return rnd_thread_state(&py_random_state, &py_random_seed,
+                            &py_thread_state);
+}
+
+static rnd_state_t *
+Numba_rnd_get_np_state(void)
+{
+    return rnd_thread_state(&np_random_state, &np_random_seed,
+                            &np_thread_state);
 }
 
 /* Random-initialize the given state (for use at startup) */
@@ -190,6 +296,7 @@ rnd_set_state(PyObject *self, PyObject *args)
     }
     state->has_gauss = 0;
     state->gauss = 0.0;
+    rnd_record_seed(state);
     Py_RETURN_NONE;
 }
 
@@ -380,6 +487,196 @@ Numba_poisson_ptrs(rnd_state_t *state, double lam)
     }
 }
 
+static int64_t
+Numba_binomial_btpe(rnd_state_t *state, int64_t n, double p)
+{
+    /* This method is invoked only if n*min(p, 1-p) is big enough
+     * ( > 30 ), so that the cost of a draw doesn't grow with n.
+     * The algorithm used is described in "Kachitvichyanukul, V. and
+     * Schmeiser, B. 1988. 'Binomial Random Variate Generation'".
+     * The implementation comes straight from Numpy.
+     */
+    double r, q, fm, p1, xm, xl, xr, c, laml, lamr, p2, p3, p4;
+    double a, u, v, s, F, rho, t, A, nrq, x1, x2, f1, f2, z, z2, w, w2, x;
+    int64_t m, y, k, i;
+
+    r = p <= 0.5 ? p : 1.0 - p;
+    q = 1.0 - r;
+    fm = n*r + r;
+    m = (int64_t) floor(fm);
+    p1 = floor(2.195*sqrt(n*r*q) - 4.6*q) + 0.5;
+    xm = m + 0.5;
+    xl = xm - p1;
+    xr = xm + p1;
+    c = 0.134 + 20.5/(15.3 + m);
+    a = (fm - xl)/(fm - xl*r);
+    laml = a*(1.0 + a/2.0);
+    a = (xr - fm)/(xr*q);
+    lamr = a*(1.0 + a/2.0);
+    p2 = p1*(1.0 + 2.0*c);
+    p3 = p2 + c/laml;
+    p4 = p3 + c/lamr;
+    nrq = n*r*q;
+
+    while (1)
+    {
+        u = get_next_double(state)*p4;
+        v = get_next_double(state);
+        if (u <= p1)
+        {
+            /* Triangular region: immediate acceptance */
+            y = (int64_t) floor(xm - p1*v + u);
+            break;
+        }
+        if (u <= p2)
+        {
+            /* Parallelogram region */
+            x = xl + (u - p1)/c;
+            v = v*c + 1.0 - fabs(m - x + 0.5)/p1;
+            if (v > 1.0)
+                continue;
+            y = (int64_t) floor(x);
+        }
+        else if (u <= p3)
+        {
+            /* Left exponential tail */
+            y = (int64_t) floor(xl + log(v)/laml);
+            if (y < 0)
+                continue;
+            v = v*(u - p2)*laml;
+        }
+        else
+        {
+            /* Right exponential tail */
+            y = (int64_t) floor(xr - log(v)/lamr);
+            if (y > n)
+                continue;
+            v = v*(u - p3)*lamr;
+        }
+
+        k = y > m ? y - m : m - y;
+        if ((k <= 20) || (k >= nrq/2.0 - 1))
+        {
+            /* Explicit evaluation of f(y) / f(m) */
+            s = r/q;
+            a = s*(n + 1);
+            F = 1.0;
+            if (m < y)
+            {
+                for (i = m + 1; i <= y; i++)
+                    F *= (a/i - s);
+            }
+            else if (m > y)
+            {
+                for (i = y + 1; i <= m; i++)
+                    F /= (a/i - s);
+            }
+            if (v > F)
+                continue;
+            break;
+        }
+
+        /* Squeeze using upper and lower bounds on log(f(y)) */
+        rho = (k/nrq)*((k*(k/3.0 + 0.625) + 0.16666666666666666)/nrq + 0.5);
+        t = -k*k/(2*nrq);
+        A = log(v);
+        if (A < (t - rho))
+            break;
+        if (A > (t + rho))
+            continue;
+
+        /* Final acceptance test with Stirling's formula */
+        x1 = y + 1;
+        f1 = m + 1;
+        z = n + 1 - m;
+        w = n - y + 1;
+        x2 = x1*x1;
+        f2 = f1*f1;
+        z2 = z*z;
+        w2 = w*w;
+        if (A > (xm*log(f1/x1)
+                 + (n - m + 0.5)*log(z/w)
+                 + (y - m)*log(w*r/(x1*q))
+                 + (13680.-(462.-(132.-(99.-140./f2)/f2)/f2)/f2)/f1/166320.
+                 + (13680.-(462.-(132.-(99.-140./z2)/z2)/z2)/z2)/z/166320.
+                 + (13680.-(462.-(132.-(99.-140./x2)/x2)/x2)/x2)/x1/166320.
+                 + (13680.-(462.-(132.-(99.-140./w2)/w2)/w2)/w2)/w/166320.))
+            continue;
+        break;
+    }
+
+    if (p > 0.5)
+        y = n - y;
+    return y;
+}
+
+static int64_t
+Numba_hypergeometric_hrua(rnd_state_t *state, int64_t good, int64_t bad,
+                          int64_t sample)
+{
+    /* This method is invoked only if the number of samples is big
+     * enough ( > 10 ), so that the cost of a draw doesn't grow with it.
+     * The algorithm used is described in "Stadlober, E. 1989.
+     * 'Sampling from Poisson, binomial and hypergeometric distributions:
+     * ratio of uniforms as a simple and fast alternative'".
+     * The implementation comes straight from Numpy.
+     */
+    const double D1 = 1.7155277699214135;
+    const double D2 = 0.8989161620588988;
+    int64_t mingoodbad, maxgoodbad, popsize, m, d9, Z;
+    double d4, d5, d6, d7, d8, d10, d11, T, W, X, Y;
+
+    mingoodbad = good < bad ? good : bad;
+    maxgoodbad = good < bad ? bad : good;
+    popsize = good + bad;
+    m = sample < popsize - sample ? sample : popsize - sample;
+    d4 = ((double) mingoodbad) / popsize;
+    d5 = 1.0 - d4;
+    d6 = m*d4 + 0.5;
+    d7 = sqrt((double) (popsize - m) * sample * d4 * d5 / (popsize - 1) + 0.5);
+    d8 = D1*d7 + D2;
+    d9 = (int64_t) floor((double) (m + 1) * (mingoodbad + 1) / (popsize + 2));
+    d10 = (loggam(d9 + 1) + loggam(mingoodbad - d9 + 1) + loggam(m - d9 + 1) +
+           loggam(maxgoodbad - m + d9 + 1));
+    /* 16 for 16-decimal-digit precision in D1 and D2 */
+    d11 = floor(d6 + 16*d7);
+    if ((m < mingoodbad ? m : mingoodbad) + 1.0 < d11)
+        d11 = (m < mingoodbad ? m : mingoodbad) + 1.0;
+
+    while (1)
+    {
+        X = get_next_double(state);
+        Y = get_next_double(state);
+        W = d6 + d8*(Y - 0.5)/X;
+
+        /* fast rejection */
+        if ((W < 0.0) || (W >= d11))
+            continue;
+
+        Z = (int64_t) floor(W);
+        T = d10 - (loggam(Z + 1) + loggam(mingoodbad - Z + 1) +
+                   loggam(m - Z + 1) + loggam(maxgoodbad - m + Z + 1));
+
+        /* fast acceptance */
+        if ((X*(4.0 - X) - 3.0) <= T)
+            break;
+        /* fast rejection */
+        if (X*(X - T) >= 1)
+            continue;
+        /* acceptance */
+        if (2.0*log(X) <= T)
+            break;
+    }
+
+    /* correction to HRUA* by Ivan Frohne in rv.py */
+    if (good > bad)
+        Z = m - Z;
+    /* another fix from rv.py to allow sample to exceed popsize/2 */
+    if (m < sample)
+        Z = good - Z;
+    return Z;
+}
+
 /*
  * Other helpers.
  */
@@ -451,6 +748,13 @@ void Numba_cpow(Py_complex *a, Py_complex *b, Py_complex *c) {
     *c = _Py_c_pow(*a, *b);
 }
 
+/* The single precision versions of the special functions below use the
+   C library's where available (MSVC only has them since Visual Studio
+   2013), rather than going through the double precision versions. */
+#if !defined(_MSC_VER) || _MSC_VER >= 1800
+    #define HAVE_C99_FLOAT_SPECIAL
+#endif
+
 /* provide gamma() and lgamma(); code borrowed from CPython */
 
 /*
@@ -717,6 +1021,9 @@ Numba_gamma(double x)
     return r;
 }
 
+/* Unlike the other single precision special functions, this one goes
+   through the double precision version: the C library's tgammaf() can
+   be several ulps off. */
 static float
 Numba_gammaf(float x)
 {
@@ -774,7 +1081,11 @@ Numba_lgamma(double x)
 static float
 Numba_lgammaf(float x)
 {
+#ifdef HAVE_C99_FLOAT_SPECIAL
+    return lgammaf(x);
+#else
     return (float) Numba_lgamma(x);
+#endif
 }
 
 /* provide erf() and erfc(); code borrowed from CPython */
@@ -910,7 +1221,11 @@ Numba_erf(double x)
 static float
 Numba_erff(float x)
 {
+#ifdef HAVE_C99_FLOAT_SPECIAL
+    return erff(x);
+#else
     return (float) Numba_erf(x);
+#endif
 }
 
 /* Complementary error function erfc(x), for general x. */
@@ -934,7 +1249,11 @@ Numba_erfc(double x)
 static float
 Numba_erfcf(float x)
 {
+#ifdef HAVE_C99_FLOAT_SPECIAL
+    return erfcf(x);
+#else
     return (float) Numba_erfc(x);
+#endif
 }
 
 
@@ -1075,6 +1394,7 @@ CLEANUP:
  */
 
 typedef struct {
+    void *meminfo;
     PyObject *parent;
     npy_intp nitems;
     npy_intp itemsize;
@@ -1099,6 +1419,8 @@ int Numba_adapt_ndarray(PyObject *obj, arystruct_t* arystruct) {
     arystruct->nitems = PyArray_SIZE(ndary);
     arystruct->itemsize = PyArray_ITEMSIZE(ndary);
     arystruct->parent = obj;
+    /* The array's memory is owned by the Numpy array, not by us */
+    arystruct->meminfo = NULL;
     p = arystruct->shape_and_strides;
     for (i = 0; i < ndim; i++, p++) {
         *p = PyArray_DIM(ndary, i);
@@ -1110,6 +1432,220 @@ int Numba_adapt_ndarray(PyObject *obj, arystruct_t* arystruct) {
     return 0;
 }
 
+/*
+ * Memory management for arrays allocated in nopython mode.
+ *
+ * A "meminfo" is a reference-counted header in front of the array data.
+ * Compiled code keeps a pointer to it in the array structure (the
+ * "meminfo" field, NULL for memory owned by a Numpy array) and increfs
+ * or decrefs it as array values are copied or go out of scope.  The
+ * refcount is updated atomically, so that arrays can be shared by
+ * functions running without the GIL.
+ */
+
+#if defined(_MSC_VER)
+    #include <intrin.h>
+    #define MEMINFO_ATOMIC_INC(ptr) _InterlockedIncrement(ptr)
+    #define MEMINFO_ATOMIC_DEC(ptr) _InterlockedDecrement(ptr)
+#elif defined(__GNUC__)
+    #define MEMINFO_ATOMIC_INC(ptr) __sync_add_and_fetch(ptr, 1)
+    #define MEMINFO_ATOMIC_DEC(ptr) __sync_sub_and_fetch(ptr, 1)
+#else
+    #define MEMINFO_ATOMIC_INC(ptr) (++(*(ptr)))
+    #define MEMINFO_ATOMIC_DEC(ptr) (--(*(ptr)))
+#endif
+
+/* Alignment of the data area (suitable for any vector instruction set) */
+#define MEMINFO_ALIGN 64
+
+typedef struct {
+    volatile long refct;
+    void *data;
+    npy_intp size;
+} meminfo_t;
+
+/* Number of live meminfos, for leak testing */
+static volatile long meminfo_live = 0;
+
+static void *
+Numba_meminfo_alloc(npy_intp size)
+{
+    meminfo_t *mi;
+    size_t addr;
+
+    if (size < 0)
+        return NULL;
+    mi = (meminfo_t *) malloc(sizeof(meminfo_t) + (size_t) size
+                              + MEMINFO_ALIGN);
+    if (mi == NULL)
+        return NULL;
+    addr = (size_t) (mi + 1);
+    addr = (addr + MEMINFO_ALIGN - 1) & ~((size_t) MEMINFO_ALIGN - 1);
+    mi->refct = 1;
+    mi->data = (void *) addr;
+    mi->size = size;
+    MEMINFO_ATOMIC_INC(&meminfo_live);
+    return mi;
+}
+
+static void *
+Numba_meminfo_data(void *meminfo)
+{
+    return ((meminfo_t *) meminfo)->data;
+}
+
+static void
+Numba_meminfo_incref(void *meminfo)
+{
+    if (meminfo == NULL)
+        return;
+    MEMINFO_ATOMIC_INC(&((meminfo_t *) meminfo)->refct);
+}
+
+static void
+Numba_meminfo_decref(void *meminfo)
+{
+    if (meminfo == NULL)
+        return;
+    if (MEMINFO_ATOMIC_DEC(&((meminfo_t *) meminfo)->refct) == 0) {
+        free(meminfo);
+        MEMINFO_ATOMIC_DEC(&meminfo_live);
+    }
+}
+
+static PyObject *
+meminfo_count(PyObject *self)
+{
+    return PyLong_FromLong(meminfo_live);
+}
+
+/*
+ * A Python object owning a meminfo reference, used as the base object
+ * of Numpy arrays wrapping memory allocated in nopython mode.
+ */
+
+typedef struct {
+    PyObject_HEAD
+    void *meminfo;
+} MemInfoObject;
+
+static void
+meminfo_dealloc(MemInfoObject *self)
+{
+    Numba_meminfo_decref(self->meminfo);
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+static PyTypeObject MemInfoType = {
+#if (PY_MAJOR_VERSION < 3)
+    PyObject_HEAD_INIT(NULL)
+    0,                         /*ob_size*/
+#else
+    PyVarObject_HEAD_INIT(NULL, 0)
+#endif
+    "_helperlib.MemInfo",      /*tp_name*/
+    sizeof(MemInfoObject),     /*tp_basicsize*/
+    0,                         /*tp_itemsize*/
+    (destructor) meminfo_dealloc, /*tp_dealloc*/
+    0,                         /*tp_print*/
+    0,                         /*tp_getattr*/
+    0,                         /*tp_setattr*/
+    0,                         /*tp_compare*/
+    0,                         /*tp_repr*/
+    0,                         /*tp_as_number*/
+    0,                         /*tp_as_sequence*/
+    0,                         /*tp_as_mapping*/
+    0,                         /*tp_hash */
+    0,                         /*tp_call*/
+    0,                         /*tp_str*/
+    0,                         /*tp_getattro*/
+    0,                         /*tp_setattro*/
+    0,                         /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,        /*tp_flags*/
+};
+
+static int
+_array_set_base(PyArrayObject *ary, PyObject *base)
+{
+#if NPY_API_VERSION >= 0x00000007
+    return PyArray_SetBaseObject(ary, base);
+#else
+    ary->base = base;
+    return 0;
+#endif
+}
+
+/*
+ * Create a Numpy array from the native array structure *arystruct*.
+ * *descr* is a borrowed reference to the array's dtype.  The structure
+ * isn't consumed: the caller still owns its meminfo reference.
+ */
+static PyObject *
+Numba_box_array(arystruct_t *arystruct, int ndim, PyObject *descr)
+{
+    PyArrayObject *ary;
+    PyObject *base;
+    PyObject *parent = arystruct->parent;
+    npy_intp *shape = arystruct->shape_and_strides;
+    npy_intp *strides = shape + ndim;
+    int i, flags = NPY_ARRAY_WRITEABLE;
+
+    if (arystruct->meminfo == NULL && parent != NULL) {
+        /* Returning an argument unchanged: reuse the original object */
+        PyArrayObject *pary = (PyArrayObject *) parent;
+        int same = (PyArray_DATA(pary) == arystruct->data &&
+                    PyArray_NDIM(pary) == ndim &&
+                    PyArray_EquivTypes(PyArray_DESCR(pary),
+                                       (PyArray_Descr *) descr));
+        for (i = 0; same && i < ndim; i++) {
+            same = (PyArray_DIM(pary, i) == shape[i] &&
+                    PyArray_STRIDE(pary, i) == strides[i]);
+        }
+        if (same) {
+            Py_INCREF(parent);
+            return parent;
+        }
+        if (!PyArray_ISWRITEABLE(pary))
+            flags = 0;
+    }
+
+    Py_INCREF(descr);
+    ary = (PyArrayObject *) PyArray_NewFromDescr(
+        &PyArray_Type, (PyArray_Descr *) descr, ndim, shape, strides,
+        arystruct->data, flags, NULL);
+    if (ary == NULL)
+        return NULL;
+    PyArray_UpdateFlags(ary, NPY_ARRAY_UPDATE_ALL);
+
+    if (arystruct->meminfo != NULL) {
+        /* The new array shares ownership of the memory */
+        MemInfoObject *miobj = PyObject_New(MemInfoObject, &MemInfoType);
+        if (miobj == NULL) {
+            Py_DECREF(ary);
+            return NULL;
+        }
+        Numba_meminfo_incref(arystruct->meminfo);
+        miobj->meminfo = arystruct->meminfo;
+        base = (PyObject *) miobj;
+    }
+    else if (parent != NULL) {
+        /* A view of an argument */
+        Py_INCREF(parent);
+        base = parent;
+    }
+    else {
+        /* No owner (e.g. a constant array): return a copy */
+        PyObject *copy = PyArray_NewCopy(ary, NPY_ANYORDER);
+        Py_DECREF(ary);
+        return copy;
+    }
+    if (_array_set_base(ary, base)) {
+        Py_DECREF(ary);
+        return NULL;
+    }
+    return (PyObject *) ary;
+}
+
 static
 PyObject* Numba_ndarray_new(int nd,
                             npy_intp *dims,   /* shape */
@@ -1372,6 +1908,11 @@ build_c_helpers_dict(void)
     declmethod(release_record_buffer);
     declmethod(adapt_ndarray);
     declmethod(ndarray_new);
+    declmethod(meminfo_alloc);
+    declmethod(meminfo_data);
+    declmethod(meminfo_incref);
+    declmethod(meminfo_decref);
+    declmethod(box_array);
     declmethod(extract_np_datetime);
     declmethod(create_np_datetime);
     declmethod(extract_np_timedelta);
@@ -1385,7 +1926,11 @@ build_c_helpers_dict(void)
     declmethod(unpickle);
     declmethod(rnd_shuffle);
     declmethod(rnd_init);
+    declmethod(rnd_get_py_state);
+    declmethod(rnd_get_np_state);
     declmethod(poisson_ptrs);
+    declmethod(binomial_btpe);
+    declmethod(hypergeometric_hrua);
 
     declpointer(py_random_state);
     declpointer(np_random_state);
@@ -1408,6 +1953,7 @@ static PyMethodDef ext_methods[] = {
     { "rnd_seed", (PyCFunction) rnd_seed, METH_VARARGS, NULL },
     { "rnd_set_state", (PyCFunction) rnd_set_state, METH_VARARGS, NULL },
     { "rnd_shuffle", (PyCFunction) rnd_shuffle, METH_O, NULL },
+    { "meminfo_count", (PyCFunction) meminfo_count, METH_NOARGS, NULL },
     { NULL },
 };
 
@@ -1420,12 +1966,16 @@ MOD_INIT(_helperlib) {
 
     import_array();
 
+    if (PyType_Ready(&MemInfoType))
+        return MOD_ERROR_VAL;
+
     PyModule_AddObject(m, "c_helpers", build_c_helpers_dict());
     PyModule_AddIntConstant(m, "long_min", LONG_MIN);
     PyModule_AddIntConstant(m, "long_max", LONG_MAX);
     PyModule_AddIntConstant(m, "py_buffer_size", sizeof(Py_buffer));
     PyModule_AddIntConstant(m, "py_gil_state_size", sizeof(PyGILState_STATE));
 
+    rnd_is_main_thread = 1;
     if (_rnd_random_seed(&py_random_state) ||
         _rnd_random_seed(&np_random_state))
         return MOD_ERROR_VAL;
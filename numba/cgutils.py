@@ -28,6 +28,28 @@ def as_bool_bit(builder, value):
     return builder.icmp(lc.ICMP_NE, value, Constant.null(value.type))
 
 
+def as_half_bits(builder, value):
+    """
+    Round single precision *value* to half precision, returning the
+    16-bit storage representation.
+    """
+    mod = get_module(builder)
+    fnty = Type.function(Type.int(16), [Type.float()])
+    fn = mod.get_or_insert_function(fnty, name="llvm.convert.to.fp16")
+    return builder.call(fn, [value])
+
+
+def from_half_bits(builder, value):
+    """
+    Widen the 16-bit storage representation *value* of a half precision
+    number to single precision.
+    """
+    mod = get_module(builder)
+    fnty = Type.function(Type.float(), [Type.int(16)])
+    fn = mod.get_or_insert_function(fnty, name="llvm.convert.from.fp16")
+    return builder.call(fn, [value])
+
+
 def make_anonymous_struct(builder, values):
     """
     Create an anonymous struct containing the given LLVM *values*.
@@ -662,11 +684,34 @@ def pointer_add(builder, ptr, offset, return_type=None):
     the pointed item type.
     """
     intptr_t = Type.int(utils.MACHINE_BITS)
-    intptr = builder.ptrtoint(ptr, intptr_t)
     if isinstance(offset, int):
         offset = Constant.int(intptr_t, offset)
-    intptr = builder.add(intptr, offset)
-    return builder.inttoptr(intptr, return_type or ptr.type)
+    # Offset a byte pointer rather than going through an integer, so that
+    # LLVM can still analyze the address (e.g. to hoist the invariant part
+    # of the index computation out of loops and strength-reduce the rest
+    # into pointer increments).
+    byteptr = builder.bitcast(ptr, Type.pointer(Type.int(8),
+                                                ptr.type.addrspace))
+    byteptr = builder.gep(byteptr, [offset])
+    return builder.bitcast(byteptr, return_type or ptr.type)
+
+
+def raw_memcpy(builder, dst, src, count, itemsize, align=1):
+    """
+    Emit a memcpy() of *count* items of *itemsize* bytes from pointer
+    *src* to pointer *dst*.  The memory areas must not overlap.
+    """
+    size_t = count.type
+    if isinstance(itemsize, int):
+        itemsize = Constant.int(size_t, itemsize)
+    voidptr_t = Type.pointer(Type.int(8))
+    memcpy = lc.Function.intrinsic(get_module(builder), lc.INTR_MEMCPY,
+                                   [voidptr_t, voidptr_t, size_t])
+    builder.call(memcpy, [builder.bitcast(dst, voidptr_t),
+                          builder.bitcast(src, voidptr_t),
+                          builder.mul(count, itemsize),
+                          Constant.int(Type.int(32), align),
+                          false_bit])
 
 
 def global_constant(builder_or_module, name, value, linkage=lc.LINKAGE_INTERNAL):
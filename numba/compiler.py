@@ -5,14 +5,21 @@ from contextlib import contextmanager
 from collections import namedtuple, defaultdict
 from pprint import pprint
 import sys
+import threading
 import warnings
 
 from numba import (bytecode, interpreter, typing, typeinfer, lowering,
                    objmode, irpasses, utils, config, type_annotations,
-                   types, ir, assume, looplifting, macro, types)
+                   types, ir, assume, looplifting, macro, types, loopnest)
 from numba.targets import cpu
 
 
+# Serializes all compilations in the process: the typing and target
+# contexts, the code generator and the JIT engine are shared, and not
+# thread-safe.  Dispatchers take it before their own compile lock.
+global_compiler_lock = threading.RLock()
+
+
 class Flags(utils.ConfigOptions):
     # These options are all false by default, but the defaults are
     # different with the @jit decorator (see targets.options.TargetOptions).
@@ -32,8 +39,33 @@ class Flags(utils.ConfigOptions):
         'boundcheck',
         'forceinline',
         'no_cpython_wrapper',
+        # Relaxed floating-point semantics (see targets.options.FASTMATH_FLAGS)
+        'fastmath_nnan',
+        'fastmath_ninf',
+        'fastmath_nsz',
+        'fastmath_arcp',
+        'fastmath_reassoc',
+        'fastmath_contract',
+        # Compile with less optimization (config.TIERED_OPT), for the
+        # first tier of tiered compilation
+        'quick_compile',
+        # Also compile a variant assuming that array arguments don't alias
+        'noalias',
+        # Interchange the loop nests over arrays (see also
+        # config.LOOP_INTERCHANGE)
+        'loop_interchange',
+        # Tile the loop nests over arrays (config.LOOP_TILE_SIZE)
+        'loop_tiling',
     ])
 
+    @property
+    def fastmath(self):
+        """
+        The set of enabled fastmath flags.
+        """
+        return frozenset(name[len('fastmath_'):] for name in self._enabled
+                         if name.startswith('fastmath_'))
+
 
 DEFAULT_FLAGS = Flags()
 
@@ -331,6 +363,16 @@ class Pipeline(object):
                             "but function takes %d arguments"
                             % (len(self.args), self.nargs))
 
+    def stage_ir_optimize(self):
+        """
+        Optimize the Numba IR before type inference
+        """
+        irpasses.optimize_ir(self.interp, self.typingctx)
+        if config.DUMP_IR:
+            print(("OPTIMIZED IR DUMP: %s" % self.interp.bytecode.func_qualname)
+                  .center(80, "-"))
+            self.interp.dump()
+
     def frontend_looplift(self):
         """
         Loop lifting analysis and transformation
@@ -343,6 +385,8 @@ class Pipeline(object):
         # Do not recursively loop lift
         outer_flags.unset('enable_looplift')
         loop_flags.unset('enable_looplift')
+        # Lifted loops aren't recompiled by tiered compilation
+        loop_flags.unset('quick_compile')
         if not self.flags.enable_pyobject_looplift:
             loop_flags.unset('enable_pyobject')
 
@@ -400,6 +444,27 @@ class Pipeline(object):
             legalize_return_type(self.return_type, self.interp,
                                  self.targetctx)
 
+    def stage_loopnest_optimize(self):
+        """
+        Interchange and tile the loop nests over arrays, and infer the
+        types of the transformed IR
+        """
+        if self.flags.boundcheck:
+            # Reordering the iterations would change which IndexError
+            # is raised
+            return
+        interchange = (self.flags.loop_interchange
+                       or bool(config.LOOP_INTERCHANGE))
+        tile_size = config.LOOP_TILE_SIZE if self.flags.loop_tiling else 0
+        if loopnest.optimize_loop_nests(self.interp, self.typemap,
+                                        interchange=interchange,
+                                        tile_size=tile_size):
+            if config.DUMP_IR:
+                print(("LOOP NEST IR DUMP: %s"
+                       % self.interp.bytecode.func_qualname).center(80, "-"))
+                self.interp.dump()
+            self.stage_nopython_frontend()
+
     def stage_annotate_type(self):
         """
         Create type annotation after type inference
@@ -450,7 +515,9 @@ class Pipeline(object):
         """
         if self.library is None:
             codegen = self.targetctx.jit_codegen()
-            self.library = codegen.create_library(self.bc.func_qualname)
+            opt = config.TIERED_OPT if self.flags.quick_compile else None
+            self.library = codegen.create_library(self.bc.func_qualname,
+                                                  opt=opt)
         lowered = lowerfn()
         signature = typing.signature(self.return_type, *self.args)
         cr = compile_result(typing_context=self.typingctx,
@@ -522,7 +589,10 @@ class Pipeline(object):
         if not self.flags.force_pyobject:
             pm.create_pipeline("nopython")
             pm.add_stage(self.stage_analyze_bytecode, "analyzing bytecode")
+            pm.add_stage(self.stage_ir_optimize, "IR optimization")
             pm.add_stage(self.stage_nopython_frontend, "nopython frontend")
+            pm.add_stage(self.stage_loopnest_optimize,
+                         "loop nest optimization")
             pm.add_stage(self.stage_annotate_type, "annotate type")
             pm.add_stage(self.stage_nopython_backend, "nopython mode backend")
 
@@ -549,26 +619,30 @@ def compile_extra(typingctx, targetctx, func, args, return_type, flags,
     - return_type
         Use ``None`` to indicate
     """
-    pipeline = Pipeline(typingctx, targetctx, library,
-                        args, return_type, flags, locals)
-    return pipeline.compile_extra(func)
+    with global_compiler_lock:
+        pipeline = Pipeline(typingctx, targetctx, library,
+                            args, return_type, flags, locals)
+        return pipeline.compile_extra(func)
 
 
 def compile_bytecode(typingctx, targetctx, bc, args, return_type, flags,
                      locals, lifted=(),
                      func_attr=DEFAULT_FUNCTION_ATTRIBUTES, library=None):
 
-    pipeline = Pipeline(typingctx, targetctx, library,
-                        args, return_type, flags, locals)
-    return pipeline.compile_bytecode(bc=bc, lifted=lifted, func_attr=func_attr)
+    with global_compiler_lock:
+        pipeline = Pipeline(typingctx, targetctx, library,
+                            args, return_type, flags, locals)
+        return pipeline.compile_bytecode(bc=bc, lifted=lifted,
+                                         func_attr=func_attr)
 
 
 def compile_internal(typingctx, targetctx, library,
                      func, args, return_type, flags, locals):
     # For now this is the same thing as compile_extra().
-    pipeline = Pipeline(typingctx, targetctx, library,
-                        args, return_type, flags, locals)
-    return pipeline.compile_extra(func)
+    with global_compiler_lock:
+        pipeline = Pipeline(typingctx, targetctx, library,
+                            args, return_type, flags, locals)
+        return pipeline.compile_extra(func)
 
 
 def _is_nopython_types(t):
@@ -590,12 +664,14 @@ def legalize_given_types(args, return_type):
 
 def legalize_return_type(return_type, interp, targetctx):
     """
-    Only accept array return type iff it is passed into the function.
+    Only accept array return type iff it is passed into the function,
+    unless the target manages array memory (in which case any array
+    can be returned).
     Reject function object return types if in nopython mode.
     """
-    assert assume.return_argument_array_only
-
-    if isinstance(return_type, types.Array):
+    if (isinstance(return_type, types.Array) and
+            not targetctx.enable_array_refcount):
+        assert assume.return_argument_array_only
         # Walk IR to discover all return statements
         retstmts = []
         caststmts = {}
@@ -687,7 +763,8 @@ def native_lowering_stage(targetctx, library, interp, typemap, restype,
         interp, typemap, restype, calltypes, mangler=targetctx.mangler,
         inline=flags.forceinline)
 
-    lower = lowering.Lower(targetctx, library, fndesc, interp)
+    lower = lowering.Lower(targetctx, library, fndesc, interp,
+                           fastmath=flags.fastmath, noalias=flags.noalias)
     lower.lower()
     if not flags.no_cpython_wrapper:
         lower.create_cpython_wrapper(flags.release_gil)
@@ -92,6 +92,32 @@ DISABLE_CUDA = _readenv("NUMBA_DISABLE_CUDA", int, 0)
 # yet-to-be-supported features.
 COMPATIBILITY_MODE = _readenv("NUMBA_COMPATIBILITY_MODE", int, 0)
 
+# Use the Ziggurat method for normal and exponential draws in the
+# numpy.random functions, instead of reproducing Numpy's streams
+RANDOM_ZIGGURAT = _readenv("NUMBA_RANDOM_ZIGGURAT", int, 0)
+
+# Compile transcendental math functions inline as branch-free code,
+# so that loops calling them can be vectorized
+VECTOR_MATH = _readenv("NUMBA_VECTOR_MATH", int, 0)
+
+# Tiered compilation: new specializations of @jit functions are first
+# compiled at TIERED_OPT, then recompiled at OPT in the background once
+# they have been called TIERED_THRESHOLD times
+TIERED_COMPILATION = _readenv("NUMBA_TIERED_COMPILATION", int, 0)
+TIERED_OPT = _readenv("NUMBA_TIERED_OPT", int, 1)
+TIERED_THRESHOLD = _readenv("NUMBA_TIERED_THRESHOLD", int, 1000)
+
+# Lower the variables of non-refcounted types to LLVM registers (with phi
+# nodes where their values merge) rather than stack slots
+REGISTER_VARIABLES = _readenv("NUMBA_REGISTER_VARIABLES", int, 1)
+
+# Interchange nested loops over arrays to access them along their
+# contiguous dimension in all functions (not only those compiled with
+# interchange=True), and the tile size of the loop nests of functions
+# compiled with tile=True
+LOOP_INTERCHANGE = _readenv("NUMBA_LOOP_INTERCHANGE", int, 0)
+LOOP_TILE_SIZE = _readenv("NUMBA_LOOP_TILE_SIZE", int, 32)
+
 # Force CUDA compute capability
 def _force_cc(text):
     if not text:
@@ -49,10 +49,10 @@ class JITCUDACodegen(BaseCPUCodegen):
             ir_module.data_layout = self._data_layout
         return ir_module
 
-    def _module_pass_manager(self):
+    def _module_pass_manager(self, opt=None):
         raise NotImplementedError
 
-    def _function_pass_manager(self, llvm_module):
+    def _function_pass_manager(self, llvm_module, opt=None):
         raise NotImplementedError
 
     def _add_module(self, module):
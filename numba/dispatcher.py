@@ -3,13 +3,57 @@ from __future__ import print_function, division, absolute_import
 import functools
 import inspect
 import sys
+import threading
+import warnings
 
-from numba import _dispatcher, compiler, utils
+from numba import _dispatcher, compiler, config, utils
 from numba.typeconv.rules import default_type_manager
 from numba import sigutils, serialize, types, typing
 from numba.typing.templates import resolve_overload
 from numba.bytecode import get_code_object
 from numba.six import create_bound_method, next
+from numba.six.moves import queue
+
+
+class _BackgroundCompiler(object):
+    """
+    A daemon thread running compilation jobs submitted by the dispatchers
+    (see tiered compilation in Overloaded).
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="numba-background-compiler")
+                self._thread.daemon = True
+                self._thread.start()
+        self._queue.put((func, args))
+
+    def join(self):
+        """
+        Wait for all submitted jobs to be done.
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            func, args = self._queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                warnings.warn("background compilation failed: %s" % (e,),
+                              config.NumbaWarning)
+            finally:
+                self._queue.task_done()
+
+
+background_compiler = _BackgroundCompiler()
 
 
 class _OverloadedBase(_dispatcher.Dispatcher):
@@ -29,6 +73,9 @@ class _OverloadedBase(_dispatcher.Dispatcher):
         self._compileinfos = {}
         # A list of nopython signatures
         self._npsigs = []
+        # A list of compile results replaced by recompiled versions, kept
+        # alive since their code may still be running or called
+        self._retired = []
 
         self.py_func = py_func
         # other parts of Numba assume the old Python 2 name for code object
@@ -51,6 +98,7 @@ class _OverloadedBase(_dispatcher.Dispatcher):
         self.overloads.clear()
         self._compileinfos.clear()
         self._npsigs[:] = []
+        self._retired[:] = []
 
     def _make_finalizer(self):
         """
@@ -58,6 +106,7 @@ class _OverloadedBase(_dispatcher.Dispatcher):
         related compiled functions.
         """
         overloads = self.overloads
+        retired = self._retired
         targetctx = self.targetctx
 
         # Early-bind utils.shutting_down() into the function's local namespace
@@ -69,7 +118,9 @@ class _OverloadedBase(_dispatcher.Dispatcher):
                 return
             # This function must *not* hold any reference to self:
             # we take care to bind the necessary objects in the closure.
-            for func in overloads.values():
+            funcs = list(overloads.values())
+            funcs += [cres.entry_point for cres in retired]
+            for func in funcs:
                 try:
                     targetctx.remove_user_function(func)
                     targetctx.remove_native_function(func)
@@ -108,6 +159,19 @@ class _OverloadedBase(_dispatcher.Dispatcher):
         if not cres.objectmode and not cres.interpmode:
             self._npsigs.append(cres.signature)
 
+    def replace_overload(self, cres):
+        """
+        Replace the existing overload for the signature of *cres* (for
+        example with a more optimized version), without interrupting
+        its callers.
+        """
+        args = tuple(cres.signature.args)
+        old = self._compileinfos[args]
+        self._replace(old.entry_point, cres.entry_point)
+        self._retired.append(old)
+        self.overloads[args] = cres.entry_point
+        self._compileinfos[args] = cres
+
     def get_call_template(self, args, kws):
         """
         Get a typing.ConcreteTemplate for this dispatcher and the given *args*
@@ -202,7 +266,7 @@ class _OverloadedBase(_dispatcher.Dispatcher):
 
         tp = self.typingctx.resolve_data_type(val)
         if tp is None:
-            tp = types.pyobject
+            tp = getattr(val, "_numba_type_", types.pyobject)
         return tp
 
 
@@ -274,7 +338,7 @@ class Overloaded(_OverloadedBase):
         return self
 
     def compile(self, sig):
-        with self._compile_lock:
+        with compiler.global_compiler_lock, self._compile_lock:
             args, return_type = sigutils.normalize_signature(sig)
             # Don't recompile if signature already exists
             # (e.g. if another thread compiled it before we got the lock)
@@ -284,6 +348,10 @@ class Overloaded(_OverloadedBase):
 
             flags = compiler.Flags()
             self.targetdescr.options.parse_as_flags(flags, self.targetoptions)
+            tiered = self.targetoptions.get('tiered',
+                                            config.TIERED_COMPILATION)
+            if tiered:
+                flags.set('quick_compile')
 
             cres = compiler.compile_extra(self.typingctx, self.targetctx,
                                           self.py_func,
@@ -295,8 +363,46 @@ class Overloaded(_OverloadedBase):
                 raise cres.typing_error
 
             self.add_overload(cres)
+            if tiered and not cres.objectmode and not cres.interpmode:
+                # Have _on_hot_overload() called once it's worth optimizing
+                self._set_countdown(cres.entry_point,
+                                    max(config.TIERED_THRESHOLD, 1))
             return cres.entry_point
 
+    def _on_hot_overload(self, entry_point):
+        """
+        Called by the C dispatcher when a quickly compiled overload has
+        been called config.TIERED_THRESHOLD times.
+        """
+        for cres in self._compileinfos.values():
+            if cres.entry_point is entry_point:
+                background_compiler.submit(self._optimize_overload, cres)
+                break
+
+    def _optimize_overload(self, cres):
+        """
+        Recompile the overload of *cres* with full optimization, and
+        swap it in.
+        """
+        flags = compiler.Flags()
+        self.targetdescr.options.parse_as_flags(flags, self.targetoptions)
+        sig = cres.signature
+        # Serialized with all other compilations in the process; the
+        # dispatcher's own lock is only taken to swap the overload (after
+        # the global lock, like in compile()).
+        with compiler.global_compiler_lock:
+            newcres = compiler.compile_extra(self.typingctx, self.targetctx,
+                                             self.py_func, args=sig.args,
+                                             return_type=sig.return_type,
+                                             flags=flags, locals=self.locals)
+            with self._compile_lock:
+                # The overload may have been discarded by recompile()
+                if self._compileinfos.get(tuple(sig.args)) is cres:
+                    self.replace_overload(newcres)
+                    return
+            self.targetctx.remove_user_function(newcres.entry_point)
+            self.targetctx.remove_native_function(newcres.entry_point)
+
     def recompile(self):
         """
         Recompile all signatures afresh.
@@ -339,7 +445,7 @@ class LiftedLoop(_OverloadedBase):
         return next(iter(self.bytecode)).lineno
 
     def compile(self, sig):
-        with self._compile_lock:
+        with compiler.global_compiler_lock, self._compile_lock:
             # FIXME this is mostly duplicated from Overloaded
             flags = self.flags
             args, return_type = sigutils.normalize_signature(sig)
@@ -118,6 +118,26 @@ class Interpreter(object):
         # Clean up
         self._insert_var_dels()
 
+    def remove_var_dels(self):
+        """
+        Remove all ir.Del statements, e.g. before transforming the IR.
+        """
+        for ir_block in self.blocks.values():
+            ir_block.body = [stmt for stmt in ir_block.body
+                             if not isinstance(stmt, ir.Del)]
+
+    def insert_var_dels(self):
+        """
+        Recompute the variable definitions and insert the ir.Del
+        statements, after the IR was transformed.
+        """
+        self.definitions = collections.defaultdict(list)
+        for ir_block in self.blocks.values():
+            for stmt in ir_block.body:
+                if isinstance(stmt, ir.Assign):
+                    self.definitions[stmt.target.name].append(stmt.value)
+        self._insert_var_dels()
+
     def _insert_var_dels(self):
         """
         Insert ir.Del statements where necessary for the various
@@ -15,3 +15,54 @@ def array_ravel(arr):
     A flattened 1D array
     """
     raise NotImplementedError
+
+
+# LAPACK wrappers used by the np.linalg implementation.  All array
+# arguments must be C-contiguous; a 2D array of shape (n, m) is seen
+# by LAPACK as its (m, n) Fortran-ordered transpose.
+
+def lapack_getrf(a, ipiv):
+    """LU factorization of *a* in-place, with pivot indices stored
+    in int32 array *ipiv*.
+
+    Returns
+    -------
+    The LAPACK info code.
+    """
+    raise NotImplementedError
+
+
+def lapack_getrs(a, ipiv, b, trans):
+    """Solve a linear system using the LU factorization *a*, *ipiv*
+    computed by lapack_getrf().  The right-hand sides in *b* are
+    overwritten with the solutions.  If *trans* is true, the transposed
+    system is solved.
+
+    Returns
+    -------
+    The LAPACK info code.
+    """
+    raise NotImplementedError
+
+
+def lapack_potrf(a):
+    """Cholesky factorization of symmetric *a* in-place.  Only the
+    lower triangle of the C-ordered array is written.
+
+    Returns
+    -------
+    The LAPACK info code.
+    """
+    raise NotImplementedError
+
+
+def lapack_gelsd(a, b, s, rcond, rank):
+    """Least-squares solution of the system described by *a* and *b*,
+    using the SVD.  The solutions overwrite *b*, the singular values
+    are stored in *s* and the effective rank in int32 array *rank*.
+
+    Returns
+    -------
+    The LAPACK info code.
+    """
+    raise NotImplementedError
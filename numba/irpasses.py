@@ -2,6 +2,10 @@
 Contains optimization passes for the IR.
 """
 from __future__ import print_function, division, absolute_import
+
+import operator
+from types import ModuleType
+
 from numba import ir, utils
 
 
@@ -51,3 +55,357 @@ class RemoveRedundantAssign(object):
                     # Only apply to use once temp variable
                     del tempassign[inst.value.name]
 
+
+
+# Python types of the constants which can be folded
+_CONSTANT_TYPES = (bool, float, complex) + utils.INT_TYPES
+
+_BINOP_FUNCS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': operator.floordiv,
+    '%': operator.mod,
+    '**': operator.pow,
+    '<<': operator.lshift,
+    '>>': operator.rshift,
+    '&': operator.and_,
+    '|': operator.or_,
+    '^': operator.xor,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+_UNARY_FUNCS = {
+    '-': operator.neg,
+    '+': operator.pos,
+    '~': operator.invert,
+    'not': operator.not_,
+}
+
+# Expressions which have no side effect and can't raise at runtime
+# (attribute lookups are only known not to fail on modules, see
+# DeadCodeElimination.is_dead())
+_PURE_EXPRS = frozenset(['build_tuple', 'pair_first', 'pair_second'])
+
+
+def _replace_vars(val, mapping):
+    """
+    Return *val* with the variables in *mapping* (a dict of names to
+    ir.Var) replaced.  Expressions are updated in place.
+    """
+    if isinstance(val, ir.Var):
+        return mapping.get(val.name, val)
+    elif isinstance(val, ir.Expr):
+        for k, v in val._kws.items():
+            v = _replace_vars(v, mapping)
+            val._kws[k] = v
+            setattr(val, k, v)
+        return val
+    elif isinstance(val, list):
+        return [_replace_vars(v, mapping) for v in val]
+    elif isinstance(val, tuple):
+        return tuple(_replace_vars(v, mapping) for v in val)
+    else:
+        return val
+
+
+def replace_var_uses(stmt, mapping):
+    """
+    Replace the variables in *mapping* read by statement *stmt*.
+    """
+    if isinstance(stmt, ir.Assign):
+        stmt.value = _replace_vars(stmt.value, mapping)
+    else:
+        for k, v in list(vars(stmt).items()):
+            if k != 'loc':
+                setattr(stmt, k, _replace_vars(v, mapping))
+
+
+def list_var_uses(stmt):
+    """
+    List the variables read by statement *stmt*.
+    """
+    if isinstance(stmt, ir.Assign):
+        if isinstance(stmt.value, ir.Var):
+            return [stmt.value]
+        elif isinstance(stmt.value, ir.Inst):
+            return stmt.value.list_vars()
+        else:
+            return []
+    return stmt.list_vars()
+
+
+class _IRPass(object):
+    """
+    Base class for the optimization passes over the IR of a function
+    without ir.Del statements (see optimize_ir()).
+    """
+
+    def __init__(self, interp):
+        self.interp = interp
+        self.blocks = interp.blocks
+        self.definitions = {}
+        for blk in utils.itervalues(self.blocks):
+            for stmt in blk.body:
+                if isinstance(stmt, ir.Assign):
+                    self.definitions.setdefault(stmt.target.name,
+                                                []).append(stmt.value)
+
+    def is_single_def_temp(self, var):
+        """
+        Whether *var* is a temporary variable assigned exactly once.
+        """
+        return var.is_temp and len(self.definitions.get(var.name, ())) == 1
+
+    def is_never_redefined(self, var):
+        """
+        Whether *var* holds the same value in all its uses (it is assigned
+        at most once, or is an argument).
+        """
+        return len(self.definitions.get(var.name, ())) <= 1
+
+    def get_definition(self, var):
+        """
+        Return the value assigned to *var*, following copies, or None if
+        it isn't assigned exactly once.
+        """
+        while isinstance(var, ir.Var):
+            defs = self.definitions.get(var.name, ())
+            if len(defs) != 1:
+                return None
+            var = defs[0]
+        return var
+
+    def get_constant(self, var):
+        """
+        Return the value of *var* if it is a foldable constant, otherwise
+        raise KeyError.
+        """
+        defn = self.get_definition(var)
+        if isinstance(defn, (ir.Const, ir.Global, ir.FreeVar)):
+            if type(defn.value) in _CONSTANT_TYPES:
+                return defn.value
+        raise KeyError(var.name)
+
+    def get_module(self, var):
+        """
+        Return the module referred to by *var*, or None.
+        """
+        defn = self.get_definition(var)
+        if (isinstance(defn, (ir.Global, ir.FreeVar))
+            and isinstance(defn.value, ModuleType)):
+            return defn.value
+
+
+class ConstantFolding(_IRPass):
+    """
+    Evaluate arithmetic on literals and global constants, and load numeric
+    constants from modules (e.g. math.pi).  An expression is only folded
+    if the constant has the type inferred for the expression, so that
+    typing is unaffected.
+    """
+
+    def __init__(self, interp, typingctx):
+        super(ConstantFolding, self).__init__(interp)
+        self.typingctx = typingctx
+
+    def run(self):
+        changed = False
+        for blk in utils.itervalues(self.blocks):
+            for stmt in blk.body:
+                if (isinstance(stmt, ir.Assign)
+                    and isinstance(stmt.value, ir.Expr)
+                    and self.is_single_def_temp(stmt.target)):
+                    const = self.fold(stmt.value)
+                    if const is not None:
+                        stmt.value = const
+                        self.definitions[stmt.target.name] = [const]
+                        changed = True
+        return changed
+
+    def fold(self, expr):
+        try:
+            if expr.op in ('binop', 'inplace_binop'):
+                func = _BINOP_FUNCS[expr.fn]
+                args = [self.get_constant(expr.lhs),
+                        self.get_constant(expr.rhs)]
+                if (expr.fn == '**'
+                    and all(isinstance(a, utils.INT_TYPES) for a in args)):
+                    # Integer powers are computed in floating-point
+                    return
+            elif expr.op == 'unary':
+                func = _UNARY_FUNCS[expr.fn]
+                args = [self.get_constant(expr.value)]
+            elif expr.op == 'getattr':
+                module = self.get_module(expr.value)
+                if module is None:
+                    return
+                value = getattr(module, expr.attr)
+                if type(value) in _CONSTANT_TYPES:
+                    return ir.Const(value, loc=expr.loc)
+                return
+            else:
+                return
+        except (KeyError, AttributeError):
+            return
+
+        try:
+            value = func(*args)
+        except ArithmeticError:
+            # Leave the error to runtime
+            return
+        ctx = self.typingctx
+        argtys = [ctx.resolve_value_type(a) for a in args]
+        try:
+            sig = ctx.resolve_function_type(expr.fn, argtys, ())
+            constty = ctx.resolve_value_type(value)
+        except Exception:
+            return
+        if sig is not None and sig.return_type == constty:
+            return ir.Const(value, loc=expr.loc)
+
+
+class CopyPropagation(_IRPass):
+    """
+    Replace the uses of temporaries which are copies of another variable
+    with that variable, and remove the copies.
+    """
+
+    def run(self):
+        copies = {}
+        for blk in utils.itervalues(self.blocks):
+            for stmt in blk.body:
+                if (isinstance(stmt, ir.Assign)
+                    and isinstance(stmt.value, ir.Var)
+                    and self.is_single_def_temp(stmt.target)
+                    and self.is_never_redefined(stmt.value)):
+                    copies[stmt.target.name] = stmt.value
+        if not copies:
+            return False
+
+        # Resolve chains of copies
+        for name in copies:
+            source = copies[name]
+            seen = set([name])
+            while source.name in copies and source.name not in seen:
+                seen.add(source.name)
+                source = copies[source.name]
+            if source.name in seen:
+                # A cycle of copies (only possible in dead code)
+                return False
+            copies[name] = source
+
+        for blk in utils.itervalues(self.blocks):
+            blk.body = [stmt for stmt in blk.body
+                        if not (isinstance(stmt, ir.Assign)
+                                and stmt.target.name in copies)]
+            for stmt in blk.body:
+                replace_var_uses(stmt, copies)
+        return True
+
+
+class CommonSubexpressionElimination(_IRPass):
+    """
+    Reuse, in each block, the results of identical loads of constants,
+    globals and module attributes.
+
+    Other expressions (such as arithmetic) may produce mutable objects
+    (e.g. arrays), so they can't be merged before type inference.
+    """
+
+    def run(self):
+        changed = False
+        for blk in utils.itervalues(self.blocks):
+            available = {}
+            for stmt in blk.body:
+                if not (isinstance(stmt, ir.Assign)
+                        and self.is_single_def_temp(stmt.target)):
+                    continue
+                key = self.get_key(stmt.value)
+                if key is None:
+                    continue
+                if key in available:
+                    stmt.value = available[key]
+                    changed = True
+                else:
+                    available[key] = stmt.target
+        return changed
+
+    def get_key(self, value):
+        if isinstance(value, ir.Const):
+            try:
+                hash(value.value)
+            except TypeError:
+                return
+            # Distinguish e.g. 0, 0.0, False and -0.0
+            return ('const', type(value.value), repr(value.value))
+        elif isinstance(value, ir.Global):
+            return ('global', value.name, id(value.value))
+        elif isinstance(value, ir.FreeVar):
+            return ('freevar', value.index, id(value.value))
+        elif (isinstance(value, ir.Expr) and value.op == 'getattr'
+              and self.get_module(value.value) is not None):
+            return ('getattr', value.value.name, value.attr)
+
+
+class DeadCodeElimination(_IRPass):
+    """
+    Remove the assignments to unused temporaries of values without side
+    effects.
+    """
+
+    def run(self):
+        changed = False
+        while True:
+            used = set()
+            for blk in utils.itervalues(self.blocks):
+                for stmt in blk.body:
+                    used.update(var.name for var in list_var_uses(stmt))
+            removed = False
+            for blk in utils.itervalues(self.blocks):
+                body = [stmt for stmt in blk.body
+                        if not self.is_dead(stmt, used)]
+                if len(body) != len(blk.body):
+                    blk.body = body
+                    removed = True
+            if not removed:
+                return changed
+            changed = True
+
+    def is_dead(self, stmt, used):
+        if not (isinstance(stmt, ir.Assign) and stmt.target.is_temp
+                and stmt.target.name not in used):
+            return False
+        value = stmt.value
+        if isinstance(value, ir.Expr):
+            if value.op == 'getattr':
+                # Other attribute lookups may fail typing, which must
+                # still reject the function.
+                module = self.get_module(value.value)
+                return module is not None and hasattr(module, value.attr)
+            return value.op in _PURE_EXPRS
+        return isinstance(value, (ir.Var, ir.Const, ir.Global, ir.FreeVar))
+
+
+def optimize_ir(interp, typingctx):
+    """
+    Run the optimization passes over the IR of *interp*, before type
+    inference.  The ir.Del statements and the variable definitions
+    are recomputed afterwards.
+    """
+    interp.remove_var_dels()
+    changed = True
+    while changed:
+        changed = False
+        for pass_ in (ConstantFolding(interp, typingctx),
+                      CommonSubexpressionElimination(interp),
+                      CopyPropagation(interp),
+                      DeadCodeElimination(interp)):
+            changed |= pass_.run()
+    interp.insert_var_dels()
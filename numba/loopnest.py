@@ -0,0 +1,911 @@
+"""
+Loop nest optimization over the typed Numba IR.
+
+Perfectly nested pairs of ``range`` loops over arrays are interchanged
+so that the inner loop walks the arrays along their contiguous dimension
+(the last index of C-contiguous arrays, the first one of Fortran-ordered
+arrays), and optionally tiled, so that the arrays are accessed in square
+blocks of a few cache lines.
+
+A loop nest is only transformed if the new iteration order can't be
+observed: the iterations may only communicate through array elements
+whose indices are affine in the loop indices (e.g. ``a[i, j + 1]``), and
+the dependences between these accesses must be preserved.  If several
+arrays are accessed, the transformed nest is only run after checking
+at runtime that they don't share memory; otherwise the original nest
+runs.
+"""
+from __future__ import print_function, division, absolute_import
+
+from collections import defaultdict
+import copy
+import math
+import cmath
+from types import ModuleType
+
+import numpy
+
+from numba import controlflow, ir, irpasses, rangeanalysis, types, utils
+
+
+def arrays_may_overlap(*arrays):
+    """
+    Whether any two of the given arrays may share memory.  Transformed
+    loop nests call this to select the original nest when their arrays
+    may alias.
+    """
+    for i, a in enumerate(arrays):
+        for b in arrays[i + 1:]:
+            if numpy.may_share_memory(a, b):
+                return True
+    return False
+
+
+# Binary operators which can raise (e.g. ZeroDivisionError)
+_RAISING_OPS = frozenset(['/', '/?', '//', '%', '**'])
+
+# Builtins which are pure functions of their arguments
+_PURE_BUILTINS = (abs, min, max, int, float, complex, bool)
+_PURE_MODULES = (math, cmath)
+
+
+def compute_cfg(blocks):
+    """
+    Compute the control flow graph (a controlflow.CFGraph) of the IR
+    *blocks*.
+    """
+    cfg = controlflow.CFGraph()
+    for offset in blocks:
+        cfg.add_node(offset)
+    for offset, block in blocks.items():
+        term = block.terminator
+        if isinstance(term, ir.Jump):
+            cfg.add_edge(offset, term.target)
+        elif isinstance(term, ir.Branch):
+            cfg.add_edge(offset, term.truebr)
+            cfg.add_edge(offset, term.falsebr)
+    cfg.set_entry_point(min(blocks))
+    cfg.process()
+    return cfg
+
+
+def _clone_value(value):
+    if isinstance(value, ir.Expr):
+        kws = dict((k, list(v) if isinstance(v, list) else v)
+                   for k, v in value._kws.items())
+        return ir.Expr(value.op, value.loc, **kws)
+    return value
+
+
+def _clone_stmt(stmt, remap):
+    """
+    Copy statement *stmt*, retargeting its jumps according to the
+    *remap* dict of block offsets.
+    """
+    if isinstance(stmt, ir.Assign):
+        return ir.Assign(_clone_value(stmt.value), stmt.target, stmt.loc)
+    elif isinstance(stmt, ir.Jump):
+        return ir.Jump(remap.get(stmt.target, stmt.target), stmt.loc)
+    elif isinstance(stmt, ir.Branch):
+        return ir.Branch(stmt.cond, remap.get(stmt.truebr, stmt.truebr),
+                         remap.get(stmt.falsebr, stmt.falsebr), stmt.loc)
+    else:
+        return copy.copy(stmt)
+
+
+def _stmts(block):
+    return [stmt for stmt in block.body if not isinstance(stmt, ir.Del)]
+
+
+def _is_expr(value, op):
+    return isinstance(value, ir.Expr) and value.op == op
+
+
+def _is_scalar_type(ty):
+    if isinstance(ty, (types.UniTuple, types.Tuple)):
+        return all(isinstance(t, types.Integer) for t in ty.types)
+    return (isinstance(ty, (types.Integer, types.Float, types.Complex))
+            or ty == types.boolean)
+
+
+class LoopNest(object):
+    """
+    A perfectly nested pair of range loops:
+
+        for i in range(...):
+            for j in range(...):
+                body
+
+    where the inner loop's range doesn't depend on the outer loop.
+    """
+
+    def __init__(self, outer, inner):
+        # The CFGraph loops
+        self.outer = outer
+        self.inner = inner
+        # The block jumping to the outer loop's header
+        self.preheader = None
+        # The blocks of the nest and of the inner loop's body
+        self.blocks = outer.body
+        self.body = inner.body - set([inner.header])
+        # The exit of the outer loop
+        self.exit = None
+        # The statements assigning the loop indices, and the range()
+        # calls of the loops
+        self.outer_index = None
+        self.inner_index = None
+        self.outer_range = None
+        self.inner_range = None
+        # The range builtin (range or xrange)
+        self.range_func = None
+        # The iterator variable of the outer loop
+        self.outer_iter = None
+        # The (offset, stmt) pairs computing the inner loop's range,
+        # to be hoisted out of the nest
+        self.setup = []
+        # The arrays accessed by the body
+        self.arrays = []
+        # The transformations to apply
+        self.interchange = False
+        self.tile = False
+
+    @property
+    def indices(self):
+        return self.outer_index.target.name, self.inner_index.target.name
+
+
+class LoopNestOptimizer(object):
+    """
+    Interchange and tile the loop nests of the typed IR of *interp*
+    (see the module docstring).  *tile_size* is the number of iterations
+    of each loop in a tile; 0 disables tiling.
+    """
+
+    def __init__(self, interp, typemap, interchange=True, tile_size=0):
+        self.interp = interp
+        self.blocks = interp.blocks
+        self.typemap = typemap
+        self.interchange = interchange
+        self.tile_size = tile_size
+        self.cfg = compute_cfg(self.blocks)
+        self.doms = self.cfg.dominators()
+        # { variable name -> [(block offset, statement)] }
+        self.defs = defaultdict(list)
+        self.uses = defaultdict(list)
+        for offset, block in self.blocks.items():
+            for stmt in _stmts(block):
+                if isinstance(stmt, ir.Assign):
+                    self.defs[stmt.target.name].append((offset, stmt))
+                for var in irpasses.list_var_uses(stmt):
+                    self.uses[var.name].append((offset, stmt))
+        self.nonneg = rangeanalysis.find_nonnegative_variables(self.blocks,
+                                                               typemap)
+        self.scope = self.blocks[min(self.blocks)].scope
+        self.next_offset = max(self.blocks) + 1
+
+    def run(self):
+        """
+        Transform the loop nests, and return whether the IR was changed.
+        """
+        nests = self.find_nests()
+        if not nests:
+            return False
+        self.interp.remove_var_dels()
+        for nest in nests:
+            self.transform(nest)
+        # The ir.Del statements are inserted according to the new
+        # control flow.
+        self.interp.cfa.graph = compute_cfg(self.blocks)
+        self.interp.insert_var_dels()
+        return True
+
+    def find_nests(self):
+        """
+        Return the LoopNest objects to transform.
+        """
+        loops = self.cfg.loops()
+        nests = []
+        for header in sorted(loops):
+            nest = self.match_nest(loops[header])
+            if nest is not None and (nest.interchange or nest.tile):
+                nests.append(nest)
+        return nests
+
+    # --- Analysis ---
+
+    def preds(self, offset):
+        return set(pred for pred, _ in self.cfg.predecessors(offset))
+
+    def single_def(self, var):
+        defs = self.defs[var.name]
+        if len(defs) == 1:
+            return defs[0][1].value
+
+    def get_global(self, var):
+        """
+        Return the Python object held by *var* if it is a global (or a
+        global module's attribute), else None.
+        """
+        value = self.single_def(var)
+        if isinstance(value, ir.Var):
+            return self.get_global(value)
+        elif isinstance(value, (ir.Global, ir.FreeVar)):
+            return value.value
+        elif _is_expr(value, 'getattr'):
+            module = self.get_global(value.value)
+            if isinstance(module, ModuleType):
+                return getattr(module, value.attr, None)
+
+    def get_constant(self, var):
+        value = self.single_def(var)
+        if isinstance(value, ir.Var):
+            return self.get_constant(value)
+        elif isinstance(value, ir.Const):
+            return value.value
+
+    def is_pure_function(self, var):
+        func = self.get_global(var)
+        return (any(func is f for f in _PURE_BUILTINS)
+                or any(func is getattr(mod, getattr(func, '__name__', ''),
+                                       None)
+                       for mod in _PURE_MODULES)
+                or isinstance(func, numpy.ufunc))
+
+    def match_header(self, offset):
+        """
+        Match the header of a loop over an iterator.  Return the
+        iterator variable, the variable of the next value, and the
+        targets of the loop's branch.
+        """
+        stmts = _stmts(self.blocks[offset])
+        if len(stmts) != 4:
+            return None
+        pair, first, second, branch = stmts
+        if not (isinstance(pair, ir.Assign) and _is_expr(pair.value, 'iternext')
+                and isinstance(first, ir.Assign)
+                and _is_expr(first.value, 'pair_first')
+                and first.value.value.name == pair.target.name
+                and isinstance(second, ir.Assign)
+                and _is_expr(second.value, 'pair_second')
+                and second.value.value.name == pair.target.name
+                and isinstance(branch, ir.Branch)
+                and branch.cond.name == second.target.name):
+            return None
+        return pair.value.value, first.target, branch.truebr, branch.falsebr
+
+    def match_range(self, iter_var):
+        """
+        Return the statement calling range() whose iterator is
+        *iter_var*, and the statement creating the iterator.
+        """
+        defs = self.defs[iter_var.name]
+        if len(defs) != 1 or not _is_expr(defs[0][1].value, 'getiter'):
+            return None
+        getiter = defs[0]
+        defs = self.defs[getiter[1].value.value.name]
+        if len(defs) != 1:
+            return None
+        call = defs[0][1].value
+        if not (_is_expr(call, 'call') and not call.kws
+                and any(self.get_global(call.func) is f
+                        for f in utils.RANGE_ITER_OBJECTS)):
+            return None
+        return defs[0], getiter
+
+    def match_index(self, offset, ind_var):
+        """
+        Return the statement of block *offset* assigning the loop index
+        *ind_var* to a user variable.
+        """
+        stmts = _stmts(self.blocks[offset])
+        stmt = stmts[0]
+        if not (isinstance(stmt, ir.Assign) and not stmt.target.is_temp
+                and isinstance(stmt.value, ir.Var)
+                and stmt.value.name == ind_var.name
+                and len(self.defs[stmt.target.name]) == 1
+                and len(self.uses[ind_var.name]) == 1):
+            return None
+        return stmt
+
+    def follow_chain(self, start, target):
+        """
+        Return the list of blocks jumping unconditionally from *start*
+        to *target*, each having a single predecessor.
+        """
+        chain = []
+        offset = start
+        while offset != target:
+            block = self.blocks[offset]
+            if (offset in chain or not isinstance(block.terminator, ir.Jump)
+                or len(self.preds(offset)) != 1):
+                return None
+            chain.append(offset)
+            offset = block.terminator.target
+        return chain
+
+    def match_nest(self, outer):
+        loops = self.cfg.loops()
+        headers = [h for h in outer.body if h in loops and h != outer.header]
+        if len(headers) != 1:
+            return None
+        inner = loops[headers[0]]
+        if not (len(outer.entries) == len(outer.exits) == 1
+                and len(inner.entries) == len(inner.exits) == 1):
+            return None
+        nest = LoopNest(outer, inner)
+
+        outer_hdr = self.match_header(outer.header)
+        inner_hdr = self.match_header(inner.header)
+        if outer_hdr is None or inner_hdr is None:
+            return None
+        outer_iter, outer_ind, outer_first, outer_exit = outer_hdr
+        inner_iter, inner_ind, inner_first, inner_exit = inner_hdr
+        if (outer.exits != set([outer_exit])
+            or inner.exits != set([inner_exit])):
+            return None
+        [nest.preheader] = outer.entries
+        terminator = self.blocks[nest.preheader].terminator
+        if not isinstance(terminator, ir.Jump):
+            return None
+        nest.exit = outer_exit
+        nest.outer_iter = outer_iter
+
+        # The blocks between the loop headers must be straight-line code
+        pre_chain = self.follow_chain(outer_first, inner.header)
+        post_chain = self.follow_chain(inner_exit, outer.header)
+        if pre_chain is None or post_chain is None or not pre_chain:
+            return None
+        if (set([outer.header]) | set(pre_chain) | inner.body
+            | set(post_chain)) != outer.body:
+            return None
+        if any(len(_stmts(self.blocks[offset])) != 1
+               for offset in post_chain):
+            return None
+
+        ranges = self.match_range(outer_iter), self.match_range(inner_iter)
+        if None in ranges:
+            return None
+        (_, nest.outer_range), _ = ranges[0]
+        (inner_range_def, inner_getiter_def) = ranges[1]
+        nest.inner_range = inner_range_def[1]
+        if not (inner_range_def[0] in pre_chain
+                and inner_getiter_def[0] in pre_chain):
+            return None
+        nest.range_func = self.get_global(nest.outer_range.value.func)
+
+        nest.outer_index = self.match_index(outer_first, outer_ind)
+        nest.inner_index = self.match_index(inner_first, inner_ind)
+        if nest.outer_index is None or nest.inner_index is None:
+            return None
+
+        if not self.match_setup(nest, pre_chain, inner_getiter_def[1]):
+            return None
+        if not self.check_body(nest):
+            return None
+        self.choose_transforms(nest)
+        return nest
+
+    def defined_in_nest(self, name, nest):
+        """
+        Whether variable *name* is assigned in the nest (other than by
+        the hoisted statements).
+        """
+        setup = [stmt for _, stmt in nest.setup]
+        return any(offset in nest.blocks
+                   and not any(stmt is s for s in setup)
+                   for offset, stmt in self.defs[name])
+
+    def is_pure_setup(self, value):
+        """
+        Whether the IR *value* can be evaluated before the nest.
+        """
+        if isinstance(value, (ir.Const, ir.Global, ir.FreeVar, ir.Var)):
+            return True
+        if not isinstance(value, ir.Expr):
+            return False
+        if value.op in ('binop', 'unary'):
+            return value.fn not in _RAISING_OPS
+        elif value.op in ('getattr', 'build_tuple', 'static_getitem'):
+            return True
+        elif value.op == 'getitem':
+            return self.is_safe_getitem(value)
+        elif value.op == 'call':
+            return not value.kws and self.is_pure_function(value.func)
+        return False
+
+    def is_safe_getitem(self, expr):
+        ty = self.typemap[expr.value.name]
+        if isinstance(ty, types.Array):
+            return True
+        return (isinstance(ty, (types.UniTuple, types.Tuple))
+                and isinstance(self.get_constant(expr.index),
+                               utils.INT_TYPES))
+
+    def match_setup(self, nest, pre_chain, inner_getiter):
+        """
+        Check that the code between the loop headers only computes the
+        inner loop's range, independently of the outer loop, and collect
+        the statements to hoist.
+        """
+        outer_index = nest.outer_index.target.name
+        for offset in pre_chain:
+            for stmt in _stmts(self.blocks[offset])[:-1]:
+                if stmt is nest.outer_index:
+                    continue
+                if any(var.name == outer_index
+                       for var in irpasses.list_var_uses(stmt)):
+                    return False
+                if stmt is nest.inner_range or stmt is inner_getiter:
+                    continue
+                if not (isinstance(stmt, ir.Assign)
+                        and len(self.defs[stmt.target.name]) == 1
+                        and self.is_pure_setup(stmt.value)
+                        and self.is_local_type(stmt.target, stmt.value)):
+                    return False
+                nest.setup.append((offset, stmt))
+        return True
+
+    def is_local_type(self, var, value):
+        """
+        Whether a variable of the nest can hold *value*: only scalars,
+        and the functions and modules it calls, are allowed.
+        """
+        if isinstance(value, (ir.Global, ir.FreeVar)):
+            return True
+        if (_is_expr(value, 'getattr')
+            and isinstance(self.typemap[value.value.name], types.Module)):
+            return True
+        return _is_scalar_type(self.typemap[var.name])
+
+    def is_pure_body_value(self, value, offset, nest):
+        if isinstance(value, (ir.Const, ir.Global, ir.FreeVar, ir.Var)):
+            return True
+        if not isinstance(value, ir.Expr):
+            return False
+        if value.op in ('binop', 'inplace_binop'):
+            return (value.fn not in _RAISING_OPS
+                    or self.is_safe_divisor(value.rhs, offset, nest))
+        elif value.op in ('unary', 'build_tuple', 'getattr',
+                          'static_getitem'):
+            return True
+        elif value.op == 'getitem':
+            return self.is_safe_getitem(value)
+        elif value.op == 'call':
+            return not value.kws and self.is_pure_function(value.func)
+        return False
+
+    def is_safe_divisor(self, var, offset, nest):
+        """
+        Whether a division by *var* in block *offset* would raise at
+        the same point whatever the iteration order: the divisor is a
+        non-zero constant, or is loop-invariant and divides in every
+        iteration (so that the first iteration raises).
+        """
+        const = self.get_constant(var)
+        if isinstance(const, (utils.INT_TYPES, float)) and const != 0:
+            return True
+        if self.defined_in_nest(var.name, nest):
+            return False
+        latches = self.preds(nest.inner.header) & nest.body
+        return all(offset in self.doms[latch] for latch in latches)
+
+    def check_body(self, nest):
+        """
+        Check that the iterations of the nest are independent, except
+        through array elements, and collect the array accesses.
+        """
+        outer_index, inner_index = nest.indices
+        body = nest.body
+        if any(offset not in body for offset, _ in self.uses[outer_index]):
+            return False
+
+        # Variables assigned in the body must be private to an iteration
+        private = set()
+        for offset in body:
+            for stmt in _stmts(self.blocks[offset]):
+                if isinstance(stmt, ir.Assign):
+                    private.add(stmt.target.name)
+        for name in private:
+            if (any(offset not in body for offset, _ in self.defs[name])
+                or any(offset not in body for offset, _ in self.uses[name])):
+                return False
+        if not self.check_defined_before_use(nest, private):
+            return False
+
+        # { array name -> [(is_write, index dims)] }
+        self.accesses = defaultdict(list)
+        escaped = set()
+        arrays = {}
+        for offset in body:
+            for stmt in _stmts(self.blocks[offset]):
+                accessed = self.check_stmt(stmt, offset, nest, private)
+                if accessed is False:
+                    return False
+                for var in irpasses.list_var_uses(stmt):
+                    if stmt is nest.inner_index:
+                        continue
+                    if var.name not in private and var.name != outer_index:
+                        if self.defined_in_nest(var.name, nest):
+                            return False
+                    if isinstance(self.typemap[var.name], types.Array):
+                        arrays[var.name] = var
+                        if not any(var is a for a in accessed):
+                            escaped.add(var.name)
+
+        written = set(name for name, accesses in self.accesses.items()
+                      if any(is_write for is_write, _ in accesses))
+        if not written or escaped & written:
+            return False
+        # The array variables must be defined when entering the nest,
+        # to check for overlaps there.
+        for name in arrays:
+            if any(offset not in self.doms[nest.preheader]
+                   for offset, _ in self.defs[name]):
+                return False
+        for name in written:
+            accesses = self.accesses[name]
+            for is_write, dims in accesses:
+                if not is_write:
+                    continue
+                for _, other in accesses:
+                    if self.may_conflict(dims, other, nest):
+                        return False
+        nest.arrays = [arrays[name] for name in sorted(arrays)]
+        return True
+
+    def check_defined_before_use(self, nest, private):
+        """
+        Check that the private variables are assigned before being used
+        in each iteration.
+        """
+        body = nest.body
+        first = self.block_of(nest.inner_index, body)
+        order = []
+        seen = set()
+
+        def visit(offset):
+            seen.add(offset)
+            for succ, _ in self.cfg.successors(offset):
+                if succ in body and succ not in seen:
+                    visit(succ)
+            order.append(offset)
+
+        visit(first)
+        if seen != body:
+            return False
+        defined = {}
+        for offset in reversed(order):
+            preds = [defined[pred] for pred in self.preds(offset)
+                     if pred in defined]
+            if offset == first:
+                current = set()
+            elif preds:
+                current = set.intersection(*preds)
+            else:
+                return False
+            for stmt in _stmts(self.blocks[offset]):
+                if any(var.name in private and var.name not in current
+                       for var in irpasses.list_var_uses(stmt)):
+                    return False
+                if isinstance(stmt, ir.Assign):
+                    current.add(stmt.target.name)
+            defined[offset] = current
+        return True
+
+    def block_of(self, stmt, offsets):
+        for offset in offsets:
+            if any(stmt is s for s in self.blocks[offset].body):
+                return offset
+
+    def check_stmt(self, stmt, offset, nest, private):
+        """
+        Check a statement of the body, recording its array accesses.
+        Return the array variables accessed element-wise, or False if the
+        statement prevents the transformation.
+        """
+        if isinstance(stmt, (ir.Jump, ir.Branch)):
+            return []
+        elif isinstance(stmt, ir.SetItem):
+            if not isinstance(self.typemap[stmt.target.name], types.Array):
+                return False
+            self.accesses[stmt.target.name].append(
+                (True, self.index_dims(stmt.index, nest)))
+            return [stmt.target]
+        elif not isinstance(stmt, ir.Assign):
+            return False
+
+        value = stmt.value
+        if not (self.is_pure_body_value(value, offset, nest)
+                and self.is_local_type(stmt.target, value)):
+            return False
+        if isinstance(value, ir.Expr) and value.op in ('getitem',
+                                                       'static_getitem',
+                                                       'getattr'):
+            if isinstance(self.typemap[value.value.name], types.Array):
+                if value.op == 'getitem':
+                    dims = self.index_dims(value.index, nest)
+                    self.accesses[value.value.name].append((False, dims))
+                elif value.op == 'static_getitem':
+                    # A constant index
+                    index = value.index
+                    if not isinstance(index, tuple):
+                        index = (index,)
+                    dims = [(None, v) for v in index]
+                    self.accesses[value.value.name].append((False, dims))
+                return [value.value]
+        return []
+
+    def index_dims(self, index, nest):
+        """
+        Return the list of affine forms (see affine()) of the index
+        *index* along each dimension, or None.
+        """
+        ty = self.typemap[index.name]
+        if isinstance(ty, types.Integer):
+            return [self.affine(index, nest)]
+        elif isinstance(ty, (types.UniTuple, types.Tuple)):
+            value = self.single_def(index)
+            if _is_expr(value, 'build_tuple'):
+                return [self.affine(item, nest) for item in value.items]
+
+    def affine(self, var, nest):
+        """
+        Return the affine form (base, offset) of integer *var*, where
+        *base* is the name of a loop index or loop-invariant variable
+        (or None for constants), and *offset* an integer.  Return None
+        if *var* isn't of that form.
+        """
+        if var.name in nest.indices or not self.defined_in_nest(var.name,
+                                                                nest):
+            return var.name, 0
+        value = self.single_def(var)
+        if isinstance(value, ir.Const):
+            if isinstance(value.value, utils.INT_TYPES):
+                return None, value.value
+        elif isinstance(value, ir.Var):
+            return self.affine(value, nest)
+        elif _is_expr(value, 'binop') and value.fn in ('+', '-'):
+            lhs = self.affine(value.lhs, nest)
+            rhs = self.affine(value.rhs, nest)
+            if lhs is None or rhs is None:
+                return None
+            if rhs[0] is None:
+                if value.fn == '+':
+                    return lhs[0], lhs[1] + rhs[1]
+                else:
+                    return lhs[0], lhs[1] - rhs[1]
+            elif lhs[0] is None and value.fn == '+':
+                return rhs[0], lhs[1] + rhs[1]
+
+    def may_conflict(self, dims, other, nest):
+        """
+        Whether the accesses to the same array with index *dims* (a
+        write) and *other* may be reordered by interchanging the loops,
+        i.e. whether they may access the same element in iterations
+        ordered differently by the outer and the inner loop.
+        """
+        if dims is None or other is None or len(dims) != len(other):
+            return True
+        if None in dims or None in other:
+            return True
+        # { loop index -> distance between the iterations accessing
+        #   the same element }
+        distances = {}
+        for (base, offset), (other_base, other_offset) in zip(dims, other):
+            # Negative indices wrap around, so their distance is unknown
+            if (base == other_base and base in nest.indices
+                and base in self.nonneg and offset >= 0 and other_offset >= 0):
+                distance = offset - other_offset
+                if distances.setdefault(base, distance) != distance:
+                    # No pair of iterations accesses the same element
+                    return False
+        outer, inner = [distances.get(name) for name in nest.indices]
+        if outer is None and inner is None:
+            return True
+        elif outer is None:
+            return inner != 0
+        elif inner is None:
+            return outer != 0
+        return outer * inner < 0
+
+    def choose_transforms(self, nest):
+        """
+        Decide whether to interchange and tile the (legal) loop nest.
+        """
+        outer_index, inner_index = nest.indices
+        outer_args = nest.outer_range.value.args
+        inner_args = nest.inner_range.value.args
+        same_types = (
+            self.typemap[outer_index] == self.typemap[inner_index]
+            and self.typemap[nest.outer_range.target.name]
+            == self.typemap[nest.inner_range.target.name])
+        if self.interchange and same_types:
+            # Vote for the loop order walking the arrays along their
+            # contiguous dimension
+            score = 0
+            for name, accesses in self.accesses.items():
+                ty = self.typemap[name]
+                for _, dims in accesses:
+                    if dims is None or len(dims) != ty.ndim:
+                        continue
+                    if ty.layout == 'C':
+                        dim = dims[-1]
+                    elif ty.layout == 'F':
+                        dim = dims[0]
+                    else:
+                        continue
+                    if dim is not None and dim[0] == outer_index:
+                        score += 1
+                    elif dim is not None and dim[0] == inner_index:
+                        score -= 1
+            nest.interchange = score > 0
+        nest.tile = (self.tile_size > 1
+                     and len(outer_args) <= 2 and len(inner_args) <= 2
+                     and self.typemap[outer_index] == types.intp
+                     and self.typemap[inner_index] == types.intp)
+
+    # --- Transformation ---
+
+    def new_offset(self):
+        offset = self.next_offset
+        self.next_offset += 1
+        return offset
+
+    def new_block(self, loc):
+        offset = self.new_offset()
+        block = ir.Block(self.scope, loc)
+        self.blocks[offset] = block
+        return offset, block
+
+    def assign(self, block, value, loc, target=None):
+        """
+        Assign *value* to *target* (a new temporary by default) at the
+        end of *block*.
+        """
+        if target is None:
+            target = self.scope.make_temp(loc)
+        stmt = ir.Assign(value=value, target=target, loc=loc)
+        if block.is_terminated:
+            block.insert_before_terminator(stmt)
+        else:
+            block.append(stmt)
+        return target
+
+    def clone(self, offsets):
+        """
+        Copy the blocks *offsets*.  Return the dict of new block offsets
+        and the dict mapping the id() of the original statements to
+        their copies.
+        """
+        remap = dict((offset, self.new_offset())
+                     for offset in sorted(offsets))
+        stmt_map = {}
+        for offset in offsets:
+            block = self.blocks[offset]
+            new = ir.Block(block.scope, block.loc)
+            for stmt in block.body:
+                copied = _clone_stmt(stmt, remap)
+                stmt_map[id(stmt)] = copied
+                new.append(copied)
+            self.blocks[remap[offset]] = new
+        return remap, stmt_map
+
+    def make_range_loop(self, pre, range_func, args, exit, loc):
+        """
+        Terminate block *pre* with the start of a loop over
+        range(*args), exiting to block *exit*.  Return the offset of the
+        loop's header, its (empty) body block and its index variable.
+        """
+        rng = self.assign(pre, ir.Expr.call(range_func, args, (), loc), loc)
+        it = self.assign(pre, ir.Expr.getiter(rng, loc), loc)
+        header_offset, header = self.new_block(loc)
+        body_offset, body = self.new_block(loc)
+        pre.append(ir.Jump(header_offset, loc))
+        pair = self.assign(header, ir.Expr.iternext(it, loc), loc)
+        index = self.assign(header, ir.Expr.pair_first(pair, loc), loc)
+        valid = self.assign(header, ir.Expr.pair_second(pair, loc), loc)
+        header.append(ir.Branch(valid, body_offset, exit, loc))
+        return header_offset, body, index
+
+    def range_bounds(self, block, args, loc):
+        if len(args) == 1:
+            return self.assign(block, ir.Const(0, loc), loc), args[0]
+        return args[0], args[1]
+
+    def transform(self, nest):
+        preheader = self.blocks[nest.preheader]
+        loc = preheader.terminator.loc
+        # Hoist the computation of the inner loop's range out of the nest
+        for offset, stmt in nest.setup:
+            self.blocks[offset].remove(stmt)
+            preheader.insert_before_terminator(stmt)
+
+        entry_offset, entry = self.new_block(loc)
+        if len(nest.arrays) > 1:
+            # Keep the original nest for overlapping arrays
+            remap, stmt_map = self.clone(nest.blocks)
+            func = self.assign(preheader,
+                               ir.Global('arrays_may_overlap',
+                                         arrays_may_overlap, loc), loc)
+            overlap = self.assign(preheader,
+                                  ir.Expr.call(func, list(nest.arrays), (),
+                                               loc), loc)
+            preheader.body[-1] = ir.Branch(overlap, nest.outer.header,
+                                           entry_offset, loc)
+        else:
+            remap, stmt_map = {}, {}
+            preheader.body[-1] = ir.Jump(entry_offset, loc)
+
+        outer_header = remap.get(nest.outer.header, nest.outer.header)
+        outer_index = stmt_map.get(id(nest.outer_index), nest.outer_index)
+        inner_index = stmt_map.get(id(nest.inner_index), nest.inner_index)
+        inner_range = stmt_map.get(id(nest.inner_range), nest.inner_range)
+        outer_args = list(nest.outer_range.value.args)
+        inner_args = list(inner_range.value.args)
+        if nest.interchange:
+            outer_args, inner_args = inner_args, outer_args
+            outer_index.target, inner_index.target = (inner_index.target,
+                                                      outer_index.target)
+
+        range_func = self.assign(entry,
+                                 ir.Global(nest.range_func.__name__,
+                                           nest.range_func, loc), loc)
+        if not nest.tile:
+            rng = self.assign(entry, ir.Expr.call(range_func, outer_args, (),
+                                                  loc), loc)
+            self.assign(entry, ir.Expr.getiter(rng, loc), loc,
+                        target=nest.outer_iter)
+            entry.append(ir.Jump(outer_header, loc))
+            inner_range.value = ir.Expr.call(inner_range.value.func,
+                                             inner_args, (), loc)
+            return
+
+        # Loop over tiles of tile_size x tile_size iterations, and over
+        # the iterations of each tile with the original loops.
+        tile = self.assign(entry, ir.Const(self.tile_size, loc), loc)
+        min_func = self.assign(entry, ir.Global('min', min, loc), loc)
+        outer_lo, outer_hi = self.range_bounds(entry, outer_args, loc)
+        inner_lo, inner_hi = self.range_bounds(entry, inner_args, loc)
+
+        outer_tiles, outer_tile_body, outer_start = self.make_range_loop(
+            entry, range_func, [outer_lo, outer_hi, tile], nest.exit, loc)
+        inner_tiles_exit, block = self.new_block(loc)
+        block.append(ir.Jump(outer_tiles, loc))
+        inner_tiles, tile_body, inner_start = self.make_range_loop(
+            outer_tile_body, range_func, [inner_lo, inner_hi, tile],
+            inner_tiles_exit, loc)
+
+        def tile_stop(start, hi):
+            end = self.assign(tile_body, ir.Expr.binop('+', start, tile, loc),
+                              loc)
+            return self.assign(tile_body,
+                               ir.Expr.call(min_func, [end, hi], (), loc),
+                               loc)
+
+        outer_stop = tile_stop(outer_start, outer_hi)
+        inner_stop = tile_stop(inner_start, inner_hi)
+        rng = self.assign(tile_body,
+                          ir.Expr.call(range_func, [outer_start, outer_stop],
+                                       (), loc), loc)
+        self.assign(tile_body, ir.Expr.getiter(rng, loc), loc,
+                    target=nest.outer_iter)
+        tile_body.append(ir.Jump(outer_header, loc))
+        inner_range.value = ir.Expr.call(inner_range.value.func,
+                                         [inner_start, inner_stop], (), loc)
+
+        # The outer loop over the tile exits to the next tile
+        outer_exit, block = self.new_block(loc)
+        block.append(ir.Jump(inner_tiles, loc))
+        self.blocks[outer_header].terminator.falsebr = outer_exit
+
+
+def optimize_loop_nests(interp, typemap, interchange=True, tile_size=0):
+    """
+    Interchange the loop nests of the typed IR of *interp* to match the
+    layout of the arrays they access, and tile them if *tile_size* is
+    non-zero.  Return whether the IR was changed, in which case it must
+    be typed again.
+    """
+    if not interchange and not tile_size:
+        return False
+    return LoopNestOptimizer(interp, typemap, interchange, tile_size).run()
@@ -9,7 +9,10 @@ from llvmlite.llvmpy.core import Type, Builder
 
 
 from numba import (_dynfunc, ir, types, cgutils, utils, config,
-                   cffi_support, typing, six)
+                   cffi_support, typing, six, irpasses, rangeanalysis,
+                   loopnest)
+from numba.typing.templates import fold_arguments
+from numba.targets import arrayobj
 
 
 class LoweringError(Exception):
@@ -172,13 +175,19 @@ class BaseLower(object):
     """
     Lower IR to LLVM
     """
-    def __init__(self, context, library, fndesc, interp):
+    def __init__(self, context, library, fndesc, interp, fastmath=frozenset(),
+                 noalias=False):
         self.context = context
         self.library = library
         self.fndesc = fndesc
         self.blocks = utils.SortedMap(utils.iteritems(interp.blocks))
         self.interp = interp
         self.call_conv = context.call_conv
+        # The enabled fastmath flags (see targets.options.FASTMATH_FLAGS)
+        self.fastmath = frozenset(fastmath)
+        # Whether to also compile a variant of the function assuming its
+        # array arguments don't alias (see NoaliasLower)
+        self.noalias = noalias
 
         # Initialize LLVM
         self.module = self.library.create_ir_module(self.fndesc.unique_name)
@@ -189,7 +198,7 @@ class BaseLower(object):
             globals=self.fndesc.lookup_module().__dict__)
 
         # Setup function
-        self.function = context.declare_function(self.module, fndesc)
+        self.function = self.declare_function()
         self.entry_block = self.function.append_basic_block('entry')
         self.builder = Builder.new(self.entry_block)
         self.call_helper = self.call_conv.init_call_helper(self.builder)
@@ -199,6 +208,8 @@ class BaseLower(object):
         self.varmap = {}
         self.firstblk = min(self.blocks.keys())
         self.loc = -1
+        # The offset of the block being lowered (None before the first)
+        self.current_offset = None
 
         # Subclass initialization
         self.init()
@@ -206,6 +217,12 @@ class BaseLower(object):
     def init(self):
         pass
 
+    def declare_function(self):
+        """
+        Declare the LLVM function to lower into.
+        """
+        return self.context.declare_function(self.module, self.fndesc)
+
     def pre_lower(self):
         """
         Called before lowering all blocks.
@@ -235,18 +252,19 @@ class BaseLower(object):
 
         self.pre_lower()
         # pre_lower() may have changed the current basic block
-        entry_block_tail = self.builder.basic_block
+        self.entry_block_tail = self.builder.basic_block
 
         # Lower all blocks
         for offset, block in self.blocks.items():
             bb = self.blkmap[offset]
             self.builder.position_at_end(bb)
+            self.current_offset = offset
             self.lower_block(block)
 
         self.post_lower()
 
         # Close tail of entry block
-        self.builder.position_at_end(entry_block_tail)
+        self.builder.position_at_end(self.entry_block_tail)
         self.builder.branch(self.blkmap[self.firstblk])
 
         # Run target specific post lowering transformation
@@ -287,13 +305,286 @@ class BaseLower(object):
 
 
 class Lower(BaseLower):
+
+    # Operators whose floating-point instructions are relaxed by the
+    # fastmath flags.  Other operators (e.g. '%' and '//') rely on exact
+    # rounding and are left alone.
+    fastmath_operators = frozenset(['+', '-', '*', '/', '/?'])
+    fastmath_opcodes = frozenset(['fadd', 'fsub', 'fmul', 'fdiv', 'frem'])
+
+    # The flags understood by LLVM 3.5; it only has "fast" for algebraic
+    # rewrites such as reassociation, which implies all the others.
+    llvm_fastmath_flags = ('nnan', 'ninf', 'nsz', 'arcp')
+
+    def init(self):
+        # Map variable names to the (basic block, operands, type) of the
+        # floating-point multiplication defining them, for contraction.
+        self.products = {}
+        self.last_product = None
+        # The basic blocks returning normally (see lower_exception_cleanup())
+        self.normal_return_blocks = set()
+        # Variables which can only hold non-negative integers, and
+        # therefore index arrays without wraparound
+        self.nonneg_vars = rangeanalysis.find_nonnegative_variables(
+            self.blocks, self.fndesc.typemap)
+        # Variables held in LLVM registers rather than stack slots (see
+        # find_ssa_variables())
+        self.ssa_idoms = {}
+        self.ssa_phi_blocks = defaultdict(list)
+        if config.REGISTER_VARIABLES:
+            self.ssa_vars = self.find_ssa_variables()
+        else:
+            self.ssa_vars = set()
+        # The values of these variables at the end of (or in) the blocks
+        # lowered so far (None for the entry block, holding the arguments)
+        self.ssa_values = defaultdict(dict)
+        self.ssa_end_blocks = {}
+        self.ssa_phis = []
+
+    def find_ssa_variables(self):
+        """
+        Find the variables which don't need a stack slot, and compute
+        where phi nodes must merge their values (in self.ssa_phi_blocks).
+
+        This is the usual conversion to SSA form: a variable assigned in
+        several blocks gets a phi node in the blocks of the iterated
+        dominance frontier of its assignments (only if it is read in a
+        block before being assigned there, since it is otherwise never
+        live at the start of a block).  The value of a
+        variable in a block is then the one of its last assignment (or
+        phi node) in the block, or else its value in the immediate
+        dominator of the block.
+
+        Refcounted variables are left out, since they need a slot to be
+        released on exception paths (see lower_exception_cleanup()), as
+        well as variables of other types than scalars whose merges would
+        need phi nodes.
+        """
+        cfg = loopnest.compute_cfg(self.blocks)
+        doms = cfg.dominators()
+        # The immediate dominator of a block is the one dominated by all
+        # the others.  Blocks are lowered in offset order, so that the
+        # values in the immediate dominator must be known by then.
+        for offset, dominators in doms.items():
+            if offset == self.firstblk:
+                continue
+            idom = max(dominators - set([offset]),
+                       key=lambda d: len(doms[d]))
+            if idom > offset:
+                return set()
+            self.ssa_idoms[offset] = idom
+
+        frontiers = defaultdict(set)
+        for offset in doms:
+            preds = [pred for pred, _ in cfg.predecessors(offset)]
+            if len(preds) < 2:
+                continue
+            for pred in preds:
+                runner = pred
+                while runner != self.ssa_idoms.get(offset):
+                    frontiers[runner].add(offset)
+                    runner = self.ssa_idoms.get(runner)
+
+        defs = defaultdict(set)
+        nonlocal_vars = set()
+        for offset, block in self.blocks.items():
+            assigned = set()
+            for inst in block.body:
+                for var in irpasses.list_var_uses(inst):
+                    if var.name not in assigned:
+                        nonlocal_vars.add(var.name)
+                if isinstance(inst, ir.Assign):
+                    assigned.add(inst.target.name)
+                    if offset in doms:
+                        defs[inst.target.name].add(offset)
+
+        ssa_vars = set()
+        for name in self.fndesc.typemap:
+            if self.is_refcounted_var(name):
+                continue
+            ssa_vars.add(name)
+            if name not in nonlocal_vars:
+                continue
+            phi_blocks = set()
+            todo = list(defs[name])
+            while todo:
+                for offset in frontiers[todo.pop()]:
+                    if offset not in phi_blocks:
+                        phi_blocks.add(offset)
+                        todo.append(offset)
+            ty = self.typeof(name)
+            if phi_blocks and not (ty == types.boolean or isinstance(
+                    ty, (types.Integer, types.Float, types.Complex))):
+                ssa_vars.discard(name)
+                continue
+            for offset in sorted(phi_blocks):
+                self.ssa_phi_blocks[offset].append(name)
+        return ssa_vars
+
+    def lower_block(self, block):
+        offset = self.current_offset
+        for name in self.ssa_phi_blocks.get(offset, ()):
+            lltype = self.context.get_value_type(self.typeof(name))
+            phi = self.builder.phi(lltype, name=name)
+            self.ssa_values[offset][name] = phi
+            self.ssa_phis.append((offset, name, phi))
+        super(Lower, self).lower_block(block)
+        self.ssa_end_blocks[offset] = self.builder.basic_block
+
+    def get_ssa_value(self, offset, name):
+        """
+        Return the value of SSA variable *name* in (or at the end of)
+        block *offset*.
+        """
+        while offset is not None:
+            if name in self.ssa_values[offset]:
+                return self.ssa_values[offset][name]
+            # Unreachable blocks only see the arguments
+            offset = self.ssa_idoms.get(offset)
+        value = self.ssa_values[None].get(name)
+        if value is None:
+            # Not assigned on any path leading here
+            value = self.context.get_constant_undef(self.typeof(name))
+        return value
+
+    def add_ssa_phi_incomings(self):
+        """
+        Add the incoming values of the phi nodes, once all blocks are
+        lowered.
+        """
+        preds = defaultdict(list)
+        preds[self.firstblk].append(None)
+        self.ssa_end_blocks[None] = self.entry_block_tail
+        for offset, block in self.blocks.items():
+            term = block.terminator
+            if isinstance(term, ir.Jump):
+                preds[term.target].append(offset)
+            elif isinstance(term, ir.Branch):
+                # Both edges are listed when the targets are the same
+                preds[term.truebr].append(offset)
+                preds[term.falsebr].append(offset)
+        for offset, name, phi in self.ssa_phis:
+            for pred in preds[offset]:
+                phi.add_incoming(self.get_ssa_value(pred, name),
+                                 self.ssa_end_blocks[pred])
+
+    def pre_lower(self):
+        # Arguments are borrowed from the caller, but their variables
+        # get released like any other.
+        for name in self.fndesc.args:
+            if self.is_refcounted_var(name):
+                self.incref(self.typeof(name), self.loadvar(name))
+        if self.noalias and NoaliasLower.get_array_args(self.fndesc):
+            self.lower_noalias_dispatch()
+
+    def lower_noalias_dispatch(self):
+        """
+        Lower the variant of the function assuming that its array
+        arguments don't alias, and call it instead of the generic code
+        if the arrays passed at runtime don't share any memory.
+        """
+        NoaliasLower(self.context, self.library, self.fndesc, self.interp,
+                     fastmath=self.fastmath).lower()
+        fnty = NoaliasLower.get_function_type(self.context, self.fndesc)
+        name = NoaliasLower.get_function_name(self.fndesc)
+        variant = self.module.get_or_insert_function(fnty, name=name)
+
+        datas = []
+        extents = []
+        for argname, argty in NoaliasLower.get_array_args(self.fndesc):
+            ary = self.context.make_array(argty)(self.context, self.builder,
+                                                 self.loadvar(argname))
+            datas.append(ary.data)
+            extents.append(arrayobj.get_array_memory_extents(
+                self.context, self.builder, argty, ary))
+
+        may_alias = cgutils.false_bit
+        for (a_start, a_end), (b_start, b_end) in itertools.combinations(
+                extents, 2):
+            overlap = arrayobj.extents_may_overlap(self.context, self.builder,
+                                                   a_start, a_end,
+                                                   b_start, b_end)
+            may_alias = self.builder.or_(may_alias, overlap)
+
+        with cgutils.ifthen(self.builder, self.builder.not_(may_alias)):
+            status = self.builder.call(variant,
+                                       list(self.function.args) + datas)
+            # The variant took its own references to the arguments;
+            # release the ones taken above.
+            for name in self.fndesc.args:
+                if self.is_refcounted_var(name):
+                    self.decref(self.typeof(name), self.loadvar(name))
+            self.normal_return_blocks.add(self.builder.basic_block)
+            self.builder.ret(status)
+
+    def lower_return(self, inst):
+        # The returned variable isn't deleted: its reference is
+        # transferred to the caller.
+        val = self.loadvar(inst.value.name)
+        oty = self.typeof(inst.value.name)
+        ty = self.fndesc.restype
+        if isinstance(ty, types.Optional):
+            # If returning an optional type
+            self.call_conv.return_optional_value(self.builder, ty, oty, val)
+            return
+        if ty != oty:
+            val = self.context.cast(self.builder, val, oty, ty)
+        retval = self.context.get_return_value(self.builder, ty, val)
+        self.call_conv.return_value(self.builder, retval)
+
+    def post_lower(self):
+        self.add_ssa_phi_incomings()
+        self.lower_exception_cleanup()
+
+    def lower_exception_cleanup(self):
+        """
+        Release the refcounted variables when returning an exception
+        status (e.g. from a raise statement, or an exception raised by
+        an implementation or a callee).  The ir.Del statements are skipped
+        on these paths, but the slot of a refcounted variable always holds
+        either a live reference or NULL, so all of them can be released.
+        """
+        refcounted = sorted(name for name in self.varmap
+                            if self.is_refcounted_var(name))
+        if not refcounted:
+            return
+        exc_returns = []
+        for block in self.function.blocks:
+            if block in self.normal_return_blocks or not block.is_terminated:
+                continue
+            term = block.instructions[-1]
+            if term.opname == 'ret':
+                exc_returns.append((block, term))
+        if not exc_returns:
+            return
+
+        # Branch from all exception returns to a common cleanup block
+        cleanup = self.function.append_basic_block('exc_cleanup')
+        self.builder.position_at_end(cleanup)
+        status = self.builder.phi(exc_returns[0][1].operands[0].type)
+        for block, term in exc_returns:
+            block.instructions.remove(term)
+            self.builder.position_at_end(block)
+            self.builder.branch(cleanup)
+            status.add_incoming(term.operands[0], block)
+
+        self.builder.position_at_end(cleanup)
+        for name in refcounted:
+            val = self.builder.load(self.varmap[name])
+            self.decref(self.typeof(name), val)
+        self.builder.ret(status)
+
     def lower_inst(self, inst):
         if config.DEBUG_JIT:
             self.context.debug_print(self.builder, str(inst))
         if isinstance(inst, ir.Assign):
             ty = self.typeof(inst.target.name)
+            self.products.pop(inst.target.name, None)
+            self.last_product = None
             val = self.lower_assign(ty, inst)
             self.storevar(val, inst.target.name)
+            if self.last_product is not None:
+                self.products[inst.target.name] = self.last_product
 
         elif isinstance(inst, ir.Branch):
             cond = self.loadvar(inst.cond.name)
@@ -310,17 +601,11 @@ class Lower(BaseLower):
             self.builder.branch(target)
 
         elif isinstance(inst, ir.Return):
-            val = self.loadvar(inst.value.name)
-            oty = self.typeof(inst.value.name)
-            ty = self.fndesc.restype
-            if isinstance(ty, types.Optional):
-                # If returning an optional type
-                self.call_conv.return_optional_value(self.builder, ty, oty, val)
-                return
-            if ty != oty:
-                val = self.context.cast(self.builder, val, oty, ty)
-            retval = self.context.get_return_value(self.builder, ty, val)
-            self.call_conv.return_value(self.builder, retval)
+            blocks = set(self.function.blocks)
+            self.normal_return_blocks.add(self.builder.basic_block)
+            self.lower_return(inst)
+            self.normal_return_blocks.update(
+                set(self.function.blocks) - blocks)
 
         elif isinstance(inst, ir.SetItem):
             target = self.loadvar(inst.target.name)
@@ -333,7 +618,8 @@ class Lower(BaseLower):
 
             signature = self.fndesc.calltypes[inst]
             assert signature is not None
-            impl = self.context.get_function('setitem', signature)
+            impl = self.context.get_function(
+                'setitem', self.nonneg_index_signature(signature, inst.index))
 
             # Convert argument to match
             if isinstance(targetty, types.Optional):
@@ -350,7 +636,7 @@ class Lower(BaseLower):
             return impl(self.builder, (target, index, value))
 
         elif isinstance(inst, ir.Del):
-            pass
+            self.delvar(inst.value)
 
         elif isinstance(inst, ir.SetAttr):
             target = self.loadvar(inst.target.name)
@@ -397,6 +683,34 @@ class Lower(BaseLower):
                                           % (exctype,))
             self.return_exception(exctype.exc_class, args)
 
+    def nonneg_index_signature(self, sig, index):
+        """
+        Return the signature to index an array with the *index* variable
+        in *sig*.  If the index is known to be non-negative, it is
+        declared unsigned (with the same representation) so that the
+        implementation doesn't emit wraparound code.
+        """
+        if (not isinstance(sig.args[0], types.Array)
+            or index.name not in self.nonneg_vars):
+            return sig
+
+        def as_unsigned(ty):
+            return getattr(types, 'uint%d' % ty.bitwidth)
+
+        idxty = sig.args[1]
+        if isinstance(idxty, types.Integer):
+            idxty = as_unsigned(idxty)
+        elif (isinstance(idxty, types.UniTuple)
+              and isinstance(idxty.dtype, types.Integer)):
+            idxty = types.UniTuple(as_unsigned(idxty.dtype), idxty.count)
+        elif (isinstance(idxty, types.Tuple)
+              and all(isinstance(ty, types.Integer) for ty in idxty)):
+            idxty = types.Tuple([as_unsigned(ty) for ty in idxty])
+        else:
+            return sig
+        return typing.signature(sig.return_type, sig.args[0], idxty,
+                                *sig.args[2:])
+
     def lower_assign(self, ty, inst):
         value = inst.value
         # In nopython mode, closure vars are frozen like globals
@@ -421,7 +735,9 @@ class Lower(BaseLower):
         elif isinstance(value, ir.Var):
             val = self.loadvar(value.name)
             oty = self.typeof(value.name)
-            return self.context.cast(self.builder, val, oty, ty)
+            res = self.context.cast(self.builder, val, oty, ty)
+            self.incref(ty, res)
+            return res
 
         else:
             raise NotImplementedError(type(value), value)
@@ -439,10 +755,90 @@ class Lower(BaseLower):
         # Convert argument to match
         lhs = self.context.cast(self.builder, lhs, lty, signature.args[0])
         rhs = self.context.cast(self.builder, rhs, rty, signature.args[1])
-        res = impl(self.builder, (lhs, rhs))
+        if self.fastmath and self.is_fastmath_binop(expr.fn, signature):
+            res = self.lower_fastmath_binop(expr, signature, impl, lhs, rhs)
+        else:
+            res = impl(self.builder, (lhs, rhs))
         return self.context.cast(self.builder, res, signature.return_type,
                                  resty)
 
+    def is_fastmath_binop(self, op, signature):
+        return (op in self.fastmath_operators and
+                isinstance(signature.return_type, types.Float) and
+                all(a == signature.return_type for a in signature.args))
+
+    def lower_fastmath_binop(self, expr, signature, impl, lhs, rhs):
+        """
+        Lower a floating-point binary operation with relaxed semantics.
+        """
+        ty = signature.return_type
+        if 'contract' in self.fastmath:
+            if expr.fn == '*':
+                self.last_product = (self.builder.basic_block, (lhs, rhs), ty)
+            elif expr.fn in ('+', '-'):
+                res = self.contract_binop(expr, ty, lhs, rhs)
+                if res is not None:
+                    return res
+
+        block = self.builder.basic_block
+        ninstrs = len(block.instructions)
+        nblocks = len(self.function.blocks)
+        res = impl(self.builder, (lhs, rhs))
+        # Mark the instructions emitted by the implementation
+        instrs = list(block.instructions[ninstrs:])
+        for blk in self.function.blocks[nblocks:]:
+            instrs.extend(blk.instructions)
+        for instr in instrs:
+            if instr.opname in self.fastmath_opcodes:
+                self.set_fastmath_flags(instr)
+        return res
+
+    def set_fastmath_flags(self, instr):
+        if (self.fastmath.issuperset(self.llvm_fastmath_flags)
+                or 'reassoc' in self.fastmath):
+            flags = ['fast']
+        else:
+            flags = [f for f in self.llvm_fastmath_flags if f in self.fastmath]
+        if not flags:
+            return
+        if hasattr(instr, 'flags'):
+            instr.flags.extend(flags)
+        else:
+            instr.opname = ' '.join([instr.opname] + flags)
+
+    def contract_binop(self, expr, ty, lhs, rhs):
+        """
+        Fuse the addition or subtraction *expr* with the multiplication
+        defining one of its operands into a llvm.fmuladd() call, which
+        LLVM may compute as a fused multiply-add.  None is returned if
+        there is no such multiplication.
+        """
+        block = self.builder.basic_block
+
+        def get_product(var):
+            product = self.products.get(var.name)
+            if (product is not None and product[0] is block and
+                    product[2] == ty and self.typeof(var.name) == ty):
+                return product[1]
+
+        product = get_product(expr.lhs)
+        if product is not None:
+            addend = rhs
+            if expr.fn == '-':
+                addend = self.builder.fsub(self.context.get_constant(ty, -0.0),
+                                           addend)
+        elif expr.fn == '+':
+            product = get_product(expr.rhs)
+            addend = lhs
+        if product is None:
+            return None
+
+        lty = self.context.get_value_type(ty)
+        fnty = Type.function(lty, [lty] * 3)
+        name = "llvm.fmuladd.f%d" % (ty.bitwidth,)
+        fn = self.module.get_or_insert_function(fnty, name=name)
+        return self.builder.call(fn, list(product) + [addend])
+
     def lower_expr(self, resty, expr):
         if expr.op == 'binop':
             return self.lower_binop(resty, expr)
@@ -479,14 +875,27 @@ class Lower(BaseLower):
                     except AttributeError:
                         raise NotImplementedError("unsupported keyword arguments "
                                                   "when calling %s" % (fnty,))
-                    ba = pysig.bind(*expr.args, **dict(expr.kws))
-                    assert not ba.kwargs
-                    args = ba.args
+                    # Omitted arguments get their default values
+                    args = fold_arguments(
+                        pysig, expr.args, dict(expr.kws),
+                        lambda index, default: ir.Const(default, expr.loc))
                 else:
                     args = expr.args
 
-                argvals = [self.loadvar(a.name) for a in args]
-                argtyps = [self.typeof(a.name) for a in args]
+                argvals = []
+                argtyps = []
+                for a, ft in zip(args, signature.args):
+                    if isinstance(a, ir.Const):
+                        if isinstance(ft, types.Dummy):
+                            av = self.context.get_dummy_value()
+                        else:
+                            av = self.context.get_constant_generic(
+                                self.builder, ft, a.value)
+                        argvals.append(av)
+                        argtyps.append(ft)
+                    else:
+                        argvals.append(self.loadvar(a.name))
+                        argtyps.append(self.typeof(a.name))
 
                 castvals = [self.context.cast(self.builder, av, at, ft)
                             for av, at, ft in zip(argvals, argtyps,
@@ -537,15 +946,19 @@ class Lower(BaseLower):
             val = self.loadvar(expr.value.name)
             ty = self.typeof(expr.value.name)
             item = self.context.pair_first(self.builder, val, ty)
-            return self.context.get_argument_value(self.builder,
-                                                   ty.first_type, item)
+            res = self.context.get_argument_value(self.builder,
+                                                  ty.first_type, item)
+            self.incref(ty.first_type, res)
+            return res
 
         elif expr.op == 'pair_second':
             val = self.loadvar(expr.value.name)
             ty = self.typeof(expr.value.name)
             item = self.context.pair_second(self.builder, val, ty)
-            return self.context.get_argument_value(self.builder,
-                                                   ty.second_type, item)
+            res = self.context.get_argument_value(self.builder,
+                                                  ty.second_type, item)
+            self.incref(ty.second_type, res)
+            return res
 
         elif expr.op in ('getiter', 'iternext'):
             val = self.loadvar(expr.value.name)
@@ -564,6 +977,7 @@ class Lower(BaseLower):
             # If we have a heterogenous tuple, we needn't do anything,
             # and we can't iterate over it anyway.
             if isinstance(ty, types.Tuple):
+                self.incref(ty, val)
                 return val
 
             itemty = ty.iterator_type.yield_type
@@ -596,6 +1010,9 @@ class Lower(BaseLower):
             with cgutils.if_unlikely(self.builder, is_valid):
                 self.return_exception(ValueError)
 
+            # The items were borrowed from the iterator
+            self.incref(resty, tup)
+            self.decref(ty.iterator_type, iterobj)
             return tup
 
         elif expr.op == "getattr":
@@ -606,6 +1023,7 @@ class Lower(BaseLower):
                 # if we are getting out a method, assume we have typed this
                 # properly and just build a bound function object
                 res = self.context.get_bound_function(self.builder, val, ty)
+                self.incref(resty, res)
             else:
                 impl = self.context.get_attribute(val, ty, expr.attr)
 
@@ -622,7 +1040,9 @@ class Lower(BaseLower):
             if cgutils.is_struct(baseval.type):
                 # Statically extract the given element from the structure
                 # (structures aren't dynamically indexable).
-                return self.builder.extract_value(baseval, expr.index)
+                res = self.builder.extract_value(baseval, expr.index)
+                self.incref(resty, res)
+                return res
             else:
                 # Fall back on the generic getitem() implementation
                 # for this type.
@@ -639,7 +1059,8 @@ class Lower(BaseLower):
             baseval = self.loadvar(expr.value.name)
             indexval = self.loadvar(expr.index.name)
             signature = self.fndesc.calltypes[expr]
-            impl = self.context.get_function("getitem", signature)
+            impl = self.context.get_function(
+                "getitem", self.nonneg_index_signature(signature, expr.index))
             argvals = (baseval, indexval)
             argtyps = (self.typeof(expr.value.name),
                        self.typeof(expr.index.name))
@@ -658,30 +1079,82 @@ class Lower(BaseLower):
             tup = self.context.get_constant_undef(resty)
             for i in range(len(castvals)):
                 tup = self.builder.insert_value(tup, castvals[i], i)
+            self.incref(resty, tup)
             return tup
 
         elif expr.op == "cast":
             val = self.loadvar(expr.value.name)
             ty = self.typeof(expr.value.name)
             castval = self.context.cast(self.builder, val, ty, resty)
+            self.incref(resty, castval)
             return castval
 
         raise NotImplementedError(expr)
 
+    def incref(self, typ, val):
+        self.context.incref(self.builder, typ, val)
+
+    def decref(self, typ, val):
+        self.context.decref(self.builder, typ, val)
+
+    def is_refcounted_var(self, name):
+        """
+        Whether the variable named *name* holds references that need
+        releasing when it is overwritten or deleted.
+        """
+        return (self.context.enable_array_refcount and
+                self.context.is_refcounted_type(self.typeof(name)))
+
+    def _getvar_slot(self, name, lltype):
+        if name not in self.varmap:
+            ptr = self.alloca_lltype(name, lltype)
+            if self.is_refcounted_var(name):
+                # Zero-initialize the slot, so that the variable can be
+                # safely released before its first assignment.
+                with cgutils.goto_entry_block(self.builder):
+                    self.builder.store(cgutils.get_null_value(lltype), ptr)
+            self.varmap[name] = ptr
+        return self.varmap[name]
+
     def getvar(self, name):
         return self.varmap[name]
 
     def loadvar(self, name):
+        if name in self.ssa_vars:
+            return self.get_ssa_value(self.current_offset, name)
         ptr = self.getvar(name)
         return self.builder.load(ptr)
 
     def storevar(self, value, name):
-        if name not in self.varmap:
-            self.varmap[name] = self.alloca_lltype(name, value.type)
-        ptr = self.getvar(name)
+        """
+        Store *value* (which must be a new reference) into the variable
+        named *name*, releasing its previous value.
+        """
+        if name in self.ssa_vars:
+            self.ssa_values[self.current_offset][name] = value
+            return
+        ptr = self._getvar_slot(name, value.type)
         assert value.type == ptr.type.pointee,\
             "store %s to ptr of %s" % (value.type, ptr.type.pointee)
-        self.builder.store(value, ptr)
+        if self.is_refcounted_var(name):
+            old = self.builder.load(ptr)
+            self.builder.store(value, ptr)
+            self.decref(self.typeof(name), old)
+        else:
+            self.builder.store(value, ptr)
+
+    def delvar(self, name):
+        """
+        Delete the variable named *name*, releasing its value.
+        """
+        if not self.is_refcounted_var(name):
+            return
+        ty = self.typeof(name)
+        ptr = self._getvar_slot(name, self.context.get_value_type(ty))
+        self.decref(ty, self.builder.load(ptr))
+        # Guard against double decref's, in case a variable is deleted
+        # several times on a given code path.
+        self.builder.store(cgutils.get_null_value(ptr.type.pointee), ptr)
 
     def alloca(self, name, type):
         lltype = self.context.get_value_type(type)
@@ -689,3 +1162,63 @@ class Lower(BaseLower):
 
     def alloca_lltype(self, name, lltype):
         return cgutils.alloca_once(self.builder, lltype, name=name)
+
+
+class NoaliasLower(Lower):
+    """
+    Lower a variant of the function which takes the data pointers of its
+    array arguments as additional "noalias" arguments, so that LLVM can
+    assume that the arrays don't share any memory (e.g. to vectorize
+    loops without runtime overlap checks).  It is only called by the
+    generic function, after checking that the arrays are disjoint (see
+    Lower.lower_noalias_dispatch()).
+    """
+
+    def __init__(self, context, library, fndesc, interp, fastmath=frozenset()):
+        super(NoaliasLower, self).__init__(context, library, fndesc, interp,
+                                           fastmath=fastmath, noalias=False)
+
+    @staticmethod
+    def get_array_args(fndesc):
+        return [(name, ty) for name, ty in zip(fndesc.args, fndesc.argtypes)
+                if isinstance(ty, types.Array)]
+
+    @classmethod
+    def get_function_type(cls, context, fndesc):
+        fnty = context.call_conv.get_function_type(fndesc.restype,
+                                                   fndesc.argtypes)
+        datatys = [context.get_value_type(types.CPointer(ty.dtype))
+                   for _, ty in cls.get_array_args(fndesc)]
+        return Type.function(fnty.return_type, list(fnty.args) + datatys)
+
+    @staticmethod
+    def get_function_name(fndesc):
+        return fndesc.mangled_name + ".noalias"
+
+    def declare_function(self):
+        fnty = self.get_function_type(self.context, self.fndesc)
+        fn = self.module.add_function(fnty,
+                                      name=self.get_function_name(self.fndesc))
+        self.call_conv.decorate_function(fn, self.fndesc.args)
+        # Inlining into the generic function would lose the noalias
+        # information.
+        fn.attributes.add('noinline')
+        array_args = self.get_array_args(self.fndesc)
+        self.data_args = dict(zip([name for name, _ in array_args],
+                                  fn.args[-len(array_args):]))
+        for name, arg in self.data_args.items():
+            arg.name = "data.%s" % name
+            arg.add_attribute('noalias')
+        return fn
+
+    def pre_lower(self):
+        super(NoaliasLower, self).pre_lower()
+        # Access the arrays' data through the noalias arguments
+        for name, ty in self.get_array_args(self.fndesc):
+            ary = self.context.make_array(ty)(self.context, self.builder,
+                                              self.loadvar(name))
+            ary.data = self.data_args[name]
+            if name in self.ssa_vars:
+                self.ssa_values[None][name] = ary._getvalue()
+            else:
+                self.builder.store(ary._getvalue(), self.getvar(name))
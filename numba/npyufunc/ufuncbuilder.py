@@ -5,7 +5,7 @@ import numpy as np
 
 from numba.decorators import jit
 from numba.targets.registry import target_registry
-from numba.targets.options import TargetOptions
+from numba.targets.options import TargetOptions, fastmath_flags
 from numba import utils, compiler, types, sigutils
 from numba.numpy_support import as_dtype
 from . import _internal
@@ -20,6 +20,8 @@ class UFuncTargetOptions(TargetOptions):
     OPTIONS = {
         "nopython" : bool,
         "forceobj" : bool,
+        "fastmath" : fastmath_flags,
+        "noalias" : bool,
     }
 
 
@@ -1,4 +1,6 @@
 from __future__ import print_function, division, absolute_import
+import copy
+
 import numpy as np
 from llvmlite.llvmpy.core import (Type, Builder, LINKAGE_INTERNAL,
                                   ICMP_EQ, Constant)
@@ -6,6 +8,7 @@ import llvmlite.llvmpy.core as lc
 from llvmlite import binding as ll
 
 from numba import types, cgutils, config
+from numba.targets.arrayobj import populate_array, extents_may_overlap
 
 
 def _build_ufunc_loop_body(load, store, context, func, builder, arrays, out,
@@ -28,12 +31,13 @@ def _build_ufunc_loop_body(load, store, context, func, builder, arrays, out,
 
     store(retval)
 
-    # increment indices
-    for off, ary in zip(offsets, arrays):
-        builder.store(builder.add(builder.load(off), ary.step), off)
+    if offsets is not None:
+        # increment indices
+        for off, ary in zip(offsets, arrays):
+            builder.store(builder.add(builder.load(off), ary.step), off)
 
-    builder.store(builder.add(builder.load(store_offset), out.step),
-                  store_offset)
+        builder.store(builder.add(builder.load(store_offset), out.step),
+                      store_offset)
 
     return status.code
 
@@ -124,6 +128,63 @@ def build_fast_loop_body(context, func, builder, arrays, out, offsets,
                                   out, offsets, store_offset, signature)
 
 
+def build_noalias_loop(module, context, func, signature, arrays, out):
+    """
+    Build a function running the ufunc over contiguous arrays, where the
+    output is known not to overlap the inputs.  The output pointer is
+    marked "noalias" so that LLVM can vectorize the loop without
+    runtime overlap checks.
+    """
+    intp_t = context.get_value_type(types.intp)
+    fnty = Type.function(Type.void(), [ary.data.type for ary in arrays]
+                                      + [out.data.type, intp_t])
+    fn = module.add_function(fnty, "__ufunc__.noalias." + func.name)
+    fn.linkage = LINKAGE_INTERNAL
+    # Inlining into the wrapper would lose the noalias information
+    fn.attributes.add('noinline')
+    out_arg = fn.args[len(arrays)]
+    out_arg.add_attribute('noalias')
+    loopcount = fn.args[-1]
+
+    builder = Builder.new(fn.append_basic_block("entry"))
+    arrays = [ary.with_data(builder, arg)
+              for ary, arg in zip(arrays, fn.args)]
+    out = out.with_data(builder, out_arg)
+
+    with cgutils.for_range(builder, loopcount, intp=intp_t) as ind:
+        def load():
+            return [ary.load_aligned(ind) for ary in arrays]
+
+        def store(retval):
+            out.store_aligned(retval, ind)
+
+        _build_ufunc_loop_body(load, store, context, func, builder, arrays,
+                               out, None, None, signature)
+    builder.ret_void()
+    return fn
+
+
+def _output_may_overlap(context, builder, loopcount, arrays, out):
+    """
+    Whether the contiguous output buffer may overlap an input buffer.
+    """
+    intp_t = context.get_value_type(types.intp)
+
+    def extents(ary):
+        start = builder.ptrtoint(ary.data, intp_t)
+        return start, builder.add(start, builder.mul(loopcount, ary.step))
+
+    out_start, out_end = extents(out)
+    may_overlap = cgutils.false_bit
+    for ary in arrays:
+        start, end = extents(ary)
+        may_overlap = builder.or_(may_overlap,
+                                  extents_may_overlap(context, builder,
+                                                      start, end,
+                                                      out_start, out_end))
+    return may_overlap
+
+
 def build_ufunc_wrapper(library, context, func, signature, objmode, env):
     """
     Wrap the scalar function with a loop that iterates over the arguments
@@ -166,12 +227,12 @@ def build_ufunc_wrapper(library, context, func, signature, objmode, env):
     arrays = []
     for i, typ in enumerate(signature.args):
         arrays.append(UArrayArg(context, builder, arg_args, arg_steps, i,
-                                context.get_argument_type(typ)))
+                                context.get_argument_type(typ), typ))
 
     # Prepare output
     valty = context.get_data_type(signature.return_type)
     out = UArrayArg(context, builder, arg_args, arg_steps, len(actual_args),
-                    valty)
+                    valty, signature.return_type)
 
     # Setup indices
     offsets = []
@@ -206,6 +267,16 @@ def build_ufunc_wrapper(library, context, func, signature, objmode, env):
                                                        is_strided):
 
             with is_unit_strided:
+                noalias_loop = build_noalias_loop(wrapper_module, context,
+                                                  func, signature, arrays,
+                                                  out)
+                may_overlap = _output_may_overlap(context, builder, loopcount,
+                                                  arrays, out)
+                with cgutils.ifthen(builder, builder.not_(may_overlap)):
+                    builder.call(noalias_loop, [ary.data for ary in arrays]
+                                               + [out.data, loopcount])
+                    builder.ret_void()
+
                 with cgutils.for_range(builder, loopcount, intp=intp_t) as ind:
                     fastloop = build_fast_loop_body(context, func, builder,
                                                     arrays, out, offsets,
@@ -235,7 +306,11 @@ def build_ufunc_wrapper(library, context, func, signature, objmode, env):
 
 
 class UArrayArg(object):
-    def __init__(self, context, builder, args, steps, i, argtype):
+    def __init__(self, context, builder, args, steps, i, argtype, typ=None):
+        # float16 data is converted from and to float32 on load and store
+        self.half = typ == types.float16
+        if self.half:
+            argtype = context.get_data_type(typ)
         # Get data
         p = builder.gep(args, [context.get_constant(types.intp, i)])
         if cgutils.is_struct_ptr(argtype):
@@ -252,6 +327,16 @@ class UArrayArg(object):
         self.is_unit_strided = builder.icmp(ICMP_EQ, abisize, self.step)
         self.builder = builder
 
+    def with_data(self, builder, data):
+        """
+        Return a copy of this argument accessing the contiguous buffer
+        *data* through *builder*.
+        """
+        ary = copy.copy(self)
+        ary.builder = builder
+        ary.data = data
+        return ary
+
     def load(self, ind):
         offset = self.builder.mul(self.step, ind)
         return self.load_direct(offset)
@@ -261,11 +346,11 @@ class UArrayArg(object):
         if self.byref:
             return ptr
         else:
-            return self.builder.load(ptr)
+            return self._from_data(self.builder.load(ptr))
 
     def load_aligned(self, ind):
         ptr = self.builder.gep(self.data, [ind])
-        return self.builder.load(ptr)
+        return self._from_data(self.builder.load(ptr))
 
     def store(self, value, ind):
         offset = self.builder.mul(self.step, ind)
@@ -273,12 +358,23 @@ class UArrayArg(object):
 
     def store_direct(self, value, offset):
         ptr = cgutils.pointer_add(self.builder, self.data, offset)
+        value = self._to_data(value)
         assert ptr.type.pointee == value.type, (ptr.type, value.type)
         self.builder.store(value, ptr)
 
     def store_aligned(self, value, ind):
         ptr = self.builder.gep(self.data, [ind])
-        self.builder.store(value, ptr)
+        self.builder.store(self._to_data(value), ptr)
+
+    def _from_data(self, value):
+        if self.half:
+            return cgutils.from_half_bits(self.builder, value)
+        return value
+
+    def _to_data(self, value):
+        if self.half:
+            return cgutils.as_half_bits(self.builder, value)
+        return value
 
 
 class _GufuncWrapper(object):
@@ -565,15 +661,23 @@ class GUArrayArg(object):
         arycls = context.make_array(arytyp)
 
         self.array = arycls(context, builder)
-        self.array.data = builder.bitcast(self.data, self.array.data.type)
         if not self.as_scalar:
-            self.array.shape = cgutils.pack_array(builder, self.shape)
-            self.array.strides = cgutils.pack_array(builder, self.strides)
+            shape = self.shape
+            strides = self.strides
         else:
             one = context.get_constant(types.intp, 1)
             zero = context.get_constant(types.intp, 0)
-            self.array.shape = cgutils.pack_array(builder, [one])
-            self.array.strides = cgutils.pack_array(builder, [zero])
+            shape = [one]
+            strides = [zero]
+        itemsize = context.get_constant(types.intp,
+                                        context.get_abi_sizeof(
+                                            context.get_data_type(self.dtype)))
+        populate_array(self.array,
+                       data=self.data,
+                       shape=shape,
+                       strides=strides,
+                       itemsize=itemsize,
+                       meminfo=None)
         self.array_value = self.array._getpointer()
 
     def next(self, i):
@@ -24,6 +24,7 @@ FROM_DTYPE = {
     numpy.dtype('uint32'): types.uint32,
     numpy.dtype('uint64'): types.uint64,
 
+    numpy.dtype('float16'): types.float16,
     numpy.dtype('float32'): types.float32,
     numpy.dtype('float64'): types.float64,
 
@@ -120,6 +121,8 @@ def as_dtype(nbtype):
     if isinstance(nbtype, (types.CharSeq, types.UnicodeCharSeq)):
         letter = _as_dtype_letters[type(nbtype)]
         return numpy.dtype('%s%d' % (letter, nbtype.count))
+    if isinstance(nbtype, types.Record):
+        return nbtype.dtype
     raise NotImplementedError("%r cannot be represented as a Numpy dtype"
                               % (nbtype,))
 
@@ -253,6 +256,10 @@ def ufunc_find_matching_loop(ufunc, arg_types):
         if 'O' in ufunc_inputs:
             # Skip object arrays
             continue
+        if 'e' in candidate:
+            # Skip half precision loops: float16 is only a storage type,
+            # its values are computed on by the single precision loops
+            continue
         # Skip if any input or output argument is mismatching
         for outer, inner in zip(np_input_types, ufunc_inputs):
             # (outer is a dtype instance, inner is a type char)
@@ -0,0 +1,457 @@
+"""
+Explicit random number generator objects, usable from nopython code.
+
+Unlike the hidden Mersenne Twister states used by the random and
+np.random functions, these generators are passed around as arguments
+and have a tiny state, which makes it cheap to give each parallel
+worker (or each simulation path) its own reproducible stream::
+
+    from numba import jit, prng
+
+    @jit(nopython=True, nogil=True)
+    def simulate(gen, n):
+        s = 0.0
+        for i in range(n):
+            s += gen.random()
+        return s
+
+    base = prng.Philox4x32(seed=42)
+    streams = [base.advanced(i * 2**64) for i in range(1000)]
+
+The following methods are supported in nopython mode: next_uint64(),
+random(), standard_normal() and standard_exponential().  Streams are
+created and moved (with advance(), advanced() and jumped()) from Python
+code.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import binascii
+import math
+import os
+
+import numpy as np
+
+from . import types
+
+
+_MASK32 = (1 << 32) - 1
+_MASK64 = (1 << 64) - 1
+_MASK128 = (1 << 128) - 1
+
+
+def _seed_int(seed, nbits):
+    """
+    Return *seed* as a non-negative integer of *nbits* bits, drawing it
+    from the operating system's entropy if it is None.
+    """
+    if seed is None:
+        seed = int(binascii.hexlify(os.urandom(nbits // 8)), 16)
+    seed = int(seed)
+    if seed < 0:
+        raise ValueError("seed must be non-negative")
+    return seed & ((1 << nbits) - 1)
+
+
+def _splitmix64(x):
+    """
+    Return the next (state, output) pair of the SplitMix64 generator,
+    used to expand seeds.
+    """
+    x = (x + 0x9e3779b97f4a7c15) & _MASK64
+    z = x
+    z = ((z ^ (z >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return x, z ^ (z >> 31)
+
+
+# Tables for the 256-layer Ziggurat samplers (Marsaglia & Tsang, 2000).
+# Layer 0 is the base strip, which includes the tail beyond R.  For each
+# layer i, K[i] is the integer threshold below which a draw falls within
+# the layer's rectangle without further test, W[i] scales integers to
+# abscissae and F[i] is the density at the layer's right edge.
+
+def _ziggurat_tables(r, v, f, f_inv, nbits):
+    m = 2.0 ** nbits
+    q = v / f(r)
+    k = [0] * 256
+    w = [0.0] * 256
+    fs = [0.0] * 256
+    k[0] = int((r / q) * m)
+    w[0] = q / m
+    w[255] = r / m
+    fs[0] = 1.0
+    fs[255] = f(r)
+    x = r
+    for i in range(254, 0, -1):
+        prev = x
+        x = f_inv(v / x + f(x))
+        k[i + 1] = int((x / prev) * m)
+        fs[i] = f(x)
+        w[i] = x / m
+    return (np.array(k, dtype=np.uint64), np.array(w), np.array(fs))
+
+ZIGGURAT_NORMAL_R = 3.6541528853610088
+ZIGGURAT_NORMAL_K, ZIGGURAT_NORMAL_W, ZIGGURAT_NORMAL_F = _ziggurat_tables(
+    ZIGGURAT_NORMAL_R, 4.928673233974655e-3,
+    lambda x: math.exp(-0.5 * x * x), lambda y: math.sqrt(-2.0 * math.log(y)),
+    52)
+
+ZIGGURAT_EXP_R = 7.69711747013105
+ZIGGURAT_EXP_K, ZIGGURAT_EXP_W, ZIGGURAT_EXP_F = _ziggurat_tables(
+    ZIGGURAT_EXP_R, 3.949659822581572e-3,
+    lambda x: math.exp(-x), lambda y: -math.log(y),
+    53)
+
+
+def ziggurat_normal(next_uint64, random):
+    """
+    Draw a number from the standard normal distribution using the
+    Ziggurat method, given functions returning 64-bit unsigned integers
+    and floats in [0, 1).
+    """
+    k, w, f = ZIGGURAT_NORMAL_K, ZIGGURAT_NORMAL_W, ZIGGURAT_NORMAL_F
+    r = ZIGGURAT_NORMAL_R
+    while True:
+        bits = next_uint64()
+        idx = bits & 0xff
+        neg = (bits >> 8) & 1
+        rabs = (bits >> 9) & ((1 << 52) - 1)
+        x = rabs * float(w[idx])
+        if neg:
+            x = -x
+        if rabs < int(k[idx]):
+            return x
+        if idx == 0:
+            # Sample from the tail
+            while True:
+                xx = -math.log(1.0 - random()) / r
+                yy = -math.log(1.0 - random())
+                if yy + yy > xx * xx:
+                    return -(r + xx) if neg else r + xx
+        elif ((float(f[idx - 1]) - float(f[idx])) * random() + float(f[idx])
+              < math.exp(-0.5 * x * x)):
+            return x
+
+
+def ziggurat_exponential(next_uint64, random):
+    """
+    Draw a number from the standard exponential distribution using the
+    Ziggurat method, given functions returning 64-bit unsigned integers
+    and floats in [0, 1).
+    """
+    k, w, f = ZIGGURAT_EXP_K, ZIGGURAT_EXP_W, ZIGGURAT_EXP_F
+    while True:
+        bits = next_uint64()
+        idx = (bits >> 3) & 0xff
+        rabs = bits >> 11
+        x = rabs * float(w[idx])
+        if rabs < int(k[idx]):
+            return x
+        if idx == 0:
+            # Sample from the tail
+            return ZIGGURAT_EXP_R - math.log(1.0 - random())
+        elif ((float(f[idx - 1]) - float(f[idx])) * random() + float(f[idx])
+              < math.exp(-x)):
+            return x
+
+
+class RandomGenerator(object):
+    """
+    Base class for random generators.  The state is stored as an array
+    of 64-bit words, which compiled code reads and updates in place.
+    Subclasses define the *engine* name, the number of state words and
+    the pure Python _next() and _advance() methods, which compute the
+    same numbers as the compiled implementation.
+    """
+
+    engine = None
+    state_size = None
+    # Number of draws skipped by jumped()
+    jump_size = None
+
+    def __init__(self, words):
+        self._state = np.array(words, dtype=np.uint64)
+        assert self._state.shape == (self.state_size,)
+
+    @property
+    def _numba_type_(self):
+        return types.RandomGenerator(self.engine)
+
+    @property
+    def _state_address(self):
+        return self._state.ctypes.data
+
+    @property
+    def state(self):
+        """
+        The generator's state, as a tuple of integers.
+        """
+        return tuple(int(x) for x in self._state)
+
+    @state.setter
+    def state(self, words):
+        self._state[:] = np.array(words, dtype=np.uint64)
+
+    def copy(self):
+        """
+        Return a new generator with the same state.
+        """
+        new = object.__new__(type(self))
+        new._state = self._state.copy()
+        return new
+
+    def next_uint64(self):
+        """
+        Return the next 64-bit unsigned integer.
+        """
+        value, words = self._next(self.state)
+        self.state = words
+        return value
+
+    def random(self):
+        """
+        Return the next float in [0, 1).
+        """
+        return (self.next_uint64() >> 11) * (1.0 / 9007199254740992.0)
+
+    def standard_normal(self):
+        """
+        Return the next number from the standard normal distribution
+        (using the Ziggurat method).
+        """
+        return ziggurat_normal(self.next_uint64, self.random)
+
+    def standard_exponential(self):
+        """
+        Return the next number from the standard exponential distribution
+        (using the Ziggurat method).
+        """
+        return ziggurat_exponential(self.next_uint64, self.random)
+
+    def advance(self, n):
+        """
+        Advance the generator in place, as if *n* numbers had been drawn
+        with next_uint64().  Return the generator.
+        """
+        self.state = self._advance(self.state, int(n))
+        return self
+
+    def advanced(self, n):
+        """
+        Return a new generator advanced by *n* draws from this one.
+        """
+        return self.copy().advance(n)
+
+    def jumped(self, jumps=1):
+        """
+        Return a new generator whose stream starts *jumps* times
+        jump_size draws after this one's, so that it doesn't overlap
+        with it in practice.
+        """
+        return self.advanced(jumps * self.jump_size)
+
+    def __repr__(self):
+        return "%s(state=%r)" % (type(self).__name__, self.state)
+
+
+def philox4x32_block(counter, key):
+    """
+    Compute the Philox4x32-10 block for the 128-bit *counter* and the
+    64-bit *key*.  A tuple of four 32-bit integers is returned.
+    """
+    c0, c1, c2, c3 = [(counter >> (32 * i)) & _MASK32 for i in range(4)]
+    k0, k1 = key & _MASK32, key >> 32
+    for i in range(10):
+        if i:
+            k0 = (k0 + 0x9E3779B9) & _MASK32
+            k1 = (k1 + 0xBB67AE85) & _MASK32
+        p0 = 0xD2511F53 * c0
+        p1 = 0xCD9E8D57 * c2
+        c0, c1, c2, c3 = ((p1 >> 32) ^ c1 ^ k0, p1 & _MASK32,
+                          (p0 >> 32) ^ c3 ^ k1, p0 & _MASK32)
+    return c0, c1, c2, c3
+
+
+class Philox4x32(RandomGenerator):
+    """
+    The counter-based Philox4x32-10 generator (Salmon et al., 2011).
+    Each block of the 128-bit counter gives two 64-bit outputs.
+
+    State words: counter (low, high), key, two buffered outputs, and
+    the index of the next buffered output (2 if the buffer is empty).
+    """
+
+    engine = "philox4x32"
+    state_size = 6
+    jump_size = 2 ** 65
+
+    def __init__(self, seed=None, counter=0):
+        counter = int(counter) & _MASK128
+        super(Philox4x32, self).__init__(
+            [counter & _MASK64, counter >> 64, _seed_int(seed, 64),
+             0, 0, 2])
+
+    @staticmethod
+    def _block(counter, key):
+        c0, c1, c2, c3 = philox4x32_block(counter, key)
+        return c0 | (c1 << 32), c2 | (c3 << 32)
+
+    def _next(self, words):
+        lo, hi, key, buf0, buf1, index = words
+        if index >= 2:
+            counter = lo | (hi << 64)
+            buf0, buf1 = self._block(counter, key)
+            counter = (counter + 1) & _MASK128
+            lo, hi = counter & _MASK64, counter >> 64
+            index = 0
+        value = (buf0, buf1)[index]
+        return value, (lo, hi, key, buf0, buf1, index + 1)
+
+    def _advance(self, words, n):
+        lo, hi, key, buf0, buf1, index = words
+        counter = lo | (hi << 64)
+        # Position in the stream, modulo its period of 2**129 draws
+        mask = (1 << 129) - 1
+        pos = (2 * counter - (2 - index) + n) & mask
+        # As after drawing: the buffer holds the block before the counter,
+        # with one or no words left
+        counter = ((pos + 1) // 2) & _MASK128
+        index = 2 - pos % 2
+        if pos:
+            buf0, buf1 = self._block((counter - 1) & _MASK128, key)
+        else:
+            buf0 = buf1 = 0
+        return (counter & _MASK64, counter >> 64, key, buf0, buf1, index)
+
+
+_PCG64_MULT = 0x2360ED051FC65DA44385DF649FCCF645
+
+
+class PCG64(RandomGenerator):
+    """
+    The PCG64 (XSL-RR 128/64) generator by M.E. O'Neill, producing the
+    same numbers as Numpy's PCG64 for a given 128-bit state and
+    increment.
+
+    State words: state (low, high), increment (low, high).
+    """
+
+    engine = "pcg64"
+    state_size = 4
+    jump_size = 0x9e3779b97f4a7c15f39cc0605cedc835
+
+    def __init__(self, seed=None, stream=0):
+        inc = ((int(stream) << 1) | 1) & _MASK128
+        state = self._step(0, inc)
+        state = self._step((state + _seed_int(seed, 128)) & _MASK128, inc)
+        super(PCG64, self).__init__(self._words(state, inc))
+
+    @staticmethod
+    def _words(state, inc):
+        return (state & _MASK64, state >> 64, inc & _MASK64, inc >> 64)
+
+    @staticmethod
+    def _step(state, inc):
+        return (state * _PCG64_MULT + inc) & _MASK128
+
+    def _next(self, words):
+        state = words[0] | (words[1] << 64)
+        inc = words[2] | (words[3] << 64)
+        state = self._step(state, inc)
+        rot = state >> 122
+        x = ((state >> 64) ^ state) & _MASK64
+        value = ((x >> rot) | (x << ((-rot) & 63))) & _MASK64
+        return value, self._words(state, inc)
+
+    def _advance(self, words, n):
+        state = words[0] | (words[1] << 64)
+        inc = words[2] | (words[3] << 64)
+        # Brown's algorithm for jumping an LCG ahead in log(n) steps
+        acc_mult, acc_plus = 1, 0
+        cur_mult, cur_plus = _PCG64_MULT, inc
+        n &= _MASK128
+        while n:
+            if n & 1:
+                acc_mult = (acc_mult * cur_mult) & _MASK128
+                acc_plus = (acc_plus * cur_mult + cur_plus) & _MASK128
+            cur_plus = ((cur_mult + 1) * cur_plus) & _MASK128
+            cur_mult = (cur_mult * cur_mult) & _MASK128
+            n >>= 1
+        state = (acc_mult * state + acc_plus) & _MASK128
+        return self._words(state, inc)
+
+
+def _rotl64(x, k):
+    return ((x << k) | (x >> (64 - k))) & _MASK64
+
+
+class Xoroshiro128Plus(RandomGenerator):
+    """
+    The xoroshiro128+ generator by D. Blackman and S. Vigna (2018
+    parameters).  Its state must not be all zeros.
+
+    State words: s0, s1.
+    """
+
+    engine = "xoroshiro128+"
+    state_size = 2
+    jump_size = 2 ** 64
+
+    # Transition matrices (over GF(2)) for 2**k steps, as lists of
+    # columns, computed lazily
+    _powers = []
+
+    def __init__(self, seed=None):
+        x, s0 = _splitmix64(_seed_int(seed, 64))
+        x, s1 = _splitmix64(x)
+        super(Xoroshiro128Plus, self).__init__([s0, s1])
+
+    @staticmethod
+    def _step(s0, s1):
+        s1 ^= s0
+        return (_rotl64(s0, 24) ^ s1 ^ ((s1 << 16) & _MASK64),
+                _rotl64(s1, 37))
+
+    def _next(self, words):
+        s0, s1 = words
+        return (s0 + s1) & _MASK64, self._step(s0, s1)
+
+    @classmethod
+    def _step_vector(cls, v):
+        s0, s1 = cls._step(v & _MASK64, v >> 64)
+        return s0 | (s1 << 64)
+
+    @staticmethod
+    def _apply(columns, v):
+        result = 0
+        j = 0
+        while v:
+            if v & 1:
+                result ^= columns[j]
+            v >>= 1
+            j += 1
+        return result
+
+    @classmethod
+    def _power(cls, k):
+        powers = cls._powers
+        if not powers:
+            powers.append([cls._step_vector(1 << j) for j in range(128)])
+        while len(powers) <= k:
+            m = powers[-1]
+            powers.append([cls._apply(m, col) for col in m])
+        return powers[k]
+
+    def _advance(self, words, n):
+        # The transition is linear over GF(2): apply the matrices for
+        # the powers of two making up *n* (modulo the period 2**128 - 1).
+        v = words[0] | (words[1] << 64)
+        n %= _MASK128
+        k = 0
+        while n:
+            if n & 1:
+                v = self._apply(self._power(k), v)
+            n >>= 1
+            k += 1
+        return (v & _MASK64, v >> 64)
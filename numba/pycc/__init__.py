@@ -10,6 +10,7 @@ import tempfile
 import sys
 
 from .compiler import Compiler, find_shared_ending, find_args, find_linker
+from .multiversion import CPU_LEVELS, parse_cpu_levels
 
 
 def get_ending(args):
@@ -41,11 +42,22 @@ def main(args=None):
     parser.add_argument('--python', action='store_true',
                         help='Emit additionally generated Python wrapper and '
                         'extension module code in output')
+    parser.add_argument('--cpu-levels', default='',
+                        help='Also compile the functions for these CPU '
+                        'feature levels, selecting the best one at runtime '
+                        '(comma-separated list of %s)' % ', '.join(CPU_LEVELS))
     parser.add_argument('-d', '--debug', action='store_true',
                         help='Print extra debug information')
 
     args = parser.parse_args(args)
 
+    try:
+        cpu_levels = parse_cpu_levels(args.cpu_levels)
+    except ValueError as e:
+        parser.error(str(e))
+    if cpu_levels and args.llvm:
+        parser.error("--cpu-levels cannot be used with --llvm")
+
     logger = logging.getLogger(__name__)
     if args.debug:
         logger.setLevel(logging.DEBUG)
@@ -65,19 +77,25 @@ def main(args=None):
         sys.exit(1)
 
     logger.debug('inputs --> %s', args.inputs)
-    with Compiler(args.inputs, module_name=module_name) as compiler:
+    with Compiler(args.inputs, module_name=module_name,
+                  cpu_levels=cpu_levels) as compiler:
         if args.llvm:
             logger.debug('emit llvm')
             compiler.write_llvm_bitcode(args.output, wrap=args.python)
         elif args.olibs:
             logger.debug('emit object file')
-            compiler.write_native_object(args.output, wrap=args.python)
+            outputs = compiler.write_native_objects(args.output,
+                                                    wrap=args.python)
+            logger.debug('object files --> %s', outputs)
         else:
             logger.debug('emit shared library')
             logger.debug('write to temporary object file %s', tempfile.gettempdir())
             temp_obj = (tempfile.gettempdir() + os.sep +
                         os.path.basename(args.output) + '.o')
-            compiler.write_native_object(temp_obj, wrap=args.python)
-            cmdargs = (find_linker(),) + find_args() + ('-o', args.output, temp_obj)
+            temp_objs = compiler.write_native_objects(temp_obj,
+                                                      wrap=args.python)
+            cmdargs = ((find_linker(),) + find_args() +
+                       ('-o', args.output) + tuple(temp_objs))
             subprocess.check_call(cmdargs)
-            os.remove(temp_obj)
+            for obj in temp_objs:
+                os.remove(obj)
@@ -11,9 +11,10 @@ import llvmlite.llvmpy.ee as le
 import llvmlite.llvmpy.passes as lp
 import llvmlite.binding as ll
 
-from numba import cgutils
+from numba import cgutils, types
 from numba.utils import IS_PY3
 from . import llvm_types as lt
+from . import multiversion
 from .decorators import registry as export_registry
 from numba.compiler import compile_extra, Flags
 from numba.targets.registry import CPUTarget
@@ -103,6 +104,10 @@ class _Compiler(object):
     :param inputs: input file(s).
     :type inputs: iterable
     :param module_name: the name of the exported module.
+    :param cpu_levels: names of CPU feature levels (see
+        :data:`numba.pycc.multiversion.CPU_LEVELS`) to compile additional
+        versions of the exported functions for.  The best version is
+        selected when the functions are called.
     """
 
     #: Structure used to describe a method of an extension type.
@@ -120,9 +125,12 @@ class _Compiler(object):
 
     method_def_ptr = lc.Type.pointer(method_def_ty)
 
-    def __init__(self, inputs, module_name='numba_exported'):
+    def __init__(self, inputs, module_name='numba_exported', cpu_levels=()):
         self.inputs = inputs
         self.module_name = module_name
+        self.cpu_levels = list(cpu_levels)
+        if self.cpu_levels:
+            multiversion.check_target()
         self.export_python_wrap = False
 
     def __enter__(self):
@@ -145,45 +153,98 @@ class _Compiler(object):
         self.exported_signatures = export_registry
         self.exported_function_types = {}
 
+        library, dispatch_types = self._compile_exports(self.module_name)
+
+        if self.cpu_levels:
+            # Select the version to call through dispatcher functions
+            # exported under the original names.
+            library.add_llvm_module(multiversion.cpu_level_module())
+            dispatch_module = library.create_ir_module("dispatch")
+            for entry in self.exported_signatures:
+                multiversion.build_dispatcher(dispatch_module, entry.symbol,
+                                              dispatch_types[entry],
+                                              self.cpu_levels)
+            library.add_ir_module(dispatch_module)
+
+        if self.export_python_wrap:
+            wrapper_module = library.create_ir_module("wrapper")
+            self._emit_python_wrapper(wrapper_module)
+            library.add_ir_module(wrapper_module)
+
+        return library
+
+    def _compile_exports(self, name, cpu_level=None):
+        """
+        Compile all exported functions into a new library, for the given
+        CPU level (None for the baseline).  When compiling for several
+        CPU levels, the exported symbols are suffixed with the level name.
+
+        Returns the library and a dict mapping the export entries to the
+        LLVM type of the exported functions.
+        """
         typing_ctx = CPUTarget.typing_context
         target_ctx = CPUTarget.target_context
 
-        codegen = target_ctx.aot_codegen(self.module_name)
-        library = codegen.create_library(self.module_name)
+        if cpu_level is None:
+            codegen = target_ctx.aot_codegen(name)
+        else:
+            features = multiversion.CPU_LEVELS[cpu_level].features
+            codegen = target_ctx.aot_codegen(name, features=features)
+        library = codegen.create_library(name)
 
         # Generate IR for all exported functions
         flags = Flags()
         flags.set("no_compile")
 
+        exported_types = {}
         for entry in self.exported_signatures:
             cres = compile_extra(typing_ctx, target_ctx, entry.function,
                                  entry.signature.args,
                                  entry.signature.return_type, flags,
                                  locals={}, library=library)
 
+            if self.cpu_levels:
+                symbol = multiversion.versioned_name(entry.symbol, cpu_level)
+            else:
+                symbol = entry.symbol
+
             func_name = cres.fndesc.llvm_func_name
             llvm_func = cres.library.get_function(func_name)
+            fnty = cres.target_context.call_conv.get_function_type(
+                cres.fndesc.restype, cres.fndesc.argtypes)
 
             if self.export_python_wrap:
                 # XXX: unsupported (necessary?)
                 llvm_func.linkage = lc.LINKAGE_INTERNAL
                 wrappername = cres.fndesc.llvm_cpython_wrapper_name
                 wrapper = cres.library.get_function(wrappername)
-                wrapper.name = entry.symbol
+                wrapper.name = symbol
                 wrapper.linkage = lc.LINKAGE_EXTERNAL
-                fnty = cres.target_context.call_conv.get_function_type(
-                    cres.fndesc.restype, cres.fndesc.argtypes)
                 self.exported_function_types[entry] = fnty
+                pyobj = target_ctx.get_argument_type(types.pyobject)
+                exported_types[entry] = lc.Type.function(pyobj, [pyobj] * 3)
             else:
                 llvm_func.linkage = lc.LINKAGE_EXTERNAL
-                llvm_func.name = entry.symbol
+                llvm_func.name = symbol
+                exported_types[entry] = fnty
 
-        if self.export_python_wrap:
-            wrapper_module = library.create_ir_module("wrapper")
-            self._emit_python_wrapper(wrapper_module)
-            library.add_ir_module(wrapper_module)
+        return library, exported_types
 
-        return library
+    def _cull_versions(self):
+        """
+        Compile the exported functions for each additional CPU level,
+        returning a list of libraries.  Only the versioned functions are
+        exported from them, to avoid clashing with the baseline library.
+        """
+        libraries = []
+        for cpu_level in self.cpu_levels:
+            library, _ = self._compile_exports(
+                "%s__%s" % (self.module_name, cpu_level), cpu_level)
+            library.internalize_symbols(
+                [multiversion.versioned_name(entry.symbol, cpu_level)
+                 for entry in self.exported_signatures])
+            libraries.append(library)
+        return libraries
 
     def _process_inputs(self, wrap=False, **kws):
         for ifile in self.inputs:
@@ -193,17 +254,40 @@ class _Compiler(object):
         self.export_python_wrap = wrap
 
     def write_llvm_bitcode(self, output, **kws):
+        if self.cpu_levels:
+            raise ValueError("CPU levels need native code generation")
         self._process_inputs(**kws)
         library = self._cull_exports()
         with open(output, 'wb') as fout:
             fout.write(library.emit_bitcode())
 
     def write_native_object(self, output, **kws):
+        if self.cpu_levels:
+            raise ValueError("CPU levels need several object files, "
+                             "use write_native_objects()")
         self._process_inputs(**kws)
         library = self._cull_exports()
         with open(output, 'wb') as fout:
             fout.write(library.emit_native_object())
 
+    def write_native_objects(self, output, **kws):
+        """
+        Write *output* as an object file, plus one object file per
+        CPU level named after it (e.g. ``mod.avx2.o`` for ``mod.o``).
+        All the object files must be linked together.
+
+        Returns the list of object file names.
+        """
+        self._process_inputs(**kws)
+        libraries = [self._cull_exports()] + self._cull_versions()
+        root, ext = os.path.splitext(output)
+        outputs = [output] + ["%s.%s%s" % (root, cpu_level, ext)
+                              for cpu_level in self.cpu_levels]
+        for library, fname in zip(libraries, outputs):
+            with open(fname, 'wb') as fout:
+                fout.write(library.emit_native_object())
+        return outputs
+
     def emit_type(self, tyobj):
         ret_val = str(tyobj)
         if 'int' in ret_val:
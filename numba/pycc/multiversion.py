@@ -0,0 +1,167 @@
+"""
+Support for compiling exported functions for several x86-64 CPU feature
+levels, and selecting the best version when the functions are first
+called.
+
+This is only used by pycc: the JIT compiles for the host CPU (see
+JITCPUCodegen._customize_tm_options()), which is known when compiling.
+"""
+from __future__ import print_function, division, absolute_import
+
+from collections import namedtuple, OrderedDict
+
+import llvmlite.llvmpy.core as lc
+import llvmlite.binding as ll
+
+from numba import cgutils
+from . import llvm_types as lt
+
+
+CPULevel = namedtuple('CPULevel', ('rank', 'features'))
+
+_sse42_features = '+sse4.2,+popcnt'
+_avx2_features = _sse42_features + ',+avx,+avx2,+fma,+f16c,+bmi,+bmi2'
+_avx512_features = _avx2_features + ',+avx512f'
+
+# The feature levels which can be asked for, from the least to the most
+# capable.  The rank is the value returned by the detection function
+# (see _cpu_level_asm below); the baseline has rank 0.
+CPU_LEVELS = OrderedDict([
+    ('sse42', CPULevel(1, _sse42_features)),
+    ('avx2', CPULevel(2, _avx2_features)),
+    ('avx512', CPULevel(3, _avx512_features)),
+])
+
+CPU_LEVEL_FUNC = "numba_pycc_cpu_level"
+
+# Compute the CPU level once, using CPUID and checking that the OS saves
+# the wider registers (XGETBV).
+_cpu_level_asm = r"""
+@{func}.cache = linkonce_odr hidden global i32 -1
+
+define linkonce_odr hidden i32 @{func}() {{
+entry:
+  %cached = load i32* @{func}.cache
+  %known = icmp sge i32 %cached, 0
+  br i1 %known, label %done, label %detect
+
+detect:
+  %leaf0 = call {{ i32, i32, i32, i32 }} asm "cpuid", "={{ax}},={{bx}},={{cx}},={{dx}},{{ax}},{{cx}}"(i32 0, i32 0)
+  %maxleaf = extractvalue {{ i32, i32, i32, i32 }} %leaf0, 0
+  %leaf1 = call {{ i32, i32, i32, i32 }} asm "cpuid", "={{ax}},={{bx}},={{cx}},={{dx}},{{ax}},{{cx}}"(i32 1, i32 0)
+  %ecx1 = extractvalue {{ i32, i32, i32, i32 }} %leaf1, 2
+  ; SSE4.2 (bit 20) and POPCNT (bit 23)
+  %sse42bits = and i32 %ecx1, 9437184
+  %has_sse42 = icmp eq i32 %sse42bits, 9437184
+  ; FMA (bit 12), OSXSAVE (bit 27), AVX (bit 28) and F16C (bit 29)
+  %avxbits = and i32 %ecx1, 939528192
+  %has_avx = icmp eq i32 %avxbits, 939528192
+  br i1 %has_avx, label %xgetbv, label %result
+
+xgetbv:
+  %xcr0pair = call {{ i32, i32 }} asm "xgetbv", "={{ax}},={{dx}},{{cx}}"(i32 0)
+  %xcr0 = extractvalue {{ i32, i32 }} %xcr0pair, 0
+  ; XMM and YMM state
+  %ymmstate = and i32 %xcr0, 6
+  %os_ymm = icmp eq i32 %ymmstate, 6
+  ; XMM, YMM, opmask and ZMM state
+  %zmmstate = and i32 %xcr0, 230
+  %os_zmm = icmp eq i32 %zmmstate, 230
+  %has_leaf7 = icmp uge i32 %maxleaf, 7
+  br i1 %has_leaf7, label %leaf7, label %result
+
+leaf7:
+  %leaf7v = call {{ i32, i32, i32, i32 }} asm "cpuid", "={{ax}},={{bx}},={{cx}},={{dx}},{{ax}},{{cx}}"(i32 7, i32 0)
+  %ebx7 = extractvalue {{ i32, i32, i32, i32 }} %leaf7v, 1
+  ; BMI1 (bit 3), AVX2 (bit 5) and BMI2 (bit 8)
+  %avx2bits = and i32 %ebx7, 296
+  %cpu_avx2 = icmp eq i32 %avx2bits, 296
+  %has_avx2 = and i1 %cpu_avx2, %os_ymm
+  ; AVX512F (bit 16)
+  %avx512bits = and i32 %ebx7, 65536
+  %cpu_avx512 = icmp ne i32 %avx512bits, 0
+  %os_avx512 = and i1 %cpu_avx512, %os_zmm
+  %has_avx512 = and i1 %os_avx512, %has_avx2
+  br label %result
+
+result:
+  %avx2 = phi i1 [ false, %detect ], [ false, %xgetbv ], [ %has_avx2, %leaf7 ]
+  %avx512 = phi i1 [ false, %detect ], [ false, %xgetbv ], [ %has_avx512, %leaf7 ]
+  %level1 = zext i1 %has_sse42 to i32
+  %level2 = select i1 %avx2, i32 2, i32 %level1
+  %level = select i1 %avx512, i32 3, i32 %level2
+  store i32 %level, i32* @{func}.cache
+  br label %done
+
+done:
+  %res = phi i32 [ %cached, %entry ], [ %level, %result ]
+  ret i32 %res
+}}
+"""
+
+
+def parse_cpu_levels(text):
+    """
+    Parse a comma-separated list of CPU level names.
+    """
+    levels = [name.strip() for name in text.split(',') if name.strip()]
+    for name in levels:
+        if name not in CPU_LEVELS:
+            raise ValueError("unknown CPU level %r (should be one of %s)"
+                             % (name, ", ".join(CPU_LEVELS)))
+    return sorted(set(levels), key=lambda name: CPU_LEVELS[name].rank)
+
+
+def check_target():
+    """
+    Check that the default target supports multiversioning.
+    """
+    arch = ll.get_default_triple().split('-')[0]
+    if arch not in ('x86_64', 'amd64'):
+        raise RuntimeError("CPU levels are only supported on x86-64, not %s"
+                           % (arch,))
+
+
+def versioned_name(name, level=None):
+    """
+    Return the symbol name of the version of function *name* compiled
+    for *level* (None for the baseline).
+    """
+    return "%s__%s" % (name, level or 'baseline')
+
+
+def cpu_level_module():
+    """
+    Return a LLVM module defining the CPU level detection function.
+    """
+    asm = _cpu_level_asm.format(func=CPU_LEVEL_FUNC)
+    triple = 'target triple = "%s"\n' % (ll.get_default_triple(),)
+    return ll.parse_assembly(triple + asm)
+
+
+def build_dispatcher(module, name, fnty, levels):
+    """
+    Define function *name* of type *fnty* in *module*.  It forwards its
+    arguments to the version compiled for the most capable of *levels*
+    supported by the running CPU, or to the baseline version.
+    """
+    detect = module.get_or_insert_function(lc.Type.function(lt._int32, ()),
+                                           name=CPU_LEVEL_FUNC)
+    fn = module.add_function(fnty, name=name)
+    builder = lc.Builder.new(fn.append_basic_block('entry'))
+    level = builder.call(detect, ())
+
+    def forward(version_name):
+        version = module.get_or_insert_function(fnty, name=version_name)
+        res = builder.call(version, list(fn.args))
+        if fnty.return_type == lc.Type.void():
+            builder.ret_void()
+        else:
+            builder.ret(res)
+
+    for lvl in sorted(levels, key=lambda name: -CPU_LEVELS[name].rank):
+        rank = lc.Constant.int(lt._int32, CPU_LEVELS[lvl].rank)
+        with cgutils.ifthen(builder, builder.icmp(lc.ICMP_SGE, level, rank)):
+            forward(versioned_name(name, lvl))
+    forward(versioned_name(name))
+    return fn
@@ -9,7 +9,12 @@ import llvmlite.llvmpy.core as lc
 
 from numba.config import PYVERSION
 import numba.ctypes_support as ctypes
-from numba import types, utils, cgutils, _helperlib, assume
+from numba import types, utils, cgutils, _helperlib, numpy_support
+
+
+# Numpy dtypes whose address is embedded in generated code for boxing
+# arrays; keep them alive.
+_boxed_dtypes = {}
 
 
 class PythonAPI(object):
@@ -841,6 +846,12 @@ class PythonAPI(object):
             return self.builder.fptrunc(fval,
                                         self.context.get_argument_type(typ))
 
+        elif typ == types.float16:
+            fobj = self.number_float(obj)
+            fval = self.float_as_double(fobj)
+            self.decref(fobj)
+            return self.context.cast(self.builder, fval, types.float64, typ)
+
         elif typ == types.float64:
             fobj = self.number_float(obj)
             fval = self.float_as_double(fobj)
@@ -899,10 +910,36 @@ class PythonAPI(object):
         elif isinstance(typ, (types.Tuple, types.UniTuple)):
             return self.to_native_tuple(obj, typ)
 
+        elif isinstance(typ, types.RandomGenerator):
+            return self.to_native_random_generator(obj, typ)
+
         raise NotImplementedError(typ)
 
+    def to_native_random_generator(self, obj, typ):
+        """
+        Get the address of the state words of a numba.prng generator.
+        """
+        addrobj = self.object_getattr_string(obj, "_state_address")
+        with cgutils.if_unlikely(self.builder, cgutils.is_null(self.builder,
+                                                               addrobj)):
+            self.builder.ret(self.get_null_object())
+        longobj = self.number_long(addrobj)
+        self.decref(addrobj)
+        addr = self.long_as_ulonglong(longobj)
+        self.decref(longobj)
+        return self.builder.inttoptr(addr,
+                                     self.context.get_argument_type(typ))
+
     def from_native_return(self, val, typ):
-        return self.from_native_value(val, typ)
+        """
+        Convert native value *val* of type *typ* returned by a function
+        to a Python object.  The native value's references are consumed.
+        """
+        if isinstance(typ, types.Optional):
+            typ = typ.type
+        obj = self.from_native_value(val, typ)
+        self.context.decref(self.builder, typ, val)
+        return obj
 
     def from_native_value(self, val, typ):
         if typ == types.pyobject:
@@ -920,7 +957,7 @@ class PythonAPI(object):
             ival = self.builder.sext(val, self.longlong)
             return self.long_from_longlong(ival)
 
-        elif typ == types.float32:
+        elif typ in (types.float16, types.float32):
             dbval = self.builder.fpext(val, self.double)
             return self.float_from_double(dbval)
 
@@ -952,7 +989,7 @@ class PythonAPI(object):
             return ret
 
         elif isinstance(typ, types.Optional):
-            return self.from_native_return(val, typ.type)
+            return self.from_native_value(val, typ.type)
 
         elif isinstance(typ, types.Array):
             return self.from_native_array(val, typ)
@@ -991,12 +1028,24 @@ class PythonAPI(object):
         return self.builder.load(aryptr)
 
     def from_native_array(self, ary, typ):
-        assert assume.return_argument_array_only
+        """
+        Box native array *ary* of type *typ*.  If the array is an argument
+        passed unchanged, the original Numpy array is returned; otherwise
+        a new Numpy array sharing the native array's memory is created.
+        """
         nativearycls = self.context.make_array(typ)
         nativeary = nativearycls(self.context, self.builder, value=ary)
-        parent = nativeary.parent
-        self.incref(parent)
-        return parent
+        aryptr = self.builder.bitcast(nativeary._getpointer(), self.voidptr)
+
+        dtype = numpy_support.as_dtype(typ.dtype)
+        _boxed_dtypes[typ.dtype] = dtype
+        dtypeaddr = Constant.int(self.py_ssize_t, id(dtype))
+        dtypeobj = dtypeaddr.inttoptr(self.pyobj)
+        ndim = Constant.int(Type.int(), typ.ndim)
+
+        fnty = Type.function(self.pyobj, [self.voidptr, Type.int(), self.pyobj])
+        fn = self._get_function(fnty, name="numba_box_array")
+        return self.builder.call(fn, [aryptr, ndim, dtypeobj])
 
     def to_native_tuple(self, obj, typ):
         """
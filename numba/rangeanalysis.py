@@ -0,0 +1,168 @@
+"""
+Value range analysis over the numba IR.
+
+The analysis finds the variables which can only hold non-negative
+integers (or tuples and iterators of non-negative integers), such as
+loop indices over ``range(a.shape[0])``.  Indexing an array with those
+needs no wraparound of negative indices.
+"""
+from __future__ import print_function, division, absolute_import
+
+from numba import ir, types, utils
+
+
+# Attributes of arrays which are always non-negative integers
+_NONNEGATIVE_ARRAY_ATTRS = frozenset(['shape', 'size', 'ndim', 'itemsize',
+                                      'nbytes'])
+
+# Binary operators whose result is non-negative if both operands are
+_BOTH_OPERANDS_OPS = frozenset(['+', '*', '//', '|', '^'])
+# Binary operators whose result is non-negative if either operand is
+_EITHER_OPERAND_OPS = frozenset(['&'])
+
+
+class NonNegativeAnalysis(object):
+    """
+    Find the variables of the function which are provably non-negative.
+
+    The analysis is flow-insensitive: a variable is non-negative if
+    all its definitions are.  It starts by assuming that all variables
+    are non-negative, and discards those with a definition which can't
+    be proven non-negative until a fixed point is reached (so that loop
+    counters such as ``i = i + 1`` can be proven).
+    """
+
+    def __init__(self, blocks, typemap):
+        self.blocks = blocks
+        self.typemap = typemap
+        self.definitions = {}
+        for block in utils.itervalues(blocks):
+            for inst in block.body:
+                if isinstance(inst, ir.Assign):
+                    self.definitions.setdefault(inst.target.name,
+                                                []).append(inst.value)
+
+    def run(self):
+        """
+        Return the set of the names of non-negative variables.
+        """
+        self.nonneg = set(self.definitions)
+        changed = True
+        while changed:
+            changed = False
+            for name in list(self.nonneg):
+                if self._is_unsigned(name):
+                    continue
+                if not all(self.is_nonneg(value)
+                           for value in self.definitions[name]):
+                    self.nonneg.discard(name)
+                    changed = True
+        return frozenset(self.nonneg)
+
+    def _is_unsigned(self, name):
+        ty = self.typemap.get(name)
+        return isinstance(ty, types.Integer) and not ty.signed
+
+    def _is_nonneg_constant(self, value):
+        if isinstance(value, tuple):
+            return all(self._is_nonneg_constant(v) for v in value)
+        return isinstance(value, utils.INT_TYPES) and value >= 0
+
+    def _global_value(self, var):
+        """
+        Return the Python object referred to by *var*, if it is a global.
+        """
+        defs = self.definitions.get(var.name, ())
+        if len(defs) == 1:
+            value = defs[0]
+            if isinstance(value, ir.Var):
+                return self._global_value(value)
+            elif isinstance(value, (ir.Global, ir.FreeVar)):
+                return value.value
+
+    def is_nonneg(self, value):
+        """
+        Whether the IR *value* is non-negative, assuming the variables
+        currently in the set are.
+        """
+        if isinstance(value, ir.Var):
+            return value.name in self.nonneg or self._is_unsigned(value.name)
+        elif isinstance(value, (ir.Const, ir.Global, ir.FreeVar)):
+            return self._is_nonneg_constant(value.value)
+        elif isinstance(value, ir.Expr):
+            handler = getattr(self, '_expr_' + value.op, None)
+            if handler is not None:
+                return handler(value)
+        return False
+
+    def _expr_binop(self, expr):
+        if expr.fn in _BOTH_OPERANDS_OPS:
+            return self.is_nonneg(expr.lhs) and self.is_nonneg(expr.rhs)
+        elif expr.fn in _EITHER_OPERAND_OPS:
+            return self.is_nonneg(expr.lhs) or self.is_nonneg(expr.rhs)
+        elif expr.fn == '%':
+            # Python's modulo has the sign of the divisor
+            return self.is_nonneg(expr.rhs)
+        elif expr.fn == '>>':
+            return self.is_nonneg(expr.lhs)
+        return False
+
+    _expr_inplace_binop = _expr_binop
+
+    def _expr_unary(self, expr):
+        return expr.fn == '+' and self.is_nonneg(expr.value)
+
+    def _expr_call(self, expr):
+        if expr.kws:
+            return False
+        func = self._global_value(expr.func)
+        args = expr.args
+        if func in utils.RANGE_ITER_OBJECTS:
+            # The values of range(start, stop, step) lie between start
+            # and stop (the latter excluded).
+            if len(args) == 1:
+                return True
+            elif len(args) == 2:
+                return self.is_nonneg(args[0])
+            else:
+                return self.is_nonneg(args[0]) and self.is_nonneg(args[1])
+        elif func is len:
+            return True
+        elif func is min:
+            return all(self.is_nonneg(arg) for arg in args)
+        elif func is max:
+            return any(self.is_nonneg(arg) for arg in args)
+        return False
+
+    def _expr_getattr(self, expr):
+        ty = self.typemap.get(expr.value.name)
+        return (isinstance(ty, types.Array)
+                and expr.attr in _NONNEGATIVE_ARRAY_ATTRS)
+
+    def _expr_build_tuple(self, expr):
+        return all(self.is_nonneg(item) for item in expr.items)
+
+    def _expr_static_getitem(self, expr):
+        ty = self.typemap.get(expr.value.name)
+        return (isinstance(ty, (types.UniTuple, types.Tuple))
+                and self.is_nonneg(expr.value))
+
+    # Iterating over a non-negative range or tuple yields non-negative
+    # values (and booleans).
+    def _expr_getiter(self, expr):
+        return self.is_nonneg(expr.value)
+
+    _expr_iternext = _expr_getiter
+    _expr_pair_first = _expr_getiter
+    _expr_exhaust_iter = _expr_getiter
+
+    def _expr_pair_second(self, expr):
+        return True
+
+
+def find_nonnegative_variables(blocks, typemap):
+    """
+    Return the names of the variables in the IR *blocks* which can only
+    hold non-negative values.
+    """
+    return NonNegativeAnalysis(blocks, typemap).run()
@@ -4,18 +4,21 @@ Implementation of operations on Array objects.
 
 from __future__ import print_function, absolute_import, division
 
+from contextlib import contextmanager
 from functools import reduce
+import math
 
 import llvmlite.llvmpy.core as lc
 
 import numba.ctypes_support as ctypes
 import numpy
 from llvmlite.llvmpy.core import Constant
-from numba import types, cgutils
+from numba import types, cgutils, numpy_support, loopnest
+from numba.typing import signature
 from numba.targets.imputils import (builtin, builtin_attr, implement,
                                     impl_attribute, impl_attribute_generic,
                                     iterator_impl, iternext_impl,
-                                    struct_factory)
+                                    struct_factory, impl_ret_borrowed)
 from .builtins import Slice
 
 
@@ -30,7 +33,8 @@ def make_array(array_type):
     # This structure should be kept in sync with Numba_adapt_ndarray()
     # in _helperlib.c.
     class ArrayTemplate(cgutils.Structure):
-        _fields = [('parent', types.pyobject),
+        _fields = [('meminfo', types.voidptr),
+                   ('parent', types.pyobject),
                    ('nitems', types.intp),
                    ('itemsize', types.intp),
                    # These three fields comprise the unofficiel llarray ABI
@@ -58,7 +62,8 @@ def make_array_ctype(ndim):
     c_intp = ctypes.c_ssize_t
 
     class c_array(ctypes.Structure):
-        _fields_ = [('parent', ctypes.c_void_p),
+        _fields_ = [('meminfo', ctypes.c_void_p),
+                    ('parent', ctypes.c_void_p),
                     ('nitems', c_intp),
                     ('itemsize', c_intp),
                     ('data', ctypes.c_void_p),
@@ -68,6 +73,106 @@ def make_array_ctype(ndim):
     return c_array
 
 
+def populate_array(array, data, shape, strides, itemsize, meminfo,
+                   parent=None):
+    """
+    Fill the array structure *array* (an instance of the class returned
+    by make_array()) with the given LLVM values.  *shape* and *strides*
+    can be either LLVM arrays or Python sequences of LLVM values.
+    A *meminfo* or *parent* of None means a NULL pointer.
+
+    Use this rather than setting fields one by one, so that no field is
+    left undefined.
+    """
+    context = array._context
+    builder = array._builder
+    intp_t = context.get_value_type(types.intp)
+
+    if meminfo is None:
+        meminfo = Constant.null(context.get_value_type(types.voidptr))
+    if parent is None:
+        parent = Constant.null(context.get_value_type(types.pyobject))
+    def as_llvm_array(values):
+        if not isinstance(values, (tuple, list)):
+            return values
+        if not values:
+            return Constant.undef(lc.Type.array(intp_t, 0))
+        return cgutils.pack_array(builder, values)
+
+    shape = as_llvm_array(shape)
+    strides = as_llvm_array(strides)
+
+    ndim = shape.type.count
+    nitems = Constant.int(intp_t, 1)
+    for dim in cgutils.unpack_tuple(builder, shape, ndim):
+        nitems = builder.mul(nitems, dim)
+
+    array.meminfo = meminfo
+    array.parent = parent
+    array.nitems = nitems
+    array.itemsize = itemsize
+    array.data = builder.bitcast(data, array.data.type)
+    array.shape = shape
+    array.strides = strides
+    return array
+
+
+def make_view(context, builder, aryty, ary, return_type,
+              data, shape, strides):
+    """
+    Build a view of array *ary* (of type *aryty*) with the given *data*
+    pointer, *shape* and *strides*.  The view shares the memory of *ary*,
+    and holds a new reference to it.
+    """
+    retary = make_array(return_type)(context, builder)
+    populate_array(retary,
+                   data=data,
+                   shape=shape,
+                   strides=strides,
+                   itemsize=ary.itemsize,
+                   meminfo=ary.meminfo,
+                   parent=ary.parent)
+    res = retary._getvalue()
+    context.incref(builder, return_type, res)
+    return res
+
+
+def get_array_memory_extents(context, builder, arrty, arr):
+    """
+    Return the half-open range [start, end) of addresses, as intp values,
+    spanned by the data of array *arr* (of type *arrty*).  The range of
+    an empty array is empty.
+    """
+    intp_t = context.get_value_type(types.intp)
+    zero = Constant.int(intp_t, 0)
+    one = Constant.int(intp_t, 1)
+    start = builder.ptrtoint(arr.data, intp_t)
+    lo = start
+    hi = builder.add(start, arr.itemsize)
+    is_empty = cgutils.false_bit
+    shapes = cgutils.unpack_tuple(builder, arr.shape, arrty.ndim)
+    strides = cgutils.unpack_tuple(builder, arr.strides, arrty.ndim)
+    for shape, stride in zip(shapes, strides):
+        offset = builder.mul(builder.sub(shape, one), stride)
+        is_neg = builder.icmp(lc.ICMP_SLT, offset, zero)
+        lo = builder.add(lo, builder.select(is_neg, offset, zero))
+        hi = builder.add(hi, builder.select(is_neg, zero, offset))
+        is_empty = builder.or_(is_empty,
+                               builder.icmp(lc.ICMP_EQ, shape, zero))
+    lo = builder.select(is_empty, start, lo)
+    hi = builder.select(is_empty, start, hi)
+    return lo, hi
+
+
+def extents_may_overlap(context, builder, a_start, a_end, b_start, b_end):
+    """
+    Whether the address ranges [a_start, a_end) and [b_start, b_end)
+    may overlap.
+    """
+    return builder.and_(builder.icmp(lc.ICMP_ULT, a_start, b_end),
+                        builder.icmp(lc.ICMP_ULT, b_start, a_end))
+
+
 @struct_factory(types.ArrayIterator)
 def make_arrayiter_cls(iterator_type):
     """
@@ -96,7 +201,9 @@ def getiter_array(context, builder, sig, args):
     iterobj.index = indexptr
     iterobj.array = array
 
-    return iterobj._getvalue()
+    # The iterator holds a reference to the array
+    return impl_ret_borrowed(context, builder, sig.return_type,
+                             iterobj._getvalue())
 
 
 def _getitem_array1d(context, builder, arrayty, array, idx, wraparound):
@@ -169,18 +276,12 @@ def getitem_array1d_slice(context, builder, sig, args):
                                        [slicestruct.start],
                                        wraparound=True)
 
-    retstty = make_array(sig.return_type)
-    retary = retstty(context, builder)
-
     shape = cgutils.get_range_from_slice(builder, slicestruct)
-    retary.shape = cgutils.pack_array(builder, [shape])
-
     stride = cgutils.get_strides_from_slice(builder, aryty.ndim, ary.strides,
                                             slicestruct, 0)
-    retary.strides = cgutils.pack_array(builder, [stride])
-    retary.data = dataptr
 
-    return retary._getvalue()
+    return make_view(context, builder, aryty, ary, sig.return_type,
+                     dataptr, [shape], [stride])
 
 
 @builtin
@@ -205,19 +306,14 @@ def getitem_array_unituple(context, builder, sig, args):
         dataptr = cgutils.get_item_pointer(builder, aryty, ary, indices,
                                            wraparound=True)
         # Build array
-        retstty = make_array(sig.return_type)
-        retary = retstty(context, builder)
-        retary.data = dataptr
         shapes = [cgutils.get_range_from_slice(builder, sl)
                   for sl in slices]
-        retary.shape = cgutils.pack_array(builder, shapes)
         strides = [cgutils.get_strides_from_slice(builder, ndim, ary.strides,
                                                   sl, i)
                    for i, sl in enumerate(slices)]
 
-        retary.strides = cgutils.pack_array(builder, strides)
-
-        return retary._getvalue()
+        return make_view(context, builder, aryty, ary, sig.return_type,
+                         dataptr, shapes, strides)
     else:
         # Indexing
         assert isinstance(idxty.dtype, types.Integer)
@@ -265,19 +361,15 @@ def getitem_array_tuple(context, builder, sig, args):
         dataptr = cgutils.get_item_pointer(builder, aryty, ary, start,
                                            wraparound=True)
         # Build array
-        retstty = make_array(sig.return_type)
-        retary = retstty(context, builder)
-        retary.data = dataptr
-        retary.shape = cgutils.pack_array(builder, shapes)
-        retary.strides = cgutils.pack_array(builder, strides)
-        return retary._getvalue()
+        return make_view(context, builder, aryty, ary, sig.return_type,
+                         dataptr, shapes, strides)
     else:
         # Indexing
         indices = cgutils.unpack_tuple(builder, idx, count=len(idxty))
         indices = [context.cast(builder, i, t, types.intp)
                    for t, i in zip(idxty, indices)]
         ptr = cgutils.get_item_pointer(builder, aryty, ary, indices,
-                                       wraparound=True)
+                                       wraparound=any(t.signed for t in idxty))
 
         return context.unpack_value(builder, aryty.dtype, ptr)
 
@@ -334,7 +426,7 @@ def setitem_array_tuple(context, builder, sig, args):
     indices = [context.cast(builder, i, t, types.intp)
                for t, i in zip(idxty, indices)]
     ptr = cgutils.get_item_pointer(builder, aryty, ary, indices,
-                                   wraparound=True)
+                                   wraparound=any(t.signed for t in idxty))
     context.pack_value(builder, aryty.dtype, val, ptr)
 
 @builtin
@@ -426,6 +518,22 @@ def array_len(context, builder, sig, args):
     return builder.extract_value(shapeary, 0)
 
 
+@builtin
+@implement(loopnest.arrays_may_overlap, types.VarArg(types.Kind(types.Array)))
+def arrays_may_overlap(context, builder, sig, args):
+    extents = [get_array_memory_extents(context, builder, arrty,
+                                        make_array(arrty)(context, builder,
+                                                          arr))
+               for arrty, arr in zip(sig.args, args)]
+    res = cgutils.false_bit
+    for i, (a_start, a_end) in enumerate(extents):
+        for b_start, b_end in extents[i + 1:]:
+            res = builder.or_(res, extents_may_overlap(context, builder,
+                                                       a_start, a_end,
+                                                       b_start, b_end))
+    return res
+
+
 @builtin
 @implement(numpy.sum, types.Kind(types.Array))
 @implement("array.sum", types.Kind(types.Array))
@@ -624,20 +732,23 @@ def array_record_getattr(context, builder, typ, value, attr):
     raryty = make_array(resty)
 
     rary = raryty(context, builder)
-    rary.shape = array.shape
 
     constoffset = context.get_constant(types.intp, offset)
-    unpackedstrides = cgutils.unpack_tuple(builder, array.strides, typ.ndim)
-    newstrides = [builder.add(s, constoffset) for s in unpackedstrides]
-
-    rary.strides = array.strides
 
     llintp = context.get_value_type(types.intp)
     newdata = builder.add(builder.ptrtoint(array.data, llintp), constoffset)
     newdataptr = builder.inttoptr(newdata, rary.data.type)
-    rary.data = newdataptr
 
-    return rary._getvalue()
+    datasize = context.get_abi_sizeof(context.get_data_type(dtype))
+    populate_array(rary,
+                   data=newdataptr,
+                   shape=array.shape,
+                   strides=array.strides,
+                   itemsize=context.get_constant(types.intp, datasize),
+                   meminfo=array.meminfo,
+                   parent=array.parent)
+
+    return impl_ret_borrowed(context, builder, resty, rary._getvalue())
 
 
 
@@ -769,7 +880,7 @@ def _make_flattening_iter_cls(flatiterty, kind):
             """
             .flat() / .ndenumerate() implementation for C-contiguous arrays.
             """
-            _fields = [('array', types.CPointer(array_type)),
+            _fields = [('array', array_type),
                        ('stride', types.intp),
                        ('pointer', types.CPointer(types.CPointer(dtype))),
                        ('index', types.CPointer(types.intp)),
@@ -838,7 +949,7 @@ def _make_flattening_iter_cls(flatiterty, kind):
             It keeps track of pointers along each dimension in order to
             minimize computations.
             """
-            _fields = [('array', types.CPointer(array_type)),
+            _fields = [('array', array_type),
                        ('pointers', types.CPointer(types.CPointer(dtype))),
                        ('indices', types.CPointer(types.intp)),
                        ('exhausted', types.CPointer(types.boolean)),
@@ -948,18 +1059,20 @@ def _make_flattening_iter_cls(flatiterty, kind):
 @builtin_attr
 @impl_attribute(types.Kind(types.Array), "flat", types.Kind(types.NumpyFlatType))
 def make_array_flatiter(context, builder, arrty, arr):
-    flatitercls = make_array_flat_cls(types.NumpyFlatType(arrty))
+    flatiterty = types.NumpyFlatType(arrty)
+    flatitercls = make_array_flat_cls(flatiterty)
     flatiter = flatitercls(context, builder)
 
-    arrayptr = cgutils.alloca_once_value(builder, arr)
-    flatiter.array = arrayptr
+    flatiter.array = arr
 
     arrcls = context.make_array(arrty)
-    arr = arrcls(context, builder, ref=arrayptr)
+    arr = arrcls(context, builder, ref=flatiter._get_ptr_by_name('array'))
 
     flatiter.init_specific(context, builder, arrty, arr)
 
-    return flatiter._getvalue()
+    # The iterator holds a reference to the array
+    return impl_ret_borrowed(context, builder, flatiterty,
+                             flatiter._getvalue())
 
 
 @builtin
@@ -974,7 +1087,7 @@ def iternext_numpy_flatiter(context, builder, sig, args, result):
 
     arrty = flatiterty.array_type
     arrcls = context.make_array(arrty)
-    arr = arrcls(context, builder, value=builder.load(flatiter.array))
+    arr = arrcls(context, builder, value=flatiter.array)
 
     flatiter.iternext_specific(context, builder, arrty, arr, result)
 
@@ -984,18 +1097,19 @@ def iternext_numpy_flatiter(context, builder, sig, args, result):
 def make_array_ndenumerate(context, builder, sig, args):
     arrty, = sig.args
     arr, = args
-    nditercls = make_array_ndenumerate_cls(types.NumpyNdEnumerateType(arrty))
+    nditerty = types.NumpyNdEnumerateType(arrty)
+    nditercls = make_array_ndenumerate_cls(nditerty)
     nditer = nditercls(context, builder)
 
-    arrayptr = cgutils.alloca_once_value(builder, arr)
-    nditer.array = arrayptr
+    nditer.array = arr
 
     arrcls = context.make_array(arrty)
-    arr = arrcls(context, builder, ref=arrayptr)
+    arr = arrcls(context, builder, ref=nditer._get_ptr_by_name('array'))
 
     nditer.init_specific(context, builder, arrty, arr)
 
-    return nditer._getvalue()
+    # The iterator holds a reference to the array
+    return impl_ret_borrowed(context, builder, nditerty, nditer._getvalue())
 
 
 @builtin
@@ -1010,7 +1124,7 @@ def iternext_numpy_nditer(context, builder, sig, args, result):
 
     arrty = nditerty.array_type
     arrcls = context.make_array(arrty)
-    arr = arrcls(context, builder, value=builder.load(nditer.array))
+    arr = arrcls(context, builder, value=nditer.array)
 
     nditer.iternext_specific(context, builder, arrty, arr, result)
 
@@ -1057,3 +1171,1123 @@ def iternext_numpy_ndindex(context, builder, sig, args, result):
     nditer = nditercls(context, builder, value=nditer)
 
     nditer.iternext_specific(context, builder, result)
+
+
+#-------------------------------------------------------------------------------
+# Array creation
+
+def _empty_nd_impl(context, builder, arrtype, shapes):
+    """
+    Allocate a new array of type *arrtype* (with 'C' or 'F' layout) and
+    dimensions *shapes* (a sequence of LLVM intp values).  The array's
+    memory is uninitialized and owned by a new meminfo.  The array
+    structure is returned.
+    """
+    arycls = make_array(arrtype)
+    ary = arycls(context, builder)
+
+    datatype = context.get_data_type(arrtype.dtype)
+    itemsize = context.get_constant(types.intp,
+                                    context.get_abi_sizeof(datatype))
+
+    arrlen = context.get_constant(types.intp, 1)
+    for s in shapes:
+        with cgutils.if_unlikely(builder, cgutils.is_neg_int(builder, s)):
+            context.call_conv.return_user_exc(
+                builder, ValueError, ("negative dimensions not allowed",))
+        arrlen = builder.mul(arrlen, s)
+
+    if arrtype.layout == 'C':
+        dims = list(reversed(shapes[1:]))
+    elif arrtype.layout == 'F':
+        dims = list(shapes[:-1])
+    else:
+        raise NotImplementedError(
+            "Don't know how to allocate array with layout '{0}'.".format(
+                arrtype.layout))
+    strides = [itemsize]
+    for dim in dims:
+        strides.append(builder.mul(strides[-1], dim))
+    if arrtype.layout == 'C':
+        strides.reverse()
+    strides = strides[:arrtype.ndim]
+
+    allocsize = builder.mul(itemsize, arrlen)
+    meminfo = context.meminfo_alloc(builder, allocsize)
+    with cgutils.if_unlikely(builder, cgutils.is_null(builder, meminfo)):
+        context.call_conv.return_user_exc(builder, MemoryError,
+                                          ("allocation failed",))
+    data = context.meminfo_data(builder, meminfo)
+
+    populate_array(ary,
+                   data=data,
+                   shape=list(shapes),
+                   strides=strides,
+                   itemsize=itemsize,
+                   meminfo=meminfo)
+    return ary
+
+
+def _parse_empty_args(context, builder, sig, args):
+    """
+    Parse the arguments of a np.empty(), np.zeros() or np.ones() call.
+    Return the array type and a list of dimension sizes.
+    """
+    arrshapetype = sig.args[0]
+    arrshape = args[0]
+    arrtype = sig.return_type
+    if isinstance(arrshapetype, types.Integer):
+        shapes = [context.cast(builder, arrshape, arrshapetype, types.intp)]
+    else:
+        shapes = [context.cast(builder, s, ty, types.intp)
+                  for s, ty in zip(cgutils.unpack_tuple(builder, arrshape,
+                                                        len(arrshapetype)),
+                                   arrshapetype)]
+    return arrtype, shapes
+
+
+def _parse_empty_like_args(context, builder, sig, args):
+    """
+    Parse the arguments of a np.empty_like(), np.zeros_like() or
+    np.ones_like() call.  Return the array type and a list of dimension
+    sizes.
+    """
+    arytype = sig.args[0]
+    ary = make_array(arytype)(context, builder, value=args[0])
+    shapes = cgutils.unpack_tuple(builder, ary.shape, count=arytype.ndim)
+    return sig.return_type, shapes
+
+
+def _fill_array(context, builder, ary, value):
+    """
+    Store LLVM *value* (in the array's data representation) in every
+    element of contiguous array *ary*.
+    """
+    intp_t = context.get_value_type(types.intp)
+    with cgutils.for_range(builder, ary.nitems, intp_t) as index:
+        ptr = builder.gep(ary.data, [index])
+        builder.store(value, ptr)
+
+
+def _zeros_value(context, arrtype):
+    return Constant.null(context.get_data_type(arrtype.dtype))
+
+
+def _ones_value(context, builder, arrtype):
+    if arrtype.dtype == types.boolean:
+        return Constant.int(context.get_data_type(arrtype.dtype), 1)
+    return context.get_constant_generic(builder, arrtype.dtype, 1)
+
+
+@builtin
+@implement(numpy.empty, types.Any)
+@implement(numpy.empty, types.Any, types.Any)
+def numpy_empty_nd(context, builder, sig, args):
+    arrtype, shapes = _parse_empty_args(context, builder, sig, args)
+    ary = _empty_nd_impl(context, builder, arrtype, shapes)
+    return ary._getvalue()
+
+@builtin
+@implement(numpy.empty_like, types.Kind(types.Array))
+@implement(numpy.empty_like, types.Kind(types.Array), types.Any)
+def numpy_empty_like_nd(context, builder, sig, args):
+    arrtype, shapes = _parse_empty_like_args(context, builder, sig, args)
+    ary = _empty_nd_impl(context, builder, arrtype, shapes)
+    return ary._getvalue()
+
+
+@builtin
+@implement(numpy.zeros, types.Any)
+@implement(numpy.zeros, types.Any, types.Any)
+def numpy_zeros_nd(context, builder, sig, args):
+    arrtype, shapes = _parse_empty_args(context, builder, sig, args)
+    ary = _empty_nd_impl(context, builder, arrtype, shapes)
+    _fill_array(context, builder, ary, _zeros_value(context, arrtype))
+    return ary._getvalue()
+
+@builtin
+@implement(numpy.zeros_like, types.Kind(types.Array))
+@implement(numpy.zeros_like, types.Kind(types.Array), types.Any)
+def numpy_zeros_like_nd(context, builder, sig, args):
+    arrtype, shapes = _parse_empty_like_args(context, builder, sig, args)
+    ary = _empty_nd_impl(context, builder, arrtype, shapes)
+    _fill_array(context, builder, ary, _zeros_value(context, arrtype))
+    return ary._getvalue()
+
+
+@builtin
+@implement(numpy.ones, types.Any)
+@implement(numpy.ones, types.Any, types.Any)
+def numpy_ones_nd(context, builder, sig, args):
+    arrtype, shapes = _parse_empty_args(context, builder, sig, args)
+    ary = _empty_nd_impl(context, builder, arrtype, shapes)
+    _fill_array(context, builder, ary, _ones_value(context, builder, arrtype))
+    return ary._getvalue()
+
+@builtin
+@implement(numpy.ones_like, types.Kind(types.Array))
+@implement(numpy.ones_like, types.Kind(types.Array), types.Any)
+def numpy_ones_like_nd(context, builder, sig, args):
+    arrtype, shapes = _parse_empty_like_args(context, builder, sig, args)
+    ary = _empty_nd_impl(context, builder, arrtype, shapes)
+    _fill_array(context, builder, ary, _ones_value(context, builder, arrtype))
+    return ary._getvalue()
+
+
+@builtin
+@implement(numpy.full, types.Any, types.Any)
+@implement(numpy.full, types.Any, types.Any, types.Any)
+def numpy_full_nd(context, builder, sig, args):
+    arrtype, shapes = _parse_empty_args(context, builder, sig, args)
+    ary = _empty_nd_impl(context, builder, arrtype, shapes)
+    value = context.cast(builder, args[1], sig.args[1], arrtype.dtype)
+    if arrtype.dtype == types.boolean:
+        value = cgutils.as_bool_byte(builder, value)
+    _fill_array(context, builder, ary, value)
+    return ary._getvalue()
+
+
+@builtin
+@implement(numpy.arange, types.Any)
+@implement(numpy.arange, types.Any, types.Any)
+@implement(numpy.arange, types.Any, types.Any, types.Any)
+@implement(numpy.arange, types.Any, types.Any, types.Any, types.Any)
+def numpy_arange(context, builder, sig, args):
+    # Normalize to (start, stop, step), ignoring None and the dtype
+    bounds = [(ty, val) for ty, val in zip(sig.args[:3], args[:3])
+              if ty != types.none]
+    if len(bounds) == 1:
+        bounds.insert(0, (types.intp, context.get_constant(types.intp, 0)))
+    if len(bounds) == 2:
+        bounds.append((types.intp, context.get_constant(types.intp, 1)))
+    dtype = numpy_support.as_dtype(sig.return_type.dtype).type
+
+    def arange_impl(start, stop, step):
+        if step == 0:
+            raise ValueError("step cannot be zero")
+        nitems_c = math.ceil((stop - start) / step)
+        nitems = 0
+        if nitems_c > 0:
+            nitems = int(nitems_c)
+        arr = numpy.empty(nitems, dtype)
+        for i in range(nitems):
+            arr[i] = start + i * step
+        return arr
+
+    return context.compile_internal(
+        builder, arange_impl,
+        signature(sig.return_type, *[ty for ty, _ in bounds]),
+        [val for _, val in bounds])
+
+
+@builtin
+@implement(numpy.linspace, types.Any, types.Any)
+@implement(numpy.linspace, types.Any, types.Any, types.Kind(types.Integer))
+def numpy_linspace(context, builder, sig, args):
+    if len(args) == 2:
+        sig = signature(sig.return_type, *(sig.args + (types.intp,)))
+        args = list(args) + [context.get_constant(types.intp, 50)]
+
+    def linspace_impl(start, stop, num):
+        arr = numpy.empty(num, numpy.float64)
+        div = num - 1
+        delta = stop - start
+        if num > 0:
+            arr[0] = start
+        if div > 0:
+            step = delta / div
+            for i in range(1, num):
+                arr[i] = start + i * step
+            arr[num - 1] = stop
+        return arr
+
+    return context.compile_internal(builder, linspace_impl, sig, args)
+
+
+#-------------------------------------------------------------------------------
+# Views and reshaping
+
+def _c_strides(context, builder, itemsize, shapes):
+    """
+    Return the list of strides of a C-contiguous array with the given
+    *itemsize* and dimensions *shapes*.
+    """
+    strides = [itemsize]
+    for dim in reversed(shapes[1:]):
+        strides.append(builder.mul(strides[-1], dim))
+    return strides[::-1]
+
+
+def _is_c_contiguous(context, builder, aryty, ary):
+    """
+    Return a predicate telling whether array *ary* is C-contiguous.
+    Dimensions of length 1 are ignored, as Numpy does.
+    """
+    if aryty.layout == 'C' or aryty.ndim == 0:
+        return cgutils.true_bit
+    one = context.get_constant(types.intp, 1)
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    strides = cgutils.unpack_tuple(builder, ary.strides, aryty.ndim)
+    expected = ary.itemsize
+    pred = cgutils.true_bit
+    for dim, stride in reversed(list(zip(shapes, strides))):
+        ok = builder.or_(builder.icmp_signed('==', dim, one),
+                         builder.icmp_signed('==', stride, expected))
+        pred = builder.and_(pred, ok)
+        expected = builder.mul(expected, dim)
+    return pred
+
+
+def _copy_to_c_array(context, builder, aryty, ary):
+    """
+    Copy array *ary* of type *aryty* into a new C-contiguous array.
+    The new array's structure is returned.
+    """
+    destty = types.Array(aryty.dtype, aryty.ndim, 'C')
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    dest = _empty_nd_impl(context, builder, destty, shapes)
+    _copy_array_data(context, builder, aryty, ary, destty, dest)
+    return dest
+
+
+def _copy_array_data(context, builder, srcty, src, destty, dest):
+    """
+    Copy the contents of array *src* into array *dest* of the same shape
+    and dtype.  A single memcpy() is used if both arrays are contiguous
+    in the same order, a strided loop otherwise.
+    """
+    intp_t = context.get_value_type(types.intp)
+    shapes = cgutils.unpack_tuple(builder, src.shape, srcty.ndim)
+
+    def memcpy():
+        cgutils.raw_memcpy(builder, dest.data, src.data, src.nitems,
+                           src.itemsize)
+
+    if not shapes or (srcty.layout == destty.layout == 'C'):
+        memcpy()
+        return
+
+    def strided_copy():
+        with cgutils.loop_nest(builder, shapes, intp_t) as indices:
+            src_ptr = cgutils.get_item_pointer(builder, srcty, src, indices)
+            dest_ptr = cgutils.get_item_pointer(builder, destty, dest,
+                                                indices)
+            builder.store(builder.load(src_ptr), dest_ptr)
+
+    if destty.layout != 'C':
+        strided_copy()
+        return
+
+    contig = _is_c_contiguous(context, builder, srcty, src)
+    with cgutils.ifelse(builder, contig) as (then, otherwise):
+        with then:
+            memcpy()
+        with otherwise:
+            strided_copy()
+
+
+def _as_c_contiguous(context, builder, aryty, ary):
+    """
+    Return a new reference to a C-contiguous array with the same contents
+    as *ary*: *ary* itself if it is already C-contiguous, a copy otherwise.
+    The result has type `aryty.copy(layout='C')`.
+    """
+    retty = aryty.copy(layout='C')
+    if aryty.layout == 'C':
+        res = ary._getvalue()
+        context.incref(builder, retty, res)
+        return res
+    resptr = cgutils.alloca_once(builder, context.get_value_type(retty))
+    contig = _is_c_contiguous(context, builder, aryty, ary)
+    with cgutils.ifelse(builder, contig, expect=True) as (then, otherwise):
+        with then:
+            shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+            strides = cgutils.unpack_tuple(builder, ary.strides, aryty.ndim)
+            res = make_view(context, builder, aryty, ary, retty, ary.data,
+                            shapes, strides)
+            builder.store(res, resptr)
+        with otherwise:
+            dest = _copy_to_c_array(context, builder, aryty, ary)
+            builder.store(dest._getvalue(), resptr)
+    return builder.load(resptr)
+
+
+def _reshape_c_array(context, builder, aryty, ary, retty, newshapes):
+    """
+    Return a view of C-contiguous array *ary* with dimensions *newshapes*
+    (which may contain one -1 entry, as in Numpy).
+    """
+    intp_t = context.get_value_type(types.intp)
+    zero = context.get_constant(types.intp, 0)
+    one = context.get_constant(types.intp, 1)
+
+    # Compute the product of known dimensions and locate the unknown one
+    known = one
+    num_unknown = zero
+    for s in newshapes:
+        is_unknown = builder.icmp_signed('==', s, context.get_constant(
+            types.intp, -1))
+        with cgutils.if_unlikely(builder,
+                                 builder.and_(cgutils.is_neg_int(builder, s),
+                                              builder.not_(is_unknown))):
+            context.call_conv.return_user_exc(
+                builder, ValueError, ("negative dimensions not allowed",))
+        known = builder.select(is_unknown, known, builder.mul(known, s))
+        num_unknown = builder.add(num_unknown, builder.zext(is_unknown, intp_t))
+
+    with cgutils.if_unlikely(builder,
+                             builder.icmp_signed('>', num_unknown, one)):
+        context.call_conv.return_user_exc(
+            builder, ValueError, ("can only specify one unknown dimension",))
+
+    size = ary.nitems
+    has_unknown = builder.icmp_signed('==', num_unknown, one)
+    # Guard against division by zero when computing the unknown dimension
+    divisor = builder.select(cgutils.is_scalar_zero(builder, known),
+                             one, known)
+    inferred = builder.sdiv(size, divisor)
+    valid = builder.select(
+        has_unknown,
+        builder.and_(cgutils.is_not_scalar_zero(builder, known),
+                     builder.icmp_signed('==', builder.mul(inferred, known),
+                                         size)),
+        builder.icmp_signed('==', known, size))
+    with cgutils.if_unlikely(builder, builder.not_(valid)):
+        context.call_conv.return_user_exc(
+            builder, ValueError, ("total size of new array must be unchanged",))
+
+    minus_one = context.get_constant(types.intp, -1)
+    shapes = [builder.select(builder.icmp_signed('==', s, minus_one),
+                             inferred, s)
+              for s in newshapes]
+    strides = _c_strides(context, builder, ary.itemsize, shapes)
+    return make_view(context, builder, aryty, ary, retty, ary.data,
+                     shapes, strides)
+
+
+def _reshape_array(context, builder, aryty, ary, retty, newshapes):
+    """
+    Reshape array *ary* to *newshapes*, as a view if its layout allows,
+    as a copy otherwise.  A new reference is returned.
+    """
+    cty = aryty.copy(layout='C')
+    contig = make_array(cty)(context, builder,
+                             _as_c_contiguous(context, builder, aryty, ary))
+    res = _reshape_c_array(context, builder, cty, contig, retty, newshapes)
+    context.decref(builder, cty, contig._getvalue())
+    return res
+
+
+def _parse_shape_args(context, builder, argtys, args):
+    """
+    Return the list of intp dimensions passed to a reshape() call,
+    either as a single tuple or as separate integers.
+    """
+    if len(argtys) == 1 and isinstance(argtys[0],
+                                       (types.UniTuple, types.Tuple)):
+        argtys = list(argtys[0])
+        args = cgutils.unpack_tuple(builder, args[0], len(argtys))
+    return [context.cast(builder, a, ty, types.intp)
+            for a, ty in zip(args, argtys)]
+
+
+def _transpose_view(context, builder, aryty, value, retty):
+    """
+    Return a transposed view of array *value*.
+    """
+    if aryty.ndim <= 1:
+        return impl_ret_borrowed(context, builder, retty, value)
+    ary = make_array(aryty)(context, builder, value)
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    strides = cgutils.unpack_tuple(builder, ary.strides, aryty.ndim)
+    return make_view(context, builder, aryty, ary, retty, ary.data,
+                     shapes[::-1], strides[::-1])
+
+
+@builtin_attr
+@impl_attribute(types.Kind(types.Array), "T", types.Kind(types.Array))
+def array_T(context, builder, typ, value):
+    if typ.ndim <= 1:
+        retty = typ
+    else:
+        layout = {'C': 'F', 'F': 'C'}.get(typ.layout, 'A')
+        retty = typ.copy(layout=layout)
+    return _transpose_view(context, builder, typ, value, retty)
+
+
+@builtin
+@implement(numpy.transpose, types.Kind(types.Array))
+@implement("array.transpose", types.Kind(types.Array))
+def array_transpose(context, builder, sig, args):
+    return _transpose_view(context, builder, sig.args[0], args[0],
+                           sig.return_type)
+
+
+@builtin
+@implement("array.reshape", types.Kind(types.Array), types.Kind(types.UniTuple))
+@implement("array.reshape", types.Kind(types.Array), types.Kind(types.Tuple))
+@implement("array.reshape", types.Kind(types.Array),
+           types.VarArg(types.Kind(types.Integer)))
+@implement(numpy.reshape, types.Kind(types.Array), types.Any)
+def array_reshape(context, builder, sig, args):
+    aryty = sig.args[0]
+    ary = make_array(aryty)(context, builder, args[0])
+    newshapes = _parse_shape_args(context, builder, sig.args[1:], args[1:])
+    return _reshape_array(context, builder, aryty, ary, sig.return_type,
+                          newshapes)
+
+
+@builtin
+@implement(numpy.ravel, types.Kind(types.Array))
+@implement("array.ravel", types.Kind(types.Array))
+def array_ravel(context, builder, sig, args):
+    aryty = sig.args[0]
+    ary = make_array(aryty)(context, builder, args[0])
+    newshapes = [context.get_constant(types.intp, -1)]
+    return _reshape_array(context, builder, aryty, ary, sig.return_type,
+                          newshapes)
+
+
+@builtin
+@implement("array.flatten", types.Kind(types.Array))
+def array_flatten(context, builder, sig, args):
+    aryty = sig.args[0]
+    ary = make_array(aryty)(context, builder, args[0])
+    cty = types.Array(aryty.dtype, aryty.ndim, 'C')
+    dest = _copy_to_c_array(context, builder, aryty, ary)
+    res = make_view(context, builder, cty, dest, sig.return_type, dest.data,
+                    [dest.nitems], [dest.itemsize])
+    context.decref(builder, cty, dest._getvalue())
+    return res
+
+
+@builtin
+@implement(numpy.ascontiguousarray, types.Kind(types.Array))
+def array_ascontiguousarray(context, builder, sig, args):
+    aryty = sig.args[0]
+    ary = make_array(aryty)(context, builder, args[0])
+    return _as_c_contiguous(context, builder, aryty, ary)
+
+
+#-------------------------------------------------------------------------------
+# Fancy indexing
+
+@contextmanager
+def _loop_over_elements(context, builder, arrays):
+    """
+    Generate a loop over the elements of one or several arrays of
+    identical shapes, in C order.  *arrays* is a sequence of
+    (array type, array structure) pairs; a list of pointers to the
+    current elements is yielded.
+    """
+    intp_t = context.get_value_type(types.intp)
+    aryty, ary = arrays[0]
+    if all(ty.layout == 'C' for ty, _ in arrays):
+        # A flat loop is easier for LLVM to vectorize
+        with cgutils.for_range(builder, ary.nitems, intp_t) as index:
+            yield [builder.gep(a.data, [index]) for _, a in arrays]
+    else:
+        shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+        with cgutils.loop_nest(builder, shapes, intp_t) as indices:
+            yield [cgutils.get_item_pointer(builder, ty, a, indices)
+                   for ty, a in arrays]
+
+
+def _check_mask_shape(context, builder, aryty, ary, maskty, mask):
+    """
+    Raise IndexError if boolean array *mask* doesn't have the same
+    shape as *ary*.
+    """
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    mshapes = cgutils.unpack_tuple(builder, mask.shape, maskty.ndim)
+    mismatch = cgutils.false_bit
+    for a, m in zip(shapes, mshapes):
+        mismatch = builder.or_(mismatch, builder.icmp_signed('!=', a, m))
+    with cgutils.if_unlikely(builder, mismatch):
+        context.call_conv.return_user_exc(
+            builder, IndexError, ("boolean index did not match indexed array",))
+
+
+def _count_mask(context, builder, maskty, mask):
+    """
+    Return the number of true elements in boolean array *mask*.
+    """
+    intp_t = context.get_value_type(types.intp)
+    countptr = cgutils.alloca_once_value(builder,
+                                         context.get_constant(types.intp, 0))
+    # The loop body is branch-free so that it vectorizes for
+    # contiguous masks
+    with _loop_over_elements(context, builder, [(maskty, mask)]) as (ptr,):
+        selected = context.unpack_value(builder, types.boolean, ptr)
+        builder.store(builder.add(builder.load(countptr),
+                                  builder.zext(selected, intp_t)),
+                      countptr)
+    return builder.load(countptr)
+
+
+def _fancy_index_value(context, builder, idxty, idxary, pos, dim):
+    """
+    Load the integer at position *pos* of 1-d index array *idxary* and
+    return it as an intp index into a dimension of length *dim*.
+    Negative indices wrap around, out-of-bounds indices raise IndexError.
+    """
+    ptr = cgutils.get_item_pointer(builder, idxty, idxary, [pos])
+    ind = context.unpack_value(builder, idxty.dtype, ptr)
+    ind = context.cast(builder, ind, idxty.dtype, types.intp)
+    if idxty.dtype.signed:
+        ind = builder.select(cgutils.is_neg_int(builder, ind),
+                             builder.add(ind, dim), ind)
+    # An unsigned comparison also catches indices still negative
+    with cgutils.if_unlikely(builder, builder.icmp_unsigned('>=', ind, dim)):
+        context.call_conv.return_user_exc(builder, IndexError,
+                                          ("index out of bounds",))
+    return ind
+
+
+def _check_values_shape(context, builder, valty, vals, shapes):
+    """
+    Raise ValueError if the shape of array *vals* isn't *shapes*.
+    """
+    vshapes = cgutils.unpack_tuple(builder, vals.shape, valty.ndim)
+    mismatch = cgutils.false_bit
+    for v, s in zip(vshapes, shapes):
+        mismatch = builder.or_(mismatch, builder.icmp_signed('!=', v, s))
+    with cgutils.if_unlikely(builder, mismatch):
+        context.call_conv.return_user_exc(
+            builder, ValueError,
+            ("shape mismatch: value array does not match indexing result",))
+
+
+def _store_value(context, builder, aryty, ptr, valty, vals, indices):
+    """
+    Store into *ptr* either scalar *vals*, or the element of array *vals*
+    at *indices*.
+    """
+    if isinstance(valty, types.Array):
+        srcptr = cgutils.get_item_pointer(builder, valty, vals, indices)
+        val = context.unpack_value(builder, valty.dtype, srcptr)
+        val = context.cast(builder, val, valty.dtype, aryty.dtype)
+    else:
+        val = vals
+    context.pack_value(builder, aryty.dtype, val, ptr)
+
+
+def _parse_fancy_args(context, builder, sig, args):
+    aryty, idxty = sig.args[:2]
+    ary = make_array(aryty)(context, builder, args[0])
+    idxary = make_array(idxty)(context, builder, args[1])
+    return aryty, ary, idxty, idxary
+
+
+@builtin
+@implement('getitem', types.Kind(types.Array), types.Kind(types.Array))
+def getitem_fancy_array(context, builder, sig, args):
+    aryty, ary, idxty, idxary = _parse_fancy_args(context, builder, sig, args)
+    retty = sig.return_type
+    intp_t = context.get_value_type(types.intp)
+    one = context.get_constant(types.intp, 1)
+
+    if idxty.dtype == types.boolean:
+        # Count the selected elements first, so that the result can be
+        # filled in a single pass
+        _check_mask_shape(context, builder, aryty, ary, idxty, idxary)
+        count = _count_mask(context, builder, idxty, idxary)
+        dest = _empty_nd_impl(context, builder, retty, [count])
+        posptr = cgutils.alloca_once_value(builder,
+                                           context.get_constant(types.intp, 0))
+        with _loop_over_elements(context, builder,
+                                 [(aryty, ary), (idxty, idxary)]) as ptrs:
+            srcptr, maskptr = ptrs
+            selected = context.unpack_value(builder, types.boolean, maskptr)
+            with cgutils.ifthen(builder, selected):
+                pos = builder.load(posptr)
+                builder.store(builder.load(srcptr),
+                              builder.gep(dest.data, [pos]))
+                builder.store(builder.add(pos, one), posptr)
+        return dest._getvalue()
+
+    # Gather along the first axis
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    nindices, = cgutils.unpack_tuple(builder, idxary.shape, 1)
+    dest = _empty_nd_impl(context, builder, retty, [nindices] + shapes[1:])
+    with cgutils.for_range(builder, nindices, intp_t) as pos:
+        ind = _fancy_index_value(context, builder, idxty, idxary, pos,
+                                 shapes[0])
+        if aryty.ndim == 1:
+            srcptr = cgutils.get_item_pointer(builder, aryty, ary, [ind])
+            builder.store(builder.load(srcptr), builder.gep(dest.data, [pos]))
+        else:
+            with cgutils.loop_nest(builder, shapes[1:], intp_t) as inner:
+                srcptr = cgutils.get_item_pointer(builder, aryty, ary,
+                                                  [ind] + list(inner))
+                destptr = cgutils.get_item_pointer(builder, retty, dest,
+                                                   [pos] + list(inner))
+                builder.store(builder.load(srcptr), destptr)
+    return dest._getvalue()
+
+
+def _copy_if_overlapping(context, builder, aryty, ary, valty, vals):
+    """
+    Make array *vals* safe to read while storing into array *ary*: if
+    their memory overlaps, *vals* is first copied into a temporary, like
+    Numpy does.  Return the type and structure of the array to read, and
+    a pointer to the temporary array (with a NULL meminfo if no copy was
+    made), to be released once the store is done.
+    """
+    srcty = valty.copy(layout='A')
+    tmpty = valty.copy(layout='C')
+    src = make_array(srcty)(context, builder, vals._getvalue())
+    srcptr = cgutils.alloca_once_value(builder, src._getvalue())
+    tmpptr = cgutils.alloca_once_value(
+        builder, cgutils.get_null_value(src._getvalue().type))
+
+    a_start, a_end = get_array_memory_extents(context, builder, aryty, ary)
+    b_start, b_end = get_array_memory_extents(context, builder, valty, vals)
+    overlap = extents_may_overlap(context, builder, a_start, a_end,
+                                  b_start, b_end)
+    with cgutils.ifthen(builder, overlap):
+        tmp = _copy_to_c_array(context, builder, valty, vals)
+        builder.store(tmp._getvalue(), tmpptr)
+        builder.store(tmp._getvalue(), srcptr)
+
+    src = make_array(srcty)(context, builder, builder.load(srcptr))
+    return srcty, src, tmpty, tmpptr
+
+
+@builtin
+@implement('setitem', types.Kind(types.Array), types.Kind(types.Array),
+           types.Any)
+def setitem_fancy_array(context, builder, sig, args):
+    aryty, ary, idxty, idxary = _parse_fancy_args(context, builder, sig, args)
+    valty = sig.args[2]
+    vals = args[2]
+    if isinstance(valty, types.Array):
+        vals = make_array(valty)(context, builder, vals)
+    intp_t = context.get_value_type(types.intp)
+    one = context.get_constant(types.intp, 1)
+    is_mask = idxty.dtype == types.boolean
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+
+    if is_mask:
+        _check_mask_shape(context, builder, aryty, ary, idxty, idxary)
+    else:
+        nindices, = cgutils.unpack_tuple(builder, idxary.shape, 1)
+    tmpptr = None
+    if isinstance(valty, types.Array):
+        if is_mask:
+            count = _count_mask(context, builder, idxty, idxary)
+            _check_values_shape(context, builder, valty, vals, [count])
+        else:
+            _check_values_shape(context, builder, valty, vals,
+                                [nindices] + shapes[1:])
+        valty, vals, tmpty, tmpptr = _copy_if_overlapping(
+            context, builder, aryty, ary, valty, vals)
+
+    if is_mask:
+        posptr = cgutils.alloca_once_value(builder,
+                                           context.get_constant(types.intp, 0))
+        with _loop_over_elements(context, builder,
+                                 [(aryty, ary), (idxty, idxary)]) as ptrs:
+            destptr, maskptr = ptrs
+            selected = context.unpack_value(builder, types.boolean, maskptr)
+            with cgutils.ifthen(builder, selected):
+                pos = builder.load(posptr)
+                _store_value(context, builder, aryty, destptr, valty, vals,
+                             [pos])
+                builder.store(builder.add(pos, one), posptr)
+    else:
+        # Scatter along the first axis
+        with cgutils.for_range(builder, nindices, intp_t) as pos:
+            ind = _fancy_index_value(context, builder, idxty, idxary, pos,
+                                     shapes[0])
+            if aryty.ndim == 1:
+                destptr = cgutils.get_item_pointer(builder, aryty, ary, [ind])
+                _store_value(context, builder, aryty, destptr, valty, vals,
+                             [pos])
+            else:
+                with cgutils.loop_nest(builder, shapes[1:], intp_t) as inner:
+                    destptr = cgutils.get_item_pointer(builder, aryty, ary,
+                                                       [ind] + list(inner))
+                    _store_value(context, builder, aryty, destptr, valty,
+                                 vals, [pos] + list(inner))
+
+    if tmpptr is not None:
+        context.decref(builder, tmpty, builder.load(tmpptr))
+
+
+#-------------------------------------------------------------------------------
+# Cumulative operations
+
+def _normalize_axis(context, builder, ndim, axis, axisty):
+    """
+    Return *axis* as a non-negative intp, raising ValueError if it is
+    out of bounds for *ndim* dimensions.
+    """
+    axis = context.cast(builder, axis, axisty, types.intp)
+    ll_ndim = context.get_constant(types.intp, ndim)
+    axis = builder.select(cgutils.is_neg_int(builder, axis),
+                          builder.add(axis, ll_ndim), axis)
+    with cgutils.if_unlikely(builder,
+                             builder.icmp_unsigned('>=', axis, ll_ndim)):
+        context.call_conv.return_user_exc(builder, ValueError,
+                                          ("axis out of bounds",))
+    return axis
+
+
+def _split_axis(context, builder, shapes, axis):
+    """
+    Given dimensions *shapes* and a runtime *axis*, return the
+    (outer size, axis length, inner size) triple describing a C-ordered
+    array as a 3-d array whose middle dimension is *axis*.
+    """
+    one = context.get_constant(types.intp, 1)
+    outer = inner = length = one
+    for k, s in enumerate(shapes):
+        k = context.get_constant(types.intp, k)
+        outer = builder.select(builder.icmp_signed('<', k, axis),
+                               builder.mul(outer, s), outer)
+        inner = builder.select(builder.icmp_signed('>', k, axis),
+                               builder.mul(inner, s), inner)
+        length = builder.select(builder.icmp_signed('==', k, axis),
+                                s, length)
+    return outer, length, inner
+
+
+def _call_axis_kernel(context, builder, kernel, aryty, ary, retty, dest,
+                      dims, destlength, extra_types=(), extra_args=()):
+    """
+    Call *kernel* (a Python function compiled with compile_internal) with
+    3-d views of array *ary* and of the new C-contiguous array *dest*.
+    *dims* are the (outer, length, inner) dimensions of the view of *ary*;
+    the view of *dest* has *destlength* as middle dimension.
+    """
+    outer, length, inner = dims
+    srcty = aryty.copy(ndim=3, layout='C')
+    destty = retty.copy(ndim=3)
+    # Non-contiguous inputs are copied here
+    src = _reshape_array(context, builder, aryty, ary, srcty,
+                         [outer, length, inner])
+    dest3 = _reshape_c_array(context, builder, retty, dest, destty,
+                             [outer, destlength, inner])
+    sig = signature(types.none, srcty, destty, *extra_types)
+    context.compile_internal(builder, kernel, sig,
+                             [src, dest3] + list(extra_args))
+    context.decref(builder, srcty, src)
+    context.decref(builder, destty, dest3)
+
+
+def _make_scan_kernel(op):
+    def scan_kernel(src, dest):
+        outer, n, inner = src.shape
+        for o in range(outer):
+            if n > 0:
+                for j in range(inner):
+                    dest[o, 0, j] = src[o, 0, j]
+            for i in range(1, n):
+                # The inner loop is independent across j, which
+                # allows vectorizing scans along non-trailing axes
+                for j in range(inner):
+                    dest[o, i, j] = src[o, i, j]
+                    dest[o, i, j] = op(dest[o, i - 1, j], dest[o, i, j])
+    return scan_kernel
+
+
+def _array_scan(context, builder, sig, args, op):
+    """
+    Compute the cumulative reduction of an array by binary ufunc *op*,
+    either over the flattened array or along an axis.
+    """
+    aryty = sig.args[0]
+    retty = sig.return_type
+    ary = make_array(aryty)(context, builder, args[0])
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    if len(sig.args) > 1 and isinstance(sig.args[1], types.Integer):
+        axis = _normalize_axis(context, builder, aryty.ndim, args[1],
+                               sig.args[1])
+        dims = _split_axis(context, builder, shapes, axis)
+        destshapes = shapes
+    else:
+        one = context.get_constant(types.intp, 1)
+        dims = (one, ary.nitems, one)
+        destshapes = [ary.nitems]
+    dest = _empty_nd_impl(context, builder, retty, destshapes)
+    _call_axis_kernel(context, builder, _make_scan_kernel(op), aryty, ary,
+                      retty, dest, dims, dims[1])
+    return dest._getvalue()
+
+
+@builtin
+@implement(numpy.cumsum, types.Kind(types.Array))
+@implement(numpy.cumsum, types.Kind(types.Array), types.Any)
+@implement("array.cumsum", types.Kind(types.Array))
+@implement("array.cumsum", types.Kind(types.Array), types.Any)
+def array_cumsum(context, builder, sig, args):
+    return _array_scan(context, builder, sig, args, numpy.add)
+
+
+@builtin
+@implement(numpy.cumprod, types.Kind(types.Array))
+@implement(numpy.cumprod, types.Kind(types.Array), types.Any)
+@implement("array.cumprod", types.Kind(types.Array))
+@implement("array.cumprod", types.Kind(types.Array), types.Any)
+def array_cumprod(context, builder, sig, args):
+    return _array_scan(context, builder, sig, args, numpy.multiply)
+
+
+@builtin
+@implement("ufunc.accumulate", types.Kind(types.Function),
+           types.Kind(types.Array))
+@implement("ufunc.accumulate", types.Kind(types.Function),
+           types.Kind(types.Array), types.Kind(types.Integer))
+def ufunc_accumulate(context, builder, sig, args):
+    ufunc = sig.args[0].template.key
+    # Numpy accumulates along the first axis by default
+    if len(args) == 2:
+        sig = signature(sig.return_type, sig.args[1], types.intp)
+        args = [args[1], context.get_constant(types.intp, 0)]
+    else:
+        sig = signature(sig.return_type, *sig.args[1:])
+        args = args[1:]
+    return _array_scan(context, builder, sig, args, ufunc)
+
+
+def _make_diff_kernel(dtype):
+    def diff_kernel(src, dest, n):
+        outer, length, inner = src.shape
+        m = dest.shape[1]
+        if n == 1:
+            for o in range(outer):
+                for i in range(m):
+                    for j in range(inner):
+                        dest[o, i, j] = src[o, i + 1, j] - src[o, i, j]
+        elif m > 0:
+            # Higher orders are computed in place on a copy of each line
+            work = numpy.empty(length, dtype)
+            for o in range(outer):
+                for j in range(inner):
+                    for i in range(length):
+                        work[i] = src[o, i, j]
+                    for k in range(n):
+                        for i in range(length - k - 1):
+                            work[i] = work[i + 1] - work[i]
+                    for i in range(m):
+                        dest[o, i, j] = work[i]
+    return diff_kernel
+
+
+@builtin
+@implement(numpy.diff, types.Kind(types.Array))
+@implement(numpy.diff, types.Kind(types.Array), types.Kind(types.Integer))
+@implement(numpy.diff, types.Kind(types.Array), types.Kind(types.Integer),
+           types.Kind(types.Integer))
+def array_diff(context, builder, sig, args):
+    aryty = sig.args[0]
+    retty = sig.return_type
+    ary = make_array(aryty)(context, builder, args[0])
+    shapes = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    zero = context.get_constant(types.intp, 0)
+
+    if len(args) > 1:
+        n = context.cast(builder, args[1], sig.args[1], types.intp)
+    else:
+        n = context.get_constant(types.intp, 1)
+    with cgutils.if_unlikely(builder, cgutils.is_neg_int(builder, n)):
+        context.call_conv.return_user_exc(
+            builder, ValueError, ("order must be non-negative",))
+
+    if len(args) > 2:
+        axis = _normalize_axis(context, builder, aryty.ndim, args[2],
+                               sig.args[2])
+    else:
+        axis = context.get_constant(types.intp, aryty.ndim - 1)
+    dims = _split_axis(context, builder, shapes, axis)
+    length = dims[1]
+    destlength = builder.select(builder.icmp_signed('>', length, n),
+                                builder.sub(length, n), zero)
+    destshapes = []
+    for k, s in enumerate(shapes):
+        is_axis = builder.icmp_signed('==', axis,
+                                      context.get_constant(types.intp, k))
+        destshapes.append(builder.select(is_axis, destlength, s))
+    dest = _empty_nd_impl(context, builder, retty, destshapes)
+
+    kernel = _make_diff_kernel(numpy_support.as_dtype(aryty.dtype).type)
+    _call_axis_kernel(context, builder, kernel, aryty, ary, retty, dest,
+                      dims, destlength, [types.intp], [n])
+    return dest._getvalue()
+
+
+#-------------------------------------------------------------------------------
+# Copying and joining arrays
+
+@builtin
+@implement("array.copy", types.Kind(types.Array))
+@implement(numpy.copy, types.Kind(types.Array))
+def array_copy(context, builder, sig, args):
+    aryty = sig.args[0]
+    ary = make_array(aryty)(context, builder, args[0])
+    return _copy_to_c_array(context, builder, aryty, ary)._getvalue()
+
+
+def _copy_into_slice(context, builder, srcty, src, destty, dest, axis,
+                     offset):
+    """
+    Copy array *src* into the C-contiguous array *dest*, starting at
+    position *offset* along the runtime *axis*.
+    """
+    intp_t = context.get_value_type(types.intp)
+    zero = context.get_constant(types.intp, 0)
+    shapes = cgutils.unpack_tuple(builder, src.shape, srcty.ndim)
+    destshapes = cgutils.unpack_tuple(builder, dest.shape, destty.ndim)
+
+    def strided_copy():
+        with cgutils.loop_nest(builder, shapes, intp_t) as indices:
+            destinds = []
+            for k, ind in enumerate(indices):
+                is_axis = builder.icmp_signed(
+                    '==', axis, context.get_constant(types.intp, k))
+                destinds.append(builder.add(ind, builder.select(is_axis,
+                                                                offset,
+                                                                zero)))
+            src_ptr = cgutils.get_item_pointer(builder, srcty, src, indices)
+            dest_ptr = cgutils.get_item_pointer(builder, destty, dest,
+                                                destinds)
+            if srcty.dtype == destty.dtype:
+                builder.store(builder.load(src_ptr), dest_ptr)
+            else:
+                val = context.unpack_value(builder, srcty.dtype, src_ptr)
+                val = context.cast(builder, val, srcty.dtype, destty.dtype)
+                context.pack_value(builder, destty.dtype, val, dest_ptr)
+
+    if srcty.dtype != destty.dtype:
+        strided_copy()
+        return
+
+    outer, length, inner = _split_axis(context, builder, shapes, axis)
+    _, total, _ = _split_axis(context, builder, destshapes, axis)
+    contig = _is_c_contiguous(context, builder, srcty, src)
+    with cgutils.ifelse(builder, contig) as (then, otherwise):
+        with then:
+            # Each outer block of the source is contiguous in the
+            # destination as well
+            block = builder.mul(length, inner)
+            with cgutils.for_range(builder, outer, intp_t) as o:
+                src_ptr = builder.gep(src.data, [builder.mul(o, block)])
+                start = builder.add(builder.mul(o, total), offset)
+                dest_ptr = builder.gep(dest.data,
+                                       [builder.mul(start, inner)])
+                cgutils.raw_memcpy(builder, dest_ptr, src_ptr, block,
+                                   src.itemsize)
+        with otherwise:
+            strided_copy()
+
+
+def _concatenate(context, builder, axis, arrtys, arrs, retty):
+    """
+    Concatenate arrays *arrs* (array structures of types *arrtys*, with
+    as many dimensions as *retty*) along the runtime *axis*.  A new array
+    structure of type *retty* is returned.
+    """
+    ndim = retty.ndim
+    allshapes = [cgutils.unpack_tuple(builder, arr.shape, ndim)
+                 for arr in arrs]
+
+    # Check the dimensions and compute the result's shape
+    destshapes = []
+    for k in range(ndim):
+        is_axis = builder.icmp_signed('==', axis,
+                                      context.get_constant(types.intp, k))
+        first = allshapes[0][k]
+        total = first
+        for shapes in allshapes[1:]:
+            total = builder.add(total, shapes[k])
+            mismatch = builder.and_(builder.not_(is_axis),
+                                    builder.icmp_signed('!=', shapes[k],
+                                                        first))
+            with cgutils.if_unlikely(builder, mismatch):
+                context.call_conv.return_user_exc(
+                    builder, ValueError,
+                    ("all the input array dimensions except for the "
+                     "concatenation axis must match exactly",))
+        destshapes.append(builder.select(is_axis, total, first))
+
+    dest = _empty_nd_impl(context, builder, retty, destshapes)
+
+    offset = context.get_constant(types.intp, 0)
+    for arrty, arr, shapes in zip(arrtys, arrs, allshapes):
+        _copy_into_slice(context, builder, arrty, arr, retty, dest, axis,
+                         offset)
+        _, length, _ = _split_axis(context, builder, shapes, axis)
+        offset = builder.add(offset, length)
+    return dest
+
+
+def _unpack_arrays(context, builder, tupty, tup):
+    """
+    Return the array types and array structures in tuple *tup*.
+    """
+    arrtys = list(tupty)
+    values = cgutils.unpack_tuple(builder, tup, len(arrtys))
+    return arrtys, [make_array(ty)(context, builder, val)
+                    for ty, val in zip(arrtys, values)]
+
+
+def _as_row_view(context, builder, aryty, ary):
+    """
+    Return a 2-d array structure viewing 1-d array *ary* as a single row.
+    No new reference is created: the view must not outlive *ary*.
+    """
+    viewty = aryty.copy(ndim=2)
+    view = make_array(viewty)(context, builder)
+    shapes = cgutils.unpack_tuple(builder, ary.shape, 1)
+    strides = cgutils.unpack_tuple(builder, ary.strides, 1)
+    populate_array(view,
+                   data=ary.data,
+                   shape=[context.get_constant(types.intp, 1), shapes[0]],
+                   strides=[builder.mul(shapes[0], ary.itemsize),
+                            strides[0]],
+                   itemsize=ary.itemsize,
+                   meminfo=ary.meminfo,
+                   parent=ary.parent)
+    return viewty, view
+
+
+@builtin
+@implement(numpy.concatenate, types.Any)
+@implement(numpy.concatenate, types.Any, types.Kind(types.Integer))
+def numpy_concatenate(context, builder, sig, args):
+    arrtys, arrs = _unpack_arrays(context, builder, sig.args[0], args[0])
+    if len(args) > 1:
+        axis = _normalize_axis(context, builder, sig.return_type.ndim,
+                               args[1], sig.args[1])
+    else:
+        axis = context.get_constant(types.intp, 0)
+    dest = _concatenate(context, builder, axis, arrtys, arrs,
+                        sig.return_type)
+    return dest._getvalue()
+
+
+@builtin
+@implement(numpy.vstack, types.Any)
+def numpy_vstack(context, builder, sig, args):
+    arrtys, arrs = _unpack_arrays(context, builder, sig.args[0], args[0])
+    if arrtys[0].ndim == 1:
+        views = [_as_row_view(context, builder, ty, arr)
+                 for ty, arr in zip(arrtys, arrs)]
+        arrtys = [ty for ty, _ in views]
+        arrs = [view for _, view in views]
+    axis = context.get_constant(types.intp, 0)
+    dest = _concatenate(context, builder, axis, arrtys, arrs,
+                        sig.return_type)
+    return dest._getvalue()
+
+
+@builtin
+@implement(numpy.hstack, types.Any)
+def numpy_hstack(context, builder, sig, args):
+    arrtys, arrs = _unpack_arrays(context, builder, sig.args[0], args[0])
+    axis = context.get_constant(types.intp,
+                                0 if sig.return_type.ndim == 1 else 1)
+    dest = _concatenate(context, builder, axis, arrtys, arrs,
+                        sig.return_type)
+    return dest._getvalue()
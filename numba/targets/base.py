@@ -41,6 +41,7 @@ LTYPEMAP = {
     types.int32: Type.int(32),
     types.int64: Type.int(64),
 
+    types.float16: Type.int(16),
     types.float32: Type.float(),
     types.float64: Type.double(),
 }
@@ -141,6 +142,10 @@ class BaseContext(object):
     implement_powi_as_math_call = False
     implement_pow_as_math_call = False
 
+    # Whether arrays allocated in nopython mode are reference-counted
+    # (this needs the meminfo helpers from _helperlib)
+    enable_array_refcount = False
+
     def __init__(self, typing_context):
         _load_global_helpers()
         self.address_size = utils.MACHINE_BITS
@@ -154,6 +159,7 @@ class BaseContext(object):
         self.insert_attr_defn(builtin_registry.attributes)
 
         self.cached_internal_func = {}
+        self._refcounted_types = {}
 
         # Initialize
         self.init()
@@ -337,6 +343,8 @@ class BaseContext(object):
     def get_value_type(self, ty):
         if ty == types.boolean:
             return Type.int(1)
+        elif ty == types.float16:
+            return Type.float()
         dataty = self.get_data_type(ty)
 
         if isinstance(ty, types.Record):
@@ -358,6 +366,8 @@ class BaseContext(object):
 
         if ty == types.boolean:
             value = cgutils.as_bool_byte(builder, value)
+        elif ty == types.float16:
+            value = cgutils.as_half_bits(builder, value)
         assert value.type == ptr.type.pointee
         builder.store(value, ptr)
 
@@ -376,6 +386,8 @@ class BaseContext(object):
         value = builder.load(ptr)
         if ty == types.boolean:
             return builder.trunc(value, Type.int(1))
+        elif ty == types.float16:
+            return cgutils.from_half_bits(builder, value)
         else:
             return value
 
@@ -442,6 +454,9 @@ class BaseContext(object):
         elif ty in types.real_domain:
             return Constant.real(lty, val)
 
+        elif ty == types.float16:
+            return Constant.real(lty, float(numpy.float16(val)))
+
         elif isinstance(ty, types.UniTuple):
             consts = [self.get_constant(ty.dtype, v) for v in val]
             return Constant.array(consts[0].type, consts)
@@ -635,7 +650,9 @@ class BaseContext(object):
                            toty in types.unsigned_domain)):
             lfrom = self.get_value_type(fromty)
             lto = self.get_value_type(toty)
-            if lfrom.width <= lto.width:
+            if lfrom.width == lto.width:
+                return val
+            elif lfrom.width < lto.width:
                 return builder.zext(val, lto)
             elif lfrom.width > lto.width:
                 return builder.trunc(val, lto)
@@ -643,11 +660,23 @@ class BaseContext(object):
         elif fromty in types.signed_domain and toty in types.signed_domain:
             lfrom = self.get_value_type(fromty)
             lto = self.get_value_type(toty)
-            if lfrom.width <= lto.width:
+            if lfrom.width == lto.width:
+                return val
+            elif lfrom.width < lto.width:
                 return builder.sext(val, lto)
             elif lfrom.width > lto.width:
                 return builder.trunc(val, lto)
 
+        elif fromty == types.float16:
+            # Half precision values are already widened to single precision
+            return self.cast(builder, val, types.float32, toty)
+
+        elif toty == types.float16:
+            # Compute in single precision, then round to half precision
+            val = self.cast(builder, val, fromty, types.float32)
+            return cgutils.from_half_bits(builder,
+                                          cgutils.as_half_bits(builder, val))
+
         elif fromty in types.real_domain and toty in types.real_domain:
             lty = self.get_value_type(toty)
             if fromty == types.float32 and toty == types.float64:
@@ -983,11 +1012,111 @@ class BaseContext(object):
 
         # Create array structure
         cary = self.make_array(typ)(self, builder)
-        cary.data = builder.bitcast(data, cary.data.type)
-        cary.shape = cshape
-        cary.strides = cstrides
+        itemsize = self.get_constant(types.intp, ary.itemsize)
+        arrayobj.populate_array(cary,
+                                data=builder.bitcast(data, cary.data.type),
+                                shape=cshape,
+                                strides=cstrides,
+                                itemsize=itemsize,
+                                meminfo=None)
         return cary._getvalue()
 
+    def meminfo_alloc(self, builder, size):
+        """
+        Allocate a new meminfo with a data area of *size* bytes.
+        The returned pointer is NULL if the allocation failed.
+        """
+        mod = cgutils.get_module(builder)
+        fnty = Type.function(GENERIC_POINTER, [self.get_value_type(types.intp)])
+        fn = mod.get_or_insert_function(fnty, name="numba_meminfo_alloc")
+        return builder.call(fn, [size])
+
+    def meminfo_data(self, builder, meminfo):
+        """
+        Get the pointer to the data area of *meminfo*.
+        """
+        mod = cgutils.get_module(builder)
+        fnty = Type.function(GENERIC_POINTER, [GENERIC_POINTER])
+        fn = mod.get_or_insert_function(fnty, name="numba_meminfo_data")
+        return builder.call(fn, [meminfo])
+
+    def is_refcounted_type(self, ty):
+        """
+        Whether values of Numba type *ty* hold references to meminfos
+        (i.e. they contain arrays, possibly indirectly).
+        """
+        try:
+            return self._refcounted_types[ty]
+        except KeyError:
+            pass
+        if isinstance(ty, types.Array):
+            res = True
+        elif isinstance(ty, (types.UniTuple, types.Tuple)):
+            res = any(self.is_refcounted_type(t) for t in ty)
+        elif isinstance(ty, types.BoundFunction):
+            res = self.is_refcounted_type(ty.this)
+        else:
+            try:
+                impl = struct_registry.match(ty)
+            except KeyError:
+                res = False
+            else:
+                res = any(self.is_refcounted_type(t)
+                          for _, t in impl(ty)._fields)
+        self._refcounted_types[ty] = res
+        return res
+
+    def _get_meminfos(self, builder, ty, val):
+        """
+        Return the list of meminfo pointers held by value *val* of
+        Numba type *ty*.
+        """
+        if not self.is_refcounted_type(ty):
+            return []
+        if isinstance(ty, types.Array):
+            # The meminfo is the first member of the array structure
+            return [builder.extract_value(val, 0)]
+        elif isinstance(ty, (types.UniTuple, types.Tuple)):
+            items = cgutils.unpack_tuple(builder, val, len(ty))
+        elif isinstance(ty, types.BoundFunction):
+            return self._get_meminfos(builder, ty.this, val)
+        else:
+            # A structure type, e.g. an array iterator
+            fieldtypes = [t for _, t in struct_registry.match(ty)(ty)._fields]
+            items = cgutils.unpack_tuple(builder, val, len(fieldtypes))
+            ty = fieldtypes
+        meminfos = []
+        for t, item in zip(ty, items):
+            meminfos += self._get_meminfos(builder, t, item)
+        return meminfos
+
+    def _call_meminfo_refcount(self, builder, funcname, ty, val):
+        if not self.enable_array_refcount:
+            return
+        meminfos = self._get_meminfos(builder, ty, val)
+        if not meminfos:
+            return
+        mod = cgutils.get_module(builder)
+        fnty = Type.function(Type.void(), [GENERIC_POINTER])
+        fn = mod.get_or_insert_function(fnty, name=funcname)
+        for meminfo in meminfos:
+            # Arrays not allocated by us (e.g. arguments) have a NULL
+            # meminfo, avoid calling out in that case.
+            with cgutils.ifthen(builder, cgutils.is_not_null(builder, meminfo)):
+                builder.call(fn, [meminfo])
+
+    def incref(self, builder, ty, val):
+        """
+        Add a reference to the memory held by value *val* of type *ty*.
+        """
+        self._call_meminfo_refcount(builder, "numba_meminfo_incref", ty, val)
+
+    def decref(self, builder, ty, val):
+        """
+        Remove a reference to the memory held by value *val* of type *ty*.
+        """
+        self._call_meminfo_refcount(builder, "numba_meminfo_decref", ty, val)
+
     def get_abi_sizeof(self, ty):
         """
         Get the ABI size of LLVM type *ty*.
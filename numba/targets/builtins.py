@@ -7,9 +7,9 @@ from llvmlite.llvmpy.core import Type, Constant
 import llvmlite.llvmpy.core as lc
 
 from .imputils import (builtin, builtin_attr, implement, impl_attribute,
-                       iternext_impl, struct_factory)
-from . import optional
-from .. import typing, types, cgutils, utils, intrinsics
+                       iternext_impl, struct_factory, impl_ret_borrowed)
+from . import optional, vecmath
+from .. import config, typing, types, cgutils, utils, intrinsics
 
 #-------------------------------------------------------------------------------
 
@@ -146,14 +146,19 @@ def int_spower_impl(context, builder, sig, args):
     module = cgutils.get_module(builder)
     x, y = args
 
-    # Cast x to float64 to ensure enough precision for the result
-    x = context.cast(builder, x, sig.args[0], types.float64)
+    # Cast x to float64 to ensure enough precision for the result,
+    # unless it is a float32 (the computation then stays in single
+    # precision, as in Numpy)
+    if sig.args[0] == types.float32:
+        fltty = types.float32
+    else:
+        fltty = types.float64
+    x = context.cast(builder, x, sig.args[0], fltty)
     # Cast y to int32
     y = context.cast(builder, y, sig.args[1], types.int32)
 
     if context.implement_powi_as_math_call:
-        undersig = typing.signature(sig.return_type, types.float64,
-                                    types.int32)
+        undersig = typing.signature(sig.return_type, fltty, types.int32)
         impl = context.get_function(math.pow, undersig)
         res = impl(builder, (x, y))
     else:
@@ -161,7 +166,7 @@ def int_spower_impl(context, builder, sig, args):
         res = builder.call(powerfn, (x, y))
 
     # Cast result back
-    return context.cast(builder, res, types.float64, sig.return_type)
+    return context.cast(builder, res, fltty, sig.return_type)
 
 
 def int_upower_impl(context, builder, sig, args):
@@ -419,8 +424,9 @@ for ty in types.unsigned_domain:
     builtin(implement('<=', ty, ty)(int_ule_impl))
     builtin(implement('>', ty, ty)(int_ugt_impl))
     builtin(implement('>=', ty, ty)(int_uge_impl))
-    builtin(implement('**', types.float64, ty)(int_upower_impl))
-    builtin(implement(pow, types.float64, ty)(int_upower_impl))
+    for fltty in (types.float32, types.float64):
+        builtin(implement('**', fltty, ty)(int_upower_impl))
+        builtin(implement(pow, fltty, ty)(int_upower_impl))
     # logical shift for unsigned
     builtin(implement('>>', ty, types.uint32)(int_lshr_impl))
     builtin(implement(types.abs_type, ty)(uint_abs_impl))
@@ -435,8 +441,9 @@ for ty in types.signed_domain:
     builtin(implement('>', ty, ty)(int_sgt_impl))
     builtin(implement('>=', ty, ty)(int_sge_impl))
     builtin(implement(types.abs_type, ty)(int_abs_impl))
-    builtin(implement('**', types.float64, ty)(int_spower_impl))
-    builtin(implement(pow, types.float64, ty)(int_spower_impl))
+    for fltty in (types.float32, types.float64):
+        builtin(implement('**', fltty, ty)(int_spower_impl))
+        builtin(implement(pow, fltty, ty)(int_spower_impl))
     # arithmetic shift for signed
     builtin(implement('>>', ty, types.uint32)(int_ashr_impl))
 
@@ -659,7 +666,9 @@ def real_floordiv_impl(context, builder, sig, args):
 def real_power_impl(context, builder, sig, args):
     x, y = args
     module = cgutils.get_module(builder)
-    if context.implement_powi_as_math_call:
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.pow, args)
+    elif context.implement_powi_as_math_call:
         imp = context.get_function(math.pow, sig)
         return imp(builder, args)
     else:
@@ -818,42 +827,95 @@ for cls in (types.Float, types.Integer):
     builtin(implement("complex.conjugate", types.Kind(cls))(real_conjugate_impl))
 
 
-@builtin
-@implement("**", types.complex128, types.complex128)
-@implement(pow, types.complex128, types.complex128)
-def complex128_power_impl(context, builder, sig, args):
+def complex_powi_impl(context, builder, sig, args):
+    """
+    Compute z ** n for a complex z and an integer n, by repeated
+    squaring.
+    """
+    [ty, intty] = sig.args
+    [z, n] = args
+
+    def complex_powi(a, n, one):
+        # This is CPython's algorithm (in c_powi())
+        m = abs(n)
+        r = one
+        p = a
+        while m:
+            if m & 1:
+                r = r * p
+            m >>= 1
+            p = p * p
+        if n < 0:
+            r = one / r
+        return r
+
+    n = context.cast(builder, n, intty, types.int64)
+    one = context.get_constant_generic(builder, ty, 1)
+    inner_sig = typing.signature(ty, ty, types.int64, ty)
+    return context.compile_internal(builder, complex_powi, inner_sig,
+                                    (z, n, one))
+
+
+def complex_power_impl(context, builder, sig, args):
+    [ty, _] = sig.args
     [ca, cb] = args
-    a = Complex128(context, builder, value=ca)
-    b = Complex128(context, builder, value=cb)
-    c = Complex128(context, builder)
-    module = cgutils.get_module(builder)
-    pa = a._getpointer()
-    pb = b._getpointer()
-    pc = c._getpointer()
-
-    # Optimize for square because cpow looses a lot of precsiion
-    TWO = context.get_constant(types.float64, 2)
-    ZERO = context.get_constant(types.float64, 0)
-
-    b_real_is_two = builder.fcmp(lc.FCMP_OEQ, b.real, TWO)
-    b_imag_is_zero = builder.fcmp(lc.FCMP_OEQ, b.imag, ZERO)
-    b_is_two = builder.and_(b_real_is_two, b_imag_is_zero)
-
-    with cgutils.ifelse(builder, b_is_two) as (then, otherwise):
+    cmplxcls, fltty = get_complex_info(ty)
+    b = cmplxcls(context, builder, value=cb)
+    c = cmplxcls(context, builder)
+
+    # Like CPython, use repeated squaring for small integral exponents,
+    # which is both faster and more precise than the general algorithm.
+    # LLVM can unroll (and vectorize) the loop for constant exponents.
+    floor = lc.Function.intrinsic(cgutils.get_module(builder), lc.INTR_FLOOR,
+                                  [b.real.type])
+    real_abs = real_abs_impl(context, builder,
+                             typing.signature(fltty, fltty), [b.real])
+    b_is_int = builder.and_(
+        builder.fcmp(lc.FCMP_OEQ, b.imag, context.get_constant(fltty, 0)),
+        builder.and_(
+            builder.fcmp(lc.FCMP_OEQ, builder.call(floor, [b.real]), b.real),
+            builder.fcmp(lc.FCMP_OLE, real_abs,
+                         context.get_constant(fltty, 100))))
+
+    with cgutils.ifelse(builder, b_is_int, expect=True) as (then, otherwise):
         with then:
-            # Lower as multiplication
-            res = complex_mul_impl(context, builder, sig, (ca, ca))
-            cres = Complex128(context, builder, value=res)
-            c.real = cres.real
-            c.imag = cres.imag
+            n = builder.fptosi(b.real, Type.int(64))
+            powi_sig = typing.signature(ty, ty, types.int64)
+            res = complex_powi_impl(context, builder, powi_sig, (ca, n))
+            c._setvalue(res)
 
         with otherwise:
-            # Lower with call to external function
+            # Lower with call to external function (in double precision)
+            a128 = Complex128(context, builder,
+                              value=context.cast(builder, ca, ty,
+                                                 types.complex128))
+            b128 = Complex128(context, builder,
+                              value=context.cast(builder, cb, ty,
+                                                 types.complex128))
+            c128 = Complex128(context, builder)
+            pa = a128._getpointer()
+            pb = b128._getpointer()
+            pc = c128._getpointer()
+            module = cgutils.get_module(builder)
             fnty = Type.function(Type.void(), [pa.type] * 3)
             cpow = module.get_or_insert_function(fnty, name="numba.math.cpow")
             builder.call(cpow, (pa, pb, pc))
+            res = context.cast(builder, builder.load(pc),
+                               types.complex128, ty)
+            c._setvalue(res)
+
+    return c._getvalue()
 
-    return builder.load(pc)
+
+def complex_int_power_impl(context, builder, sig, args):
+    [ty, intty] = sig.args
+    [ca, n] = args
+    # Python converts the exponent to complex, then takes the same
+    # code path as for complex exponents (small integers use repeated
+    # squaring); for constant exponents LLVM folds the checks away.
+    cb = context.cast(builder, n, intty, ty)
+    return complex_power_impl(context, builder,
+                              typing.signature(ty, ty, ty), (ca, cb))
 
 
 def complex_add_impl(context, builder, sig, args):
@@ -908,35 +970,44 @@ def complex_mul_impl(context, builder, sig, args):
     return z._getvalue()
 
 
-NAN = float('nan')
-
 def complex_div_impl(context, builder, sig, args):
-    def complex_div(a, b):
-        # This is CPython's algorithm (in _Py_c_quot()).
-        areal = a.real
-        aimag = a.imag
-        breal = b.real
-        bimag = b.imag
-        if abs(breal) >= abs(bimag):
-            # Divide tops and bottom by b.real
-            if not breal:
-                return complex(NAN, NAN)
-            ratio = bimag / breal
-            denom = breal + bimag * ratio
-            return complex(
-                (areal + aimag * ratio) / denom,
-                (aimag - areal * ratio) / denom)
-        else:
-            # Divide tops and bottom by b.imag
-            if not bimag:
-                return complex(NAN, NAN)
-            ratio = breal / bimag
-            denom = breal * ratio + bimag
-            return complex(
-                (a.real * ratio + a.imag) / denom,
-                (a.imag * ratio - a.real) / denom)
-
-    return context.compile_internal(builder, complex_div, sig, args)
+    """
+    Complex division using Smith's algorithm, as CPython does
+    (in _Py_c_quot()).  Both branches of the algorithm are computed
+    and the result selected, so that loops of divisions can be
+    vectorized.  A zero divisor gives NaNs.
+    """
+    [cx, cy] = args
+    complexClass = context.make_complex(sig.args[0])
+    x = complexClass(context, builder, value=cx)
+    y = complexClass(context, builder, value=cy)
+    z = complexClass(context, builder)
+    a = x.real
+    b = x.imag
+    c = y.real
+    d = y.imag
+    fltty = sig.args[0].underlying_float
+    abs_sig = typing.signature(fltty, fltty)
+    # If abs(c) >= abs(d), divide tops and bottom by c, otherwise by d
+    # (false for NaNs, which then propagate)
+    c_is_big = builder.fcmp(lc.FCMP_OGE,
+                            real_abs_impl(context, builder, abs_sig, [c]),
+                            real_abs_impl(context, builder, abs_sig, [d]))
+    big = builder.select(c_is_big, c, d)
+    small = builder.select(c_is_big, d, c)
+    ratio = builder.fdiv(small, big)
+    denom = builder.fadd(big, builder.fmul(small, ratio))
+    neg_a = real_negate_impl(context, builder, abs_sig, [a])
+    # real = (a + b * ratio) / denom, resp. (b + a * ratio) / denom
+    real = builder.fadd(builder.select(c_is_big, a, b),
+                        builder.fmul(builder.select(c_is_big, b, a), ratio))
+    # imag = (b - a * ratio) / denom, resp. (-a + b * ratio) / denom
+    imag = builder.fadd(builder.select(c_is_big, b, neg_a),
+                        builder.fmul(builder.select(c_is_big, neg_a, b),
+                                     ratio))
+    z.real = builder.fdiv(real, denom)
+    z.imag = builder.fdiv(imag, denom)
+    return z._getvalue()
 
 
 def complex_negate_impl(context, builder, sig, args):
@@ -1003,6 +1074,12 @@ for ty in types.complex_domain:
 
     builtin(implement(types.abs_type, ty)(complex_abs_impl))
 
+    builtin(implement("**", ty, ty)(complex_power_impl))
+    builtin(implement(pow, ty, ty)(complex_power_impl))
+    for intty in types.integer_domain:
+        builtin(implement("**", ty, intty)(complex_int_power_impl))
+        builtin(implement(pow, ty, intty)(complex_int_power_impl))
+
 
 #------------------------------------------------------------------------------
 
@@ -1149,7 +1226,9 @@ def getiter_unituple(context, builder, sig, args):
     iterval.index = indexptr
     iterval.tuple = tup
 
-    return iterval._getvalue()
+    # The iterator holds a reference to the tuple's contents
+    return impl_ret_borrowed(context, builder, sig.return_type,
+                             iterval._getvalue())
 
 
 # Unfortunately, we can't make decorate UniTupleIter with iterator_impl
@@ -1176,7 +1255,8 @@ def iternext_unituple(context, builder, sig, args, result):
     with cgutils.ifthen(builder, is_valid):
         getitem_sig = typing.signature(sig.return_type, tupiterty.unituple,
                                        types.intp)
-        result.yield_(getitem_unituple(context, builder, getitem_sig, [tup, idx]))
+        result.yield_(_getitem_unituple(context, builder, getitem_sig,
+                                        [tup, idx]))
         nidx = builder.add(idx, context.get_constant(types.intp, 1))
         builder.store(nidx, iterval.index)
 
@@ -1184,6 +1264,11 @@ def iternext_unituple(context, builder, sig, args, result):
 @builtin
 @implement('getitem', types.Kind(types.UniTuple), types.intp)
 def getitem_unituple(context, builder, sig, args):
+    res = _getitem_unituple(context, builder, sig, args)
+    return impl_ret_borrowed(context, builder, sig.return_type, res)
+
+
+def _getitem_unituple(context, builder, sig, args):
     tupty, _ = sig.args
     tup, idx = args
 
@@ -1414,9 +1499,15 @@ def array_ravel_impl(context, builder, sig, args):
     strides = cgutils.unpack_tuple(builder, arr.strides, arrty.ndim)
     unit_stride = strides[0] if arrty.layout == 'F' else strides[-1]
 
-    flatarr.data = arr.data
-    flatarr.shape = cgutils.pack_array(builder, [size])
-    flatarr.strides = cgutils.pack_array(builder, [unit_stride])
-
-    return flatarr._getvalue()
+    from .arrayobj import populate_array
+    populate_array(flatarr,
+                   data=arr.data,
+                   shape=[size],
+                   strides=[unit_stride],
+                   itemsize=arr.itemsize,
+                   meminfo=arr.meminfo,
+                   parent=arr.parent)
+
+    return impl_ret_borrowed(context, builder, flatarrty,
+                             flatarr._getvalue())
 
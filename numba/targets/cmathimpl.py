@@ -11,9 +11,9 @@ import llvmlite.llvmpy.core as lc
 from llvmlite.llvmpy.core import Type
 
 from numba.targets.imputils import implement, Registry
-from numba import types, cgutils, utils
+from numba import config, types, cgutils, utils
 from numba.typing import signature
-from . import builtins, mathimpl
+from . import builtins, mathimpl, vecmath
 
 
 registry = Registry()
@@ -120,8 +120,70 @@ def intrinsic_complex_unary(inner_func):
 NAN = float('nan')
 INF = float('inf')
 
+
+def vector_math_impl(vector_impl):
+    """
+    Return a decorator making an implementation emit *vector_impl*
+    instead if NUMBA_VECTOR_MATH is set.
+    """
+    def decorate(impl):
+        def implementer(context, builder, sig, args):
+            if config.VECTOR_MATH:
+                return vector_impl(context, builder, sig, args)
+            return impl(context, builder, sig, args)
+        return implementer
+    return decorate
+
+
+def vector_exp_impl(context, builder, sig, args):
+    """
+    cmath.exp(z) with the branch-free functions from vecmath.py.
+    """
+    [typ] = sig.args
+    [value] = args
+    cplx_cls = context.make_complex(typ)
+    z = cplx_cls(context, builder, value=value)
+    x = z.real
+    y = z.imag
+    r = vecmath.emit(builder, math.exp, [x])
+    real = builder.fmul(r, vecmath.emit(builder, math.cos, [y]))
+    imag = builder.fmul(r, vecmath.emit(builder, math.sin, [y]))
+    # Special values, as in C99: exp(x + 0j) = exp(x) + 0j,
+    # exp(-inf + y j) = 0 and exp(+inf + y j) = inf + nan j for infinite
+    # or NaN y (the other cases come out right)
+    zero = context.get_constant(typ.underlying_float, 0.0)
+    inf = context.get_constant(typ.underlying_float, INF)
+    imag = builder.select(builder.fcmp(lc.FCMP_OEQ, y, zero), y, imag)
+    y_is_finite = mathimpl.is_finite(builder, y)
+    x_is_neg_inf = builder.fcmp(lc.FCMP_OEQ, x, builder.fsub(zero, inf))
+    x_is_pos_inf = builder.fcmp(lc.FCMP_OEQ, x, inf)
+    zero_res = builder.and_(x_is_neg_inf, builder.not_(y_is_finite))
+    inf_res = builder.and_(x_is_pos_inf, builder.not_(y_is_finite))
+    real = builder.select(zero_res, zero, builder.select(inf_res, inf, real))
+    imag = builder.select(zero_res, zero, imag)
+    res = cplx_cls(context, builder)
+    res.real = real
+    res.imag = imag
+    return res._getvalue()
+
+
+def vector_log_impl(context, builder, sig, args):
+    """
+    cmath.log(z) with the branch-free functions from vecmath.py.
+    """
+    [typ] = sig.args
+    [value] = args
+    cplx_cls = context.make_complex(typ)
+    z = cplx_cls(context, builder, value=value)
+    res = cplx_cls(context, builder)
+    res.real = vecmath.log_hypot(builder, z.real, z.imag)
+    res.imag = vecmath.emit(builder, math.atan2, [z.imag, z.real])
+    return res._getvalue()
+
+
 @register
 @implement(cmath.exp, types.Kind(types.Complex))
+@vector_math_impl(vector_exp_impl)
 @intrinsic_complex_unary
 def exp_impl(x, y, x_is_finite, y_is_finite):
     """cmath.exp(x + y j)"""
@@ -164,6 +226,7 @@ def exp_impl(x, y, x_is_finite, y_is_finite):
 
 @register
 @implement(cmath.log, types.Kind(types.Complex))
+@vector_math_impl(vector_log_impl)
 @intrinsic_complex_unary
 def log_impl(x, y, x_is_finite, y_is_finite):
     """cmath.log(x + y j)"""
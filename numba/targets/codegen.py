@@ -34,13 +34,15 @@ class CodeLibrary(object):
 
     _finalized = False
 
-    def __init__(self, codegen, name):
+    def __init__(self, codegen, name, opt=None):
         self._codegen = codegen
         self._name = name
+        # The optimization level (None for config.OPT)
+        self._opt = opt
         self._linking_libraries = set()
         self._final_module = ll.parse_assembly(
             str(self._codegen._create_empty_module(self._name)))
-        self._shared_module = None
+        self._shared_modules = {}
 
     @property
     def codegen(self):
@@ -67,7 +69,8 @@ class CodeLibrary(object):
         """
         # Enforce data layout to enable layout-specific optimizations
         ll_module.data_layout = self._codegen._data_layout
-        with self._codegen._function_pass_manager(ll_module) as fpm:
+        with self._codegen._function_pass_manager(ll_module,
+                                                  self._opt) as fpm:
             # Run function-level optimizations to reduce memory usage and improve
             # module-level optimization.
             for func in ll_module.functions:
@@ -79,30 +82,70 @@ class CodeLibrary(object):
         """
         Internal: optimize this library's final module.
         """
-        self._codegen._mpm.run(self._final_module)
+        mpm = self._codegen._get_module_pass_manager(self._opt)
+        mpm.run(self._final_module)
 
-    def _get_module_for_linking(self):
+    def _get_module_for_linking(self, linkage='linkonce_odr'):
         """
         Internal: get a LLVM module suitable for linking multiple times
-        into another library.  Exported functions are made "linkonce_odr"
-        to allow for multiple definitions, inlining, and removal of
-        unused exports.
+        into another library.  Exported functions are given *linkage*:
+        "linkonce_odr" allows for multiple definitions, inlining, and
+        removal of unused exports, while "available_externally" allows
+        inlining but never emits the function, so that calls resolve
+        to this library's own copy.
         See discussion in https://github.com/numba/numba/pull/890
         """
-        if self._shared_module is not None:
-            return self._shared_module
+        mod = self._shared_modules.get(linkage)
+        if mod is not None:
+            return mod
         mod = self._final_module
-        to_fix = []
-        for fn in mod.functions:
-            if not fn.is_declaration and fn.linkage == ll.Linkage.external:
-                to_fix.append(fn.name)
+        to_fix = self.get_defined_symbols()
         if to_fix:
             mod = mod.clone()
             for name in to_fix:
-                mod.get_function(name).linkage = 'linkonce_odr'
-        self._shared_module = mod
+                mod.get_function(name).linkage = linkage
+        self._shared_modules[linkage] = mod
         return mod
 
+    def get_defined_symbols(self):
+        """
+        Return the names of the functions exported by this library.
+        """
+        return [fn.name for fn in self._final_module.functions
+                if not fn.is_declaration
+                and fn.linkage == ll.Linkage.external]
+
+    def _get_undefined_symbols(self, ll_module):
+        return set(fn.name for fn in ll_module.functions
+                   if fn.is_declaration)
+
+    def _link_dependencies(self):
+        """
+        Internal: link in the code of the libraries this library
+        depends on, so that it can be inlined.  Besides the libraries
+        explicitly added with add_linking_library(), only the codegen's
+        shared libraries defining a symbol that is actually referenced
+        are linked in.
+        """
+        linkage = self._codegen._shared_linkage
+        pending = list(self._linking_libraries)
+        linked = set()
+        while True:
+            for library in pending:
+                if library in linked:
+                    continue
+                linked.add(library)
+                self._final_module.link_in(
+                    library._get_module_for_linking(linkage), preserve=True)
+            # Linked-in code may itself reference other shared libraries
+            pending = [self._codegen._symbol_libraries[name]
+                       for name in self._get_undefined_symbols(
+                           self._final_module)
+                       if name in self._codegen._symbol_libraries]
+            pending = [lib for lib in pending if lib not in linked]
+            if not pending:
+                break
+
     def create_ir_module(self, name):
         """
         Create a LLVM IR module for use by this library.
@@ -145,12 +188,7 @@ class CodeLibrary(object):
             dump("FUNCTION OPTIMIZED DUMP %s" % self._name, self.get_llvm_str())
 
         # Link libraries for shared code
-        for library in self._linking_libraries:
-            self._final_module.link_in(
-                library._get_module_for_linking(), preserve=True)
-        for library in self._codegen._libraries:
-            self._final_module.link_in(
-                library._get_module_for_linking(), preserve=True)
+        self._link_dependencies()
 
         # Optimize the module after all dependences are linked in above,
         # to allow for inlining.
@@ -214,6 +252,17 @@ class AOTCodeLibrary(CodeLibrary):
         self._ensure_finalized()
         return self._final_module.as_bitcode()
 
+    def internalize_symbols(self, keep=()):
+        """
+        Give internal linkage to the functions exported by this library,
+        except those named in *keep*, so that several libraries defining
+        the same helpers can be linked into one binary.
+        """
+        self._raise_if_finalized()
+        for name in self.get_defined_symbols():
+            if name not in keep:
+                self._final_module.get_function(name).linkage = 'internal'
+
     def _finalize_specific(self):
         pass
 
@@ -237,9 +286,16 @@ class JITCodeLibrary(CodeLibrary):
 
 class BaseCPUCodegen(object):
 
+    # The linkage given to functions of other libraries linked into a
+    # library (see CodeLibrary._get_module_for_linking())
+    _shared_linkage = 'linkonce_odr'
+
     def __init__(self, module_name):
         self._libraries = set()
+        self._symbol_libraries = {}
         self._data_layout = None
+        # Module pass managers for non-default optimization levels
+        self._mpms = {}
         self._llvm_module = ll.parse_assembly(
             str(self._create_empty_module(module_name)))
         self._init(self._llvm_module)
@@ -288,44 +344,58 @@ class BaseCPUCodegen(object):
         """
         library._ensure_finalized()
         self._libraries.add(library)
+        for name in library.get_defined_symbols():
+            self._symbol_libraries.setdefault(name, library)
 
-    def create_library(self, name):
+    def create_library(self, name, opt=None):
         """
         Create a :class:`CodeLibrary` object for use with this codegen
-        instance.
+        instance.  *opt* is the LLVM optimization level of the library's
+        code (by default, config.OPT).
         """
-        return self._library_class(self, name)
+        return self._library_class(self, name, opt)
+
+    def _get_module_pass_manager(self, opt=None):
+        if opt is None:
+            return self._mpm
+        pm = self._mpms.get(opt)
+        if pm is None:
+            pm = self._mpms[opt] = self._module_pass_manager(opt)
+        return pm
 
-    def _module_pass_manager(self):
+    def _module_pass_manager(self, opt=None):
         pm = ll.create_module_pass_manager()
         dl = ll.create_target_data(self._data_layout)
         dl.add_pass(pm)
         self._tli.add_pass(pm)
         self._tm.add_analysis_passes(pm)
-        with self._pass_manager_builder() as pmb:
+        with self._pass_manager_builder(opt) as pmb:
             pmb.populate(pm)
         return pm
 
-    def _function_pass_manager(self, llvm_module):
+    def _function_pass_manager(self, llvm_module, opt=None):
         pm = ll.create_function_pass_manager(llvm_module)
         self._target_data.add_pass(pm)
         self._tli.add_pass(pm)
         self._tm.add_analysis_passes(pm)
-        with self._pass_manager_builder() as pmb:
+        with self._pass_manager_builder(opt) as pmb:
             pmb.populate(pm)
         return pm
 
-    def _pass_manager_builder(self):
+    def _pass_manager_builder(self, opt=None):
         """
-        Create a PassManagerBuilder.
+        Create a PassManagerBuilder for optimization level *opt*
+        (by default, config.OPT).
 
         Note: a PassManagerBuilder seems good only for one use, so you
         should call this method each time you want to populate a module
         or function pass manager.  Otherwise some optimizations will be
         missed...
         """
+        if opt is None:
+            opt = config.OPT
         pmb = lp.create_pass_manager_builder(
-            opt=config.OPT, loop_vectorize=config.LOOP_VECTORIZE)
+            opt=opt, loop_vectorize=config.LOOP_VECTORIZE)
         return pmb
 
 
@@ -337,7 +407,15 @@ class AOTCPUCodegen(BaseCPUCodegen):
 
     _library_class = AOTCodeLibrary
 
+    def __init__(self, module_name, cpu_name='', features=''):
+        # By default, produce code for a generic CPU
+        self._cpu_name = cpu_name
+        self._features = features
+        BaseCPUCodegen.__init__(self, module_name)
+
     def _customize_tm_options(self, options):
+        options['cpu'] = self._cpu_name
+        options['features'] = self._features
         options['reloc'] = 'pic'
         options['codemodel'] = 'default'
 
@@ -352,6 +430,13 @@ class JITCPUCodegen(BaseCPUCodegen):
 
     _library_class = JITCodeLibrary
 
+    # All libraries are added to the same execution engine, so that a
+    # library can call the functions of another one by symbol instead of
+    # embedding a copy of them.  Linked-in functions are still available
+    # for inlining.  MCJIT is still defective under Windows, though.
+    if not sys.platform.startswith('win32'):
+        _shared_linkage = 'available_externally'
+
     def _customize_tm_options(self, options):
         features = []
 
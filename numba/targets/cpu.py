@@ -12,9 +12,9 @@ from .base import BaseContext, PYOBJECT
 from numba import utils, cgutils, types
 from numba.utils import cached_property
 from numba.targets import (
-    callconv, codegen, externals, intrinsics, cmathimpl, mathimpl,
-    npyimpl, operatorimpl, printimpl, randomimpl)
-from .options import TargetOptions
+    callconv, codegen, externals, intrinsics, cmathimpl, linalgimpl,
+    mathimpl, npyimpl, operatorimpl, printimpl, randomimpl)
+from .options import TargetOptions, fastmath_flags
 
 
 # Keep those structures in sync with _dynfunc.c.
@@ -34,6 +34,8 @@ class CPUContext(BaseContext):
     """
     Changes BaseContext calling convention
     """
+    enable_array_refcount = True
+
     # Overrides
     def create_module(self, name):
         return self._internal_codegen._create_empty_module(name)
@@ -48,6 +50,7 @@ class CPUContext(BaseContext):
 
         # Add target specific implementations
         self.insert_func_defn(cmathimpl.registry.functions)
+        self.insert_func_defn(linalgimpl.registry.functions)
         self.insert_func_defn(mathimpl.registry.functions)
         self.insert_func_defn(npyimpl.registry.functions)
         self.insert_func_defn(operatorimpl.registry.functions)
@@ -60,8 +63,8 @@ class CPUContext(BaseContext):
     def target_data(self):
         return self._internal_codegen.target_data
 
-    def aot_codegen(self, name):
-        return codegen.AOTCPUCodegen(name)
+    def aot_codegen(self, name, cpu_name='', features=''):
+        return codegen.AOTCPUCodegen(name, cpu_name, features)
 
     def jit_codegen(self):
         return self._internal_codegen
@@ -167,6 +170,11 @@ class CPUTargetOptions(TargetOptions):
         "looplift": bool,
         "wraparound": bool,
         "boundcheck": bool,
+        "fastmath": fastmath_flags,
+        "tiered": bool,
+        "noalias": bool,
+        "interchange": bool,
+        "tile": bool,
     }
 
 
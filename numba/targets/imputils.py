@@ -56,6 +56,16 @@ def impl_attribute_generic(ty):
     return wrapper
 
 
+def impl_ret_borrowed(context, builder, retty, ret):
+    """
+    Return *ret* (of type *retty*) from an implementation which returns
+    (part of) one of its arguments.  As implementations must return new
+    references, a reference is added here.
+    """
+    context.incref(builder, retty, ret)
+    return ret
+
+
 def user_function(func, fndesc, libs):
     """
     A wrapper inserting code calling Numba-compiled *func*.
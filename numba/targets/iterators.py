@@ -5,14 +5,14 @@ Implementation of various iterable and iterator types.
 from numba import types, cgutils
 from numba.targets.imputils import (
     builtin, implement, iternext_impl, call_iternext, call_getiter,
-    struct_factory)
+    struct_factory, impl_ret_borrowed)
 
 
 @builtin
 @implement('getiter', types.Kind(types.IteratorType))
 def iterator_getiter(context, builder, sig, args):
     [it] = args
-    return it
+    return impl_ret_borrowed(context, builder, sig.return_type, it)
 
 
 #-------------------------------------------------------------------------------
@@ -0,0 +1,566 @@
+"""
+Implementation of the np.linalg functions, using LAPACK.
+
+The LAPACK routines are looked up at runtime in the Cython bindings
+exported by scipy (scipy.linalg.cython_lapack).  Numpy itself doesn't
+export its LAPACK symbols.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import ctypes
+import math
+
+import numpy as np
+
+import llvmlite.binding as ll
+from llvmlite.llvmpy.core import Type, Constant
+
+from numba import cgutils, intrinsics, types
+from numba.numpy_support import as_dtype
+from numba.targets.imputils import implement, Registry
+from numba.typing import signature
+from .arrayobj import make_array, make_view, _empty_nd_impl
+
+
+registry = Registry()
+register = registry.register
+
+ll_int = Type.int(32)
+ll_char = Type.int(8)
+
+# Matrices of at most this size are handled by specialized code,
+# to avoid the overhead of LAPACK calls and temporary allocations.
+SMALL_MATRIX_SIZE = 4
+
+
+# -----------------------------------------------------------------------------
+# LAPACK symbol resolution
+
+_lapack_symbols = {}
+
+def _get_capsule_pointer(capsule):
+    get_name = ctypes.pythonapi.PyCapsule_GetName
+    get_name.restype = ctypes.c_char_p
+    get_name.argtypes = [ctypes.py_object]
+    get_pointer = ctypes.pythonapi.PyCapsule_GetPointer
+    get_pointer.restype = ctypes.c_void_p
+    get_pointer.argtypes = [ctypes.py_object, ctypes.c_char_p]
+    return get_pointer(capsule, get_name(capsule))
+
+def get_lapack_symbol(name):
+    """
+    Return the LLVM symbol name for LAPACK routine *name* (e.g. "dgetrf"),
+    registering its address with LLVM on first use.
+    """
+    try:
+        return _lapack_symbols[name]
+    except KeyError:
+        pass
+    try:
+        from scipy.linalg import cython_lapack
+    except ImportError:
+        raise ImportError("scipy 0.16+ is required for linear algebra "
+                          "in nopython mode")
+    try:
+        capsule = cython_lapack.__pyx_capi__[name]
+    except KeyError:
+        raise NotImplementedError("LAPACK routine %r not available" % (name,))
+    symbol = "numba.lapack.%s" % (name,)
+    ll.add_symbol(symbol, _get_capsule_pointer(capsule))
+    _lapack_symbols[name] = symbol
+    return symbol
+
+
+def _lapack_name(dtype, name):
+    prefix = {types.float32: 's', types.float64: 'd'}[dtype]
+    return prefix + name
+
+def call_lapack(context, builder, dtype, name, args):
+    """
+    Call the LAPACK routine *name* (without the type prefix) for *dtype*
+    with the given LLVM pointer arguments (Fortran calling convention).
+    """
+    symbol = get_lapack_symbol(_lapack_name(dtype, name))
+    mod = cgutils.get_module(builder)
+    fnty = Type.function(Type.void(), [a.type for a in args])
+    fn = mod.get_or_insert_function(fnty, name=symbol)
+    builder.call(fn, args)
+
+
+def _int_ptr(context, builder, value):
+    """
+    Store the intp *value* in a new int32 stack slot and return its pointer.
+    """
+    if value.type != ll_int:
+        value = builder.trunc(value, ll_int)
+    return cgutils.alloca_once_value(builder, value)
+
+def _char_ptr(builder, char):
+    return cgutils.alloca_once_value(builder, Constant.int(ll_char, ord(char)))
+
+def _at_least_one(context, builder, value):
+    one = context.get_constant(types.intp, 1)
+    return builder.select(builder.icmp_signed('<', value, one), one, value)
+
+def _matrix_dims(context, builder, aryty, ary):
+    """
+    Return the (rows, columns, leading dimension) of C-contiguous array
+    *ary* as seen by LAPACK, i.e. for its Fortran-ordered transpose.
+    A 1D array is seen as a single column.
+    """
+    shape = cgutils.unpack_tuple(builder, ary.shape, aryty.ndim)
+    if aryty.ndim == 1:
+        n = shape[0]
+        nrhs = context.get_constant(types.intp, 1)
+    else:
+        nrhs, n = shape
+    return n, nrhs, _at_least_one(context, builder, n)
+
+
+# -----------------------------------------------------------------------------
+# LAPACK wrappers
+
+@register
+@implement(intrinsics.lapack_getrf, types.Kind(types.Array),
+           types.Kind(types.Array))
+def lapack_getrf_impl(context, builder, sig, args):
+    aty, ipivty = sig.args
+    a = make_array(aty)(context, builder, args[0])
+    ipiv = make_array(ipivty)(context, builder, args[1])
+    m, n, lda = _matrix_dims(context, builder, aty, a)
+    info = cgutils.alloca_once(builder, ll_int)
+    call_lapack(context, builder, aty.dtype, "getrf",
+                [_int_ptr(context, builder, m), _int_ptr(context, builder, n),
+                 a.data, _int_ptr(context, builder, lda), ipiv.data, info])
+    return builder.load(info)
+
+
+@register
+@implement(intrinsics.lapack_getrs, types.Kind(types.Array),
+           types.Kind(types.Array), types.Kind(types.Array), types.boolean)
+def lapack_getrs_impl(context, builder, sig, args):
+    aty, ipivty, bty, _ = sig.args
+    a = make_array(aty)(context, builder, args[0])
+    ipiv = make_array(ipivty)(context, builder, args[1])
+    b = make_array(bty)(context, builder, args[2])
+    trans = builder.select(args[3], Constant.int(ll_char, ord('T')),
+                           Constant.int(ll_char, ord('N')))
+    n, _, lda = _matrix_dims(context, builder, aty, a)
+    _, nrhs, ldb = _matrix_dims(context, builder, bty, b)
+    info = cgutils.alloca_once(builder, ll_int)
+    call_lapack(context, builder, aty.dtype, "getrs",
+                [cgutils.alloca_once_value(builder, trans),
+                 _int_ptr(context, builder, n),
+                 _int_ptr(context, builder, nrhs),
+                 a.data, _int_ptr(context, builder, lda), ipiv.data,
+                 b.data, _int_ptr(context, builder, ldb), info])
+    return builder.load(info)
+
+
+@register
+@implement(intrinsics.lapack_potrf, types.Kind(types.Array))
+def lapack_potrf_impl(context, builder, sig, args):
+    [aty] = sig.args
+    a = make_array(aty)(context, builder, args[0])
+    n, _, lda = _matrix_dims(context, builder, aty, a)
+    info = cgutils.alloca_once(builder, ll_int)
+    # The upper triangle of the Fortran-ordered matrix is the lower
+    # triangle of the C-ordered one.
+    call_lapack(context, builder, aty.dtype, "potrf",
+                [_char_ptr(builder, 'U'), _int_ptr(context, builder, n),
+                 a.data, _int_ptr(context, builder, lda), info])
+    return builder.load(info)
+
+
+@register
+@implement(intrinsics.lapack_gelsd, types.Kind(types.Array),
+           types.Kind(types.Array), types.Kind(types.Array), types.Any,
+           types.Kind(types.Array))
+def lapack_gelsd_impl(context, builder, sig, args):
+    aty, bty, sty, rcondty, rankty = sig.args
+    dtype = aty.dtype
+    a = make_array(aty)(context, builder, args[0])
+    b = make_array(bty)(context, builder, args[1])
+    s = make_array(sty)(context, builder, args[2])
+    rank = make_array(rankty)(context, builder, args[4])
+    rcond = cgutils.alloca_once_value(builder, args[3])
+
+    m, n, lda = _matrix_dims(context, builder, aty, a)
+    _, nrhs, ldb = _matrix_dims(context, builder, bty, b)
+    info = cgutils.alloca_once(builder, ll_int)
+
+    def call_gelsd(work, lwork, iwork):
+        call_lapack(context, builder, dtype, "gelsd",
+                    [_int_ptr(context, builder, m),
+                     _int_ptr(context, builder, n),
+                     _int_ptr(context, builder, nrhs),
+                     a.data, _int_ptr(context, builder, lda),
+                     b.data, _int_ptr(context, builder, ldb),
+                     s.data, rcond, rank.data,
+                     work, lwork, iwork, info])
+
+    # Workspace query
+    work_size = cgutils.alloca_once(builder, context.get_value_type(dtype))
+    iwork_size = cgutils.alloca_once(builder, ll_int)
+    call_gelsd(work_size, _int_ptr(context, builder,
+                                   context.get_constant(types.intp, -1)),
+               iwork_size)
+
+    intp_t = context.get_value_type(types.intp)
+    lwork = builder.fptosi(builder.load(work_size), intp_t)
+    lwork = _at_least_one(context, builder, lwork)
+    liwork = _at_least_one(context, builder,
+                           builder.sext(builder.load(iwork_size), intp_t))
+
+    workty = types.Array(dtype, 1, 'C')
+    iworkty = types.Array(types.int32, 1, 'C')
+    work = _empty_nd_impl(context, builder, workty, [lwork])
+    iwork = _empty_nd_impl(context, builder, iworkty, [liwork])
+    call_gelsd(work.data, _int_ptr(context, builder, lwork), iwork.data)
+    context.decref(builder, workty, work._getvalue())
+    context.decref(builder, iworkty, iwork._getvalue())
+    return builder.load(info)
+
+
+# -----------------------------------------------------------------------------
+# np.linalg functions
+
+@register
+@implement("np.linalg.det", types.Kind(types.Array))
+def det_impl(context, builder, sig, args):
+    dtype = as_dtype(sig.return_type).type
+    small = SMALL_MATRIX_SIZE
+
+    def det_impl(a):
+        n = a.shape[0]
+        if a.shape[1] != n:
+            raise np.linalg.LinAlgError("Last 2 dimensions of the array "
+                                        "must be square")
+        if n == 0:
+            return 1.0
+        if n == 1:
+            return a[0, 0]
+        if n == 2:
+            return a[0, 0] * a[1, 1] - a[0, 1] * a[1, 0]
+        if n == 3:
+            return (a[0, 0] * (a[1, 1] * a[2, 2] - a[1, 2] * a[2, 1])
+                    - a[0, 1] * (a[1, 0] * a[2, 2] - a[1, 2] * a[2, 0])
+                    + a[0, 2] * (a[1, 0] * a[2, 1] - a[1, 1] * a[2, 0]))
+        acpy = np.empty((n, n), dtype)
+        for i in range(n):
+            for j in range(n):
+                acpy[i, j] = a[i, j]
+        d = 1.0
+        if n <= small:
+            # Gaussian elimination with partial pivoting
+            for k in range(n):
+                p = k
+                for i in range(k + 1, n):
+                    if abs(acpy[i, k]) > abs(acpy[p, k]):
+                        p = i
+                if acpy[p, k] == 0:
+                    return 0.0
+                if p != k:
+                    d = -d
+                    for j in range(k, n):
+                        tmp = acpy[k, j]
+                        acpy[k, j] = acpy[p, j]
+                        acpy[p, j] = tmp
+                d *= acpy[k, k]
+                for i in range(k + 1, n):
+                    f = acpy[i, k] / acpy[k, k]
+                    for j in range(k + 1, n):
+                        acpy[i, j] -= f * acpy[k, j]
+            return d
+
+        ipiv = np.empty(n, np.int32)
+        if intrinsics.lapack_getrf(acpy, ipiv) > 0:
+            return 0.0
+        for i in range(n):
+            d *= acpy[i, i]
+            # LAPACK pivot indices are 1-based
+            if ipiv[i] != i + 1:
+                d = -d
+        return d
+
+    return context.compile_internal(builder, det_impl, sig, args)
+
+
+@register
+@implement("np.linalg.inv", types.Kind(types.Array))
+def inv_impl(context, builder, sig, args):
+    dtype = as_dtype(sig.return_type.dtype).type
+    small = SMALL_MATRIX_SIZE
+
+    def inv_impl(a):
+        n = a.shape[0]
+        if a.shape[1] != n:
+            raise np.linalg.LinAlgError("Last 2 dimensions of the array "
+                                        "must be square")
+        acpy = np.empty((n, n), dtype)
+        for i in range(n):
+            for j in range(n):
+                acpy[i, j] = a[i, j]
+        res = np.zeros((n, n), dtype)
+        for i in range(n):
+            res[i, i] = 1
+
+        if n <= small:
+            # Gauss-Jordan elimination with partial pivoting
+            for k in range(n):
+                p = k
+                for i in range(k + 1, n):
+                    if abs(acpy[i, k]) > abs(acpy[p, k]):
+                        p = i
+                if acpy[p, k] == 0:
+                    raise np.linalg.LinAlgError("Singular matrix")
+                if p != k:
+                    for j in range(n):
+                        tmp = acpy[k, j]
+                        acpy[k, j] = acpy[p, j]
+                        acpy[p, j] = tmp
+                        tmp = res[k, j]
+                        res[k, j] = res[p, j]
+                        res[p, j] = tmp
+                pivot = acpy[k, k]
+                for j in range(n):
+                    acpy[k, j] /= pivot
+                    res[k, j] /= pivot
+                for i in range(n):
+                    if i != k:
+                        f = acpy[i, k]
+                        for j in range(n):
+                            acpy[i, j] -= f * acpy[k, j]
+                            res[i, j] -= f * res[k, j]
+            return res
+
+        # LAPACK sees the transpose of the C-ordered copy; solving the
+        # transposed system gives the inverse in C order.
+        ipiv = np.empty(n, np.int32)
+        if intrinsics.lapack_getrf(acpy, ipiv) > 0:
+            raise np.linalg.LinAlgError("Singular matrix")
+        intrinsics.lapack_getrs(acpy, ipiv, res, False)
+        return res
+
+    return context.compile_internal(builder, inv_impl, sig, args)
+
+
+def _rhs_as_2d(context, builder, bty, b):
+    """
+    Return a (n, 1) view of 1D array *b* of type *bty*, and its type.
+    """
+    ary = make_array(bty)(context, builder, b)
+    zero = context.get_constant(types.intp, 0)
+    one = context.get_constant(types.intp, 1)
+    [n] = cgutils.unpack_tuple(builder, ary.shape, 1)
+    [stride] = cgutils.unpack_tuple(builder, ary.strides, 1)
+    b2dty = types.Array(bty.dtype, 2, 'A')
+    return b2dty, make_view(context, builder, bty, ary, b2dty, ary.data,
+                            [n, one], [stride, zero])
+
+def _result_as_1d(context, builder, resty, res):
+    """
+    Return a 1D C-contiguous view of the (n, 1) result array *res* of
+    type *resty*.  The reference to *res* is consumed.
+    """
+    ary = make_array(resty)(context, builder, res)
+    [n, _] = cgutils.unpack_tuple(builder, ary.shape, 2)
+    res1dty = resty.copy(ndim=1)
+    res1d = make_view(context, builder, resty, ary, res1dty, ary.data,
+                      [n], [ary.itemsize])
+    context.decref(builder, resty, res)
+    return res1d
+
+
+@register
+@implement("np.linalg.solve", types.Kind(types.Array), types.Kind(types.Array))
+def solve_impl(context, builder, sig, args):
+    aty, bty = sig.args
+    dtype = as_dtype(sig.return_type.dtype).type
+    small = SMALL_MATRIX_SIZE
+
+    def solve_impl(a, b):
+        n = a.shape[0]
+        if a.shape[1] != n:
+            raise np.linalg.LinAlgError("Last 2 dimensions of the array "
+                                        "must be square")
+        if b.shape[0] != n:
+            raise ValueError("incompatible array sizes")
+        nrhs = b.shape[1]
+        acpy = np.empty((n, n), dtype)
+        for i in range(n):
+            for j in range(n):
+                acpy[i, j] = a[i, j]
+        # Right-hand sides as rows, i.e. Fortran order for LAPACK
+        x = np.empty((nrhs, n), dtype)
+        for i in range(n):
+            for r in range(nrhs):
+                x[r, i] = b[i, r]
+
+        if n <= small:
+            # Gaussian elimination with partial pivoting
+            for k in range(n):
+                p = k
+                for i in range(k + 1, n):
+                    if abs(acpy[i, k]) > abs(acpy[p, k]):
+                        p = i
+                if acpy[p, k] == 0:
+                    raise np.linalg.LinAlgError("Singular matrix")
+                if p != k:
+                    for j in range(n):
+                        tmp = acpy[k, j]
+                        acpy[k, j] = acpy[p, j]
+                        acpy[p, j] = tmp
+                    for r in range(nrhs):
+                        tmp = x[r, k]
+                        x[r, k] = x[r, p]
+                        x[r, p] = tmp
+                for i in range(k + 1, n):
+                    f = acpy[i, k] / acpy[k, k]
+                    for j in range(k, n):
+                        acpy[i, j] -= f * acpy[k, j]
+                    for r in range(nrhs):
+                        x[r, i] -= f * x[r, k]
+            for r in range(nrhs):
+                for i in range(n - 1, -1, -1):
+                    acc = x[r, i]
+                    for j in range(i + 1, n):
+                        acc -= acpy[i, j] * x[r, j]
+                    x[r, i] = acc / acpy[i, i]
+        else:
+            # LAPACK sees the transpose of the C-ordered copy
+            ipiv = np.empty(n, np.int32)
+            if intrinsics.lapack_getrf(acpy, ipiv) > 0:
+                raise np.linalg.LinAlgError("Singular matrix")
+            intrinsics.lapack_getrs(acpy, ipiv, x, True)
+
+        res = np.empty((n, nrhs), dtype)
+        for i in range(n):
+            for r in range(nrhs):
+                res[i, r] = x[r, i]
+        return res
+
+    if bty.ndim == 1:
+        a, b = args
+        b2dty, b2d = _rhs_as_2d(context, builder, bty, b)
+        res2dty = sig.return_type.copy(ndim=2)
+        res2d = context.compile_internal(builder, solve_impl,
+                                         signature(res2dty, aty, b2dty),
+                                         (a, b2d))
+        context.decref(builder, b2dty, b2d)
+        return _result_as_1d(context, builder, res2dty, res2d)
+    else:
+        return context.compile_internal(builder, solve_impl, sig, args)
+
+
+@register
+@implement("np.linalg.cholesky", types.Kind(types.Array))
+def cholesky_impl(context, builder, sig, args):
+    dtype = as_dtype(sig.return_type.dtype).type
+    small = SMALL_MATRIX_SIZE
+
+    def cholesky_impl(a):
+        n = a.shape[0]
+        if a.shape[1] != n:
+            raise np.linalg.LinAlgError("Last 2 dimensions of the array "
+                                        "must be square")
+        res = np.zeros((n, n), dtype)
+        if n <= small:
+            # Cholesky-Banachiewicz, computing L row by row
+            for i in range(n):
+                for j in range(i + 1):
+                    s = a[i, j]
+                    for k in range(j):
+                        s -= res[i, k] * res[j, k]
+                    if i == j:
+                        if not s > 0:
+                            raise np.linalg.LinAlgError(
+                                "Matrix is not positive definite")
+                        res[i, i] = math.sqrt(s)
+                    else:
+                        res[i, j] = s / res[j, j]
+            return res
+
+        # Only the lower triangle is referenced and written by LAPACK
+        for i in range(n):
+            for j in range(i + 1):
+                res[i, j] = a[i, j]
+        if intrinsics.lapack_potrf(res) > 0:
+            raise np.linalg.LinAlgError("Matrix is not positive definite")
+        return res
+
+    return context.compile_internal(builder, cholesky_impl, sig, args)
+
+
+@register
+@implement("np.linalg.lstsq", types.Kind(types.Array), types.Kind(types.Array))
+@implement("np.linalg.lstsq", types.Kind(types.Array), types.Kind(types.Array),
+           types.Any)
+def lstsq_impl(context, builder, sig, args):
+    aty, bty = sig.args[:2]
+    restype = sig.return_type
+    dtype = as_dtype(restype[0].dtype).type
+    if len(args) == 2:
+        # Default rcond of np.linalg.lstsq(): machine precision
+        rcondty = types.float64
+        rcond = context.get_constant(types.float64, -1.0)
+    else:
+        rcondty = sig.args[2]
+        rcond = args[2]
+
+    def lstsq_impl(a, b, rcond):
+        m, n = a.shape
+        if b.shape[0] != m:
+            raise ValueError("incompatible array sizes")
+        nrhs = b.shape[1]
+        # LAPACK sees the transpose of C-ordered *acpy*
+        acpy = np.empty((n, m), dtype)
+        for i in range(m):
+            for j in range(n):
+                acpy[j, i] = a[i, j]
+        # Right-hand sides as rows, i.e. Fortran order for LAPACK
+        x = np.zeros((nrhs, max(max(m, n), 1)), dtype)
+        for i in range(m):
+            for r in range(nrhs):
+                x[r, i] = b[i, r]
+        s = np.empty(min(m, n), dtype)
+        rank = np.empty(1, np.int32)
+
+        info = intrinsics.lapack_gelsd(acpy, x, s, dtype(rcond), rank)
+        if info > 0:
+            raise np.linalg.LinAlgError("SVD did not converge in "
+                                        "Linear Least Squares")
+
+        sol = np.empty((n, nrhs), dtype)
+        for i in range(n):
+            for r in range(nrhs):
+                sol[i, r] = x[r, i]
+        if rank[0] == n and m > n:
+            res = np.zeros(nrhs, dtype)
+            for r in range(nrhs):
+                for i in range(n, m):
+                    res[r] += x[r, i] * x[r, i]
+        else:
+            res = np.empty(0, dtype)
+        return sol, res, np.intp(rank[0]), s
+
+    a, b = args[:2]
+    if bty.ndim == 1:
+        b2dty, b2d = _rhs_as_2d(context, builder, bty, b)
+        sol2dty = restype[0].copy(ndim=2)
+        tup2dty = types.Tuple([sol2dty] + list(restype.types[1:]))
+        tup = context.compile_internal(builder, lstsq_impl,
+                                       signature(tup2dty, aty, b2dty, rcondty),
+                                       (a, b2d, rcond))
+        context.decref(builder, b2dty, b2d)
+        items = cgutils.unpack_tuple(builder, tup, len(restype))
+        items[0] = _result_as_1d(context, builder, sol2dty, items[0])
+        res = context.get_constant_undef(restype)
+        for i, item in enumerate(items):
+            res = builder.insert_value(res, item, i)
+        return res
+    else:
+        return context.compile_internal(builder, lstsq_impl,
+                                        signature(restype, aty, bty, rcondty),
+                                        (a, b, rcond))
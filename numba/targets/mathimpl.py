@@ -10,9 +10,9 @@ import llvmlite.llvmpy.core as lc
 from llvmlite.llvmpy.core import Type
 
 from numba.targets.imputils import implement, Registry
-from numba import types, cgutils, utils
+from numba import config, types, cgutils, utils
 from numba.typing import signature
-from . import builtins
+from . import builtins, vecmath
 
 
 registry = Registry()
@@ -108,14 +108,27 @@ def _unary_int_input_wrapper_impl(wrapped_impl):
 
     return implementer
 
+def _vector_math_impl(fn, impl):
+    """
+    Return an implementation of *fn* emitting the branch-free code from
+    vecmath.py if NUMBA_VECTOR_MATH is set, deferring to *impl* otherwise.
+    """
+    if fn not in vecmath.kernels:
+        return impl
+
+    def implementer(context, builder, sig, args):
+        if config.VECTOR_MATH:
+            return vecmath.emit(builder, fn, args)
+        return impl(context, builder, sig, args)
+
+    return implementer
+
 def unary_math_int_impl(fn, f64impl):
     impl = _unary_int_input_wrapper_impl(f64impl)
     for input_type in [types.intp, types.uintp, types.int64, types.uint64]:
         register(implement(fn, input_type)(impl))
 
 def unary_math_intr(fn, intrcode):
-    @register
-    @implement(fn, types.float32)
     def f32impl(context, builder, sig, args):
         [val] = args
         mod = cgutils.get_module(builder)
@@ -123,8 +136,6 @@ def unary_math_intr(fn, intrcode):
         intr = lc.Function.intrinsic(mod, intrcode, [lty])
         return builder.call(intr, args)
 
-    @register
-    @implement(fn, types.float64)
     def f64impl(context, builder, sig, args):
         [val] = args
         mod = cgutils.get_module(builder)
@@ -132,6 +143,10 @@ def unary_math_intr(fn, intrcode):
         intr = lc.Function.intrinsic(mod, intrcode, [lty])
         return builder.call(intr, args)
 
+    f32impl = _vector_math_impl(fn, f32impl)
+    f64impl = _vector_math_impl(fn, f64impl)
+    register(implement(fn, types.float32)(f32impl))
+    register(implement(fn, types.float64)(f64impl))
     unary_math_int_impl(fn, f64impl)
 
 
@@ -166,6 +181,9 @@ def unary_math_extern(fn, f32extern, f64extern, int_restype=False):
     f_restype = types.int64 if int_restype else None
     f32impl = _float_input_unary_math_extern_impl(f32extern, types.float32, f_restype)
     f64impl = _float_input_unary_math_extern_impl(f64extern, types.float64, f_restype)
+    if not int_restype:
+        f32impl = _vector_math_impl(fn, f32impl)
+        f64impl = _vector_math_impl(fn, f64impl)
     register(implement(fn, types.float32)(f32impl))
     register(implement(fn, types.float64)(f64impl))
 
@@ -338,6 +356,8 @@ def atan2_u64_impl(context, builder, sig, args):
 @implement(math.atan2, types.float32, types.float32)
 def atan2_f32_impl(context, builder, sig, args):
     assert len(args) == 2
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.atan2, args)
     mod = cgutils.get_module(builder)
     fnty = Type.function(Type.float(), [Type.float(), Type.float()])
     fn = mod.get_or_insert_function(fnty, name="atan2f")
@@ -347,6 +367,8 @@ def atan2_f32_impl(context, builder, sig, args):
 @implement(math.atan2, types.float64, types.float64)
 def atan2_f64_impl(context, builder, sig, args):
     assert len(args) == 2
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.atan2, args)
     mod = cgutils.get_module(builder)
     fnty = Type.function(Type.double(), [Type.double(), Type.double()])
     # Workaround atan2() issues under Windows
@@ -380,6 +402,9 @@ def hypot_u64_impl(context, builder, sig, args):
 @register
 @implement(math.hypot, types.Kind(types.Float), types.Kind(types.Float))
 def hypot_float_impl(context, builder, sig, args):
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.hypot, args)
+
     def hypot(x, y):
         if math.isinf(x):
             return abs(x)
@@ -440,10 +465,11 @@ unary_math_int_impl(math.degrees, degrees_f64_impl)
 
 # -----------------------------------------------------------------------------
 
-for ty in types.unsigned_domain:
-    register(implement(math.pow, types.float64, ty)(builtins.int_upower_impl))
-for ty in types.signed_domain:
-    register(implement(math.pow, types.float64, ty)(builtins.int_spower_impl))
+for fltty in (types.float32, types.float64):
+    for ty in types.unsigned_domain:
+        register(implement(math.pow, fltty, ty)(builtins.int_upower_impl))
+    for ty in types.signed_domain:
+        register(implement(math.pow, fltty, ty)(builtins.int_spower_impl))
 for ty in types.real_domain:
     register(implement(math.pow, ty, ty)(builtins.real_power_impl))
 
@@ -10,8 +10,8 @@ import math
 
 from llvmlite.llvmpy import core as lc
 
-from .. import cgutils, typing, types, lowering
-from . import builtins
+from .. import cgutils, config, typing, types, lowering
+from . import builtins, cmathimpl, vecmath
 
 # some NumPy constants. Note that we could generate some of them using
 # the math library, but having the values copied from npy_math seems to
@@ -302,54 +302,41 @@ def np_complex_div_impl(context, builder, sig, args):
     ZERO = lc.Constant.real(ftype, 0.0)
     ONE = lc.Constant.real(ftype, 1.0)
 
+    # Both branches of the algorithm are computed and the result is
+    # selected, so that loops of divisions can be vectorized.
     # if abs(denominator.real) >= abs(denominator.imag)
     in2r_abs = _fabs(context, builder, in2r)
     in2i_abs = _fabs(context, builder, in2i)
     in2r_abs_ge_in2i_abs = builder.fcmp(lc.FCMP_OGE, in2r_abs, in2i_abs)
-    with cgutils.ifelse(builder, in2r_abs_ge_in2i_abs) as (then, otherwise):
-        with then:
-            # if abs(denominator.real) == 0 and abs(denominator.imag) == 0
-            in2r_is_zero = builder.fcmp(lc.FCMP_OEQ, in2r_abs, ZERO)
-            in2i_is_zero = builder.fcmp(lc.FCMP_OEQ, in2i_abs, ZERO)
-            in2_is_zero = builder.and_(in2r_is_zero, in2i_is_zero)
-            with cgutils.ifelse(builder, in2_is_zero) as (inn_then, inn_otherwise):
-                with inn_then:
-                    # division by 0.
-                    # fdiv generates the appropriate NAN/INF/NINF
-                    out.real = builder.fdiv(in1r, in2r_abs)
-                    out.imag = builder.fdiv(in1i, in2i_abs)
-                with inn_otherwise:
-                    # general case for:
-                    # abs(denominator.real) > abs(denominator.imag)
-                    rat = builder.fdiv(in2i, in2r)
-                    # scl = 1.0/(in2r + in2i*rat)
-                    tmp1 = builder.fmul(in2i, rat)
-                    tmp2 = builder.fadd(in2r, tmp1)
-                    scl = builder.fdiv(ONE, tmp2)
-                    # out.real = (in1r + in1i*rat)*scl
-                    # out.imag = (in1i - in1r*rat)*scl
-                    tmp3 = builder.fmul(in1i, rat)
-                    tmp4 = builder.fmul(in1r, rat)
-                    tmp5 = builder.fadd(in1r, tmp3)
-                    tmp6 = builder.fsub(in1i, tmp4)
-                    out.real = builder.fmul(tmp5, scl)
-                    out.imag = builder.fmul(tmp6, scl)
-        with otherwise:
-            # general case for:
-            # abs(denominator.imag) > abs(denominator.real)
-            rat = builder.fdiv(in2r, in2i)
-            # scl = 1.0/(in2i + in2r*rat)
-            tmp1 = builder.fmul(in2r, rat)
-            tmp2 = builder.fadd(in2i, tmp1)
-            scl = builder.fdiv(ONE, tmp2)
-            # out.real = (in1r*rat + in1i)*scl
-            # out.imag = (in1i*rat - in1r)*scl
-            tmp3 = builder.fmul(in1r, rat)
-            tmp4 = builder.fmul(in1i, rat)
-            tmp5 = builder.fadd(tmp3, in1i)
-            tmp6 = builder.fsub(tmp4, in1r)
-            out.real = builder.fmul(tmp5, scl)
-            out.imag = builder.fmul(tmp6, scl)
+    # general case, dividing by the larger part of the denominator:
+    # rat = in2i/in2r, resp. in2r/in2i
+    big = builder.select(in2r_abs_ge_in2i_abs, in2r, in2i)
+    small = builder.select(in2r_abs_ge_in2i_abs, in2i, in2r)
+    rat = builder.fdiv(small, big)
+    # scl = 1.0/(in2r + in2i*rat), resp. 1.0/(in2i + in2r*rat)
+    tmp1 = builder.fmul(small, rat)
+    tmp2 = builder.fadd(big, tmp1)
+    scl = builder.fdiv(ONE, tmp2)
+    # out.real = (in1r + in1i*rat)*scl, resp. (in1r*rat + in1i)*scl
+    # out.imag = (in1i - in1r*rat)*scl, resp. (in1i*rat - in1r)*scl
+    in1r_neg = builder.fsub(lc.Constant.real(ftype, -0.0), in1r)
+    tmp3 = builder.select(in2r_abs_ge_in2i_abs, in1r, in1i)
+    tmp4 = builder.select(in2r_abs_ge_in2i_abs, in1i, in1r)
+    tmp5 = builder.fadd(tmp3, builder.fmul(tmp4, rat))
+    tmp3 = builder.select(in2r_abs_ge_in2i_abs, in1i, in1r_neg)
+    tmp4 = builder.select(in2r_abs_ge_in2i_abs, in1r_neg, in1i)
+    tmp6 = builder.fadd(tmp3, builder.fmul(tmp4, rat))
+    real = builder.fmul(tmp5, scl)
+    imag = builder.fmul(tmp6, scl)
+
+    # if abs(denominator.real) == 0 and abs(denominator.imag) == 0
+    in2r_is_zero = builder.fcmp(lc.FCMP_OEQ, in2r_abs, ZERO)
+    in2i_is_zero = builder.fcmp(lc.FCMP_OEQ, in2i_abs, ZERO)
+    in2_is_zero = builder.and_(in2r_is_zero, in2i_is_zero)
+    # division by 0.
+    # fdiv generates the appropriate NAN/INF/NINF
+    out.real = builder.select(in2_is_zero, builder.fdiv(in1r, in2r_abs), real)
+    out.imag = builder.select(in2_is_zero, builder.fdiv(in1i, in2i_abs), imag)
 
     return out._getvalue()
 
@@ -480,6 +467,9 @@ def np_int_power_impl(context, builder, sig, args):
 def np_real_power_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 2)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.pow, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.powf',
         types.float64: 'numba.npymath.pow',
@@ -497,8 +487,36 @@ def np_complex_power_impl(context, builder, sig, args):
         types.complex128: 'numba.npymath.cpow',
     }
 
-    return _dispatch_func_by_name_type(context, builder, sig, args,
-                                       dispatch_table, 'power')
+    # Like NumPy, use repeated squaring for small integral exponents
+    ty = sig.args[0]
+    float_ty = ty.underlying_float
+    complex_class = context.make_complex(ty)
+    in2 = complex_class(context, builder, value=args[1])
+    out = complex_class(context, builder)
+
+    mod = cgutils.get_module(builder)
+    floor = lc.Function.intrinsic(mod, lc.INTR_FLOOR, [in2.real.type])
+    in2r_is_int = builder.fcmp(lc.FCMP_OEQ, builder.call(floor, [in2.real]),
+                               in2.real)
+    in2r_is_small = builder.fcmp(lc.FCMP_OLT,
+                                 _fabs(context, builder, in2.real),
+                                 context.get_constant(float_ty, 100))
+    in2i_is_zero = builder.fcmp(lc.FCMP_OEQ, in2.imag,
+                                context.get_constant(float_ty, 0))
+    use_powi = builder.and_(in2i_is_zero,
+                            builder.and_(in2r_is_int, in2r_is_small))
+    with cgutils.ifelse(builder, use_powi, expect=True) as (then, otherwise):
+        with then:
+            n = builder.fptosi(in2.real, lc.Type.int(64))
+            powi_sig = typing.signature(ty, ty, types.int64)
+            out._setvalue(builtins.complex_powi_impl(context, builder,
+                                                     powi_sig, (args[0], n)))
+        with otherwise:
+            out._setvalue(_dispatch_func_by_name_type(context, builder, sig,
+                                                      args, dispatch_table,
+                                                      'power'))
+
+    return out._getvalue()
 
 
 def np_real_floor_impl(context, builder, sig, args):
@@ -605,6 +623,9 @@ def np_complex_conjugate_impl(context, builder, sig, args):
 def np_real_exp_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 1)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.exp, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.expf',
         types.float64: 'numba.npymath.exp',
@@ -617,6 +638,9 @@ def np_real_exp_impl(context, builder, sig, args):
 def np_complex_exp_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 1)
 
+    if config.VECTOR_MATH:
+        return cmathimpl.vector_exp_impl(context, builder, sig, args)
+
     dispatch_table = {
         types.complex64: 'numba.npymath.cexpf',
         types.complex128: 'numba.npymath.cexp',
@@ -659,6 +683,9 @@ def np_complex_exp2_impl(context, builder, sig, args):
 def np_real_log_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 1)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.log, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.logf',
         types.float64: 'numba.npymath.log',
@@ -671,6 +698,9 @@ def np_real_log_impl(context, builder, sig, args):
 def np_complex_log_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 1)
 
+    if config.VECTOR_MATH:
+        return cmathimpl.vector_log_impl(context, builder, sig, args)
+
     dispatch_table = {
         types.complex64: 'numba.npymath.clogf',
         types.complex128: 'numba.npymath.clog',
@@ -922,6 +952,9 @@ def np_complex_reciprocal_impl(context, builder, sig, args):
 def np_real_sin_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 1)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.sin, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.sinf',
         types.float64: 'numba.npymath.sin',
@@ -949,6 +982,9 @@ def np_complex_sin_impl(context, builder, sig, args):
 def np_real_cos_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 1)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.cos, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.cosf',
         types.float64: 'numba.npymath.cos',
@@ -1244,6 +1280,9 @@ def np_complex_atan_impl(context, builder, sig, args):
 def np_real_atan2_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 2)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.atan2, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.atan2f',
         types.float64: 'numba.npymath.atan2',
@@ -1259,6 +1298,9 @@ def np_real_atan2_impl(context, builder, sig, args):
 def np_real_hypot_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 2)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.hypot, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.hypotf',
         types.float64: 'numba.npymath.hypot',
@@ -1355,6 +1397,9 @@ def np_complex_cosh_impl(context, builder, sig, args):
 def np_real_tanh_impl(context, builder, sig, args):
     _check_arity_and_homogeneity(sig, args, 1)
 
+    if config.VECTOR_MATH:
+        return vecmath.emit(builder, math.tanh, args)
+
     dispatch_table = {
         types.float32: 'numba.npymath.tanhf',
         types.float64: 'numba.npymath.tanh',
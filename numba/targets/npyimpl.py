@@ -13,7 +13,7 @@ from collections import namedtuple
 from llvmlite.llvmpy import core as lc
 
 from . import builtins, ufunc_db
-from .imputils import implement, Registry
+from .imputils import implement, Registry, impl_ret_borrowed
 from .. import typing, types, cgutils, numpy_support
 from ..config import PYVERSION
 from ..numpy_support import ufunc_find_matching_loop
@@ -230,7 +230,8 @@ def numpy_ufunc_kernel(context, builder, sig, args, kernel_class,
 
         val_out = kernel.generate(*vals_in)
         output.store_data(loop_indices, val_out)
-    return arguments[-1].return_val
+    out = arguments[-1].return_val
+    return impl_ret_borrowed(context, builder, sig.return_type, out)
 
 
 # Kernels are the code to be executed inside the multidimensional loop.
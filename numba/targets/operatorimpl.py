@@ -47,8 +47,9 @@ for ty in types.unsigned_domain:
     register(implement(operator.le, ty, ty)(builtins.int_ule_impl))
     register(implement(operator.gt, ty, ty)(builtins.int_ugt_impl))
     register(implement(operator.ge, ty, ty)(builtins.int_uge_impl))
-    register(implement(operator.pow, types.float64, ty)(builtins.int_upower_impl))
-    register(implement(operator.ipow, types.float64, ty)(builtins.int_upower_impl))
+    for fltty in (types.float32, types.float64):
+        register(implement(operator.pow, fltty, ty)(builtins.int_upower_impl))
+        register(implement(operator.ipow, fltty, ty)(builtins.int_upower_impl))
     register(implement(operator.rshift, ty, ty)(builtins.int_lshr_impl))
     register(implement(operator.irshift, ty, ty)(builtins.int_lshr_impl))
 
@@ -66,8 +67,9 @@ for ty in types.signed_domain:
     register(implement(operator.le, ty, ty)(builtins.int_sle_impl))
     register(implement(operator.gt, ty, ty)(builtins.int_sgt_impl))
     register(implement(operator.ge, ty, ty)(builtins.int_sge_impl))
-    register(implement(operator.pow, types.float64, ty)(builtins.int_spower_impl))
-    register(implement(operator.ipow, types.float64, ty)(builtins.int_spower_impl))
+    for fltty in (types.float32, types.float64):
+        register(implement(operator.pow, fltty, ty)(builtins.int_spower_impl))
+        register(implement(operator.ipow, fltty, ty)(builtins.int_spower_impl))
     register(implement(operator.rshift, ty, ty)(builtins.int_ashr_impl))
     register(implement(operator.irshift, ty, ty)(builtins.int_ashr_impl))
 
@@ -111,6 +113,13 @@ for ty in types.complex_domain:
         register(implement(operator.idiv, ty, ty)(builtins.complex_div_impl))
     register(implement(operator.truediv, ty, ty)(builtins.complex_div_impl))
     register(implement(operator.itruediv, ty, ty)(builtins.complex_div_impl))
+    register(implement(operator.pow, ty, ty)(builtins.complex_power_impl))
+    register(implement(operator.ipow, ty, ty)(builtins.complex_power_impl))
+    for intty in types.integer_domain:
+        register(implement(operator.pow, ty, intty)(
+            builtins.complex_int_power_impl))
+        register(implement(operator.ipow, ty, intty)(
+            builtins.complex_int_power_impl))
     register(implement(operator.eq, ty, ty)(builtins.complex_eq_impl))
     register(implement(operator.ne, ty, ty)(builtins.complex_ne_impl))
     register(implement(operator.neg, ty)(builtins.complex_negate_impl))
@@ -4,6 +4,32 @@ Target Options
 from __future__ import print_function, division, absolute_import
 
 
+# Relaxations of IEEE floating-point semantics accepted by the *fastmath*
+# option: assume no NaNs (nnan), no infinities (ninf), ignore the sign of
+# zeros (nsz), allow reciprocals (arcp), allow reassociation (reassoc) and
+# allow contraction into fused multiply-adds (contract).
+FASTMATH_FLAGS = frozenset(['nnan', 'ninf', 'nsz', 'arcp', 'reassoc',
+                            'contract'])
+
+
+def fastmath_flags(value):
+    """
+    Parse the value of the *fastmath* option: True enables all flags,
+    False none, otherwise an iterable of flag names is expected.
+    """
+    if value is True:
+        return FASTMATH_FLAGS
+    elif value is False:
+        return frozenset()
+    flags = frozenset(value)
+    unknown = flags - FASTMATH_FLAGS
+    if unknown:
+        raise ValueError("Unrecognized fastmath flags: %s (expected %s)"
+                         % (", ".join(sorted(unknown)),
+                            ", ".join(sorted(FASTMATH_FLAGS))))
+    return flags
+
+
 class TargetOptions(object):
     OPTIONS = {}
 
@@ -55,6 +81,21 @@ class TargetOptions(object):
         if kws.pop('nogil', False):
             flags.set("release_gil")
 
+        for name in kws.pop('fastmath', ()):
+            flags.set("fastmath_" + name)
+
+        if kws.pop('noalias', False):
+            flags.set("noalias")
+
+        if kws.pop('interchange', False):
+            flags.set("loop_interchange")
+
+        if kws.pop('tile', False):
+            flags.set("loop_tiling")
+
+        # Handled by the dispatcher
+        kws.pop('tiered', None)
+
         flags.set("enable_pyobject_looplift")
 
         if kws:
@@ -12,9 +12,10 @@ import numpy as np
 
 from llvmlite import ir
 
-from numba.targets.imputils import implement, Registry
+from numba.targets.imputils import implement, Registry, type_factory
+from numba.targets.arrayobj import _empty_nd_impl, _parse_empty_args
 from numba.typing import signature
-from numba import _helperlib, cgutils, types, utils
+from numba import _helperlib, cgutils, config, prng, types, utils
 
 
 registry = Registry()
@@ -24,6 +25,8 @@ int32_t = ir.IntType(32)
 int64_t = ir.IntType(64)
 def const_int(x):
     return ir.Constant(int32_t, x)
+def _i64(x):
+    return ir.Constant(int64_t, x)
 double = ir.DoubleType()
 
 N = 624
@@ -76,7 +79,12 @@ def get_next_int32(context, builder, state_ptr):
     y = builder.load(cgutils.gep(builder, array_ptr, 0, idx))
     idx = builder.add(idx, const_int(1))
     builder.store(idx, idxptr)
-    # Tempering
+    return _temper(builder, y)
+
+def _temper(builder, y):
+    """
+    Apply the Mersenne Twister's tempering to the raw state word *y*.
+    """
     y = builder.xor(y, builder.lshr(y, const_int(11)))
     y = builder.xor(y, builder.and_(builder.shl(y, const_int(7)),
                                     const_int(0x9d2c5680)))
@@ -85,13 +93,13 @@ def get_next_int32(context, builder, state_ptr):
     y = builder.xor(y, builder.lshr(y, const_int(18)))
     return y
 
-def get_next_double(context, builder, state_ptr):
+def _make_double(builder, a, b):
     """
-    Get the next double generated by the PRNG at *state_ptr*.
+    Make a double in [0, 1) from two tempered 32-bit outputs *a* and *b*.
     """
     # a = rk_random(state) >> 5, b = rk_random(state) >> 6;
-    a = builder.lshr(get_next_int32(context, builder, state_ptr), const_int(5))
-    b = builder.lshr(get_next_int32(context, builder, state_ptr), const_int(6))
+    a = builder.lshr(a, const_int(5))
+    b = builder.lshr(b, const_int(6))
 
     # return (a * 67108864.0 + b) / 9007199254740992.0;
     a = builder.uitofp(a, double)
@@ -100,6 +108,73 @@ def get_next_double(context, builder, state_ptr):
         builder.fadd(b, builder.fmul(a, ir.Constant(double, 67108864.0))),
         ir.Constant(double, 9007199254740992.0))
 
+def get_next_double(context, builder, state_ptr):
+    """
+    Get the next double generated by the PRNG at *state_ptr*.
+    """
+    a = get_next_int32(context, builder, state_ptr)
+    b = get_next_int32(context, builder, state_ptr)
+    return _make_double(builder, a, b)
+
+def fill_doubles(context, builder, state_ptr, data, count):
+    """
+    Store the next *count* doubles generated by the PRNG at *state_ptr*
+    at *data*, a double pointer.  This produces the same numbers as
+    repeated calls to get_next_double(), but the numbers are computed
+    in blocks straight from the state array: the state is reshuffled
+    once per block of N outputs, and the inner loop doesn't carry
+    any dependency other than its induction variable, so that it
+    can be vectorized.
+    """
+    intp_t = context.get_value_type(types.intp)
+    idxptr = get_index_ptr(builder, state_ptr)
+    array_ptr = get_array_ptr(builder, state_ptr)
+    posptr = cgutils.alloca_once_value(builder, ir.Constant(intp_t, 0))
+
+    bbcond = cgutils.append_basic_block(builder, "fill.cond")
+    bbbody = cgutils.append_basic_block(builder, "fill.body")
+    bbend = cgutils.append_basic_block(builder, "fill.end")
+    builder.branch(bbcond)
+    with cgutils.goto_block(builder, bbcond):
+        pos = builder.load(posptr)
+        builder.cbranch(builder.icmp_signed('<', pos, count), bbbody, bbend)
+
+    with cgutils.goto_block(builder, bbbody):
+        pos = builder.load(posptr)
+        idx = builder.load(idxptr)
+        # A double needs two 32-bit outputs: if the state array doesn't
+        # have them, fall back on get_next_double() which reshuffles.
+        is_short = builder.icmp_signed('>=', idx, const_int(N - 1))
+        with cgutils.ifelse(builder, is_short) as (then, otherwise):
+            with then:
+                builder.store(get_next_double(context, builder, state_ptr),
+                              builder.gep(data, [pos]))
+                builder.store(builder.add(pos, ir.Constant(intp_t, 1)),
+                              posptr)
+            with otherwise:
+                idx = builder.sext(idx, intp_t)
+                avail = builder.lshr(builder.sub(ir.Constant(intp_t, N), idx),
+                                     ir.Constant(intp_t, 1))
+                remaining = builder.sub(count, pos)
+                nblock = builder.select(
+                    builder.icmp_signed('<', remaining, avail),
+                    remaining, avail)
+                with cgutils.for_range(builder, nblock, intp_t) as j:
+                    k = builder.add(idx, builder.shl(j, ir.Constant(intp_t, 1)))
+                    k1 = builder.add(k, ir.Constant(intp_t, 1))
+                    a = builder.load(cgutils.gep(builder, array_ptr, 0, k))
+                    b = builder.load(cgutils.gep(builder, array_ptr, 0, k1))
+                    r = _make_double(builder, _temper(builder, a),
+                                     _temper(builder, b))
+                    builder.store(r, builder.gep(data, [builder.add(pos, j)]))
+                newidx = builder.add(idx, builder.shl(nblock,
+                                                      ir.Constant(intp_t, 1)))
+                builder.store(builder.trunc(newidx, int32_t), idxptr)
+                builder.store(builder.add(pos, nblock), posptr)
+        builder.branch(bbcond)
+
+    builder.position_at_end(bbend)
+
 def get_next_int(context, builder, state_ptr, nbits):
     """
     Get the next integer with width *nbits*.
@@ -129,13 +204,201 @@ def get_next_int(context, builder, state_ptr, nbits):
     return builder.load(ret)
 
 
+def get_next_uint64(context, builder, state_ptr):
+    """
+    Get the next 64-bit integer generated by the PRNG at *state_ptr*,
+    from two 32-bit outputs (the first one in the high bits).
+    """
+    a = builder.zext(get_next_int32(context, builder, state_ptr), int64_t)
+    b = builder.zext(get_next_int32(context, builder, state_ptr), int64_t)
+    return builder.or_(builder.shl(a, _i64(32)), b)
+
+
+# Ziggurat samplers.  *next_uint64* and *next_double* are callables
+# emitting the next 64-bit integer and the next double in [0, 1) of the
+# underlying generator.  The algorithm and tables are the same as in
+# numba.prng, whose pure Python implementation gives the same numbers.
+
+def _ziggurat_tables(context, builder, name, tables):
+    module = cgutils.get_module(builder)
+    ptrs = []
+    for suffix, table in zip("kwf", tables):
+        if table.dtype == np.uint64:
+            llty = int64_t
+            values = [ir.Constant(int64_t, int(v)) for v in table]
+        else:
+            llty = double
+            values = [ir.Constant(double, float(v)) for v in table]
+        ptrs.append(context.insert_unique_const(
+            module, ".const.ziggurat_%s_%s" % (name, suffix),
+            ir.Constant(ir.ArrayType(llty, len(values)), values)))
+    return ptrs
+
+def _table_entry(builder, table, idx):
+    return builder.load(builder.gep(table, [const_int(0), idx]))
+
+def _ziggurat_wedge(context, builder, f, idx, density, next_double):
+    """
+    Emit the rejection test for a draw in the wedge of layer *idx*
+    (*density* is the density at the draw).
+    """
+    f0 = _table_entry(builder, f, builder.sub(idx, _i64(1)))
+    f1 = _table_entry(builder, f, idx)
+    y = builder.fadd(builder.fmul(builder.fsub(f0, f1), next_double()), f1)
+    return builder.fcmp_ordered('<', y, density)
+
+def ziggurat_normal(context, builder, next_uint64, next_double):
+    """
+    Emit a draw from the standard normal distribution.
+    """
+    k, w, f = _ziggurat_tables(context, builder, "normal",
+                               (prng.ZIGGURAT_NORMAL_K,
+                                prng.ZIGGURAT_NORMAL_W,
+                                prng.ZIGGURAT_NORMAL_F))
+    fsig = signature(types.float64, types.float64)
+    exp = context.get_function(math.exp, fsig)
+    log = context.get_function(math.log, fsig)
+    r = ir.Constant(double, prng.ZIGGURAT_NORMAL_R)
+    one = ir.Constant(double, 1.0)
+    result = cgutils.alloca_once(builder, double, name="result")
+
+    bbloop = cgutils.append_basic_block(builder, "ziggurat.loop")
+    bbaccept = cgutils.append_basic_block(builder, "ziggurat.accept")
+    bbslow = cgutils.append_basic_block(builder, "ziggurat.slow")
+    bbwedge = cgutils.append_basic_block(builder, "ziggurat.wedge")
+    bbtail = cgutils.append_basic_block(builder, "ziggurat.tail")
+    bbtailaccept = cgutils.append_basic_block(builder, "ziggurat.tail.accept")
+    bbend = cgutils.append_basic_block(builder, "ziggurat.end")
+    builder.branch(bbloop)
+
+    # Most draws fall within a layer's rectangle
+    builder.position_at_end(bbloop)
+    bits = next_uint64()
+    idx = builder.and_(bits, _i64(0xff))
+    neg = builder.trunc(builder.lshr(bits, _i64(8)), ir.IntType(1))
+    rabs = builder.and_(builder.lshr(bits, _i64(9)), _i64((1 << 52) - 1))
+    x = builder.fmul(builder.uitofp(rabs, double), _table_entry(builder, w, idx))
+    x = builder.select(neg, builder.fsub(ir.Constant(double, -0.0), x), x)
+    fast = builder.icmp_unsigned('<', rabs, _table_entry(builder, k, idx))
+    builder.cbranch(fast, bbaccept, bbslow)
+
+    builder.position_at_end(bbaccept)
+    builder.store(x, result)
+    builder.branch(bbend)
+
+    builder.position_at_end(bbslow)
+    is_base = builder.icmp_unsigned('==', idx, _i64(0))
+    builder.cbranch(is_base, bbtail, bbwedge)
+
+    builder.position_at_end(bbwedge)
+    density = exp(builder, [builder.fmul(builder.fmul(x, x),
+                                         ir.Constant(double, -0.5))])
+    accept = _ziggurat_wedge(context, builder, f, idx, density, next_double)
+    builder.cbranch(accept, bbaccept, bbloop)
+
+    # Sample from the tail beyond R
+    builder.position_at_end(bbtail)
+    xx = builder.fdiv(log(builder, [builder.fsub(one, next_double())]),
+                      ir.Constant(double, -prng.ZIGGURAT_NORMAL_R))
+    yy = builder.fsub(ir.Constant(double, -0.0),
+                      log(builder, [builder.fsub(one, next_double())]))
+    accept = builder.fcmp_ordered('>', builder.fadd(yy, yy),
+                                  builder.fmul(xx, xx))
+    builder.cbranch(accept, bbtailaccept, bbtail)
+
+    builder.position_at_end(bbtailaccept)
+    v = builder.fadd(r, xx)
+    builder.store(builder.select(neg, builder.fsub(ir.Constant(double, -0.0),
+                                                   v), v),
+                  result)
+    builder.branch(bbend)
+
+    builder.position_at_end(bbend)
+    return builder.load(result)
+
+def ziggurat_exponential(context, builder, next_uint64, next_double):
+    """
+    Emit a draw from the standard exponential distribution.
+    """
+    k, w, f = _ziggurat_tables(context, builder, "exp",
+                               (prng.ZIGGURAT_EXP_K,
+                                prng.ZIGGURAT_EXP_W,
+                                prng.ZIGGURAT_EXP_F))
+    fsig = signature(types.float64, types.float64)
+    exp = context.get_function(math.exp, fsig)
+    log = context.get_function(math.log, fsig)
+    result = cgutils.alloca_once(builder, double, name="result")
+
+    bbloop = cgutils.append_basic_block(builder, "ziggurat.loop")
+    bbaccept = cgutils.append_basic_block(builder, "ziggurat.accept")
+    bbslow = cgutils.append_basic_block(builder, "ziggurat.slow")
+    bbwedge = cgutils.append_basic_block(builder, "ziggurat.wedge")
+    bbtail = cgutils.append_basic_block(builder, "ziggurat.tail")
+    bbend = cgutils.append_basic_block(builder, "ziggurat.end")
+    builder.branch(bbloop)
+
+    builder.position_at_end(bbloop)
+    bits = next_uint64()
+    idx = builder.and_(builder.lshr(bits, _i64(3)), _i64(0xff))
+    rabs = builder.lshr(bits, _i64(11))
+    x = builder.fmul(builder.uitofp(rabs, double), _table_entry(builder, w, idx))
+    fast = builder.icmp_unsigned('<', rabs, _table_entry(builder, k, idx))
+    builder.cbranch(fast, bbaccept, bbslow)
+
+    builder.position_at_end(bbaccept)
+    builder.store(x, result)
+    builder.branch(bbend)
+
+    builder.position_at_end(bbslow)
+    is_base = builder.icmp_unsigned('==', idx, _i64(0))
+    builder.cbranch(is_base, bbtail, bbwedge)
+
+    builder.position_at_end(bbwedge)
+    density = exp(builder, [builder.fsub(ir.Constant(double, -0.0), x)])
+    accept = _ziggurat_wedge(context, builder, f, idx, density, next_double)
+    builder.cbranch(accept, bbaccept, bbloop)
+
+    # Sample from the tail beyond R (memorylessness makes it a shifted
+    # exponential distribution)
+    builder.position_at_end(bbtail)
+    u = builder.fsub(ir.Constant(double, 1.0), next_double())
+    builder.store(builder.fsub(ir.Constant(double, prng.ZIGGURAT_EXP_R),
+                               log(builder, [u])),
+                  result)
+    builder.branch(bbend)
+
+    builder.position_at_end(bbend)
+    return builder.load(result)
+
+def _np_ziggurat(context, builder, sampler):
+    """
+    Emit a draw of Ziggurat *sampler* from the Numpy random state.
+    """
+    state_ptr = get_np_state_ptr(context, builder)
+    return sampler(context, builder,
+                   lambda: get_next_uint64(context, builder, state_ptr),
+                   lambda: get_next_double(context, builder, state_ptr))
+
+
+def _get_thread_state_ptr(builder, name):
+    """
+    Get a pointer to the calling thread's state for the PRNG *name*.
+    The thread which imported Numba uses the global state (the one
+    exposed as _helperlib.c_helpers['<name>_random_state']), other
+    threads get their own state, so that nogil functions running in
+    parallel don't race on a shared state.
+    """
+    fnty = ir.FunctionType(rnd_state_ptr_t, ())
+    fn = builder.function.module.get_or_insert_function(
+        fnty, "numba_rnd_get_%s_state" % name)
+    fn.attributes.add("nounwind")
+    return builder.call(fn, ())
+
 def get_py_state_ptr(context, builder):
-    return context.get_c_value(builder, rnd_state_t,
-                               "numba_py_random_state")
+    return _get_thread_state_ptr(builder, "py")
 
 def get_np_state_ptr(context, builder):
-    return context.get_c_value(builder, rnd_state_t,
-                               "numba_np_random_state")
+    return _get_thread_state_ptr(builder, "np")
 
 def get_state_ptr(context, builder, name):
     return {
@@ -202,6 +465,10 @@ def gauss_impl(context, builder, sig, args):
 @implement("np.random.normal", types.Kind(types.Float), types.Kind(types.Float))
 def np_gauss_impl(context, builder, sig, args):
     sig, args = _fill_defaults(context, builder, sig, args, (0.0, 1.0))
+    if config.RANDOM_ZIGGURAT:
+        mu, sigma = args
+        z = _np_ziggurat(context, builder, ziggurat_normal)
+        return builder.fadd(mu, builder.fmul(sigma, z))
     return _gauss_impl(context, builder, sig, args, "np")
 
 
@@ -571,6 +838,11 @@ def expovariate_impl(context, builder, sig, args):
 @register
 @implement("np.random.exponential", types.Kind(types.Float))
 def exponential_impl(context, builder, sig, args):
+    if config.RANDOM_ZIGGURAT:
+        scale, = args
+        return builder.fmul(scale, _np_ziggurat(context, builder,
+                                                ziggurat_exponential))
+
     _random = np.random.random
     _log = math.log
 
@@ -584,6 +856,9 @@ def exponential_impl(context, builder, sig, args):
 @implement("np.random.standard_exponential")
 @implement("np.random.exponential")
 def exponential_impl(context, builder, sig, args):
+    if config.RANDOM_ZIGGURAT:
+        return _np_ziggurat(context, builder, ziggurat_exponential)
+
     _random = np.random.random
     _log = math.log
 
@@ -744,13 +1019,42 @@ def _vonmisesvariate_impl(context, builder, sig, args, _random):
 @implement("np.random.binomial", types.Kind(types.Integer), types.Kind(types.Float))
 def binomial_impl(context, builder, sig, args):
     intty = sig.return_type
+    state_ptr = get_np_state_ptr(context, builder)
+
+    retptr = cgutils.alloca_once(builder, context.get_value_type(intty),
+                                 name="ret")
+    bbcont = cgutils.append_basic_block(builder, "bbcont")
+    bbend = cgutils.append_basic_block(builder, "bbend")
+
+    n = context.cast(builder, args[0], sig.args[0], types.int64)
+    p = context.cast(builder, args[1], sig.args[1], types.float64)
+    q = builder.fsub(ir.Constant(double, 1.0), p)
+    r = builder.select(builder.fcmp_ordered('<=', p, ir.Constant(double, 0.5)),
+                       p, q)
+    nr = builder.fmul(builder.sitofp(n, double), r)
+    # The comparisons are false for invalid parameters, which are
+    # reported by the generic implementation below.
+    big_n = builder.and_(builder.fcmp_ordered('>=', r, ir.Constant(double, 0.0)),
+                         builder.fcmp_ordered('>', nr, ir.Constant(double, 30.0)))
+    with cgutils.ifthen(builder, big_n):
+        # For n * min(p, 1 - p) > 30, we switch to the BTPE algorithm
+        # (see _helperlib.c), whose cost doesn't grow with n.
+        fnty = ir.FunctionType(int64_t, (rnd_state_ptr_t, int64_t, double))
+        fn = builder.function.module.get_or_insert_function(fnty,
+                                                            "numba_binomial_btpe")
+        ret = builder.call(fn, (state_ptr, n, p))
+        builder.store(context.cast(builder, ret, types.int64, intty), retptr)
+        builder.branch(bbend)
+
+    builder.branch(bbcont)
+    builder.position_at_end(bbcont)
+
     _random = np.random.random
 
     def binomial_impl(n, p):
         """
         Binomial distribution.  Numpy's variant of the BINV algorithm
-        is used.
-        (Numpy uses BTPE for n*p >= 30, though)
+        is used for n * min(p, 1 - p) <= 30.
         """
         if n < 0:
             raise ValueError("binomial(): n <= 0")
@@ -774,7 +1078,11 @@ def binomial_impl(context, builder, sig, args):
                 X += 1
                 px = ((n - X + 1) * p * px) / (X * q)
 
-    return context.compile_internal(builder, binomial_impl, sig, args)
+    ret = context.compile_internal(builder, binomial_impl, sig, args)
+    builder.store(ret, retptr)
+    builder.branch(bbend)
+    builder.position_at_end(bbend)
+    return builder.load(retptr)
 
 
 @register
@@ -841,11 +1149,50 @@ def gumbel_impl(context, builder, sig, args):
 @implement("np.random.hypergeometric", types.Kind(types.Integer),
            types.Kind(types.Integer), types.Kind(types.Integer))
 def hypergeometric_impl(context, builder, sig, args):
+    intty = sig.return_type
+    state_ptr = get_np_state_ptr(context, builder)
+
+    retptr = cgutils.alloca_once(builder, context.get_value_type(intty),
+                                 name="ret")
+    bbcont = cgutils.append_basic_block(builder, "bbcont")
+    bbend = cgutils.append_basic_block(builder, "bbend")
+
+    ngood, nbad, nsamples = [context.cast(builder, v, ty, types.int64)
+                             for v, ty in zip(args, sig.args)]
+    zero = ir.Constant(int64_t, 0)
+    # Invalid parameters are reported by the generic implementation below.
+    big_nsamples = builder.and_(
+        builder.and_(builder.icmp_signed('>=', ngood, zero),
+                     builder.icmp_signed('>=', nbad, zero)),
+        builder.and_(builder.icmp_signed('>', nsamples,
+                                         ir.Constant(int64_t, 10)),
+                     builder.icmp_signed('<=', nsamples,
+                                         builder.add(ngood, nbad))))
+    with cgutils.ifthen(builder, big_nsamples):
+        # For nsamples > 10, we switch to the HRUA algorithm
+        # (see _helperlib.c), whose cost doesn't grow with nsamples.
+        fnty = ir.FunctionType(int64_t, (rnd_state_ptr_t, int64_t, int64_t,
+                                         int64_t))
+        fn = builder.function.module.get_or_insert_function(
+            fnty, "numba_hypergeometric_hrua")
+        ret = builder.call(fn, (state_ptr, ngood, nbad, nsamples))
+        builder.store(context.cast(builder, ret, types.int64, intty), retptr)
+        builder.branch(bbend)
+
+    builder.branch(bbcont)
+    builder.position_at_end(bbcont)
+
     _random = np.random.random
     _floor = math.floor
 
     def hypergeometric_impl(ngood, nbad, nsamples):
-        """Numpy's algorithm for hypergeometric()."""
+        """Numpy's algorithm for hypergeometric() on small *nsamples*."""
+        if ngood < 0:
+            raise ValueError("hypergeometric(): ngood < 0")
+        if nbad < 0:
+            raise ValueError("hypergeometric(): nbad < 0")
+        if nsamples > ngood + nbad:
+            raise ValueError("hypergeometric(): ngood + nbad < nsamples")
         d1 = nbad + ngood - nsamples
         d2 = float(min(nbad, ngood))
 
@@ -860,7 +1207,11 @@ def hypergeometric_impl(context, builder, sig, args):
         else:
             return Z
 
-    return context.compile_internal(builder, hypergeometric_impl, sig, args)
+    ret = context.compile_internal(builder, hypergeometric_impl, sig, args)
+    builder.store(ret, retptr)
+    builder.branch(bbend)
+    builder.position_at_end(bbend)
+    return builder.load(retptr)
 
 
 @register
@@ -1123,3 +1474,623 @@ def _shuffle_impl(context, builder, sig, args, _randrange):
 
     return context.compile_internal(builder, shuffle_impl,
                                     sig, args)
+
+
+@register
+@implement("np.random.permutation", types.Kind(types.Integer))
+def permutation_impl(context, builder, sig, args):
+    def permutation_impl(n):
+        arr = np.arange(n)
+        np.random.shuffle(arr)
+        return arr
+
+    return context.compile_internal(builder, permutation_impl, sig, args)
+
+@register
+@implement("np.random.permutation", types.Kind(types.Array))
+def permutation_impl(context, builder, sig, args):
+    def permutation_impl(arr):
+        arr = arr.copy()
+        np.random.shuffle(arr)
+        return arr
+
+    return context.compile_internal(builder, permutation_impl, sig, args)
+
+
+# np.random.choice() draws indices into the population (the first
+# argument, either an integer or a 1-d array), then takes the elements
+# at those indices if the population is an array.  Without weights, the
+# same numbers as Numpy are drawn.  With weights *p* and replacement,
+# arrays of indices are drawn in O(1) each using a Walker alias table
+# (Numpy does a binary search for each draw).
+
+def _array_len(a):
+    return a.shape[0]
+
+def _choice_check_p(n, p):
+    if p.shape[0] != n:
+        raise ValueError("a and p must have same size")
+    total = 0.0
+    for i in range(n):
+        if not p[i] >= 0.0:
+            raise ValueError("probabilities are not non-negative")
+        total += p[i]
+    # Same tolerance as Numpy
+    if abs(total - 1.0) > 1.4901161193847656e-08:
+        raise ValueError("probabilities do not sum to 1")
+
+def _choice_index(n, replace):
+    if n <= 0:
+        raise ValueError("a must be non-empty")
+    if replace:
+        return np.random.randint(n)
+    else:
+        return np.random.permutation(n)[0]
+
+def _choice_weighted_index(n, replace, p):
+    if n <= 0:
+        raise ValueError("a must be non-empty")
+    # Same as Numpy: searchsorted(cumsum(p) / sum(p), u, side='right')
+    u = np.random.random()
+    total = 0.0
+    for i in range(n):
+        total += p[i]
+    acc = 0.0
+    for i in range(n):
+        acc += p[i]
+        if acc / total > u:
+            return i
+    return n - 1
+
+def _choice_indices(out, n, replace, p):
+    flat = out.reshape(out.size)
+    k = flat.shape[0]
+    if k == 0:
+        return
+    if n <= 0:
+        raise ValueError("a must be non-empty")
+    if replace:
+        for i in range(k):
+            flat[i] = np.random.randint(n)
+    else:
+        if k > n:
+            raise ValueError("Cannot take a larger sample than population "
+                             "when 'replace=False'")
+        perm = np.random.permutation(n)
+        for i in range(k):
+            flat[i] = perm[i]
+
+def _choice_weighted_indices(out, n, replace, p):
+    flat = out.reshape(out.size)
+    k = flat.shape[0]
+    if k == 0:
+        return
+    if n <= 0:
+        raise ValueError("a must be non-empty")
+    total = 0.0
+    for i in range(n):
+        total += p[i]
+
+    if replace:
+        # Build Vose's alias table: column i is picked with probability
+        # prob[i], otherwise alias[i] is.
+        prob = np.empty(n)
+        alias = np.empty(n, np.int64)
+        small = np.empty(n, np.int64)
+        large = np.empty(n, np.int64)
+        nsmall = 0
+        nlarge = 0
+        for i in range(n):
+            prob[i] = p[i] * n / total
+            alias[i] = i
+            if prob[i] < 1.0:
+                small[nsmall] = i
+                nsmall += 1
+            else:
+                large[nlarge] = i
+                nlarge += 1
+        while nsmall > 0 and nlarge > 0:
+            nsmall -= 1
+            s = small[nsmall]
+            l = large[nlarge - 1]
+            alias[s] = l
+            prob[l] = (prob[l] + prob[s]) - 1.0
+            if prob[l] < 1.0:
+                nlarge -= 1
+                small[nsmall] = l
+                nsmall += 1
+        # Leftover columns (only off by rounding errors) are always taken
+        for i in range(nlarge):
+            prob[large[i]] = 1.0
+        for i in range(nsmall):
+            prob[small[i]] = 1.0
+
+        for i in range(k):
+            x = np.random.random() * n
+            j = int(x)
+            if j >= n:
+                j = n - 1
+            if x - j >= prob[j]:
+                j = alias[j]
+            flat[i] = j
+
+    else:
+        # Sequential draws, zeroing the weight of each drawn index
+        w = np.empty(n)
+        nonzero = 0
+        for i in range(n):
+            w[i] = p[i]
+            if p[i] > 0.0:
+                nonzero += 1
+        if k > nonzero:
+            raise ValueError("Fewer non-zero entries in p than size")
+        for i in range(k):
+            u = np.random.random() * total
+            acc = 0.0
+            last = -1
+            j = -1
+            for t in range(n):
+                if w[t] > 0.0:
+                    last = t
+                    acc += w[t]
+                    if acc > u:
+                        j = t
+                        break
+            if j < 0:
+                # Rounding errors in the running total
+                j = last
+            flat[i] = j
+            total -= w[j]
+            w[j] = 0.0
+
+def _choice_take(a, i):
+    return a[i]
+
+def _choice_take_all(out, a, indices):
+    flat = out.reshape(out.size)
+    flat_indices = indices.reshape(indices.size)
+    for i in range(flat.shape[0]):
+        flat[i] = a[flat_indices[i]]
+
+
+@register
+@implement("np.random.choice", types.VarArg(types.Any))
+def choice_impl(context, builder, sig, args):
+    # Fill in the defaults of omitted trailing parameters
+    argtys = list(sig.args)
+    args = list(args)
+    for ty, val in [(types.none, context.get_dummy_value()),
+                    (types.boolean, cgutils.true_bit),
+                    (types.none, context.get_dummy_value())][len(args) - 1:]:
+        argtys.append(ty)
+        args.append(val)
+    aty, sizety, replacety, pty = argtys
+    a, size, replace, p = args
+
+    if isinstance(aty, types.Array):
+        n = context.compile_internal(builder, _array_len,
+                                     signature(types.int64, aty), [a])
+    else:
+        n = context.cast(builder, a, aty, types.int64)
+    weighted = pty != types.none
+    if weighted:
+        context.compile_internal(builder, _choice_check_p,
+                                 signature(types.none, types.int64, pty),
+                                 [n, p])
+
+    if sizety == types.none:
+        if weighted:
+            index = context.compile_internal(
+                builder, _choice_weighted_index,
+                signature(types.int64, types.int64, types.boolean, pty),
+                [n, replace, p])
+        else:
+            index = context.compile_internal(
+                builder, _choice_index,
+                signature(types.int64, types.int64, types.boolean),
+                [n, replace])
+        if isinstance(aty, types.Array):
+            return context.compile_internal(
+                builder, _choice_take,
+                signature(sig.return_type, aty, types.int64), [a, index])
+        return index
+
+    arrty, shapes = _parse_empty_args(
+        context, builder, signature(sig.return_type, sizety), [size])
+    out = _empty_nd_impl(context, builder, arrty, shapes)
+    if isinstance(aty, types.Array):
+        indexty = types.Array(types.int64, arrty.ndim, 'C')
+        indices = _empty_nd_impl(context, builder, indexty, shapes)
+    else:
+        indexty = arrty
+        indices = out
+
+    if weighted:
+        context.compile_internal(
+            builder, _choice_weighted_indices,
+            signature(types.none, indexty, types.int64, types.boolean, pty),
+            [indices._getvalue(), n, replace, p])
+    else:
+        context.compile_internal(
+            builder, _choice_indices,
+            signature(types.none, indexty, types.int64, types.boolean,
+                      types.none),
+            [indices._getvalue(), n, replace, context.get_dummy_value()])
+
+    if isinstance(aty, types.Array):
+        context.compile_internal(
+            builder, _choice_take_all,
+            signature(types.none, arrty, aty, indexty),
+            [out._getvalue(), a, indices._getvalue()])
+        context.decref(builder, indexty, indices._getvalue())
+    return out._getvalue()
+
+
+@register
+@implement("np.random.multinomial", types.VarArg(types.Any))
+def multinomial_impl(context, builder, sig, args):
+    nty, pvalsty = sig.args[:2]
+    n, pvals = args[:2]
+    n = context.cast(builder, n, nty, types.int64)
+    arrty = sig.return_type
+
+    shapes = []
+    if len(args) > 2 and sig.args[2] != types.none:
+        sizety = sig.args[2]
+        _, shapes = _parse_empty_args(context, builder,
+                                      signature(arrty, sizety), [args[2]])
+    d = context.compile_internal(builder, _array_len,
+                                 signature(types.intp, pvalsty), [pvals])
+    out = _empty_nd_impl(context, builder, arrty, shapes + [d])
+
+    def multinomial_impl(out, n, pvals):
+        """
+        Draw each count from the binomial distribution of the remaining
+        trials, as Numpy does.
+        """
+        d = pvals.shape[0]
+        if n < 0:
+            raise ValueError("multinomial(): n < 0")
+        total = 0.0
+        for i in range(d - 1):
+            total += pvals[i]
+        if total > 1.0 + 1e-12:
+            raise ValueError("sum(pvals[:-1]) > 1.0")
+        if out.size == 0:
+            return
+        rows = out.reshape((out.size // d, d))
+        for r in range(rows.shape[0]):
+            dn = n
+            remaining = 1.0
+            for i in range(d):
+                rows[r, i] = 0
+            for i in range(d - 1):
+                if remaining > 0.0:
+                    q = min(max(pvals[i] / remaining, 0.0), 1.0)
+                else:
+                    q = 0.0
+                k = np.random.binomial(dn, q)
+                rows[r, i] = k
+                dn -= k
+                if dn <= 0:
+                    break
+                remaining -= pvals[i]
+            if dn > 0:
+                rows[r, d - 1] = dn
+
+    context.compile_internal(builder, multinomial_impl,
+                             signature(types.none, arrty, types.int64,
+                                       pvalsty),
+                             [out._getvalue(), n, pvals])
+    return out._getvalue()
+
+
+#-------------------------------------------------------------------------------
+# Array-filling variants (with a size argument)
+
+def _identity(u):
+    return u
+
+def _uniform(u, low, high):
+    return low + (high - low) * u
+
+def _standard_exponential(u):
+    return -math.log(1.0 - u)
+
+def _exponential(u, scale):
+    return -math.log(1.0 - u) * scale
+
+def _gumbel(u, loc, scale):
+    return loc - scale * math.log(-math.log(1.0 - u))
+
+def _pareto(u, a):
+    return 1.0 / (1.0 - u) ** (1.0 / a) - 1
+
+def _weibull(u, a):
+    return (-math.log(1.0 - u)) ** (1.0 / a)
+
+# Distributions computing each draw from a single uniform number (in the
+# same way as their scalar implementation), keyed by (function, number of
+# parameters).  Their array variants first fill the output with uniform
+# numbers, using fill_doubles(), then transform them in a separate loop.
+_uniform_transforms = {
+    ("np.random.random", 0): _identity,
+    ("np.random.uniform", 2): _uniform,
+    ("np.random.standard_exponential", 0): _standard_exponential,
+    ("np.random.exponential", 0): _standard_exponential,
+    ("np.random.exponential", 1): _exponential,
+    ("np.random.gumbel", 2): _gumbel,
+    ("np.random.pareto", 1): _pareto,
+    ("np.random.weibull", 1): _weibull,
+    }
+
+# Distributions drawn with a Ziggurat sampler when config.RANDOM_ZIGGURAT
+# is enabled, rather than from a uniform number
+_ziggurat_keys = frozenset(["np.random.standard_exponential",
+                            "np.random.exponential"])
+
+
+def _fill_random_array(context, builder, key, arrty, shapes,
+                       argtys, args):
+    """
+    Allocate an array of type *arrty* and dimensions *shapes*, and
+    fill it with draws of the scalar function *key* with the given
+    parameters.  The new array structure is returned.
+    """
+    intp_t = context.get_value_type(types.intp)
+    ary = _empty_nd_impl(context, builder, arrty, shapes)
+    if config.RANDOM_ZIGGURAT and key in _ziggurat_keys:
+        transform = None
+    else:
+        transform = _uniform_transforms.get((key, len(args)))
+
+    if transform is not None:
+        state_ptr = get_np_state_ptr(context, builder)
+        fill_doubles(context, builder, state_ptr, ary.data, ary.nitems)
+        if transform is not _identity:
+            tsig = signature(arrty.dtype, types.float64, *argtys)
+            with cgutils.for_range(builder, ary.nitems, intp_t) as i:
+                ptr = builder.gep(ary.data, [i])
+                val = context.compile_internal(builder, transform, tsig,
+                                               [builder.load(ptr)] + args)
+                builder.store(val, ptr)
+    else:
+        impl = context.get_function(key, signature(arrty.dtype, *argtys))
+        with cgutils.for_range(builder, ary.nitems, intp_t) as i:
+            builder.store(impl(builder, args), builder.gep(ary.data, [i]))
+
+    return ary
+
+
+def _register_size_impl(key):
+    """
+    Register the implementation of np.random function *key* when called
+    with a size argument (typed as the last argument).
+    """
+    @register
+    @implement(key, types.VarArg(types.Any))
+    def random_size_impl(context, builder, sig, args):
+        sizety, size = sig.args[-1], args[-1]
+        # Omitted optional parameters are typed as none
+        params = [(ty, val) for ty, val in zip(sig.args[:-1], args[:-1])
+                  if ty != types.none]
+        argtys = [ty for ty, _ in params]
+        args = [val for _, val in params]
+
+        if sizety == types.none:
+            impl = context.get_function(key, signature(sig.return_type,
+                                                       *argtys))
+            return impl(builder, args)
+
+        arrty, shapes = _parse_empty_args(
+            context, builder, signature(sig.return_type, sizety), [size])
+        ary = _fill_random_array(context, builder, key, arrty, shapes,
+                                 argtys, args)
+        return ary._getvalue()
+
+for _key in ("np.random.random", "np.random.standard_cauchy",
+             "np.random.standard_normal", "np.random.standard_exponential",
+             "np.random.randint", "np.random.geometric",
+             "np.random.logseries", "np.random.zipf", "np.random.binomial",
+             "np.random.negative_binomial", "np.random.poisson",
+             "np.random.exponential", "np.random.rayleigh",
+             "np.random.hypergeometric", "np.random.laplace",
+             "np.random.logistic", "np.random.lognormal",
+             "np.random.normal", "np.random.gamma", "np.random.triangular",
+             "np.random.beta", "np.random.f", "np.random.gumbel",
+             "np.random.uniform", "np.random.vonmises", "np.random.wald",
+             "np.random.chisquare", "np.random.pareto", "np.random.power",
+             "np.random.standard_gamma", "np.random.standard_t",
+             "np.random.weibull"):
+    _register_size_impl(_key)
+
+
+@register
+@implement("np.random.rand", types.VarArg(types.Kind(types.Integer)))
+def rand_impl(context, builder, sig, args):
+    shapes = [context.cast(builder, val, ty, types.intp)
+              for ty, val in zip(sig.args, args)]
+    ary = _fill_random_array(context, builder, "np.random.random",
+                             sig.return_type, shapes, [], [])
+    return ary._getvalue()
+
+@register
+@implement("np.random.randn", types.VarArg(types.Kind(types.Integer)))
+def randn_impl(context, builder, sig, args):
+    shapes = [context.cast(builder, val, ty, types.intp)
+              for ty, val in zip(sig.args, args)]
+    ary = _fill_random_array(context, builder, "np.random.standard_normal",
+                             sig.return_type, shapes, [], [])
+    return ary._getvalue()
+
+
+# Generator objects (numba.prng)
+
+@type_factory(types.RandomGenerator)
+def llvm_random_generator_type(context, tp):
+    # A pointer to the generator's state words
+    return ir.PointerType(int64_t)
+
+
+def _rotl64(builder, x, k):
+    return builder.or_(builder.shl(x, _i64(k)), builder.lshr(x, _i64(64 - k)))
+
+def _load_words(builder, state_ptr, n):
+    ptrs = [cgutils.gep(builder, state_ptr, i) for i in range(n)]
+    return ptrs, [builder.load(p) for p in ptrs]
+
+def _xoroshiro128p_next(builder, state_ptr):
+    """
+    xoroshiro128+: s0 + s1, then s1 ^= s0;
+    s0 = rotl(s0, 24) ^ s1 ^ (s1 << 16); s1 = rotl(s1, 37).
+    """
+    (p0, p1), (s0, s1) = _load_words(builder, state_ptr, 2)
+    result = builder.add(s0, s1)
+    s1 = builder.xor(s1, s0)
+    builder.store(builder.xor(builder.xor(_rotl64(builder, s0, 24), s1),
+                              builder.shl(s1, _i64(16))), p0)
+    builder.store(_rotl64(builder, s1, 37), p1)
+    return result
+
+def _pcg64_next(builder, state_ptr):
+    """
+    PCG64 (XSL-RR): advance the 128-bit LCG, then output the xor of the
+    state's halves rotated right by the state's top 6 bits.
+    """
+    int128_t = ir.IntType(128)
+    def join(lo, hi):
+        return builder.or_(builder.zext(lo, int128_t),
+                           builder.shl(builder.zext(hi, int128_t),
+                                       ir.Constant(int128_t, 64)))
+
+    (plo, phi, _, _), (lo, hi, inclo, inchi) = _load_words(builder,
+                                                           state_ptr, 4)
+    state = builder.add(
+        builder.mul(join(lo, hi),
+                    ir.Constant(int128_t, 0x2360ED051FC65DA44385DF649FCCF645)),
+        join(inclo, inchi))
+    builder.store(builder.trunc(state, int64_t), plo)
+    builder.store(builder.trunc(builder.lshr(state, ir.Constant(int128_t, 64)),
+                                int64_t), phi)
+
+    rot = builder.trunc(builder.lshr(state, ir.Constant(int128_t, 122)),
+                        int64_t)
+    x = builder.trunc(builder.xor(builder.lshr(state,
+                                               ir.Constant(int128_t, 64)),
+                                  state),
+                      int64_t)
+    return builder.or_(builder.lshr(x, rot),
+                       builder.shl(x, builder.and_(builder.sub(_i64(0), rot),
+                                                     _i64(63))))
+
+def _philox4x32_block(builder, lo, hi, key):
+    """
+    Compute the Philox4x32-10 block for the counter (*lo*, *hi*) and
+    the *key*, as two 64-bit words.
+    """
+    int32_t = ir.IntType(32)
+    def half(x, shift):
+        return builder.trunc(builder.lshr(x, _i64(shift)), int32_t)
+    def mulhilo(a, m):
+        p = builder.mul(builder.zext(a, int64_t), _i64(m))
+        return half(p, 32), half(p, 0)
+    def join(a, b):
+        return builder.or_(builder.zext(a, int64_t),
+                           builder.shl(builder.zext(b, int64_t), _i64(32)))
+
+    c0, c1, c2, c3 = half(lo, 0), half(lo, 32), half(hi, 0), half(hi, 32)
+    k0, k1 = half(key, 0), half(key, 32)
+    for i in range(10):
+        if i:
+            k0 = builder.add(k0, const_int(0x9E3779B9))
+            k1 = builder.add(k1, const_int(0xBB67AE85))
+        hi0, lo0 = mulhilo(c0, 0xD2511F53)
+        hi1, lo1 = mulhilo(c2, 0xCD9E8D57)
+        c0, c1, c2, c3 = (builder.xor(builder.xor(hi1, c1), k0), lo1,
+                          builder.xor(builder.xor(hi0, c3), k1), lo0)
+    return join(c0, c1), join(c2, c3)
+
+def _philox4x32_next(builder, state_ptr):
+    """
+    Philox4x32: return the next buffered word, generating the block
+    for the current counter (and incrementing it) when the buffer of
+    two words is exhausted.
+    """
+    ptrs, (lo, hi, key, _, _, index) = _load_words(builder, state_ptr, 6)
+    plo, phi, _, pbuf0, pbuf1, pindex = ptrs
+    exhausted = builder.icmp_unsigned('>=', index, _i64(2))
+    with cgutils.if_unlikely(builder, exhausted):
+        buf0, buf1 = _philox4x32_block(builder, lo, hi, key)
+        builder.store(buf0, pbuf0)
+        builder.store(buf1, pbuf1)
+        newlo = builder.add(lo, _i64(1))
+        carry = builder.icmp_unsigned('==', newlo, _i64(0))
+        builder.store(newlo, plo)
+        builder.store(builder.add(hi, builder.zext(carry, int64_t)), phi)
+        builder.store(_i64(0), pindex)
+
+    index = builder.load(pindex)
+    builder.store(builder.add(index, _i64(1)), pindex)
+    return builder.select(builder.icmp_unsigned('==', index, _i64(0)),
+                          builder.load(pbuf0), builder.load(pbuf1))
+
+_generator_next = {
+    "philox4x32": _philox4x32_next,
+    "pcg64": _pcg64_next,
+    "xoroshiro128+": _xoroshiro128p_next,
+    }
+
+def get_generator_next_uint64(context, builder, gentype, state_ptr):
+    """
+    Get the next 64-bit word generated by the generator of type
+    *gentype* at *state_ptr*.
+    """
+    return _generator_next[gentype.engine](builder, state_ptr)
+
+
+@register
+@implement("rng.next_uint64", types.Kind(types.RandomGenerator))
+def rng_next_uint64_impl(context, builder, sig, args):
+    gentype, = sig.args
+    state_ptr, = args
+    return get_generator_next_uint64(context, builder, gentype, state_ptr)
+
+
+def get_generator_next_double(context, builder, gentype, state_ptr):
+    """
+    Get the next double in [0, 1) generated by the generator of type
+    *gentype* at *state_ptr*: (x >> 11) * 2**-53.
+    """
+    x = get_generator_next_uint64(context, builder, gentype, state_ptr)
+    x = builder.uitofp(builder.lshr(x, _i64(11)), double)
+    return builder.fmul(x, ir.Constant(double, 1.0 / 9007199254740992.0))
+
+
+def _generator_ziggurat(context, builder, sig, args, sampler):
+    gentype, = sig.args
+    state_ptr, = args
+    return sampler(
+        context, builder,
+        lambda: get_generator_next_uint64(context, builder, gentype,
+                                          state_ptr),
+        lambda: get_generator_next_double(context, builder, gentype,
+                                          state_ptr))
+
+
+@register
+@implement("rng.random", types.Kind(types.RandomGenerator))
+def rng_random_impl(context, builder, sig, args):
+    gentype, = sig.args
+    state_ptr, = args
+    return get_generator_next_double(context, builder, gentype, state_ptr)
+
+@register
+@implement("rng.standard_normal", types.Kind(types.RandomGenerator))
+def rng_standard_normal_impl(context, builder, sig, args):
+    return _generator_ziggurat(context, builder, sig, args, ziggurat_normal)
+
+@register
+@implement("rng.standard_exponential", types.Kind(types.RandomGenerator))
+def rng_standard_exponential_impl(context, builder, sig, args):
+    return _generator_ziggurat(context, builder, sig, args,
+                               ziggurat_exponential)
@@ -0,0 +1,889 @@
+"""
+Branch-free implementations of transcendental functions.
+
+The C math library functions called for math.exp(), math.sin(), etc.
+are opaque to LLVM, which therefore cannot vectorize loops calling them.
+The implementations here are emitted inline as straight-line IR (only
+arithmetic, bit manipulation and selects), so that such loops can be
+vectorized.  They are used instead of the C math library when
+NUMBA_VECTOR_MATH is set, both for the math module functions and for
+the corresponding ufuncs (see mathimpl.py and npyfuncs.py).
+
+Each function has a double precision and a single precision variant,
+selected from the argument type, so that float32 loops are vectorized
+at twice the width of float64 loops.  The maximum errors measured are:
+
+- exp(), log(): 1 ulp
+- sin(), cos(): 1 ulp, the arguments being reduced with a Payne-Hanek
+  reduction (in double precision for |x| >= 2**20 in single precision);
+  arguments within 2**-40 of a multiple of pi / 2 lose accuracy, down
+  to a relative error of 2e-12 for the worst case among all doubles
+- tanh(), erf(), pow(), atan2(), hypot(): 2.5 ulps (the logarithm in
+  pow() is computed in double-double, resp. float-float, precision)
+- log_hypot(), the real part of the complex logarithm: 1 ulp, except
+  for arguments within a few ulps of the unit circle
+
+Special values (infinities, NaNs, signed zeros) follow C99.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import math
+import struct
+
+from llvmlite import ir
+import llvmlite.llvmpy.core as lc
+
+from numba import cgutils
+
+
+double = ir.DoubleType()
+float_ = ir.FloatType()
+
+
+class _Format(object):
+    """
+    The parameters of a floating-point format, and the constants
+    used by the functions below in that format.
+    """
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+_F64 = _Format(
+    fltty=double,
+    intty=ir.IntType(64),
+    bits=64,
+    mant_bits=52,
+    bias=1023,
+    min_normal=2.2250738585072014e-308,
+    # Adding then subtracting this rounds a number of magnitude < 2**51
+    # to the nearest integer.
+    rint_magic=6755399441055744.0,
+    # Numbers of magnitude >= this are all integers
+    int_min=2.0 ** 52,
+    # Dekker's splitting constant, 2**27 + 1
+    splitter=134217729.0,
+    log2e=1.4426950408889634,
+    # ln(2) split so that n * ln2_hi is exact for |n| < 2**20
+    ln2_hi=6.93147180369123816490e-01,
+    ln2_lo=1.90821492927058770002e-10,
+    sqrt2=1.4142135623730951,
+    # 2/3 as a sum of two numbers
+    two_thirds=(0.6666666666666666, 3.700743415417188e-17),
+    two_over_pi=0.6366197723675814,
+    # pi / 2 as a sum of three numbers
+    pio2=(1.5707963267948966, 6.123233995736766e-17, -1.4973849048591698e-33),
+    # sin(x) rounds to x below this
+    sin_tiny=2.0 ** -27,
+    # exp(x) overflows above exp_max and underflows to 0 below exp_min
+    exp_max=710.0,
+    exp_min=-746.0,
+    # tanh(x) rounds to 1 well before 2 * |x| reaches this
+    tanh_max=40.0,
+    # Taylor coefficients of (exp(r) - 1 - r) / r**2
+    expm1_coeffs=[1.0 / math.factorial(k) for k in range(2, 14)],
+    # Taylor coefficients of (atanh(s) - s - s**3 / 3) / s**5, as a
+    # polynomial in s**2, times two
+    log_coeffs=[2.0 / (2 * k + 1) for k in range(2, 11)],
+    # sin(r) = r + r**3 * P(r**2) and cos(r) = 1 - r**2 / 2 + r**4 * Q(r**2)
+    # on [-pi/4, pi/4], from fdlibm
+    sin_coeffs=[-1.66666666666666324348e-01, 8.33333333332248946124e-03,
+                -1.98412698298579493134e-04, 2.75573137070700676789e-06,
+                -2.50507602534068634195e-08, 1.58969099521155010221e-10],
+    cos_coeffs=[4.16666666666666019037e-02, -1.38888888888741095749e-03,
+                2.48015872894767294178e-05, -2.75573143513906633035e-07,
+                2.08757232129817482790e-09, -1.13596475577881948265e-11],
+    # erf(x) / x as a polynomial in u = 2 * x**2 - 1, for |x| < 1
+    erf_small_coeffs=[
+        0.9654687386698673, -0.1405360890227171, 0.019852496688984218,
+        -0.0022854855611440855, 0.00021751715603563488, -1.75371694412802e-05,
+        1.2233827638093572e-06, -7.51156925108609e-08, 4.115751500265885e-09,
+        -2.035231956483527e-10, 9.21125018742823e-12, -3.80659122412214e-13],
+    # erfc(x) * exp(x**2) as a polynomial in u = 2 * x - 3, for 1 <= x < 2
+    erfc_medium_coeffs=[
+        0.3215854164543175, -0.08181145886628004, 0.019037759963870138,
+        -0.0041163631624454335, 0.0008360838095501772, -0.00016081117337237463,
+        2.9470857585360663e-05, -5.171328661078072e-06, 8.723039535796884e-07,
+        -1.4191188983511488e-07, 2.2329527918697295e-08, -3.40590129634009e-09,
+        5.033420569164749e-10, -7.259519499451313e-11, 1.100964212179346e-11,
+        -1.5053845831299624e-12],
+    # erfc(x) * exp(x**2) as a polynomial in u = x * scale - offset, for
+    # 2 <= x < erf_one, where erf(x) rounds to 1 for x >= erf_one
+    erfc_large_coeffs=[
+        0.13699945762506138, -0.06476701219002746, 0.029861732979897134,
+        -0.013449456615099843, 0.005925639504306034, -0.002557084145437522,
+        0.0010819615443804634, -0.000449327170817165, 0.00018330777006575385,
+        -7.352008568773549e-05, 2.9011515082962187e-05, -1.1275073990509855e-05,
+        4.314825741710838e-06, -1.618701135767133e-06, 6.024756248132528e-07,
+        -2.3270040011180073e-07, 8.400637713845437e-08, -2.0848628708497824e-08,
+        7.51985535709463e-09, -6.7237580409382605e-09, 2.289129018275158e-09],
+    erfc_large_u=(0.5, 2.0),
+    erf_one=6.0,
+    # atan(x) = x + x**3 * P(x**2) / Q(x**2) on [0, atan_mid], from Cephes;
+    # larger arguments are reduced using pi / 4 or pi / 2
+    atan_mid=0.66,
+    atan_num_coeffs=[-6.485021904942025371773E1, -1.228866684490136173410E2,
+                     -7.500855792314704667340E1, -1.615753718733365076637E1,
+                     -8.750608600031904122785E-1],
+    # log_hypot() scales arguments of magnitude above hypot_big or below
+    # 1 / hypot_big by 2**-hypot_scale_bits, resp. 2**hypot_scale_bits
+    hypot_big=2.0 ** 500,
+    hypot_scale_bits=600,
+    atan_den_coeffs=[1.945506571482613964425E2, 4.853903996359136964868E2,
+                     4.328810604912902668951E2, 1.650270098316988542046E2,
+                     2.485846490142306297962E1, 1.0],
+    )
+
+_F32 = _Format(
+    fltty=float_,
+    intty=ir.IntType(32),
+    bits=32,
+    mant_bits=23,
+    bias=127,
+    min_normal=1.1754943508222875e-38,
+    rint_magic=12582912.0,
+    int_min=2.0 ** 23,
+    # 2**12 + 1
+    splitter=4097.0,
+    log2e=1.4426950216293335,
+    # ln(2) split so that n * ln2_hi is exact for |n| < 2**8
+    ln2_hi=0.693145751953125,
+    ln2_lo=1.428606765330187e-06,
+    sqrt2=1.4142135381698608,
+    two_thirds=(0.6666666865348816, -1.9868215517249155e-08),
+    two_over_pi=0.6366197466850281,
+    pio2=(1.5707963705062866, -4.371138828673793e-08, -1.7151245100058819e-15),
+    sincos_max=2.0 ** 20,
+    sin_tiny=2.0 ** -12,
+    exp_max=89.0,
+    exp_min=-104.0,
+    tanh_max=20.0,
+    expm1_coeffs=[1.0 / math.factorial(k) for k in range(2, 9)],
+    log_coeffs=[2.0 / (2 * k + 1) for k in range(2, 6)],
+    # From Cephes
+    sin_coeffs=[-1.6666654611e-1, 8.3321608736e-3, -1.9515295891e-4],
+    cos_coeffs=[4.166664568298827e-2, -1.388731625493765e-3,
+                2.443315711809948e-5],
+    erf_small_coeffs=[
+        0.9654687643051147, -0.1405360847711563, 0.019852498546242714,
+        -0.0022854856215417385, 0.00021751198801212013, -1.7536915038363077e-05,
+        1.231639544130303e-06, -7.552378633590706e-08],
+    erfc_medium_coeffs=[
+        0.32158541679382324, -0.08181145042181015, 0.0190377589315176,
+        -0.004116433206945658, 0.0008360947831533849, -0.0001605600118637085,
+        2.943145045719575e-05, -5.502442490978865e-06, 9.242911573892343e-07],
+    erfc_large_coeffs=[
+        0.17900115251541138, -0.054372258484363556, 0.015884339809417725,
+        -0.004479423630982637, 0.0012232951121404767, -0.0003241841041017324,
+        8.284579234896228e-05, -2.082739410980139e-05, 5.934612090641167e-06,
+        -1.4138810229269438e-06],
+    erfc_large_u=(1.0, 3.0),
+    erf_one=4.0,
+    atan_mid=0.41421356237309503,
+    atan_num_coeffs=[-3.33329491539e-1, 1.99777106478e-1, -1.38776856032e-1,
+                     8.05374449538e-2],
+    atan_den_coeffs=None,
+    hypot_big=2.0 ** 60,
+    hypot_scale_bits=90,
+    )
+
+
+def _format(val):
+    """
+    Return the _Format for the type of IR value *val*.
+    """
+    return _F64 if val.type == double else _F32
+
+def _fconst(fmt, value):
+    if fmt is _F32:
+        # Round to the nearest single precision number
+        value = struct.unpack('f', struct.pack('f', value))[0]
+    return ir.Constant(fmt.fltty, value)
+
+def _iconst(fmt, value):
+    return ir.Constant(fmt.intty, value)
+
+def _as_int(builder, fmt, x):
+    return builder.bitcast(x, fmt.intty)
+
+def _as_float(builder, fmt, x):
+    return builder.bitcast(x, fmt.fltty)
+
+def _fabs(builder, fmt, x):
+    abs_mask = (1 << (fmt.bits - 1)) - 1
+    return _as_float(builder, fmt, builder.and_(_as_int(builder, fmt, x),
+                                                _iconst(fmt, abs_mask)))
+
+def _copysign(builder, fmt, x, y):
+    """
+    Return *x* with the sign of *y*.
+    """
+    abs_mask = (1 << (fmt.bits - 1)) - 1
+    sign_mask = 1 << (fmt.bits - 1)
+    mag = builder.and_(_as_int(builder, fmt, x), _iconst(fmt, abs_mask))
+    sign = builder.and_(_as_int(builder, fmt, y), _iconst(fmt, sign_mask))
+    return _as_float(builder, fmt, builder.or_(mag, sign))
+
+def _fselect(builder, fmt, cmpop, x, bound, then, otherwise):
+    """
+    Return *then* if `x <cmpop> bound` (an ordered comparison, so false
+    for NaNs), *otherwise* else.
+    """
+    cond = builder.fcmp_ordered(cmpop, x, _fconst(fmt, bound))
+    return builder.select(cond, then, otherwise)
+
+
+def _rint(builder, fmt, x):
+    """
+    Round *x* (|x| < fmt.int_min / 2) to the nearest integer, as a
+    floating-point number.
+    """
+    magic = _fconst(fmt, fmt.rint_magic)
+    return builder.fsub(builder.fadd(x, magic), magic)
+
+def _to_int(builder, fmt, x):
+    """
+    Convert integral *x* to an integer, mapping NaNs to 0 (the
+    conversion of a NaN would otherwise be undefined).
+    """
+    x = builder.select(builder.fcmp_ordered('==', x, x), x, _fconst(fmt, 0.0))
+    return builder.fptosi(x, fmt.intty)
+
+def _pow2(builder, fmt, n):
+    """
+    Return 2**n as a floating-point number, for integer *n* in the
+    range of normal exponents.
+    """
+    return _as_float(builder, fmt,
+                     builder.shl(builder.add(n, _iconst(fmt, fmt.bias)),
+                                 _iconst(fmt, fmt.mant_bits)))
+
+def _polyval(builder, fmt, coeffs, x):
+    """
+    Evaluate the polynomial with *coeffs* (in increasing degree) at *x*.
+    """
+    res = _fconst(fmt, coeffs[-1])
+    for c in reversed(coeffs[:-1]):
+        res = builder.fadd(builder.fmul(res, x), _fconst(fmt, c))
+    return res
+
+def _two_sum(builder, a, b):
+    """
+    Return (s, e) such that s + e == a + b exactly.
+    """
+    s = builder.fadd(a, b)
+    bb = builder.fsub(s, a)
+    e = builder.fadd(builder.fsub(a, builder.fsub(s, bb)),
+                     builder.fsub(b, bb))
+    return s, e
+
+def _split(builder, fmt, a):
+    t = builder.fmul(a, _fconst(fmt, fmt.splitter))
+    hi = builder.fsub(t, builder.fsub(t, a))
+    return hi, builder.fsub(a, hi)
+
+def _two_prod(builder, fmt, a, b):
+    """
+    Return (p, e) such that p + e == a * b exactly (Dekker's algorithm).
+    """
+    p = builder.fmul(a, b)
+    ahi, alo = _split(builder, fmt, a)
+    bhi, blo = _split(builder, fmt, b)
+    e = builder.fsub(builder.fmul(ahi, bhi), p)
+    e = builder.fadd(e, builder.fmul(ahi, blo))
+    e = builder.fadd(e, builder.fmul(alo, bhi))
+    e = builder.fadd(e, builder.fmul(alo, blo))
+    return p, e
+
+
+def exp(builder, x, xlo=None):
+    """
+    Compute exp(x + xlo), where *xlo* is an optional low-order correction
+    to *x*.
+    """
+    fmt = _format(x)
+    # Clamp to the range where the result is neither 0 nor infinite:
+    # the final scaling then under- or overflows as needed.
+    xc = _fselect(builder, fmt, '>', x, fmt.exp_max,
+                  _fconst(fmt, fmt.exp_max), x)
+    xc = _fselect(builder, fmt, '<', xc, fmt.exp_min,
+                  _fconst(fmt, fmt.exp_min), xc)
+    # x = n * ln(2) + r, with |r| <= ln(2) / 2
+    nf = _rint(builder, fmt, builder.fmul(xc, _fconst(fmt, fmt.log2e)))
+    r = builder.fsub(xc, builder.fmul(nf, _fconst(fmt, fmt.ln2_hi)))
+    r = builder.fsub(r, builder.fmul(nf, _fconst(fmt, fmt.ln2_lo)))
+    if xlo is not None:
+        xlo = _fselect(builder, fmt, '<', _fabs(builder, fmt, x),
+                       -fmt.exp_min, xlo, _fconst(fmt, 0.0))
+        r = builder.fadd(r, xlo)
+    # exp(r) = 1 + r + r**2 * P(r)
+    p = builder.fmul(builder.fmul(r, r),
+                     _polyval(builder, fmt, fmt.expm1_coeffs, r))
+    p = builder.fadd(_fconst(fmt, 1.0), builder.fadd(r, p))
+    # Multiply by 2**n in two steps, so that neither factor overflows
+    n = _to_int(builder, fmt, nf)
+    n1 = builder.ashr(n, _iconst(fmt, 1))
+    n2 = builder.sub(n, n1)
+    return builder.fmul(builder.fmul(p, _pow2(builder, fmt, n1)),
+                        _pow2(builder, fmt, n2))
+
+
+def _log_dd(builder, x):
+    """
+    Compute log(x) as a double-double (hi, lo), for positive finite *x*
+    (as a float-float if *x* is single precision).
+    """
+    fmt = _format(x)
+    # Scale subnormals up
+    scale_bits = fmt.mant_bits + 2
+    tiny = builder.fcmp_ordered('<', x, _fconst(fmt, fmt.min_normal))
+    x = builder.select(tiny, builder.fmul(x, _fconst(fmt, 2.0 ** scale_bits)),
+                       x)
+    bits = _as_int(builder, fmt, x)
+    e = builder.sub(builder.lshr(bits, _iconst(fmt, fmt.mant_bits)),
+                    _iconst(fmt, fmt.bias))
+    e = builder.sub(e, builder.select(tiny, _iconst(fmt, scale_bits),
+                                      _iconst(fmt, 0)))
+    # x = 2**e * m, with sqrt(2) / 2 <= m < sqrt(2)
+    mant_mask = (1 << fmt.mant_bits) - 1
+    one_bits = fmt.bias << fmt.mant_bits
+    m = _as_float(builder, fmt,
+                  builder.or_(builder.and_(bits, _iconst(fmt, mant_mask)),
+                              _iconst(fmt, one_bits)))
+    big = builder.fcmp_ordered('>', m, _fconst(fmt, fmt.sqrt2))
+    m = builder.select(big, builder.fmul(m, _fconst(fmt, 0.5)), m)
+    e = builder.add(e, builder.zext(big, fmt.intty))
+    # log(m) = 2 * atanh(s), with s = (m - 1) / (m + 1) and |s| < 0.172.
+    # f and d_lo are computed exactly.
+    one = _fconst(fmt, 1.0)
+    two = _fconst(fmt, 2.0)
+    f = builder.fsub(m, one)
+    d = builder.fadd(m, one)
+    d_lo = builder.fsub(m, builder.fsub(d, one))
+    s = builder.fdiv(f, d)
+    # s_lo = (f - s * (d + d_lo)) / d
+    p, p_lo = _two_prod(builder, fmt, s, d)
+    s_lo = builder.fsub(builder.fsub(f, p), p_lo)
+    s_lo = builder.fsub(s_lo, builder.fmul(s, d_lo))
+    s_lo = builder.fdiv(s_lo, d)
+    # The cubic term is also computed in double-double precision, so
+    # that the result is accurate enough for pow().
+    two_thirds_hi = _fconst(fmt, fmt.two_thirds[0])
+    two_thirds_lo = _fconst(fmt, fmt.two_thirds[1])
+    z, z_lo = _two_prod(builder, fmt, s, s)
+    c, c_lo = _two_prod(builder, fmt, s, z)
+    c_lo = builder.fadd(c_lo, builder.fmul(s, z_lo))
+    t, t_lo = _two_prod(builder, fmt, c, two_thirds_hi)
+    t_lo = builder.fadd(t_lo, builder.fadd(builder.fmul(c_lo, two_thirds_hi),
+                                           builder.fmul(c, two_thirds_lo)))
+    rest = builder.fmul(builder.fmul(c, z),
+                        _polyval(builder, fmt, fmt.log_coeffs, z))
+    # log(m) = 2 * (s + s_lo) + 2/3 * (s + s_lo)**3 + rest
+    hi, lo = _two_sum(builder, builder.fmul(s, two), t)
+    s_lo = builder.fmul(s_lo, two)
+    lo = builder.fadd(lo, builder.fadd(s_lo, builder.fmul(z, s_lo)))
+    lo = builder.fadd(lo, builder.fadd(t_lo, rest))
+    # Add e * ln(2)
+    ef = builder.sitofp(e, fmt.fltty)
+    hi, lo2 = _two_sum(builder,
+                       builder.fmul(ef, _fconst(fmt, fmt.ln2_hi)), hi)
+    lo = builder.fadd(lo2, builder.fadd(
+        lo, builder.fmul(ef, _fconst(fmt, fmt.ln2_lo))))
+    res = builder.fadd(hi, lo)
+    return res, builder.fsub(lo, builder.fsub(res, hi))
+
+
+def log(builder, x):
+    fmt = _format(x)
+    hi, lo = _log_dd(builder, x)
+    res = builder.fadd(hi, lo)
+    # Special cases: log(+inf) = +inf, log(NaN) = NaN, log(+-0) = -inf,
+    # log(x < 0) = NaN
+    res = _fselect(builder, fmt, '<', x, float('inf'), res, x)
+    res = _fselect(builder, fmt, '==', x, 0.0,
+                   _fconst(fmt, float('-inf')), res)
+    res = _fselect(builder, fmt, '<', x, 0.0,
+                   _fconst(fmt, float('nan')), res)
+    return res
+
+
+def _two_over_pi_chunks(nchunks, pad):
+    """
+    Return the binary expansion of 2 / pi as *nchunks* integers of 24
+    bits each, preceded by *pad* zero chunks.
+    """
+    nbits = 24 * (nchunks - pad)
+    # pi * 2**prec with Machin's formula, in fixed-point arithmetic
+    prec = nbits + 64
+
+    def arctan_inv(k):
+        total = term = (1 << prec) // k
+        n = 1
+        while term:
+            term //= k * k
+            n += 2
+            total += term // n if n % 4 == 1 else -(term // n)
+        return total
+
+    pi = 16 * arctan_inv(5) - 4 * arctan_inv(239)
+    bits = (1 << (nbits + 1 + prec)) // pi
+    chunks = [(bits >> (24 * (nchunks - pad - 1 - i))) & 0xffffff
+              for i in range(nchunks - pad)]
+    return [0] * pad + chunks
+
+
+# The Payne-Hanek reduction multiplies the mantissa of its argument by
+# _PH_CHUNKS chunks of 2 / pi, starting at a chunk selected from the
+# exponent.  Chunk m holds the bits of weights 2**-(24 * (m - _PH_PAD) + 1)
+# to 2**-(24 * (m - _PH_PAD) + 24).  Smaller arguments than 2**_PH_MIN_EXP
+# don't need reducing.
+_PH_CHUNKS = 8
+_PH_PAD = 4
+_PH_MIN_EXP = -28
+_PH_MAX_EXP = 1023
+_PH_TABLE_SIZE = (_PH_MAX_EXP - 54) // 24 + _PH_PAD + 1
+_two_over_pi = _two_over_pi_chunks(_PH_TABLE_SIZE + _PH_CHUNKS - 1, _PH_PAD)
+
+
+def _two_over_pi_table(builder):
+    """
+    Return a pointer to the table of chunks of 2 / pi: row k holds
+    chunks k, k + 1, etc. scaled by 2**(-24 * k).
+    """
+    module = cgutils.get_module(builder)
+    name = ".const.vecmath.two_over_pi"
+    table = module.globals.get(name)
+    if table is None:
+        rowty = ir.ArrayType(double, _PH_TABLE_SIZE)
+        rows = [ir.Constant(rowty, [float(c) * 2.0 ** (-24 * k) for c in
+                                    _two_over_pi[k:k + _PH_TABLE_SIZE]])
+                for k in range(_PH_CHUNKS)]
+        table = cgutils.global_constant(
+            module, name, ir.Constant(ir.ArrayType(rowty, _PH_CHUNKS), rows))
+    return table
+
+
+def _rem_pio2(builder, x):
+    """
+    Payne-Hanek reduction of double *x* (with 2**_PH_MIN_EXP <= |x|
+    < inf; the results are unspecified otherwise): return (n, r, r_lo)
+    such that x = n * pi / 2 + (r + r_lo), with |r| <= pi / 4.  *n* is
+    an i64 whose two lowest bits are those of the quadrant (the others
+    are unspecified).
+
+    All operations are exact, except for the sum of the terms smaller
+    than 2**-42, so that the absolute error of r + r_lo is about 2**-96,
+    which only matters when x is within 2**-40 of a multiple of pi / 2.
+    """
+    fmt = _F64
+    i32 = ir.IntType(32)
+    table = _two_over_pi_table(builder)
+    bits = builder.and_(_as_int(builder, fmt, x),
+                        _iconst(fmt, (1 << 63) - 1))
+    # The exponent arithmetic is done on 32-bit integers, which are
+    # cheaper in vectorized loops
+    e = builder.sub(builder.trunc(builder.lshr(bits, _iconst(fmt, 52)), i32),
+                    ir.Constant(i32, fmt.bias))
+    for op, bound in [('<', _PH_MIN_EXP), ('>', _PH_MAX_EXP)]:
+        e = builder.select(builder.icmp_signed(op, e, ir.Constant(i32, bound)),
+                           ir.Constant(i32, bound), e)
+    # |x| = (m_hi + m_lo) * 2**(e - 52), where m_hi is a multiple of 2**26
+    # below 2**53 and m_lo < 2**26, so that their products with 24-bit
+    # chunks are exact.
+    mant = builder.or_(builder.and_(bits, _iconst(fmt, (1 << 52) - 1)),
+                       _iconst(fmt, (fmt.bias + 52) << 52))
+    m_hi = _as_float(builder, fmt,
+                     builder.and_(mant, _iconst(fmt, ~((1 << 26) - 1))))
+    m = _as_float(builder, fmt, mant)
+    m_lo = builder.fsub(m, m_hi)
+    # The product of |x| with the bits of 2 / pi before chunk m0 is a
+    # multiple of 4, so it doesn't change the quadrant.  Chunk k after
+    # m0 is weighted by 2**(f - 24 * k), with -22 <= f <= 1.
+    m0 = builder.udiv(builder.add(e, ir.Constant(i32, 24 * _PH_PAD - 54)),
+                      ir.Constant(i32, 24))
+    f = builder.sub(builder.add(e, ir.Constant(i32, 24 * _PH_PAD - 76)),
+                    builder.mul(m0, ir.Constant(i32, 24)))
+    scale = _pow2(builder, fmt, builder.sext(f, fmt.intty))
+    m_hi = builder.fmul(m_hi, scale)
+    m_lo = builder.fmul(m_lo, scale)
+    m = builder.fmul(m, scale)
+    chunks = [builder.load(builder.gep(table, [ir.Constant(i32, 0),
+                                              ir.Constant(i32, k), m0]))
+              for k in range(_PH_CHUNKS)]
+    # The exact products of the halves of the mantissa with the chunks,
+    # of magnitudes below 2**(78 - 24 * k), resp. 2**(51 - 24 * k).
+    # The product with chunk 0 of the high half is a multiple of 16.
+    a = [None] + [builder.fmul(m_hi, c) for c in chunks[1:6]]
+    b = [builder.fmul(m_lo, c) for c in chunks[:6]]
+
+    def mod4(t):
+        # Subtract the nearest multiple of 4 from |t| < 2**54 (adding
+        # then subtracting 1.5 * 2**54 rounds to a multiple of 4).  This
+        # is exact, since the result (in [-2, 2]) is a multiple of ulp(t).
+        magic = _fconst(fmt, 1.5 * 2.0 ** 54)
+        return builder.fsub(t, builder.fsub(builder.fadd(t, magic), magic))
+
+    def split(t):
+        # Split |t| < 2**5 into a multiple of 2**-46 and a remainder
+        magic = _fconst(fmt, 1.5 * 2.0 ** 6)
+        t_hi = builder.fsub(builder.fadd(t, magic), magic)
+        return t_hi, builder.fsub(t, t_hi)
+
+    # The largest terms are multiples of 2**-46, and so is their sum
+    # modulo 4 (below 2**5 in magnitude), which is computed exactly.
+    hi = builder.fadd(builder.fadd(mod4(b[0]), mod4(a[1])),
+                      builder.fadd(mod4(b[1]), mod4(a[2])))
+    lo = []
+    for t in [mod4(a[3]), b[2], a[4], b[3], a[5]]:
+        t_hi, t_lo = split(t)
+        hi = builder.fadd(hi, t_hi)
+        lo.append(t_lo)
+    # The remaining terms are below 2**-44
+    lo += [b[4], b[5]] + [builder.fmul(m, c) for c in chunks[6:]]
+    lo_sum = lo.pop()
+    for t in reversed(lo):
+        lo_sum = builder.fadd(lo_sum, t)
+    # |x| * 2 / pi = n + y (mod 4), with y = (hi - n) + lo_sum and
+    # |y| <= 1/2; the low bits of the rounded sum are those of n
+    magic = builder.fadd(hi, _fconst(fmt, fmt.rint_magic))
+    y_hi = builder.fsub(hi, builder.fsub(magic, _fconst(fmt, fmt.rint_magic)))
+    # y * pi / 2, where the product of y_hi (which has at most 46
+    # significant bits) with the 7 leading bits of pi / 2 is exact
+    pio2_1, pio2_2 = fmt.pio2[:2]
+    pio2_hi = 1.5625
+    r_hi = builder.fmul(y_hi, _fconst(fmt, pio2_hi))
+    r_lo = builder.fadd(builder.fmul(y_hi, _fconst(fmt, pio2_1 - pio2_hi)),
+                        builder.fmul(y_hi, _fconst(fmt, pio2_2)))
+    r_lo = builder.fadd(r_lo, builder.fmul(lo_sum, _fconst(fmt, pio2_1)))
+    r, r_lo = _two_sum(builder, r_hi, r_lo)
+    n = _as_int(builder, fmt, magic)
+    # sin() and cos() of -x are computed from the reduction of x
+    neg = builder.icmp_signed('<', _as_int(builder, fmt, x), _iconst(fmt, 0))
+    return (builder.select(neg, builder.neg(n), n),
+            builder.select(neg, builder.fsub(_fconst(fmt, -0.0), r), r),
+            builder.select(neg, builder.fsub(_fconst(fmt, -0.0), r_lo), r_lo))
+
+
+def _sincos(builder, x, quadrant_offset):
+    """
+    Compute sin(x + quadrant_offset * pi / 2).
+    """
+    fmt = _format(x)
+    ax = _fabs(builder, fmt, x)
+    if fmt is _F64:
+        # Reduce x = n * pi / 2 + (r + r_lo), with |r| <= pi / 4, with
+        # the Payne-Hanek reduction (tiny arguments don't need reducing)
+        n, r, r_lo = _rem_pio2(builder, x)
+        tiny = builder.fcmp_ordered('<', ax, _fconst(fmt, 2.0 ** _PH_MIN_EXP))
+        n = builder.select(tiny, _iconst(fmt, 0), n)
+        r = builder.select(tiny, x, r)
+        r_lo = builder.select(tiny, _fconst(fmt, 0.0), r_lo)
+    else:
+        # Reduce x = n * pi / 2 + (r + r_lo), with |r| <= pi / 4.  The
+        # products of n with the first two parts of pi / 2 are computed
+        # exactly, and the reduced argument is kept as a float-float, so
+        # that it stays accurate for large n.  Larger arguments than
+        # fmt.sincos_max are reduced in double precision with the
+        # Payne-Hanek reduction instead.
+        nf = _rint(builder, fmt,
+                   builder.fmul(x, _fconst(fmt, fmt.two_over_pi)))
+        nf = _fselect(builder, fmt, '<', ax, fmt.sincos_max, nf,
+                      _fconst(fmt, 0.0))
+        neg_nf = builder.fsub(_fconst(fmt, -0.0), nf)
+        pio2_1, pio2_2, pio2_3 = fmt.pio2
+        p1, e1 = _two_prod(builder, fmt, neg_nf, _fconst(fmt, pio2_1))
+        p2, e2 = _two_prod(builder, fmt, neg_nf, _fconst(fmt, pio2_2))
+        # x + p1 is exact as they are within a factor of two of each other
+        hi, t1 = _two_sum(builder, builder.fadd(x, p1), e1)
+        hi, t2 = _two_sum(builder, hi, p2)
+        lo = builder.fadd(builder.fadd(t1, t2), builder.fadd(
+            e2, builder.fmul(neg_nf, _fconst(fmt, pio2_3))))
+        r = builder.fadd(hi, lo)
+        r_lo = builder.fsub(lo, builder.fsub(r, hi))
+        n = _to_int(builder, fmt, nf)
+        big_n, rd, rd_lo = _rem_pio2(builder, builder.fpext(x, double))
+        big_r = builder.fptrunc(rd, fmt.fltty)
+        big_r_lo = builder.fptrunc(
+            builder.fadd(builder.fsub(rd, builder.fpext(big_r, double)),
+                         rd_lo), fmt.fltty)
+        big = builder.fcmp_ordered('>=', ax, _fconst(fmt, fmt.sincos_max))
+        n = builder.select(big, builder.trunc(big_n, fmt.intty), n)
+        r = builder.select(big, big_r, r)
+        r_lo = builder.select(big, big_r_lo, r_lo)
+    # sin(r + r_lo) ~= sin(r) + r_lo, cos(r + r_lo) ~= cos(r) - r * r_lo
+    z = builder.fmul(r, r)
+    sin_r = builder.fmul(builder.fmul(r, z),
+                         _polyval(builder, fmt, fmt.sin_coeffs, z))
+    sin_r = builder.fadd(r, builder.fadd(sin_r, r_lo))
+    one = _fconst(fmt, 1.0)
+    hz = builder.fmul(z, _fconst(fmt, 0.5))
+    w = builder.fsub(one, hz)
+    cos_r = builder.fmul(builder.fmul(z, z),
+                         _polyval(builder, fmt, fmt.cos_coeffs, z))
+    cos_r = builder.fsub(cos_r, builder.fmul(r, r_lo))
+    cos_r = builder.fadd(builder.fsub(builder.fsub(one, w), hz), cos_r)
+    cos_r = builder.fadd(w, cos_r)
+    # Select the result from the quadrant
+    q = builder.add(n, _iconst(fmt, quadrant_offset))
+    odd = builder.trunc(builder.and_(q, _iconst(fmt, 1)), ir.IntType(1))
+    res = builder.select(odd, cos_r, sin_r)
+    negate = builder.shl(builder.and_(q, _iconst(fmt, 2)),
+                         _iconst(fmt, fmt.bits - 2))
+    res = _as_float(builder, fmt,
+                    builder.xor(_as_int(builder, fmt, res), negate))
+    # sin(+-inf) and cos(+-inf) are NaN, and so are sin(nan), cos(nan)
+    return _fselect(builder, fmt, '<', ax, float('inf'), res,
+                    _fconst(fmt, float('nan')))
+
+
+def sin(builder, x):
+    fmt = _format(x)
+    res = _sincos(builder, x, 0)
+    # sin(x) rounds to x for tiny x; this also preserves the sign of zeros
+    return _fselect(builder, fmt, '<', _fabs(builder, fmt, x), fmt.sin_tiny,
+                    x, res)
+
+
+def cos(builder, x):
+    return _sincos(builder, x, 1)
+
+
+def tanh(builder, x):
+    fmt = _format(x)
+    # tanh(|x|) = em / (em + 2), with em = expm1(2 * |x|)
+    y = builder.fmul(_fabs(builder, fmt, x), _fconst(fmt, 2.0))
+    y = _fselect(builder, fmt, '>', y, fmt.tanh_max,
+                 _fconst(fmt, fmt.tanh_max), y)
+    nf = _rint(builder, fmt, builder.fmul(y, _fconst(fmt, fmt.log2e)))
+    r = builder.fsub(y, builder.fmul(nf, _fconst(fmt, fmt.ln2_hi)))
+    r = builder.fsub(r, builder.fmul(nf, _fconst(fmt, fmt.ln2_lo)))
+    em_r = builder.fmul(builder.fmul(r, r),
+                        _polyval(builder, fmt, fmt.expm1_coeffs, r))
+    em_r = builder.fadd(r, em_r)
+    # expm1(y) = (2**n - 1) + 2**n * expm1(r)
+    scale = _pow2(builder, fmt, _to_int(builder, fmt, nf))
+    em = builder.fadd(builder.fsub(scale, _fconst(fmt, 1.0)),
+                      builder.fmul(scale, em_r))
+    res = builder.fdiv(em, builder.fadd(em, _fconst(fmt, 2.0)))
+    return _copysign(builder, fmt, res, x)
+
+
+def _is_integer(builder, fmt, ax):
+    """
+    Return whether non-negative *ax* is an integer (infinities
+    included).
+    """
+    rounded = _fselect(builder, fmt, '<', ax, fmt.int_min,
+                       _rint(builder, fmt, ax), ax)
+    return builder.fcmp_ordered('==', rounded, ax)
+
+
+def pow(builder, x, y):
+    fmt = _format(x)
+    ay = _fabs(builder, fmt, y)
+    y_is_int = _is_integer(builder, fmt, ay)
+    half_ay = builder.fmul(ay, _fconst(fmt, 0.5))
+    y_is_odd = builder.and_(y_is_int,
+                            builder.not_(_is_integer(builder, fmt, half_ay)))
+    # |x| ** y = exp(y * log|x|), with the logarithm and the product
+    # computed in double-double precision
+    ax = _fabs(builder, fmt, x)
+    log_hi, log_lo = _log_dd(builder, ax)
+    log_hi = _fselect(builder, fmt, '<', ax, float('inf'), log_hi, ax)
+    log_hi = _fselect(builder, fmt, '==', ax, 0.0,
+                      _fconst(fmt, float('-inf')), log_hi)
+    p_hi, p_lo = _two_prod(builder, fmt, y, log_hi)
+    p_lo = builder.fadd(p_lo, builder.fmul(y, log_lo))
+    res = exp(builder, p_hi, p_lo)
+    one = _fconst(fmt, 1.0)
+    # |x| == 1: avoid the NaNs the above computation gives for huge y
+    res = _fselect(builder, fmt, '==', ax, 1.0, one, res)
+    # Negative x: the result is negative for odd integral y, NaN for
+    # finite non-integral y
+    negate = builder.and_(builder.icmp_signed('<', _as_int(builder, fmt, x),
+                                              _iconst(fmt, 0)),
+                          y_is_odd)
+    res = builder.select(negate, builder.fsub(_fconst(fmt, -0.0), res), res)
+    finite_neg_x = builder.and_(
+        builder.fcmp_ordered('<', x, _fconst(fmt, 0.0)),
+        builder.fcmp_ordered('>', x, _fconst(fmt, float('-inf'))))
+    res = builder.select(builder.and_(finite_neg_x, builder.not_(y_is_int)),
+                         _fconst(fmt, float('nan')), res)
+    # pow(1, y) = 1 and pow(x, 0) = 1, even for NaNs
+    res = _fselect(builder, fmt, '==', x, 1.0, one, res)
+    return _fselect(builder, fmt, '==', y, 0.0, one, res)
+
+
+def erf(builder, x):
+    fmt = _format(x)
+    ax = _fabs(builder, fmt, x)
+    one = _fconst(fmt, 1.0)
+    two = _fconst(fmt, 2.0)
+    # Small |x|: erf(x) = x * P(x**2)
+    u = builder.fsub(builder.fmul(builder.fmul(ax, ax), two), one)
+    small = builder.fmul(ax, _polyval(builder, fmt, fmt.erf_small_coeffs, u))
+    # Otherwise erf(x) = 1 - exp(-x**2) * G(x)
+    u = builder.fsub(builder.fmul(ax, two), _fconst(fmt, 3.0))
+    g_medium = _polyval(builder, fmt, fmt.erfc_medium_coeffs, u)
+    scale, offset = fmt.erfc_large_u
+    u = builder.fsub(builder.fmul(ax, _fconst(fmt, scale)),
+                     _fconst(fmt, offset))
+    g_large = _polyval(builder, fmt, fmt.erfc_large_coeffs, u)
+    g = _fselect(builder, fmt, '<', ax, 2.0, g_medium, g_large)
+    e = exp(builder, builder.fsub(_fconst(fmt, -0.0), builder.fmul(ax, ax)))
+    large = builder.fsub(one, builder.fmul(e, g))
+    # erf(x) rounds to 1 for large x; NaNs fall through to *large*
+    res = _fselect(builder, fmt, '>=', ax, fmt.erf_one, one, large)
+    res = _fselect(builder, fmt, '<', ax, 1.0, small, res)
+    return _copysign(builder, fmt, res, x)
+
+
+def _sqrt(builder, fmt, x):
+    fn = lc.Function.intrinsic(cgutils.get_module(builder), lc.INTR_SQRT,
+                               [fmt.fltty])
+    return builder.call(fn, [x])
+
+
+def hypot(builder, x, y):
+    fmt = _format(x)
+    ax = _fabs(builder, fmt, x)
+    ay = _fabs(builder, fmt, y)
+    # hypot(x, y) = big * sqrt(1 + (small / big)**2), which doesn't
+    # overflow unless the result does.  NaNs end up in *ratio*.
+    x_is_big = builder.fcmp_ordered('>=', ax, ay)
+    big = builder.select(x_is_big, ax, ay)
+    small = builder.select(x_is_big, ay, ax)
+    ratio = builder.fdiv(small, big)
+    one = _fconst(fmt, 1.0)
+    res = builder.fmul(big, _sqrt(builder, fmt,
+                                  builder.fadd(one, builder.fmul(ratio, ratio))))
+    # hypot(x, 0) = |x| (including zeros), hypot(+-inf, y) = +inf even
+    # for a NaN y
+    res = _fselect(builder, fmt, '==', small, 0.0, big, res)
+    inf = _fconst(fmt, float('inf'))
+    res = _fselect(builder, fmt, '==', ax, float('inf'), inf, res)
+    return _fselect(builder, fmt, '==', ay, float('inf'), inf, res)
+
+
+def log_hypot(builder, x, y):
+    """
+    Compute log(hypot(x, y)), the real part of the complex logarithm.
+    x**2 + y**2 is computed exactly as a double-double (resp.
+    float-float), so that the result is accurate even when
+    hypot(x, y) is close to 1.
+    """
+    fmt = _format(x)
+    ax = _fabs(builder, fmt, x)
+    ay = _fabs(builder, fmt, y)
+    big = builder.select(builder.fcmp_ordered('>=', ax, ay), ax, ay)
+    # Scale by a power of two so that the squares neither overflow nor
+    # underflow: log(hypot(x, y)) = log(hypot(x * 2**k, y * 2**k)) - k * ln(2)
+    k = fmt.hypot_scale_bits
+    zero = _fconst(fmt, 0.0)
+    is_big = builder.fcmp_ordered('>', big, _fconst(fmt, fmt.hypot_big))
+    is_tiny = builder.fcmp_ordered('<', big, _fconst(fmt, 1.0 / fmt.hypot_big))
+    scale = builder.select(is_big, _fconst(fmt, 2.0 ** -k),
+                           builder.select(is_tiny, _fconst(fmt, 2.0 ** k),
+                                          _fconst(fmt, 1.0)))
+    kf = builder.select(is_big, _fconst(fmt, k),
+                        builder.select(is_tiny, _fconst(fmt, -k), zero))
+    ax = builder.fmul(ax, scale)
+    ay = builder.fmul(ay, scale)
+    xx, xx_lo = _two_prod(builder, fmt, ax, ax)
+    yy, yy_lo = _two_prod(builder, fmt, ay, ay)
+    hi, lo = _two_sum(builder, xx, yy)
+    lo = builder.fadd(lo, builder.fadd(xx_lo, yy_lo))
+    s = builder.fadd(hi, lo)
+    s_lo = builder.fsub(lo, builder.fsub(s, hi))
+    # log(s + s_lo) ~= log(s) + s_lo / s
+    log_hi, log_lo = _log_dd(builder, s)
+    log_lo = builder.fadd(log_lo, builder.fdiv(s_lo, s))
+    half = _fconst(fmt, 0.5)
+    res = builder.fadd(
+        builder.fmul(kf, _fconst(fmt, fmt.ln2_hi)),
+        builder.fmul(log_hi, half))
+    res = builder.fadd(res, builder.fadd(
+        builder.fmul(kf, _fconst(fmt, fmt.ln2_lo)),
+        builder.fmul(log_lo, half)))
+    # Special cases: log(hypot(+-0, +-0)) = -inf; infinities win over NaNs
+    res = _fselect(builder, fmt, '==', big, 0.0,
+                   _fconst(fmt, float('-inf')), res)
+    is_nan = builder.fcmp_unordered('uno', x, y)
+    res = builder.select(is_nan, builder.fadd(x, y), res)
+    inf = _fconst(fmt, float('inf'))
+    res = _fselect(builder, fmt, '==', ax, float('inf'), inf, res)
+    return _fselect(builder, fmt, '==', ay, float('inf'), inf, res)
+
+
+def _atan_positive(builder, fmt, x):
+    """
+    Compute atan(x) for non-negative *x* (infinities included).
+    """
+    pio2_hi, pio2_lo = fmt.pio2[:2]
+    # Reduce atan(x) = pi / 2 + atan(-1 / x) for x > tan(3 * pi / 8),
+    # atan(x) = pi / 4 + atan((x - 1) / (x + 1)) for x > atan_mid
+    one = _fconst(fmt, 1.0)
+    big = builder.fcmp_ordered('>', x, _fconst(fmt, 2.414213562373095))
+    mid = builder.fcmp_ordered('>', x, _fconst(fmt, fmt.atan_mid))
+    r = builder.select(mid, builder.fdiv(builder.fsub(x, one),
+                                         builder.fadd(x, one)), x)
+    r = builder.select(big, builder.fdiv(_fconst(fmt, -1.0), x), r)
+    base = builder.select(mid, _fconst(fmt, pio2_hi * 0.5), _fconst(fmt, 0.0))
+    base = builder.select(big, _fconst(fmt, pio2_hi), base)
+    base_lo = builder.select(mid, _fconst(fmt, pio2_lo * 0.5),
+                             _fconst(fmt, 0.0))
+    base_lo = builder.select(big, _fconst(fmt, pio2_lo), base_lo)
+    z = builder.fmul(r, r)
+    p = _polyval(builder, fmt, fmt.atan_num_coeffs, z)
+    if fmt.atan_den_coeffs is not None:
+        p = builder.fdiv(p, _polyval(builder, fmt, fmt.atan_den_coeffs, z))
+    res = builder.fadd(r, builder.fmul(builder.fmul(r, z), p))
+    return builder.fadd(base, builder.fadd(res, base_lo))
+
+
+def atan2(builder, y, x):
+    fmt = _format(x)
+    ax = _fabs(builder, fmt, x)
+    ay = _fabs(builder, fmt, y)
+    res = _atan_positive(builder, fmt, builder.fdiv(ay, ax))
+    # atan2(+-inf, +-inf) is an odd multiple of pi / 4
+    both_inf = builder.and_(
+        builder.fcmp_ordered('==', ax, _fconst(fmt, float('inf'))),
+        builder.fcmp_ordered('==', ay, _fconst(fmt, float('inf'))))
+    res = builder.select(both_inf, _fconst(fmt, fmt.pio2[0] * 0.5), res)
+    # atan2(+-0, x) is 0 for positive x and pi for negative x
+    # (the sign of x is taken into account below)
+    res = _fselect(builder, fmt, '==', ay, 0.0, _fconst(fmt, 0.0), res)
+    # Negative x (including -0): atan2(y, x) = pi - atan2(y, -x)
+    pi_hi, pi_lo = [_fconst(fmt, 2.0 * v) for v in fmt.pio2[:2]]
+    x_is_neg = builder.icmp_signed('<', _as_int(builder, fmt, x),
+                                   _iconst(fmt, 0))
+    res = builder.select(x_is_neg,
+                         builder.fadd(builder.fsub(pi_hi, res), pi_lo), res)
+    res = _copysign(builder, fmt, res, y)
+    # NaNs propagate
+    is_nan = builder.fcmp_unordered('uno', x, y)
+    return builder.select(is_nan, builder.fadd(x, y), res)
+
+
+kernels = {
+    math.exp: exp,
+    math.log: log,
+    math.sin: sin,
+    math.cos: cos,
+    math.tanh: tanh,
+    math.pow: pow,
+    math.erf: erf,
+    math.atan2: atan2,
+    math.hypot: hypot,
+    }
+
+
+def emit(builder, fn, args):
+    """
+    Emit the branch-free implementation of math function *fn* for
+    float32 or float64 *args*.
+    """
+    return kernels[fn](builder, *args)
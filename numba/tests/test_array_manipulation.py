@@ -2,7 +2,7 @@ from __future__ import print_function
 import numpy as np
 
 from numba.compiler import compile_isolated, Flags
-from numba import types, from_dtype, utils
+from numba import types, from_dtype, typeof, utils
 import numba.unittest_support as unittest
 from numba.tests import usecases
 from numba.tests.support import TestCase
@@ -25,6 +25,45 @@ def ravel_array(a, expected):
 def transpose_array(a, expected):
     return (a.transpose() == expected).all()
 
+def reshape_array_to(a, shape):
+    return a.reshape(shape)
+
+def reshape_array_varargs(a):
+    return a.reshape(3, -1)
+
+def np_reshape_array(a, shape):
+    return np.reshape(a, shape)
+
+def flatten_array_to(a):
+    return a.flatten()
+
+def ravel_array_to(a):
+    return a.ravel()
+
+def np_ravel_array(a):
+    return np.ravel(a)
+
+def transpose_array_to(a):
+    return a.transpose()
+
+def transpose_attr(a):
+    return a.T
+
+def np_transpose_array(a):
+    return np.transpose(a)
+
+def np_ascontiguousarray(a):
+    return np.ascontiguousarray(a)
+
+def transpose_sum(a):
+    # Index through the transposed view
+    t = a.T
+    s = 0
+    for i in range(t.shape[0]):
+        for j in range(t.shape[1]):
+            s += (i + 1) * t[i, j]
+    return s
+
 def squeeze_array(a, expected):
     return (a.squeeze() == expected).all()
 
@@ -62,9 +101,52 @@ class TestArrayManipulation(TestCase):
         expected = np.arange(9).reshape(3, 3)
         self.assertTrue(cfunc(a, expected))
 
+    def check_view(self, got, expected, base):
+        self.assertEqual(got.shape, expected.shape)
+        self.assertEqual(got.strides, expected.strides)
+        self.assertTrue(np.all(got == expected))
+        # Writing through the view should be visible in the base array
+        got.flat[0] = 42
+        self.assertEqual(base.flat[0], 42)
+
+    def check_copy(self, got, expected, base):
+        self.assertEqual(got.shape, expected.shape)
+        self.assertTrue(got.flags.c_contiguous)
+        self.assertTrue(np.all(got == expected))
+        got.flat[0] = 42
+        self.assertNotEqual(base.flat[0], 42)
+
     def test_reshape_array_npm(self):
-        with self.assertTypingError():
-            self.test_reshape_array(flags=no_pyobj_flags)
+        a = np.arange(12)
+        aty = typeof(a)
+        for pyfunc in (reshape_array_to, np_reshape_array):
+            for shape in [(3, 4), (2, 3, 2), 12, (-1, 6), (4, -1)]:
+                cr = compile_isolated(pyfunc, (aty, typeof(shape)),
+                                      flags=no_pyobj_flags)
+                self.assertEqual(cr.signature.return_type.layout, 'C')
+                base = a.copy()
+                self.check_view(cr.entry_point(base, shape),
+                                pyfunc(a, shape), base)
+
+        cr = compile_isolated(reshape_array_varargs, (aty,),
+                              flags=no_pyobj_flags)
+        base = a.copy()
+        self.check_view(cr.entry_point(base), reshape_array_varargs(a), base)
+
+        # Non-contiguous array => copy
+        b = np.arange(24).reshape((4, 6))[:, ::2]
+        cr = compile_isolated(reshape_array_to, (typeof(b), typeof((3, 4))),
+                              flags=no_pyobj_flags)
+        self.check_copy(cr.entry_point(b, (3, 4)), b.reshape((3, 4)), b)
+
+    def test_reshape_array_errors(self):
+        a = np.arange(12)
+        cr = compile_isolated(reshape_array_to, (typeof(a), typeof((5, 2))),
+                              flags=no_pyobj_flags)
+        cfunc = cr.entry_point
+        for shape in [(5, 2), (-1, 5), (-1, -1)]:
+            with self.assertRaises(ValueError):
+                cfunc(a, shape)
 
     def test_flatten_array(self, flags=enable_pyobj_flags):
         pyfunc = flatten_array
@@ -79,8 +161,11 @@ class TestArrayManipulation(TestCase):
         self.assertTrue(cfunc(a, expected))
 
     def test_flatten_array_npm(self):
-        with self.assertTypingError():
-            self.test_flatten_array(flags=no_pyobj_flags)
+        for a in (np.arange(12).reshape((3, 4)),
+                  np.arange(12).reshape((3, 4)).T):
+            cr = compile_isolated(flatten_array_to, (typeof(a),),
+                                  flags=no_pyobj_flags)
+            self.check_copy(cr.entry_point(a), a.flatten(), a)
 
     def test_ravel_array(self, flags=enable_pyobj_flags):
         pyfunc = ravel_array
@@ -95,8 +180,16 @@ class TestArrayManipulation(TestCase):
         self.assertTrue(cfunc(a, expected))
 
     def test_ravel_array_npm(self):
-        with self.assertTypingError():
-            self.test_ravel_array(flags=no_pyobj_flags)
+        for pyfunc in (ravel_array_to, np_ravel_array):
+            a = np.arange(12).reshape((3, 4))
+            cr = compile_isolated(pyfunc, (typeof(a),),
+                                  flags=no_pyobj_flags)
+            self.check_view(cr.entry_point(a), pyfunc(a.copy()), a)
+            # Non-contiguous array => copy
+            a = np.arange(12).reshape((3, 4)).T
+            cr = compile_isolated(pyfunc, (typeof(a),),
+                                  flags=no_pyobj_flags)
+            self.check_copy(cr.entry_point(a), pyfunc(a), a)
 
     def test_transpose_array(self, flags=enable_pyobj_flags):
         pyfunc = transpose_array
@@ -111,8 +204,32 @@ class TestArrayManipulation(TestCase):
         self.assertTrue(cfunc(a, expected))
 
     def test_transpose_array_npm(self):
-        with self.assertTypingError():
-            self.test_transpose_array(flags=no_pyobj_flags)
+        for pyfunc in (transpose_array_to, transpose_attr, np_transpose_array):
+            for a in (np.arange(12).reshape((3, 4)),
+                      np.asfortranarray(np.arange(24).reshape((2, 3, 4))),
+                      np.arange(24).reshape((4, 6))[::2, 1:],
+                      np.arange(5)):
+                cr = compile_isolated(pyfunc, (typeof(a),),
+                                      flags=no_pyobj_flags)
+                expected = pyfunc(a)
+                self.assertEqual(cr.signature.return_type, typeof(expected))
+                self.check_view(cr.entry_point(a), expected, a)
+
+    def test_transpose_indexing(self):
+        a = np.arange(12).reshape((3, 4))
+        cr = compile_isolated(transpose_sum, (typeof(a),),
+                              flags=no_pyobj_flags)
+        self.assertEqual(cr.entry_point(a), transpose_sum(a))
+
+    def test_ascontiguousarray(self):
+        pyfunc = np_ascontiguousarray
+        a = np.arange(12).reshape((3, 4))
+        cr = compile_isolated(pyfunc, (typeof(a),), flags=no_pyobj_flags)
+        self.assertIs(cr.entry_point(a), a)
+        a = np.arange(12).reshape((3, 4)).T
+        cr = compile_isolated(pyfunc, (typeof(a),), flags=no_pyobj_flags)
+        self.assertEqual(cr.signature.return_type.layout, 'C')
+        self.check_copy(cr.entry_point(a), pyfunc(a), a)
 
     def test_squeeze_array(self, flags=enable_pyobj_flags):
         pyfunc = squeeze_array
@@ -5,7 +5,7 @@ from itertools import product
 import numpy as np
 
 from numba import unittest_support as unittest
-from numba import typeof, types
+from numba import jit, typeof, types
 from numba.compiler import compile_isolated
 from .support import TestCase
 
@@ -97,6 +97,46 @@ def array_argmax_global(arr):
     return np.argmax(arr)
 
 
+def array_cumsum(arr):
+    return arr.cumsum()
+
+def array_cumsum_global(arr):
+    return np.cumsum(arr)
+
+def array_cumsum_axis(arr, axis):
+    return arr.cumsum(axis=axis)
+
+def array_cumsum_axis_global(arr, axis):
+    return np.cumsum(arr, axis)
+
+def array_cumprod(arr):
+    return arr.cumprod()
+
+def array_cumprod_axis_global(arr, axis):
+    return np.cumprod(arr, axis=axis)
+
+def np_diff(arr):
+    return np.diff(arr)
+
+def np_diff_n(arr, n):
+    return np.diff(arr, n)
+
+def np_diff_axis(arr, axis):
+    return np.diff(arr, axis=axis)
+
+def np_diff_n_axis(arr, n, axis):
+    return np.diff(arr, n, axis)
+
+def add_accumulate(arr):
+    return np.add.accumulate(arr)
+
+def multiply_accumulate_axis(arr, axis):
+    return np.multiply.accumulate(arr, axis)
+
+def maximum_accumulate(arr):
+    return np.maximum.accumulate(arr)
+
+
 def base_test_arrays(dtype):
     a1 = np.arange(10, dtype=dtype) + 1
     a2 = np.arange(10, dtype=dtype).reshape(2, 5) + 1
@@ -391,6 +431,87 @@ class TestArrayMethods(TestCase):
         self.check_aggregation_magnitude(array_std)
         self.check_aggregation_magnitude(array_std_global)
 
+    def check_array_result(self, got, expected):
+        self.assertEqual(got.shape, expected.shape)
+        self.assertEqual(got.dtype, expected.dtype)
+        self.assertTrue(got.flags.c_contiguous)
+        if expected.dtype.kind in 'fc':
+            np.testing.assert_allclose(got, expected, rtol=1e-6)
+        else:
+            self.assertTrue(np.all(got == expected), (got, expected))
+
+    def scan_test_arrays(self):
+        yield np.arange(10, dtype=np.int32)
+        yield np.array([True, False, True, True])
+        yield np.linspace(0.5, 1.5, 12).reshape((3, 4))
+        yield np.arange(24, dtype=np.int16).reshape((2, 3, 4)).T
+        yield np.arange(20, dtype=np.uint8).reshape((4, 5))[:, ::2]
+        yield np.zeros((0, 3))
+
+    def test_cumsum_cumprod(self):
+        for pyfunc in (array_cumsum, array_cumsum_global, array_cumprod):
+            cfunc = jit(nopython=True)(pyfunc)
+            for arr in self.scan_test_arrays():
+                self.check_array_result(cfunc(arr), pyfunc(arr))
+
+    def test_cumsum_cumprod_axis(self):
+        for pyfunc in (array_cumsum_axis, array_cumsum_axis_global,
+                       array_cumprod_axis_global):
+            cfunc = jit(nopython=True)(pyfunc)
+            for arr in self.scan_test_arrays():
+                for axis in range(-arr.ndim, arr.ndim):
+                    self.check_array_result(cfunc(arr, axis),
+                                            pyfunc(arr, axis))
+            with self.assertRaises(ValueError):
+                cfunc(np.arange(4), 1)
+
+    def test_cumsum_large(self):
+        cfunc = jit(nopython=True)(array_cumsum)
+        arr = self.random.randint(-1000, 1000, size=100000)
+        self.check_array_result(cfunc(arr), arr.cumsum())
+
+    def test_diff(self):
+        cfunc = jit(nopython=True)(np_diff)
+        for arr in (np.arange(10)[::-2] ** 2, np.linspace(0, 1, 5),
+                    np.arange(12, dtype=np.int8).reshape((3, 4)).T,
+                    np.zeros(0)):
+            self.check_array_result(cfunc(arr), np_diff(arr))
+
+        pyfunc = np_diff_n_axis
+        cfunc = jit(nopython=True)(pyfunc)
+        arr = (np.arange(24) ** 2).reshape((2, 3, 4))
+        for n in range(6):
+            for axis in range(-3, 3):
+                self.check_array_result(cfunc(arr, n, axis),
+                                        pyfunc(arr, n, axis))
+
+        for pyfunc, extra in [(np_diff_n, 2), (np_diff_axis, 0)]:
+            cfunc = jit(nopython=True)(pyfunc)
+            arr = np.arange(12.0).reshape((3, 4)) ** 2
+            self.check_array_result(cfunc(arr, extra), pyfunc(arr, extra))
+
+    def test_diff_errors(self):
+        cfunc = jit(nopython=True)(np_diff_n_axis)
+        arr = np.arange(5)
+        with self.assertRaises(ValueError):
+            cfunc(arr, -1, 0)
+        with self.assertRaises(ValueError):
+            cfunc(arr, 1, 1)
+
+    def test_ufunc_accumulate(self):
+        for pyfunc in (add_accumulate, maximum_accumulate):
+            cfunc = jit(nopython=True)(pyfunc)
+            for arr in (np.arange(10, dtype=np.int8) * 20,
+                        np.linspace(-1, 1, 12).reshape((3, 4)) ** 2,
+                        np.arange(12.0).reshape((4, 3))[::-1]):
+                self.check_array_result(cfunc(arr), pyfunc(arr))
+
+        pyfunc = multiply_accumulate_axis
+        cfunc = jit(nopython=True)(pyfunc)
+        arr = np.arange(1, 13, dtype=np.float32).reshape((3, 4))
+        for axis in (0, 1, -1):
+            self.check_array_result(cfunc(arr, axis), pyfunc(arr, axis))
+
 
 # These form a testing product where each of the combinations are tested
 reduction_funcs = [array_sum, array_sum_global,
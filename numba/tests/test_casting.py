@@ -17,6 +17,14 @@ def float_to_unsigned(x):
     return types.uint32(x)
 
 
+def int_to_unsigned(x):
+    return types.uint32(x)
+
+
+def unsigned_to_int(x):
+    return types.int64(x)
+
+
 def float_to_complex(x):
     return types.complex128(x)
 
@@ -50,6 +58,26 @@ class TestCasting(unittest.TestCase):
         self.assertEqual(cfunc(-3.21), struct.unpack('I', struct.pack('i',
                                                                       -3))[0])
 
+    def test_int_to_unsigned(self):
+        # Same-width casts reinterpret the bits
+        pyfunc = int_to_unsigned
+        cr = compile_isolated(pyfunc, [types.int32])
+        cfunc = cr.entry_point
+
+        self.assertEqual(cr.signature.return_type, types.uint32)
+        self.assertEqual(cfunc(123), 123)
+        self.assertEqual(cfunc(-3), struct.unpack('I', struct.pack('i',
+                                                                   -3))[0])
+
+    def test_unsigned_to_int(self):
+        pyfunc = unsigned_to_int
+        cr = compile_isolated(pyfunc, [types.uint64])
+        cfunc = cr.entry_point
+
+        self.assertEqual(cr.signature.return_type, types.int64)
+        self.assertEqual(cfunc(123), 123)
+        self.assertEqual(cfunc(2**64 - 3), -3)
+
     def test_float_to_complex(self):
         pyfunc = float_to_complex
         cr = compile_isolated(pyfunc, [types.float64])
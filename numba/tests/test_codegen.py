@@ -0,0 +1,88 @@
+"""
+Tests for the code libraries and how they are linked together.
+"""
+
+from __future__ import print_function
+
+import ctypes
+import re
+
+import llvmlite.binding as ll
+
+import numba.unittest_support as unittest
+from numba.targets import codegen
+from .support import TestCase
+
+
+helper_asm = """
+define i64 @test_codegen_helper(i64 %x) {
+entry:
+  %y = mul i64 %x, 3
+  ret i64 %y
+}
+"""
+
+unused_asm = """
+define i64 @test_codegen_unused(i64 %x) {
+entry:
+  %y = add i64 %x, 1
+  ret i64 %y
+}
+"""
+
+caller_asm = """
+declare i64 @test_codegen_helper(i64)
+
+define i64 @test_codegen_caller(i64 %x) {
+entry:
+  %y = call i64 @test_codegen_helper(i64 %x)
+  %z = add i64 %y, 1
+  ret i64 %z
+}
+"""
+
+
+class TestCodeLibrary(TestCase):
+
+    def setUp(self):
+        self.codegen = codegen.JITCPUCodegen("test_codegen")
+
+    def make_library(self, name, asm):
+        library = self.codegen.create_library(name)
+        library.add_llvm_module(ll.parse_assembly(asm))
+        return library
+
+    def call(self, library, name, arg):
+        ptr = library.get_pointer_to_function(name)
+        cfunc = ctypes.CFUNCTYPE(ctypes.c_int64, ctypes.c_int64)(ptr)
+        return cfunc(arg)
+
+    def test_shared_libraries(self):
+        helper = self.make_library("helper", helper_asm)
+        unused = self.make_library("unused", unused_asm)
+        self.codegen.add_linking_library(helper)
+        self.codegen.add_linking_library(unused)
+        self.assertEqual(helper.get_defined_symbols(),
+                         ["test_codegen_helper"])
+
+        caller = self.make_library("caller", caller_asm)
+        self.assertEqual(self.call(caller, "test_codegen_caller", 5), 16)
+        self.assertEqual(self.call(helper, "test_codegen_helper", 5), 15)
+        # Only the libraries defining referenced symbols are linked in
+        llvm_ir = caller.get_llvm_str()
+        self.assertNotIn("test_codegen_unused", llvm_ir)
+
+    def test_linking_library(self):
+        helper = self.make_library("helper", helper_asm)
+        caller = self.make_library("caller", caller_asm)
+        caller.add_linking_library(helper)
+        self.assertEqual(self.call(caller, "test_codegen_caller", 5), 16)
+        # The helper can be inlined, but its exported definition stays
+        # in its own library.
+        llvm_ir = caller.get_llvm_str()
+        self.assertFalse(re.search(r"^define i64 @test_codegen_helper",
+                                   llvm_ir, re.MULTILINE), llvm_ir)
+
+
+if __name__ == '__main__':
+    unittest.main()
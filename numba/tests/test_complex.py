@@ -19,6 +19,9 @@ no_pyobj_flags = Flags()
 def div_usecase(x, y):
     return x / y
 
+def pow_usecase(x, y):
+    return x ** y
+
 
 def real_usecase(x):
     return x.real
@@ -208,6 +211,46 @@ class TestComplex(BaseComplexTest, TestCase):
     def test_div_npm(self):
         self.test_div(flags=no_pyobj_flags)
 
+    def test_pow(self, flags=enable_pyobj_flags):
+        """
+        Test complex.__pow__ implementation with integral and
+        non-integral exponents.
+        """
+        bases = [1+2j, -0.5+0.25j, 3j, -1.5, 0.9-1.1j]
+        exponents = [0j, 1+0j, 2+0j, 3+0j, -2+0j, 7+0j, -13+0j, 100+0j,
+                     101+0j, 0.5+0j, 1.5-2j, 2j]
+        values = list(itertools.product(bases, exponents))
+        self.run_binary(pow_usecase, [(types.complex128, types.complex128)],
+                        values, flags=flags)
+        # Errors grow with the exponent in single precision
+        bases = [1+2j, -0.5+0.25j, 3j, -1.5]
+        exponents = [0j, 1+0j, 2+0j, 3+0j, -2+0j, 0.5+0j, 1.5-2j]
+        values = list(itertools.product(bases, exponents))
+        self.run_binary(pow_usecase, [(types.complex64, types.complex64)],
+                        values, flags=flags, ulps=2)
+
+    def test_pow_npm(self):
+        self.test_pow(flags=no_pyobj_flags)
+
+    def test_int_pow(self, flags=enable_pyobj_flags):
+        bases = [1+2j, -0.5+0.25j, 3j, -1.5, 0.9-1.1j]
+        exponents = [0, 1, 2, 3, 5, -1, -4, 17, 150]
+        values = list(itertools.product(bases, exponents))
+        self.run_binary(pow_usecase, [(types.complex128, types.int64)],
+                        values, flags=flags)
+        bases = [1+2j, -0.5+0.25j, 3j, -1.5]
+        exponents = [0, 1, 2, 3, -1, -2]
+        values = list(itertools.product(bases, exponents))
+        self.run_binary(pow_usecase, [(types.complex64, types.int32)],
+                        values, flags=flags, ulps=2)
+
+    def test_int_pow_npm(self):
+        self.test_int_pow(flags=no_pyobj_flags)
+        # complex64 ** int stays in single precision
+        cr = compile_isolated(pow_usecase, (types.complex64, types.int64),
+                              flags=no_pyobj_flags)
+        self.assertEqual(cr.signature.return_type, types.complex64)
+
 
 class TestCMath(BaseComplexTest, TestCase):
     """
@@ -3,7 +3,7 @@ from __future__ import print_function, division, absolute_import
 import threading
 
 from numba import unittest_support as unittest
-from numba import utils, vectorize, jit
+from numba import compiler, config, dispatcher, types, utils, vectorize, jit
 from .support import TestCase
 
 
@@ -225,5 +225,115 @@ class TestDispatcher(TestCase):
             # Look for the function name
             self.assertTrue("foo" in asm)
 
+
+class TestTieredCompilation(TestCase):
+
+    def setUp(self):
+        self.old_threshold = config.TIERED_THRESHOLD
+        config.TIERED_THRESHOLD = 5
+
+    def tearDown(self):
+        config.TIERED_THRESHOLD = self.old_threshold
+
+    def test_tier_up(self):
+        foo = jit(nopython=True, tiered=True)(add)
+        self.assertPreciseEqual(foo(1, 2), 3)
+        sig = foo.signatures[0]
+        quick = foo._compileinfos[sig]
+        self.assertEqual(quick.library._opt, config.TIERED_OPT)
+        for i in range(3):
+            self.assertPreciseEqual(foo(1, i), 1 + i)
+        # Not hot enough yet
+        dispatcher.background_compiler.join()
+        self.assertIs(foo._compileinfos[sig], quick)
+        for i in range(3):
+            self.assertPreciseEqual(foo(1, i), 1 + i)
+        dispatcher.background_compiler.join()
+        # The overload was recompiled with full optimization and swapped in
+        optimized = foo._compileinfos[sig]
+        self.assertIsNot(optimized, quick)
+        self.assertIs(optimized.library._opt, None)
+        self.assertIs(foo.overloads[sig], optimized.entry_point)
+        self.assertEqual(foo.signatures, [sig])
+        for i in range(10):
+            self.assertPreciseEqual(foo(1, i), 1 + i)
+        dispatcher.background_compiler.join()
+        self.assertIs(foo._compileinfos[sig], optimized)
+        # Other signatures start from the first tier again
+        self.assertPreciseEqual(foo(1.5, 2.0), 3.5)
+        self.assertEqual(len(foo.signatures), 2)
+        cres = foo._compileinfos[(types.float64, types.float64)]
+        self.assertEqual(cres.library._opt, config.TIERED_OPT)
+
+    def test_not_tiered(self):
+        foo = jit(nopython=True)(add)
+        for i in range(10):
+            self.assertPreciseEqual(foo(1, i), 1 + i)
+        dispatcher.background_compiler.join()
+        cres = foo._compileinfos[foo.signatures[0]]
+        self.assertIs(cres.library._opt, None)
+        self.assertEqual(foo._retired, [])
+
+    def test_threads(self):
+        # Swapping the entry point while other threads call the function
+        foo = jit(nopython=True, nogil=True, tiered=True)(add)
+        errors = []
+
+        def wrapper():
+            try:
+                for i in range(100):
+                    self.assertEqual(foo(i, 1), i + 1)
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=wrapper) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        dispatcher.background_compiler.join()
+        self.assertFalse(errors)
+        self.assertEqual(len(foo._retired), 1)
+
+    def test_concurrent_compilation(self):
+        # Compiling other functions while a background recompile is
+        # pending or running: compilations must never overlap.
+        active = set()
+        overlaps = []
+        lock = threading.Lock()
+        orig = compiler.Pipeline._compile_bytecode
+
+        def _compile_bytecode(pipeline):
+            me = threading.current_thread()
+            with lock:
+                if active - set([me]):
+                    overlaps.append(me.name)
+                nested = me in active
+                active.add(me)
+            try:
+                return orig(pipeline)
+            finally:
+                if not nested:
+                    with lock:
+                        active.discard(me)
+
+        compiler.Pipeline._compile_bytecode = _compile_bytecode
+        try:
+            foo = jit(nopython=True, tiered=True)(add)
+            for i in range(5):
+                self.assertPreciseEqual(foo(1, i), 1 + i)
+            # The recompile of foo is now queued or running
+            for i in range(5):
+                bar = jit(nopython=True)(add)
+                self.assertPreciseEqual(bar(i, 2.5), i + 2.5)
+            dispatcher.background_compiler.join()
+        finally:
+            compiler.Pipeline._compile_bytecode = orig
+        self.assertEqual(overlaps, [])
+        sig = foo.signatures[0]
+        self.assertIs(foo._compileinfos[sig].library._opt, None)
+        self.assertPreciseEqual(foo(1, 2), 3)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,288 @@
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import jit, _helperlib
+from .support import TestCase
+
+
+def np_empty(n):
+    return np.empty(n)
+
+def np_empty_2d(m, n):
+    return np.empty((m, n), np.int32)
+
+def np_empty_dtype_kw(n):
+    return np.empty(n, dtype=np.float32)
+
+def np_zeros(m, n):
+    return np.zeros((m, n))
+
+def np_ones(n):
+    return np.ones(n, np.int16)
+
+def np_zeros_like(a):
+    return np.zeros_like(a)
+
+def np_ones_like(a):
+    return np.ones_like(a, np.complex128)
+
+def fill_and_sum(n):
+    a = np.empty(n)
+    for i in range(n):
+        a[i] = i
+    s = 0.0
+    for i in range(n):
+        s += a[i]
+    return s
+
+def reassign(n):
+    a = np.zeros(n)
+    for i in range(3):
+        a = np.ones(n)
+    return a
+
+def return_view(n):
+    a = np.ones((n, n))
+    return a[1:]
+
+def return_tuple(n):
+    a = np.zeros(n)
+    b = np.ones(n)
+    return a, b
+
+def raise_after_alloc(n):
+    a = np.zeros(n)
+    for i in range(n):
+        b = np.ones(i)
+        if i == 3:
+            raise ValueError("too large")
+        a[i] = b.sum()
+    return a
+
+def alloc_failure(n):
+    a = np.zeros(n)
+    b = np.empty(n - 5)
+    return a, b
+
+def np_full(n, v):
+    return np.full(n, v)
+
+def np_full_dtype(m, n, v):
+    return np.full((m, n), v, np.float32)
+
+def np_arange_1(n):
+    return np.arange(n)
+
+def np_arange_2(a, b):
+    return np.arange(a, b)
+
+def np_arange_3(a, b, c):
+    return np.arange(a, b, c)
+
+def np_arange_dtype(n):
+    return np.arange(n, dtype=np.float32)
+
+def np_linspace_2(a, b):
+    return np.linspace(a, b)
+
+def np_linspace_3(a, b, n):
+    return np.linspace(a, b, n)
+
+def array_copy(a):
+    return a.copy()
+
+def np_copy(a):
+    return np.copy(a)
+
+def np_concatenate(a, b, c):
+    return np.concatenate((a, b, c))
+
+def np_concatenate_axis(a, b, axis):
+    return np.concatenate((a, b), axis)
+
+def np_vstack(a, b):
+    return np.vstack((a, b))
+
+def np_hstack(a, b):
+    return np.hstack((a, b))
+
+
+class TestDynArray(TestCase):
+
+    def setUp(self):
+        self.live_meminfos = _helperlib.meminfo_count()
+
+    def tearDown(self):
+        # Check that no memory was leaked by the compiled code
+        self.assertEqual(_helperlib.meminfo_count(), self.live_meminfos)
+
+    def check_array(self, got, expected):
+        self.assertEqual(got.shape, expected.shape)
+        self.assertEqual(got.dtype, expected.dtype)
+        self.assertTrue(got.flags.c_contiguous)
+        self.assertTrue(got.flags.writeable)
+
+    def test_empty(self):
+        cfunc = jit(nopython=True)(np_empty)
+        self.check_array(cfunc(10), np.empty(10))
+        self.check_array(cfunc(0), np.empty(0))
+        cfunc = jit(nopython=True)(np_empty_2d)
+        self.check_array(cfunc(3, 4), np.empty((3, 4), np.int32))
+        cfunc = jit(nopython=True)(np_empty_dtype_kw)
+        self.check_array(cfunc(5), np.empty(5, np.float32))
+
+    def test_empty_negative(self):
+        cfunc = jit(nopython=True)(np_empty)
+        with self.assertRaises(ValueError) as raises:
+            cfunc(-1)
+        self.assertIn("negative dimensions", str(raises.exception))
+
+    def test_zeros_ones(self):
+        cfunc = jit(nopython=True)(np_zeros)
+        got = cfunc(3, 4)
+        self.check_array(got, np.zeros((3, 4)))
+        self.assertTrue(np.all(got == 0))
+        cfunc = jit(nopython=True)(np_ones)
+        got = cfunc(7)
+        self.check_array(got, np.ones(7, np.int16))
+        self.assertTrue(np.all(got == 1))
+
+    def test_like(self):
+        a = np.arange(12).reshape((3, 4))
+        cfunc = jit(nopython=True)(np_zeros_like)
+        got = cfunc(a)
+        self.check_array(got, np.zeros_like(a))
+        self.assertTrue(np.all(got == 0))
+        cfunc = jit(nopython=True)(np_ones_like)
+        got = cfunc(a)
+        self.check_array(got, np.ones_like(a, np.complex128))
+        self.assertTrue(np.all(got == 1))
+
+    def test_lifetime(self):
+        cfunc = jit(nopython=True)(fill_and_sum)
+        self.assertPreciseEqual(cfunc(10), fill_and_sum(10))
+        cfunc = jit(nopython=True)(reassign)
+        self.assertTrue(np.all(cfunc(4) == 1))
+
+    def test_return_view(self):
+        cfunc = jit(nopython=True)(return_view)
+        got = cfunc(3)
+        self.assertEqual(got.shape, (2, 3))
+        self.assertTrue(np.all(got == 1))
+        # The view keeps the underlying memory alive
+        self.assertEqual(_helperlib.meminfo_count(), self.live_meminfos + 1)
+        del got
+
+    def test_return_tuple(self):
+        cfunc = jit(nopython=True)(return_tuple)
+        a, b = cfunc(5)
+        self.assertTrue(np.all(a == 0))
+        self.assertTrue(np.all(b == 1))
+        del a, b
+
+    def test_raise(self):
+        # Live arrays are released when an exception is raised
+        cfunc = jit(nopython=True)(raise_after_alloc)
+        self.assertPreciseEqual(cfunc(3), raise_after_alloc(3))
+        with self.assertRaises(ValueError) as raises:
+            cfunc(5)
+        self.assertEqual(str(raises.exception), "too large")
+        cfunc = jit(nopython=True)(alloc_failure)
+        with self.assertRaises(ValueError):
+            cfunc(2)
+        a, b = cfunc(6)
+        del a, b
+
+    def test_full(self):
+        cfunc = jit(nopython=True)(np_full)
+        for v in (3, 1.5, True):
+            got = cfunc(5, v)
+            expected = np.full(5, v)
+            self.check_array(got, expected)
+            self.assertPreciseEqual(got, expected)
+        cfunc = jit(nopython=True)(np_full_dtype)
+        got = cfunc(2, 3, 7)
+        self.check_array(got, np.full((2, 3), 7, np.float32))
+        self.assertTrue(np.all(got == 7))
+
+    def test_arange(self):
+        cfunc = jit(nopython=True)(np_arange_1)
+        for n in (0, 1, 10, -3):
+            self.assertPreciseEqual(cfunc(n), np.arange(n))
+        cfunc = jit(nopython=True)(np_arange_2)
+        for a, b in [(3, 10), (10, 3), (-4, 4), (0.5, 4.0)]:
+            self.assertPreciseEqual(cfunc(a, b), np.arange(a, b))
+        cfunc = jit(nopython=True)(np_arange_3)
+        for a, b, c in [(0, 10, 3), (10, 0, -2), (0.0, 1.0, 0.25),
+                        (1, 2, 0.3)]:
+            self.assertPreciseEqual(cfunc(a, b, c), np.arange(a, b, c))
+        with self.assertRaises(ValueError) as raises:
+            cfunc(0, 5, 0)
+        self.assertIn("step cannot be zero", str(raises.exception))
+        cfunc = jit(nopython=True)(np_arange_dtype)
+        self.assertPreciseEqual(cfunc(5), np.arange(5, dtype=np.float32))
+
+    def test_linspace(self):
+        cfunc = jit(nopython=True)(np_linspace_2)
+        self.assertPreciseEqual(cfunc(0, 10), np.linspace(0, 10))
+        cfunc = jit(nopython=True)(np_linspace_3)
+        for a, b, n in [(0, 1, 5), (-2.5, 3.0, 11), (1, 1, 3),
+                        (0, 1, 1), (0, 1, 0)]:
+            np.testing.assert_allclose(cfunc(a, b, n), np.linspace(a, b, n))
+
+    def check_copy(self, cfunc, a):
+        got = cfunc(a)
+        self.check_array(got, a)
+        self.assertPreciseEqual(got, a.copy())
+        # The copy doesn't share memory with the original
+        if got.size:
+            got.flat[0] += 1
+            self.assertNotEqual(got.flat[0], a.flat[0])
+
+    def test_copy(self):
+        a = np.arange(24, dtype=np.float32).reshape((2, 3, 4))
+        for pyfunc in (array_copy, np_copy):
+            cfunc = jit(nopython=True)(pyfunc)
+            self.check_copy(cfunc, a)
+            self.check_copy(cfunc, a.T)
+            self.check_copy(cfunc, a[:, ::2, 1:])
+            self.check_copy(cfunc, a[:0])
+
+    def test_concatenate(self):
+        cfunc = jit(nopython=True)(np_concatenate)
+        a = np.arange(4)
+        b = np.arange(6) * 2
+        c = np.arange(10)[::3]
+        self.assertPreciseEqual(cfunc(a, b, c), np.concatenate((a, b, c)))
+        # Mixed dtypes
+        b = b.astype(np.float32)
+        self.assertPreciseEqual(cfunc(a, b, c), np.concatenate((a, b, c)))
+
+        cfunc = jit(nopython=True)(np_concatenate_axis)
+        a = np.arange(6).reshape((2, 3))
+        b = np.arange(12).reshape((4, 3))
+        self.assertPreciseEqual(cfunc(a, b, 0), np.concatenate((a, b), 0))
+        self.assertPreciseEqual(cfunc(a, b.T[:, :2], -1),
+                                np.concatenate((a, b.T[:, :2]), -1))
+        self.assertPreciseEqual(cfunc(a.T, b.T, 1),
+                                np.concatenate((a.T, b.T), 1))
+        with self.assertRaises(ValueError) as raises:
+            cfunc(a, b, 1)
+        self.assertIn("must match exactly", str(raises.exception))
+
+    def test_stack(self):
+        a = np.arange(4)
+        b = np.arange(4.0)[::-1]
+        for pyfunc, npfunc in ((np_vstack, np.vstack),
+                               (np_hstack, np.hstack)):
+            cfunc = jit(nopython=True)(pyfunc)
+            self.assertPreciseEqual(cfunc(a, b), npfunc((a, b)))
+            m = np.arange(8).reshape((2, 4))
+            n = np.arange(8).reshape((4, 2)).T
+            self.assertPreciseEqual(cfunc(m, n), npfunc((m, n)))
+
+
+if __name__ == '__main__':
+    unittest.main()
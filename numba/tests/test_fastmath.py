@@ -0,0 +1,117 @@
+"""
+Tests for the fastmath option.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import re
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import jit, vectorize
+from numba.compiler import Flags
+from numba.targets.cpu import CPUTargetOptions
+from .support import TestCase
+
+
+def sum_usecase(a):
+    s = 0.0
+    for i in range(a.shape[0]):
+        s += a[i]
+    return s
+
+def muladd_usecase(a, b, c):
+    return a * b + c
+
+def mulsub_usecase(a, b, c):
+    return a * b - c
+
+def addmul_usecase(a, b, c):
+    return c + a * b
+
+def div_usecase(a, b):
+    return a / b
+
+def mod_usecase(a, b):
+    return a % b
+
+
+class TestFastMath(TestCase):
+
+    def compile(self, pyfunc, sig, fastmath):
+        cfunc = jit(sig, nopython=True, fastmath=fastmath)(pyfunc)
+        return cfunc, cfunc.inspect_llvm(cfunc.signatures[0])
+
+    def assertNotFast(self, llvm_ir):
+        self.assertFalse(re.search(r"\bfast\b", llvm_ir), llvm_ir)
+
+    def test_flags(self):
+        flags = CPUTargetOptions.parse_as_flags(Flags(), {'fastmath': True})
+        self.assertEqual(flags.fastmath, frozenset(['nnan', 'ninf', 'nsz',
+                                                    'arcp', 'reassoc',
+                                                    'contract']))
+        flags = CPUTargetOptions.parse_as_flags(Flags(),
+                                                {'fastmath': ['contract']})
+        self.assertEqual(flags.fastmath, frozenset(['contract']))
+        flags = CPUTargetOptions.parse_as_flags(Flags(), {'fastmath': False})
+        self.assertEqual(flags.fastmath, frozenset())
+        with self.assertRaises(ValueError) as raises:
+            jit("float64(float64[::1])",
+                fastmath=set(['nnan', 'fast']))(sum_usecase)
+        self.assertIn("Unrecognized fastmath flags: fast", str(raises.exception))
+
+    def test_sum(self):
+        a = np.linspace(-1, 1, 1001)
+        cfunc, llvm_ir = self.compile(sum_usecase, "float64(float64[::1])",
+                                      True)
+        self.assertAlmostEqual(cfunc(a), a.sum(), places=12)
+        self.assertIn("fadd fast", llvm_ir)
+        cfunc, llvm_ir = self.compile(sum_usecase, "float64(float64[::1])",
+                                      False)
+        self.assertPreciseEqual(cfunc(a), sum_usecase(a))
+        self.assertNotFast(llvm_ir)
+
+    def test_flag_subset(self):
+        cfunc, llvm_ir = self.compile(div_usecase, "float64(float64, float64)",
+                                      set(['nnan', 'arcp']))
+        self.assertPreciseEqual(cfunc(3.0, 4.0), 0.75)
+        self.assertIn("fdiv nnan arcp", llvm_ir)
+        self.assertNotFast(llvm_ir)
+        # Division by zero is still detected
+        with self.assertRaises(ZeroDivisionError):
+            cfunc(1.0, 0.0)
+
+    def test_exact_operators(self):
+        # The modulo operator isn't relaxed
+        cfunc, llvm_ir = self.compile(mod_usecase, "float64(float64, float64)",
+                                      True)
+        self.assertPreciseEqual(cfunc(-5.5, 2.0), -5.5 % 2.0)
+        self.assertNotFast(llvm_ir)
+
+    def test_contract(self):
+        args = (1.5, -2.25, 0.75)
+        for pyfunc in (muladd_usecase, mulsub_usecase, addmul_usecase):
+            for sig, ty in [("float64(float64, float64, float64)", "f64"),
+                            ("float32(float32, float32, float32)", "f32")]:
+                cfunc, llvm_ir = self.compile(pyfunc, sig, ['contract'])
+                self.assertPreciseEqual(cfunc(*args), pyfunc(*args),
+                                        prec='single')
+                self.assertTrue(re.search(r"call .* @llvm\.fmuladd\.%s" % ty,
+                                          llvm_ir), llvm_ir)
+        # Not without the flag
+        cfunc, llvm_ir = self.compile(muladd_usecase,
+                                      "float64(float64, float64, float64)",
+                                      ['nnan'])
+        self.assertNotIn("llvm.fmuladd", llvm_ir)
+
+    def test_vectorize(self):
+        ufunc = vectorize(["float64(float64, float64, float64)"],
+                          fastmath=True)(muladd_usecase)
+        a = np.linspace(-1, 1, 101)
+        b = a[::-1].copy()
+        np.testing.assert_allclose(ufunc(a, b, 1.0), a * b + 1.0, rtol=1e-15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Test half precision (float16) arrays, which are stored as float16
+but computed on in single precision.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba.compiler import compile_isolated, Flags
+from numba import types, vectorize
+from .support import TestCase
+
+no_pyobj_flags = Flags()
+
+
+def getitem_usecase(a, i):
+    return a[i]
+
+def setitem_usecase(a, i, v):
+    a[i] = v
+
+def axpy_usecase(alpha, x, y, out):
+    for i in range(x.shape[0]):
+        out[i] = alpha * x[i] + y[i]
+
+def sum_usecase(a):
+    return a.sum()
+
+def mean_usecase(a):
+    return a.mean()
+
+def loop_sum_usecase(a):
+    s = 0.0
+    for v in a:
+        s += v
+    return s
+
+def half_scalar_usecase(x, y):
+    return x * y
+
+
+class TestFloat16(TestCase):
+
+    arrty = types.Array(types.float16, 1, 'C')
+
+    def compile(self, pyfunc, argtys):
+        return compile_isolated(pyfunc, argtys, flags=no_pyobj_flags)
+
+    def half_array(self, n=100):
+        return np.linspace(-4, 4, n).astype(np.float16)
+
+    def test_getitem(self):
+        cres = self.compile(getitem_usecase, (self.arrty, types.intp))
+        a = self.half_array()
+        for i in (0, 3, 50, 99):
+            self.assertEqual(cres.entry_point(a, i), float(a[i]))
+
+    def test_setitem(self):
+        cres = self.compile(setitem_usecase,
+                            (self.arrty, types.intp, types.float64))
+        a = np.zeros(5, dtype=np.float16)
+        for i, v in enumerate([1.0, -2.5, 1.0 / 3, 1e5, 6e-8]):
+            cres.entry_point(a, i, v)
+            # Values are rounded to the nearest half precision number
+            self.assertPreciseEqual(a[i], np.float16(v))
+
+    def test_compute(self):
+        cres = self.compile(axpy_usecase, (types.float32, self.arrty,
+                                           self.arrty, self.arrty))
+        x = self.half_array()
+        y = self.half_array()[::-1].copy()
+        out = np.empty_like(x)
+        cres.entry_point(np.float32(1.5), x, y, out)
+        expected = (np.float32(1.5) * x.astype(np.float32)
+                    + y.astype(np.float32)).astype(np.float16)
+        self.assertPreciseEqual(out, expected)
+
+    def test_reductions(self):
+        # Multiples of 1/8, so that all sums are exact
+        a = (np.arange(-300, 701) / 8).astype(np.float16)
+        for pyfunc in (sum_usecase, mean_usecase):
+            cres = self.compile(pyfunc, (self.arrty,))
+            # Accumulate in single precision
+            self.assertEqual(cres.signature.return_type, types.float32)
+            got = cres.entry_point(a)
+            expected = pyfunc(a.astype(np.float32))
+            self.assertPreciseEqual(got, float(expected), prec='single')
+        cres = self.compile(loop_sum_usecase, (self.arrty,))
+        self.assertPreciseEqual(cres.entry_point(a),
+                                float(a.astype(np.float64).sum()))
+
+    def test_scalars(self):
+        cres = self.compile(half_scalar_usecase,
+                            (types.float16, types.float16))
+        self.assertEqual(cres.signature.return_type, types.float32)
+        got = cres.entry_point(np.float16(1.5), np.float16(-3.25))
+        self.assertPreciseEqual(got, -4.875)
+
+    def test_vectorize(self):
+        ufunc = vectorize(["float16(float16, float16)"])(half_scalar_usecase)
+        a = self.half_array()
+        b = self.half_array()[::-1].copy()
+        for x, y in [(a, b), (a[::2], b[::2])]:
+            got = ufunc(x, y)
+            self.assertEqual(got.dtype, np.dtype(np.float16))
+            expected = (x.astype(np.float32)
+                        * y.astype(np.float32)).astype(np.float16)
+            self.assertPreciseEqual(got, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Check that float32 math functions and ufuncs are computed in single
+precision, without going through double precision.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import math
+import re
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba.compiler import compile_isolated, Flags
+from numba import config, types, utils
+from .support import TestCase
+
+PY27_AND_ABOVE = utils.PYVERSION > (2, 6)
+
+no_pyobj_flags = Flags()
+
+
+unary_math_funcs = ['exp', 'log', 'log10', 'log1p', 'sqrt', 'fabs',
+                    'sin', 'cos', 'tan', 'asin', 'acos', 'atan',
+                    'sinh', 'cosh', 'tanh', 'asinh', 'acosh', 'atanh',
+                    'radians', 'degrees']
+if PY27_AND_ABOVE:
+    unary_math_funcs += ['expm1', 'erf', 'erfc', 'lgamma']
+
+binary_math_funcs = ['atan2', 'hypot', 'copysign', 'pow']
+
+unary_ufuncs = ['exp', 'exp2', 'expm1', 'log', 'log2', 'log10', 'log1p',
+                'sqrt', 'square', 'reciprocal', 'sin', 'cos', 'tan',
+                'arcsin', 'arccos', 'arctan', 'sinh', 'cosh', 'tanh',
+                'arcsinh', 'arccosh', 'arctanh', 'deg2rad', 'rad2deg',
+                'floor', 'ceil', 'trunc', 'rint', 'fabs', 'absolute']
+
+binary_ufuncs = ['power', 'arctan2', 'hypot', 'logaddexp', 'logaddexp2',
+                 'true_divide', 'floor_divide', 'remainder', 'fmod',
+                 'maximum', 'fmin', 'copysign', 'nextafter']
+
+
+def _unary_usecase(mod, name):
+    fn = getattr(mod, name)
+    def usecase(x):
+        return fn(x)
+    return usecase
+
+def _binary_usecase(mod, name):
+    fn = getattr(mod, name)
+    def usecase(x, y):
+        return fn(x, y)
+    return usecase
+
+def pow_int_usecase(x, n):
+    return x ** n
+
+def math_pow_int_usecase(x, n):
+    return math.pow(x, n)
+
+def loop_usecase(a, out):
+    for i in range(a.shape[0]):
+        out[i] = math.exp(a[i]) * math.sin(a[i]) + math.log(a[i]) ** 2
+
+
+class TestFloat32(TestCase):
+
+    def compile(self, pyfunc, argtys):
+        return compile_isolated(pyfunc, argtys, flags=no_pyobj_flags)
+
+    def native_ir(self, cres):
+        """
+        Return the optimized IR of the native function of *cres*
+        (excluding the Python wrapper, which converts from and to
+        Python floats).
+        """
+        return str(cres.library.get_function(cres.fndesc.llvm_func_name))
+
+    def assert_no_double(self, cres):
+        llvm_ir = self.native_ir(cres)
+        self.assertFalse(re.search(r"\bdouble\b", llvm_ir), llvm_ir)
+
+    def check_unary(self, pyfunc, name):
+        cres = self.compile(pyfunc, (types.float32,))
+        self.assertEqual(cres.signature.return_type, types.float32)
+        self.assert_no_double(cres)
+        # Stay in the domain of all functions
+        x = np.float32(1.25 if name in ('acosh', 'arccosh') else 0.75)
+        got = cres.entry_point(x)
+        expected = pyfunc(np.float64(x))
+        self.assertPreciseEqual(got, expected, prec='single', ulps=2,
+                                msg=name)
+
+    def check_binary(self, pyfunc, name):
+        cres = self.compile(pyfunc, (types.float32, types.float32))
+        self.assertEqual(cres.signature.return_type, types.float32)
+        self.assert_no_double(cres)
+        x, y = np.float32(0.75), np.float32(1.5)
+        got = cres.entry_point(x, y)
+        expected = pyfunc(np.float64(x), np.float64(y))
+        self.assertPreciseEqual(got, expected, prec='single', ulps=2,
+                                msg=name)
+
+    def test_math_funcs(self):
+        for name in unary_math_funcs:
+            self.check_unary(_unary_usecase(math, name), name)
+        for name in binary_math_funcs:
+            self.check_binary(_binary_usecase(math, name), name)
+
+    @unittest.skipUnless(PY27_AND_ABOVE, "needs Python 2.7+")
+    def test_gamma(self):
+        # The computation is done in double precision by the helper
+        # library, but the generated code is single precision.
+        cres = self.compile(_unary_usecase(math, 'gamma'), (types.float32,))
+        self.assert_no_double(cres)
+
+    def test_ufuncs(self):
+        for name in unary_ufuncs:
+            self.check_unary(_unary_usecase(np, name), name)
+        for name in binary_ufuncs:
+            self.check_binary(_binary_usecase(np, name), name)
+
+    def test_integer_power(self):
+        for pyfunc in (pow_int_usecase, math_pow_int_usecase):
+            for intty in (types.int32, types.int64, types.uint64):
+                cres = self.compile(pyfunc, (types.float32, intty))
+                self.assertEqual(cres.signature.return_type, types.float32)
+                self.assert_no_double(cres)
+                for n in (0, 1, 2, 5):
+                    got = cres.entry_point(np.float32(1.25), n)
+                    self.assertPreciseEqual(got, np.float32(1.25) ** n,
+                                            prec='single')
+
+
+class TestFloat32VectorMath(TestFloat32):
+    """
+    Same as TestFloat32, with the branch-free math functions.
+    """
+
+    def setUp(self):
+        self.old_vector_math = config.VECTOR_MATH
+        config.VECTOR_MATH = 1
+
+    def tearDown(self):
+        config.VECTOR_MATH = self.old_vector_math
+
+    @unittest.skipUnless(config.LOOP_VECTORIZE, "needs the loop vectorizer")
+    def test_loop_is_vectorized(self):
+        arrty = types.Array(types.float32, 1, 'C')
+        cres = self.compile(loop_usecase, (arrty, arrty))
+        self.assert_no_double(cres)
+        llvm_ir = self.native_ir(cres)
+        self.assertTrue(re.search(r"<\d+ x float>", llvm_ir), llvm_ir)
+        a = np.linspace(0.5, 10, 101).astype(np.float32)
+        out = np.empty_like(a)
+        cres.entry_point(a, out)
+        expected = np.exp(a) * np.sin(a) + np.log(a) ** 2
+        np.testing.assert_allclose(out, expected, rtol=1e-5, atol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,12 @@
 from __future__ import print_function
 
+import re
+
 import numpy as np
 
 import numba.unittest_support as unittest
 from numba.compiler import compile_isolated, Flags
-from numba import types, utils
+from numba import types, typeof, utils
 from numba.tests import usecases
 from .support import TestCase
 
@@ -108,6 +110,9 @@ def boolean_indexing_usecase(a, mask):
 def empty_tuple_usecase(a):
     return a[()]
 
+def fancy_setitem_usecase(a, index, value):
+    a[index] = value
+
 
 def slicing_1d_usecase_set(a, b, start, stop, step):
     a[start:stop:step] = b
@@ -117,6 +122,12 @@ def slicing_2d_usecase_set(a, b, start, stop, step, start2, stop2, step2):
     a[start:stop:step,start2:stop2:step2] = b
     return a
 
+def stencil_usecase(a, out):
+    for i in range(1, a.shape[0] - 1):
+        for j in range(1, a.shape[1] - 1):
+            out[i, j] = 0.25 * (a[i - 1, j] + a[i + 1, j]
+                                + a[i, j - 1] + a[i, j + 1])
+
 
 class TestIndexing(TestCase):
 
@@ -579,8 +590,38 @@ class TestIndexing(TestCase):
         self.assertTrue((pyfunc(a, index) == cfunc(a, index)).all())
 
     def test_fancy_index_npm(self):
-        with self.assertTypingError():
-            self.test_fancy_index(flags=Noflags)
+        self.test_fancy_index(flags=Noflags)
+
+    def check_fancy_getitem(self, a, index):
+        pyfunc = fancy_index_usecase
+        cr = compile_isolated(pyfunc, (typeof(a), typeof(index)),
+                              flags=Noflags)
+        expected = pyfunc(a, index)
+        got = cr.entry_point(a, index)
+        self.assertEqual(got.shape, expected.shape)
+        self.assertEqual(got.dtype, expected.dtype)
+        self.assertTrue(got.flags.c_contiguous)
+        self.assertTrue((got == expected).all())
+
+    def test_fancy_index_array_npm(self):
+        a = np.arange(20, dtype='f8')
+        for index in (np.array([3, 0, -1, 19, 3]), np.array([], dtype='i8'),
+                      np.array([5, 2], dtype='u2'),
+                      np.arange(10)[::-3]):
+            self.check_fancy_getitem(a, index)
+        # Non-contiguous arrays
+        self.check_fancy_getitem(a[::2], np.array([1, -2]))
+        b = np.arange(24).reshape((4, 6)).T
+        self.check_fancy_getitem(b, np.array([5, 0, -1]))
+
+    def test_fancy_index_errors_npm(self):
+        pyfunc = fancy_index_usecase
+        a = np.arange(5)
+        cr = compile_isolated(pyfunc, (typeof(a), typeof(np.arange(2))),
+                              flags=Noflags)
+        for index in (np.array([0, 5]), np.array([-6])):
+            with self.assertRaises(IndexError):
+                cr.entry_point(a, index)
 
     def test_boolean_indexing(self, flags=enable_pyobj_flags):
         pyfunc = boolean_indexing_usecase
@@ -594,9 +635,96 @@ class TestIndexing(TestCase):
         self.assertTrue((pyfunc(a, mask) == cfunc(a, mask)).all())
 
     def test_boolean_indexing_npm(self):
+        # Masks must have as many dimensions as the indexed array
         with self.assertTypingError():
             self.test_boolean_indexing(flags=Noflags)
 
+    def test_boolean_mask_npm(self):
+        a = np.arange(12, dtype='i4')
+        self.check_fancy_getitem(a, a % 3 == 0)
+        self.check_fancy_getitem(a, np.zeros(12, dtype=np.bool_))
+        b = a.reshape((3, 4))
+        self.check_fancy_getitem(b, b > 4)
+        # Non-contiguous array and mask
+        self.check_fancy_getitem(b.T, (b > 4).T)
+        self.check_fancy_getitem(b[:, ::2], b[:, ::2] % 4 == 0)
+
+    def test_boolean_mask_errors_npm(self):
+        pyfunc = fancy_index_usecase
+        a = np.arange(5)
+        mask = np.ones(4, dtype=np.bool_)
+        cr = compile_isolated(pyfunc, (typeof(a), typeof(mask)),
+                              flags=Noflags)
+        with self.assertRaises(IndexError):
+            cr.entry_point(a, mask)
+
+    def check_fancy_setitem(self, a, index, value):
+        pyfunc = fancy_setitem_usecase
+        cr = compile_isolated(pyfunc,
+                              (typeof(a), typeof(index), typeof(value)),
+                              flags=Noflags)
+        expected = a.copy()
+        pyfunc(expected, index, value)
+        cr.entry_point(a, index, value)
+        self.assertTrue((a == expected).all())
+
+    def test_fancy_setitem_npm(self):
+        a = np.arange(10, dtype='f8')
+        self.check_fancy_setitem(a, np.array([1, -1, 4]), 42.0)
+        self.check_fancy_setitem(a, np.array([0, 2]), np.array([7, 8]))
+        b = np.arange(12).reshape((3, 4))
+        self.check_fancy_setitem(b, np.array([2, 0]), 5)
+        self.check_fancy_setitem(b, np.array([1]),
+                                 np.arange(4).reshape((1, 4)))
+        self.check_fancy_setitem(b.T, np.array([3, 1]), 0)
+
+    def test_boolean_mask_setitem_npm(self):
+        a = np.arange(10, dtype='f8')
+        self.check_fancy_setitem(a, a > 5, 0.0)
+        a = np.arange(10, dtype='f8')
+        self.check_fancy_setitem(a, a < 3, np.array([-1, -2, -3]))
+        b = np.arange(12).reshape((3, 4))
+        self.check_fancy_setitem(b, b % 2 == 0, 3)
+        b = np.arange(12).reshape((3, 4))
+        self.check_fancy_setitem(b.T, (b % 5 == 0).T, np.array([7, 8, 9]))
+
+    def test_fancy_setitem_overlap_npm(self):
+        # Values overlapping the array are copied first, like Numpy
+        pyfunc = fancy_setitem_usecase
+        a = np.arange(10, dtype='f8')
+        index = np.arange(10)
+        mask = a % 2 == 0
+        for idx, make_values in [(index, lambda a: a[::-1]),
+                                 (index[:5], lambda a: a[1:6]),
+                                 (mask, lambda a: a[:5]),
+                                 (mask, lambda a: a[::-2])]:
+            expected = a.copy()
+            got = a.copy()
+            pyfunc(expected, idx, make_values(expected))
+            values = make_values(got)
+            cr = compile_isolated(pyfunc,
+                                  (typeof(got), typeof(idx), typeof(values)),
+                                  flags=Noflags)
+            cr.entry_point(got, idx, values)
+            self.assertPreciseEqual(got, expected)
+
+    def test_fancy_setitem_errors_npm(self):
+        pyfunc = fancy_setitem_usecase
+        a = np.arange(5)
+        mask = a > 1
+        values = np.arange(2)
+        cr = compile_isolated(pyfunc,
+                              (typeof(a), typeof(mask), typeof(values)),
+                              flags=Noflags)
+        with self.assertRaises(ValueError):
+            cr.entry_point(a, mask, values)
+        index = np.array([0, 7])
+        cr = compile_isolated(pyfunc,
+                              (typeof(a), typeof(index), typeof(values)),
+                              flags=Noflags)
+        with self.assertRaises(IndexError):
+            cr.entry_point(a, index, values)
+
     def test_empty_tuple_indexing(self, flags=enable_pyobj_flags):
         pyfunc = empty_tuple_usecase
         arraytype = types.Array(types.int32, 0, 'C')
@@ -675,6 +803,72 @@ class TestIndexing(TestCase):
         with self.assertTypingError():
             self.test_2d_slicing_set(flags=Noflags)
 
+    def test_2d_stencil_npm(self):
+        # Non-contiguous views use the generic index computation
+        pyfunc = stencil_usecase
+        arraytype = types.Array(types.float64, 2, 'A')
+        cr = compile_isolated(pyfunc, (arraytype, arraytype), flags=Noflags)
+        cfunc = cr.entry_point
+
+        base = np.arange(20 * 30, dtype=np.float64).reshape((20, 30)) ** 0.5
+        for view in (lambda a: a[::2, ::3], lambda a: a.T,
+                     lambda a: a[::-1, 1:]):
+            a = view(base)
+            got = np.zeros_like(a)
+            expected = np.zeros_like(a)
+            cfunc(a, got)
+            pyfunc(a, expected)
+            self.assertPreciseEqual(got, expected)
+
+    def loop_blocks(self, llvm_ir):
+        """
+        Return the instructions of the basic blocks of function IR
+        *llvm_ir* which are part of a loop.
+        """
+        label_re = re.compile(r"^(?:([-\w.$]+):|; <label>:(\d+))")
+        blocks = {}
+        succs = {}
+        label = None
+        for line in llvm_ir.splitlines():
+            m = label_re.match(line)
+            if m:
+                label = m.group(1) or m.group(2)
+                blocks[label] = []
+                succs[label] = set()
+            elif label is not None and line.startswith(' '):
+                blocks[label].append(line)
+                succs[label].update(re.findall(r"label %([-\w.$]+)", line))
+
+        def reachable(start):
+            seen = set()
+            todo = list(succs[start])
+            while todo:
+                succ = todo.pop()
+                if succ not in seen:
+                    seen.add(succ)
+                    todo.extend(succs.get(succ, ()))
+            return seen
+
+        return [body for label, body in blocks.items()
+                if label in reachable(label)]
+
+    def test_2d_stencil_hoisting(self):
+        # Only the array elements are loaded inside the loops: the
+        # shapes and strides are loaded once, and the address computation
+        # is not a barrier to LLVM's loop-invariant code motion.
+        arraytype = types.Array(types.float64, 2, 'A')
+        cr = compile_isolated(stencil_usecase, (arraytype, arraytype),
+                              flags=Noflags)
+        llvm_ir = str(cr.library.get_function(cr.fndesc.llvm_func_name))
+        loops = self.loop_blocks(llvm_ir)
+        self.assertTrue(loops, llvm_ir)
+        for block in loops:
+            for line in block:
+                if re.search(r"= load ", line):
+                    self.assertTrue(
+                        re.search(r"= load (volatile )?(<\d+ x )?double\b",
+                                  line), llvm_ir)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,144 @@
+from __future__ import print_function, absolute_import, division
+
+import math
+
+import numpy as np
+
+import numba.unittest_support as unittest
+from numba import bytecode, compiler, ir, irpasses, types, typing
+from numba.compiler import compile_isolated, Flags
+from .support import TestCase
+
+no_pyobj_flags = Flags()
+
+SCALE = 2.5
+
+
+def float_fold_usecase(x):
+    a = 1.5
+    return x * (a * 4.0) + math.pi / 2.0
+
+def global_fold_usecase(x):
+    return x * (SCALE + 1.0)
+
+def int_usecase(x):
+    n = 1
+    return x + (n + 2)
+
+def division_usecase(x):
+    return x + 1.0 / 0.0
+
+def loop_usecase(a):
+    total = 0.0
+    for i in range(a.shape[0]):
+        total += math.sqrt(a[i]) + math.sin(a[i])
+    return total
+
+def unused_attr_usecase(a):
+    math.pi
+    return a[0]
+
+def bad_attr_usecase(a):
+    a.nonexistent
+    return a[0]
+
+def bad_module_attr_usecase(a):
+    math.nonexistent
+    return a[0]
+
+def array_usecase(a, b):
+    c = a + b
+    d = a + b
+    c[0] = 42.0
+    return d[0]
+
+
+class TestIRPasses(TestCase):
+
+    def get_ir(self, pyfunc):
+        interp = compiler.translate_stage(bytecode.ByteCode(func=pyfunc))
+        irpasses.optimize_ir(interp, typing.Context())
+        return interp
+
+    def get_assigned_values(self, interp):
+        return [stmt.value for blk in interp.blocks.values()
+                for stmt in blk.body if isinstance(stmt, ir.Assign)]
+
+    def get_constants(self, interp):
+        return [value.value for value in self.get_assigned_values(interp)
+                if isinstance(value, ir.Const)]
+
+    def check_compile(self, pyfunc, argtys, *args):
+        cres = compile_isolated(pyfunc, argtys, flags=no_pyobj_flags)
+        self.assertPreciseEqual(cres.entry_point(*args), pyfunc(*args))
+        return cres
+
+    def test_constant_folding(self):
+        interp = self.get_ir(float_fold_usecase)
+        consts = self.get_constants(interp)
+        self.assertIn(6.0, consts)
+        self.assertIn(math.pi / 2.0, consts)
+        # The unused operands were eliminated
+        self.assertNotIn(4.0, consts)
+        self.assertNotIn(2.0, consts)
+        self.check_compile(float_fold_usecase, (types.float64,), 1.25)
+
+        interp = self.get_ir(global_fold_usecase)
+        self.assertIn(3.5, self.get_constants(interp))
+        self.check_compile(global_fold_usecase, (types.float64,), 1.25)
+
+    def test_typing_preserved(self):
+        # n + 2 is typed as intp, but the constant 3 would be int32
+        interp = self.get_ir(int_usecase)
+        self.assertNotIn(3, self.get_constants(interp))
+        cres = self.check_compile(int_usecase, (types.int32,), 5)
+        self.assertEqual(cres.signature.return_type, types.intp)
+
+    def test_division_by_zero(self):
+        interp = self.get_ir(division_usecase)
+        self.assertTrue(any(isinstance(value, ir.Expr) and value.op == 'binop'
+                            and value.fn == '/'
+                            for value in self.get_assigned_values(interp)))
+        cres = compile_isolated(division_usecase, (types.float64,),
+                                flags=no_pyobj_flags)
+        with self.assertRaises(ZeroDivisionError):
+            cres.entry_point(1.0)
+
+    def test_cse(self):
+        interp = self.get_ir(loop_usecase)
+        globals_ = [value for value in self.get_assigned_values(interp)
+                    if isinstance(value, ir.Global) and value.name == 'math']
+        self.assertEqual(len(globals_), 1)
+        a = np.linspace(0, 1, 11)
+        self.check_compile(loop_usecase,
+                           (types.Array(types.float64, 1, 'C'),), a)
+
+    def test_arrays_not_merged(self):
+        arrty = types.Array(types.float64, 1, 'C')
+        self.check_compile(array_usecase, (arrty, arrty),
+                           np.arange(3.0), np.ones(3))
+
+    def test_unused_attributes(self):
+        # Unused module attributes are eliminated...
+        interp = self.get_ir(unused_attr_usecase)
+        self.assertFalse(any(isinstance(value, ir.Expr)
+                             and value.op == 'getattr'
+                             for value in self.get_assigned_values(interp)))
+        arrty = types.Array(types.float64, 1, 'C')
+        self.check_compile(unused_attr_usecase, (arrty,), np.arange(3.0))
+        # ... but invalid attributes are still rejected
+        for pyfunc in (bad_attr_usecase, bad_module_attr_usecase):
+            with self.assertTypingError():
+                compile_isolated(pyfunc, (arrty,), flags=no_pyobj_flags)
+
+    def test_copies_removed(self):
+        interp = compiler.translate_stage(
+            bytecode.ByteCode(func=loop_usecase))
+        before = len(self.get_assigned_values(interp))
+        irpasses.optimize_ir(interp, typing.Context())
+        after = len(self.get_assigned_values(interp))
+        self.assertLess(after, before)
+
+
+if __name__ == '__main__':
+    unittest.main()
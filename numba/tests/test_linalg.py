@@ -0,0 +1,156 @@
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import jit, _helperlib
+from .support import TestCase
+
+try:
+    import scipy.linalg.cython_lapack
+    has_lapack = True
+except ImportError:
+    has_lapack = False
+
+needs_lapack = unittest.skipUnless(has_lapack,
+                                   "LAPACK needs scipy 0.16+")
+
+
+def inv_matrix(a):
+    return np.linalg.inv(a)
+
+def det_matrix(a):
+    return np.linalg.det(a)
+
+def solve_system(a, b):
+    return np.linalg.solve(a, b)
+
+def cholesky_matrix(a):
+    return np.linalg.cholesky(a)
+
+def lstsq_system(a, b):
+    return np.linalg.lstsq(a, b)
+
+def lstsq_system_rcond(a, b, rcond):
+    return np.linalg.lstsq(a, b, rcond)
+
+
+@needs_lapack
+class TestLinalg(TestCase):
+
+    # Sizes exercising both the small matrix and the LAPACK paths
+    sizes = (1, 2, 3, 4, 5, 10)
+    dtypes = (np.float64, np.float32)
+
+    def setUp(self):
+        self.live_meminfos = _helperlib.meminfo_count()
+
+    def tearDown(self):
+        # Check that no temporary was leaked by the compiled code
+        self.assertEqual(_helperlib.meminfo_count(), self.live_meminfos)
+
+    def matrix(self, n, dtype, m=None):
+        if m is None:
+            m = n
+        a = self.random.uniform(-1.0, 1.0, (n, m)) + np.eye(n, m) * n
+        return a.astype(dtype)
+
+    def spd_matrix(self, n, dtype):
+        a = self.random.uniform(-1.0, 1.0, (n, n))
+        return (np.dot(a, a.T) + np.eye(n) * n).astype(dtype)
+
+    def assert_close(self, got, expected, dtype):
+        rtol = 1e-4 if dtype == np.float32 else 1e-10
+        self.assertEqual(got.shape, expected.shape)
+        self.assertEqual(got.dtype, expected.dtype)
+        np.testing.assert_allclose(got, expected, rtol=rtol, atol=rtol)
+
+    def test_inv(self):
+        cfunc = jit(nopython=True)(inv_matrix)
+        for dtype in self.dtypes:
+            for n in self.sizes:
+                a = self.matrix(n, dtype)
+                got = cfunc(a)
+                self.assert_close(got, np.linalg.inv(a), dtype)
+            # Non-contiguous input
+            a = self.matrix(6, dtype)[::2, ::2]
+            self.assert_close(cfunc(a), np.linalg.inv(a), dtype)
+
+    def test_inv_errors(self):
+        cfunc = jit(nopython=True)(inv_matrix)
+        for n in (3, 6):
+            with self.assertRaises(np.linalg.LinAlgError):
+                cfunc(np.zeros((n, n)))
+        with self.assertRaises(np.linalg.LinAlgError):
+            cfunc(np.zeros((2, 3)))
+
+    def test_det(self):
+        cfunc = jit(nopython=True)(det_matrix)
+        for dtype in self.dtypes:
+            for n in self.sizes:
+                a = self.matrix(n, dtype)
+                rtol = 1e-4 if dtype == np.float32 else 1e-10
+                np.testing.assert_allclose(cfunc(a), np.linalg.det(a),
+                                           rtol=rtol)
+        for n in (3, 4, 6):
+            self.assertEqual(cfunc(np.zeros((n, n))), 0.0)
+
+    def test_solve(self):
+        cfunc = jit(nopython=True)(solve_system)
+        for dtype in self.dtypes:
+            for n in self.sizes:
+                a = self.matrix(n, dtype)
+                b = self.random.uniform(-1.0, 1.0, n).astype(dtype)
+                self.assert_close(cfunc(a, b), np.linalg.solve(a, b), dtype)
+                b = self.random.uniform(-1.0, 1.0, (n, 3)).astype(dtype)
+                self.assert_close(cfunc(a, b), np.linalg.solve(a, b), dtype)
+
+    def test_solve_errors(self):
+        cfunc = jit(nopython=True)(solve_system)
+        with self.assertRaises(np.linalg.LinAlgError):
+            cfunc(np.zeros((5, 5)), np.ones(5))
+        with self.assertRaises(ValueError):
+            cfunc(np.eye(3), np.ones(4))
+
+    def test_cholesky(self):
+        cfunc = jit(nopython=True)(cholesky_matrix)
+        for dtype in self.dtypes:
+            for n in self.sizes:
+                a = self.spd_matrix(n, dtype)
+                self.assert_close(cfunc(a), np.linalg.cholesky(a), dtype)
+
+    def test_cholesky_errors(self):
+        cfunc = jit(nopython=True)(cholesky_matrix)
+        for n in (3, 6):
+            with self.assertRaises(np.linalg.LinAlgError):
+                cfunc(-np.eye(n))
+
+    def test_lstsq(self):
+        cfunc = jit(nopython=True)(lstsq_system)
+        for dtype in self.dtypes:
+            for m, n in [(5, 3), (3, 3), (3, 5), (10, 4)]:
+                a = self.matrix(m, dtype, n)
+                for b in (self.random.uniform(-1.0, 1.0, m).astype(dtype),
+                          self.random.uniform(-1.0, 1.0, (m, 2)).astype(dtype)):
+                    got = cfunc(a, b)
+                    expected = np.linalg.lstsq(a, b, -1)
+                    self.assertEqual(len(got), 4)
+                    self.assert_close(got[0], expected[0], dtype)
+                    self.assert_close(got[1], expected[1], dtype)
+                    self.assertEqual(got[2], expected[2])
+                    self.assert_close(got[3], expected[3], dtype)
+                    del got
+
+    def test_lstsq_rcond(self):
+        cfunc = jit(nopython=True)(lstsq_system_rcond)
+        a = np.array([[1.0, 0.0], [0.0, 1e-8], [0.0, 0.0]])
+        b = np.ones(3)
+        got = cfunc(a, b, 1e-6)
+        expected = np.linalg.lstsq(a, b, 1e-6)
+        self.assertEqual(got[2], expected[2])
+        self.assert_close(got[0], expected[0], np.float64)
+        del got
+
+
+if __name__ == '__main__':
+    unittest.main()
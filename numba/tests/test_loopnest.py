@@ -0,0 +1,247 @@
+"""
+Tests for the interchange and tiling of loop nests.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import loopnest, types
+from numba.compiler import compile_isolated, Flags
+from .support import TestCase, override_config
+
+no_pyobj_flags = Flags()
+
+interchange_flags = Flags()
+interchange_flags.set("loop_interchange")
+
+tiling_flags = Flags()
+tiling_flags.set("loop_tiling")
+
+
+def scale_usecase(a, out):
+    for j in range(a.shape[1]):
+        for i in range(a.shape[0]):
+            out[i, j] = a[i, j] * 2.0 + j
+
+def shift_usecase(a):
+    for j in range(a.shape[1] - 1):
+        for i in range(a.shape[0] - 1):
+            a[i + 1, j] = a[i, j + 1] + 1.0
+
+def shift_copy_usecase(a, out):
+    for j in range(a.shape[1] - 1):
+        for i in range(a.shape[0] - 1):
+            out[i + 1, j] = a[i, j + 1] + 1.0
+
+def sum_usecase(a):
+    total = 0.0
+    for j in range(a.shape[1]):
+        for i in range(a.shape[0]):
+            total += a[i, j]
+    return total
+
+def column_sum_usecase(a, out):
+    for j in range(a.shape[1]):
+        for i in range(a.shape[0]):
+            out[j] += a[i, j]
+
+def divide_usecase(a, out, d):
+    for j in range(a.shape[1]):
+        for i in range(a.shape[0]):
+            out[i, j] = a[i, j] / d
+
+def divide_arrays_usecase(a, b, out):
+    for j in range(a.shape[1]):
+        for i in range(a.shape[0]):
+            out[i, j] = a[i, j] / b[i, j]
+
+def raise_usecase(a, out):
+    for j in range(a.shape[1]):
+        for i in range(a.shape[0]):
+            if a[i, j] < 0:
+                raise ValueError
+            out[i, j] = a[i, j]
+
+def transpose_usecase(a, out):
+    for i in range(1, out.shape[0]):
+        for j in range(out.shape[1]):
+            out[i, j] = a[j, i] * 2.0
+
+def matmul_usecase(a, b, out):
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            for k in range(a.shape[1]):
+                out[i, j] += a[i, k] * b[k, j]
+
+
+class TestLoopNests(TestCase):
+
+    def compile(self, pyfunc, argtys, flags=interchange_flags):
+        """
+        Compile *pyfunc* and return the entry point and the transformed
+        LoopNest objects.
+        """
+        found = []
+        orig = loopnest.LoopNestOptimizer.find_nests
+
+        def find_nests(optimizer):
+            nests = orig(optimizer)
+            found.extend(nests)
+            return nests
+
+        loopnest.LoopNestOptimizer.find_nests = find_nests
+        try:
+            cres = compile_isolated(pyfunc, argtys, flags=flags)
+        finally:
+            loopnest.LoopNestOptimizer.find_nests = orig
+        return cres.entry_point, found
+
+    def check_arrays(self, pyfunc, cfunc, *arrays):
+        expected = [a.copy() for a in arrays]
+        got = [a.copy() for a in arrays]
+        res = pyfunc(*expected)
+        self.assertPreciseEqual(cfunc(*got), res)
+        for x, y in zip(got, expected):
+            self.assertPreciseEqual(x, y)
+
+    def test_arrays_may_overlap(self):
+        a = np.zeros((4, 5))
+        self.assertTrue(loopnest.arrays_may_overlap(a, a.T))
+        self.assertTrue(loopnest.arrays_may_overlap(np.ones(3), a[1:], a))
+        self.assertFalse(loopnest.arrays_may_overlap(a, np.ones(3)))
+        self.assertFalse(loopnest.arrays_may_overlap(a[:2], a[2:]))
+
+    def test_interchange(self):
+        a = np.arange(20.0).reshape((4, 5))
+        arrty = types.Array(types.float64, 2, 'C')
+        cfunc, nests = self.compile(scale_usecase, (arrty, arrty))
+        self.assertEqual([nest.interchange for nest in nests], [True])
+        self.check_arrays(scale_usecase, cfunc, a, np.zeros_like(a))
+        # The loops already walk Fortran-ordered arrays contiguously
+        arrty = types.Array(types.float64, 2, 'F')
+        cfunc, nests = self.compile(scale_usecase, (arrty, arrty))
+        self.assertEqual(nests, [])
+        a = np.asfortranarray(a)
+        self.check_arrays(scale_usecase, cfunc, a, np.zeros_like(a))
+
+    def test_disabled(self):
+        # Interchange is opt-in
+        arrty = types.Array(types.float64, 2, 'C')
+        with override_config('LOOP_INTERCHANGE', 0):
+            cfunc, nests = self.compile(scale_usecase, (arrty, arrty),
+                                        flags=no_pyobj_flags)
+        self.assertEqual(nests, [])
+        with override_config('LOOP_INTERCHANGE', 1):
+            cfunc, nests = self.compile(scale_usecase, (arrty, arrty),
+                                        flags=no_pyobj_flags)
+        self.assertEqual([nest.interchange for nest in nests], [True])
+
+    def test_illegal_interchange(self):
+        # Interchanging the loops would read the updated elements
+        a = np.arange(30.0).reshape((5, 6))
+        arrty = types.Array(types.float64, 2, 'C')
+        cfunc, nests = self.compile(shift_usecase, (arrty,))
+        self.assertEqual(nests, [])
+        self.check_arrays(shift_usecase, cfunc, a)
+
+    def test_reduction(self):
+        # The order of the additions must be kept
+        a = np.linspace(0, 1, 30).reshape((5, 6))
+        cfunc, nests = self.compile(sum_usecase,
+                                    (types.Array(types.float64, 2, 'C'),))
+        self.assertEqual(nests, [])
+        self.assertPreciseEqual(cfunc(a), sum_usecase(a))
+
+    def test_array_reduction(self):
+        # The additions into each element of out keep their order
+        a = np.linspace(0, 1, 30).reshape((5, 6))
+        arrty = types.Array(types.float64, 2, 'C')
+        outty = types.Array(types.float64, 1, 'C')
+        cfunc, nests = self.compile(column_sum_usecase, (arrty, outty))
+        self.assertEqual([nest.interchange for nest in nests], [True])
+        self.check_arrays(column_sum_usecase, cfunc, a, np.zeros(6))
+
+    def test_invariant_division(self):
+        # Dividing by a loop-invariant value raises in the first iteration
+        # of both loop orders
+        a = np.arange(30.0).reshape((5, 6))
+        arrty = types.Array(types.float64, 2, 'C')
+        cfunc, nests = self.compile(divide_usecase,
+                                    (arrty, arrty, types.float64))
+        self.assertEqual([nest.interchange for nest in nests], [True])
+        self.check_arrays(lambda a, out: divide_usecase(a, out, 4.0),
+                          lambda a, out: cfunc(a, out, 4.0),
+                          a, np.zeros_like(a))
+        out = np.zeros_like(a)
+        with self.assertRaises(ZeroDivisionError):
+            cfunc(a, out, 0.0)
+        self.assertPreciseEqual(out, np.zeros_like(a))
+
+    def test_raising_loops(self):
+        # The exception raised, and the elements written before it,
+        # depend on the iteration order
+        arrty = types.Array(types.float64, 2, 'C')
+        cfunc, nests = self.compile(divide_arrays_usecase,
+                                    (arrty, arrty, arrty))
+        self.assertEqual(nests, [])
+        a = np.arange(30.0).reshape((5, 6))
+        b = np.ones_like(a)
+        b[3, 1] = 0.0
+        got = np.zeros_like(a)
+        expected = np.zeros_like(a)
+        with self.assertRaises(ZeroDivisionError):
+            cfunc(a, b, got)
+        with self.assertRaises(ZeroDivisionError):
+            divide_arrays_usecase(a, b, expected)
+        self.assertPreciseEqual(got, expected)
+
+        cfunc, nests = self.compile(raise_usecase, (arrty, arrty))
+        self.assertEqual(nests, [])
+        a[1, 4] = -1.0
+        got = np.zeros_like(a)
+        expected = np.zeros_like(a)
+        with self.assertRaises(ValueError):
+            cfunc(a, got)
+        with self.assertRaises(ValueError):
+            raise_usecase(a, expected)
+        self.assertPreciseEqual(got, expected)
+
+    def test_overlapping_arrays(self):
+        a = np.arange(30.0).reshape((5, 6))
+        arrty = types.Array(types.float64, 2, 'C')
+        cfunc, nests = self.compile(shift_copy_usecase, (arrty, arrty))
+        self.assertEqual([nest.interchange for nest in nests], [True])
+        self.check_arrays(shift_copy_usecase, cfunc, a, np.zeros_like(a))
+        # The original loop nest runs when the arrays overlap
+        got = a.copy()
+        expected = a.copy()
+        cfunc(got, got)
+        shift_copy_usecase(expected, expected)
+        self.assertPreciseEqual(got, expected)
+
+    def test_tiling(self):
+        arrty = types.Array(types.float64, 2, 'C')
+        with override_config('LOOP_TILE_SIZE', 4):
+            cfunc, nests = self.compile(transpose_usecase, (arrty, arrty),
+                                        flags=tiling_flags)
+        self.assertEqual([nest.tile for nest in nests], [True])
+        self.assertEqual([nest.interchange for nest in nests], [False])
+        for m, n in [(1, 1), (4, 8), (10, 7), (3, 13)]:
+            a = np.arange(m * n, dtype=np.float64).reshape((m, n))
+            self.check_arrays(transpose_usecase, cfunc, a,
+                              np.zeros((n, m)))
+
+    def test_matmul(self):
+        # The two inner loops are interchanged
+        arrty = types.Array(types.float64, 2, 'C')
+        cfunc, nests = self.compile(matmul_usecase, (arrty, arrty, arrty))
+        self.assertEqual([nest.interchange for nest in nests], [True])
+        a = np.arange(12.0).reshape((3, 4))
+        b = np.linspace(0, 1, 20).reshape((4, 5))
+        self.check_arrays(matmul_usecase, cfunc, a, b, np.zeros((3, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
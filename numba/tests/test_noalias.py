@@ -0,0 +1,129 @@
+"""
+Tests for the noalias option and the runtime overlap checks of array
+arguments.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import jit, vectorize, guvectorize, _helperlib
+from numba.compiler import Flags
+from numba.targets.cpu import CPUTargetOptions
+from .support import TestCase
+
+
+def axpy_usecase(alpha, x, y, out):
+    for i in range(x.shape[0]):
+        out[i] = alpha * x[i] + y[i]
+
+def shift_usecase(a, b):
+    for i in range(a.shape[0] - 1):
+        b[i + 1] = a[i] + 1.0
+
+def add_usecase(x, y):
+    return x + y
+
+def gufunc_usecase(a, b, out):
+    for i in range(a.shape[0]):
+        out[i] = a[i] * b[i]
+
+def alloc_axpy_usecase(n):
+    x = np.ones(n)
+    y = np.arange(n)
+    out = np.empty(n)
+    axpy_noalias(2.0, x, y, out)
+    return out.sum()
+
+axpy_noalias = jit(nopython=True, noalias=True)(axpy_usecase)
+
+
+class TestNoalias(TestCase):
+
+    axpy_sig = "void(float64, float64[::1], float64[::1], float64[::1])"
+
+    def test_flags(self):
+        flags = CPUTargetOptions.parse_as_flags(Flags(), {'noalias': True})
+        self.assertTrue(flags.noalias)
+        flags = CPUTargetOptions.parse_as_flags(Flags(), {})
+        self.assertFalse(flags.noalias)
+
+    def test_llvm(self):
+        cfunc = jit(self.axpy_sig, nopython=True, noalias=True)(axpy_usecase)
+        llvm_ir = cfunc.inspect_llvm(cfunc.signatures[0])
+        self.assertIn(".noalias", llvm_ir)
+        self.assertIn("noalias", llvm_ir)
+        cfunc = jit(self.axpy_sig, nopython=True)(axpy_usecase)
+        llvm_ir = cfunc.inspect_llvm(cfunc.signatures[0])
+        self.assertNotIn(".noalias", llvm_ir)
+
+    def test_disjoint(self):
+        cfunc = jit(self.axpy_sig, nopython=True, noalias=True)(axpy_usecase)
+        x = np.linspace(-1, 1, 101)
+        y = x[::-1].copy()
+        got = np.zeros_like(x)
+        expected = np.zeros_like(x)
+        cfunc(2.0, x, y, got)
+        axpy_usecase(2.0, x, y, expected)
+        self.assertPreciseEqual(got, expected)
+
+    def test_overlapping(self):
+        # The generic code runs when the arrays share memory
+        cfunc = jit("void(float64[:], float64[:])", nopython=True,
+                    noalias=True)(shift_usecase)
+        for make_args in [lambda a: (a, a),
+                          lambda a: (a[:-1], a[1:]),
+                          lambda a: (a[1:], a[:-1]),
+                          lambda a: (a[::2], a[1::2])]:
+            got = np.arange(20.0)
+            expected = got.copy()
+            cfunc(*make_args(got))
+            shift_usecase(*make_args(expected))
+            self.assertPreciseEqual(got, expected)
+        # Reversed views span the same memory
+        got = np.arange(20.0)
+        expected = got.copy()
+        cfunc(got, got[::-1])
+        shift_usecase(expected, expected[::-1])
+        self.assertPreciseEqual(got, expected)
+        # Empty arrays don't overlap anything
+        a = np.arange(20.0)
+        cfunc(a[:0], a)
+        self.assertPreciseEqual(a, np.arange(20.0))
+
+    def test_refcount(self):
+        # Arrays allocated in nopython mode, passed to both versions of
+        # the function, must be released exactly once
+        live_meminfos = _helperlib.meminfo_count()
+        cfunc = jit(nopython=True)(alloc_axpy_usecase)
+        self.assertPreciseEqual(cfunc(10), alloc_axpy_usecase(10))
+        self.assertEqual(_helperlib.meminfo_count(), live_meminfos)
+
+    def test_vectorize(self):
+        for noalias in (False, True):
+            ufunc = vectorize(["float64(float64, float64)"],
+                              noalias=noalias)(add_usecase)
+            a = np.arange(100.0)
+            b = a[::-1].copy()
+            self.assertPreciseEqual(ufunc(a, b), a + b)
+            # In-place operation
+            expected = a + a
+            ufunc(a, a, out=a)
+            self.assertPreciseEqual(a, expected)
+            # Output overlapping an input
+            a = np.arange(100.0)
+            expected = a[1:] + b[:-1]
+            ufunc(a[1:], b[:-1], out=a[:-1])
+            self.assertPreciseEqual(a[:-1], expected)
+
+    def test_guvectorize(self):
+        gufunc = guvectorize(["void(float64[:], float64[:], float64[:])"],
+                             "(n),(n)->(n)", noalias=True)(gufunc_usecase)
+        a = np.arange(20.0).reshape((4, 5))
+        b = a + 1.0
+        self.assertPreciseEqual(gufunc(a, b), a * b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -29,6 +29,8 @@ class TestFromDtype(TestCase):
             self.assertEqual(dtype, numpy_support.as_dtype(numba_type))
 
         check('?', types.bool_)
+        check('e', types.float16)
+        check('f2', types.float16)
         check('f', types.float32)
         check('f4', types.float32)
         check('d', types.float64)
@@ -283,6 +285,9 @@ class TestUFuncs(TestCase):
         check(np_add, (types.int16, types.uint16), 'ii->i')
         check(np_add, (types.complex64, types.float64), 'DD->D')
         check(np_add, (types.float64, types.complex64), 'DD->D')
+        # Half precision is computed on by the single precision loop
+        check(np_add, (types.float16, types.float16), 'ff->f')
+        check(np_add, (types.float16, types.float32), 'ff->f')
         # With some timedelta64 arguments as well
         check(np_mul, (types.NPTimedelta('s'), types.int32),
               'mq->m', output_types=(types.NPTimedelta('s'),))
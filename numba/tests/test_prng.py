@@ -0,0 +1,143 @@
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import jit, prng, types
+from .support import TestCase
+
+
+def gen_next_uint64(gen, n):
+    out = np.empty(n, np.uint64)
+    for i in range(n):
+        out[i] = gen.next_uint64()
+    return out
+
+def gen_random(gen, n):
+    out = np.empty(n)
+    for i in range(n):
+        out[i] = gen.random()
+    return out
+
+def gen_standard_normal(gen, n):
+    out = np.empty(n)
+    for i in range(n):
+        out[i] = gen.standard_normal()
+    return out
+
+def gen_standard_exponential(gen, n):
+    out = np.empty(n)
+    for i in range(n):
+        out[i] = gen.standard_exponential()
+    return out
+
+def gen_two(gen1, gen2):
+    return gen1.next_uint64(), gen2.next_uint64()
+
+
+class TestGenerators(TestCase):
+
+    generator_classes = (prng.Philox4x32, prng.PCG64, prng.Xoroshiro128Plus)
+
+    def test_typeof(self):
+        for cls in self.generator_classes:
+            gen = cls(1)
+            self.assertEqual(gen._numba_type_, types.RandomGenerator(cls.engine))
+
+    def test_philox_known_answer(self):
+        # From the Random123 known answer tests
+        self.assertEqual(prng.philox4x32_block(0, 0),
+                         (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8))
+        self.assertEqual(
+            prng.philox4x32_block(0xffffffffffffffffffffffffffffffff,
+                                  0xffffffffffffffff),
+            (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd))
+
+    def test_pcg64_matches_numpy(self):
+        if not hasattr(np.random, "PCG64"):
+            self.skipTest("needs numpy.random.PCG64")
+        gen = prng.PCG64(12345, stream=7)
+        words = gen.state
+        ref = np.random.PCG64()
+        ref.state = {'bit_generator': 'PCG64',
+                     'state': {'state': words[0] | (words[1] << 64),
+                               'inc': words[2] | (words[3] << 64)},
+                     'has_uint32': 0, 'uinteger': 0}
+        expected = [int(ref.random_raw()) for i in range(10)]
+        self.assertEqual([gen.next_uint64() for i in range(10)], expected)
+
+    def check_against_python(self, pyfunc, assert_equal):
+        cfunc = jit(nopython=True)(pyfunc)
+        for cls in self.generator_classes:
+            gen = cls(42)
+            ref = gen.copy()
+            got = cfunc(gen, 1001)
+            expected = [getattr(ref, pyfunc.__name__[4:])()
+                        for i in range(1001)]
+            assert_equal(got, np.array(expected, dtype=got.dtype))
+            # The compiled code updated the generator's state in place
+            self.assertEqual(gen.state, ref.state)
+
+    def test_next_uint64(self):
+        self.check_against_python(gen_next_uint64, self.assertPreciseEqual)
+
+    def test_random(self):
+        self.check_against_python(gen_random, self.assertPreciseEqual)
+
+    def test_standard_normal(self):
+        self.check_against_python(
+            gen_standard_normal,
+            lambda a, b: np.testing.assert_allclose(a, b, rtol=1e-12))
+
+    def test_standard_exponential(self):
+        self.check_against_python(
+            gen_standard_exponential,
+            lambda a, b: np.testing.assert_allclose(a, b, rtol=1e-12))
+
+    def test_ziggurat_moments(self):
+        gen = prng.PCG64(0)
+        a = jit(nopython=True)(gen_standard_normal)(gen, 200000)
+        self.assertLess(abs(a.mean()), 0.01)
+        self.assertLess(abs(a.std() - 1.0), 0.01)
+        a = jit(nopython=True)(gen_standard_exponential)(gen, 200000)
+        self.assertLess(abs(a.mean() - 1.0), 0.01)
+        self.assertLess(abs(a.std() - 1.0), 0.02)
+
+    def test_several_generators(self):
+        cfunc = jit(nopython=True)(gen_two)
+        a = prng.Philox4x32(1)
+        b = prng.Xoroshiro128Plus(1)
+        ra, rb = a.copy(), b.copy()
+        self.assertEqual(cfunc(a, b), (ra.next_uint64(), rb.next_uint64()))
+
+    def test_advance(self):
+        cfunc = jit(nopython=True)(gen_next_uint64)
+        for cls in self.generator_classes:
+            for n in (1, 2, 3, 1000):
+                gen = cls(5)
+                # Philox: start from the middle of a block
+                gen.next_uint64()
+                advanced = gen.advanced(n)
+                cfunc(gen, n)
+                self.assertEqual(gen.state, advanced.state)
+                self.assertEqual(gen.next_uint64(), advanced.next_uint64())
+
+    def test_jumped(self):
+        for cls in self.generator_classes:
+            gen = cls(5)
+            jumped = gen.jumped()
+            self.assertEqual(jumped.state, gen.advanced(cls.jump_size).state)
+            self.assertEqual(gen.jumped(2).state, jumped.jumped().state)
+            self.assertNotEqual(gen.next_uint64(), jumped.next_uint64())
+
+    def test_seeding(self):
+        for cls in self.generator_classes:
+            self.assertEqual(cls(3).state, cls(3).state)
+            self.assertNotEqual(cls(3).state, cls(4).state)
+            self.assertNotEqual(cls().state, cls().state)
+            with self.assertRaises(ValueError):
+                cls(-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,11 @@ from __future__ import print_function
 import os
 import tempfile
 import sys
+from platform import machine
 from ctypes import *
 from numba import unittest_support as unittest
-from numba.pycc import find_shared_ending, main
+from numba.pycc import find_shared_ending, main, parse_cpu_levels
+from numba.pycc import multiversion
 
 base_path = os.path.dirname(os.path.abspath(__file__))
 
@@ -54,6 +56,46 @@ class TestPYCC(unittest.TestCase):
         lib.multf(byref(res), None, None, 987, 321)
         self.assertEqual(res.value, 987 * 321)
 
+    @unittest.skipIf(machine() not in ('x86_64', 'AMD64'), "needs x86-64")
+    def test_pycc_cpu_levels(self):
+        """
+        Test creating a C shared library object with several versions
+        of the functions for different CPU levels.
+        """
+        unset_macosx_deployment_target()
+
+        modulename = os.path.join(base_path, 'compile_with_pycc')
+        cdll_modulename = os.path.join(tempfile.gettempdir(),
+                                       'compiled_with_pycc_levels'
+                                       + find_shared_ending())
+
+        def _cleanup():
+            if os.path.exists(cdll_modulename):
+                os.unlink(cdll_modulename)
+        _cleanup()
+        self.addCleanup(_cleanup)
+
+        main(args=['--cpu-levels', 'avx2,sse42',
+                   '-o', cdll_modulename, modulename + '.py'])
+        lib = CDLL(cdll_modulename)
+        lib.mult.argtypes = [POINTER(c_double), c_void_p, c_void_p,
+                             c_double, c_double]
+        lib.mult.restype = c_int
+
+        res = c_double()
+        lib.mult(byref(res), None, None, 123, 321)
+        self.assertEqual(res.value, 123 * 321)
+        # All versions are exported
+        for level in (None, 'sse42', 'avx2'):
+            name = multiversion.versioned_name('multf', level)
+            self.assertTrue(hasattr(lib, name), name)
+
+    def test_parse_cpu_levels(self):
+        self.assertEqual(parse_cpu_levels(''), [])
+        self.assertEqual(parse_cpu_levels('avx512, sse42,avx2,sse42'),
+                         ['sse42', 'avx2', 'avx512'])
+        self.assertRaises(ValueError, parse_cpu_levels, 'avx')
+
     def test_pycc_pymodule(self):
         """
         Test creating a CPython extension module using pycc.
@@ -4,13 +4,15 @@ import functools
 import math
 import os
 import random
+import struct
 import subprocess
 import sys
+import threading
 
 import numpy as np
 
 import numba.unittest_support as unittest
-from numba import jit, _helperlib, types
+from numba import config, jit, prng, _helperlib, types
 from numba.compiler import compile_isolated
 from .support import TestCase
 
@@ -72,6 +74,12 @@ numpy_random = jit_nullary("np.random.random")
 numpy_seed = jit_unary("np.random.seed")
 
 
+@jit(nopython=True, nogil=True)
+def numpy_fill_random(out):
+    for i in range(out.size):
+        out[i] = np.random.random()
+
+
 def _copy_py_state(r, ptr):
     """
     Copy state of Python random *r* to Numba state *ptr*.
@@ -589,9 +597,15 @@ class TestRandom(TestCase):
                                    np_state_ptr)
 
     def test_numpy_binomial(self):
-        # We follow Numpy's algorithm up to n*p == 30
-        self._follow_numpy(np_state_ptr, 0)
+        # Our implementation follows Numpy's: inversion up to n*p == 30,
+        # BTPE above.
+        r = self._follow_numpy(np_state_ptr, 0)
         binomial = jit_binary("np.random.binomial")
+        self._check_dist(binomial, r.binomial,
+                         [(10, 0.3), (10, 0.9), (100, 0.4), (100, 0.7),
+                          (1000000, 0.01), (1000000, 0.5),
+                          (10**12, 0.25)],
+                         niters=30)
         self.assertRaises(ValueError, binomial, -1, 0.5)
         self.assertRaises(ValueError, binomial, 10, -0.1)
         self.assertRaises(ValueError, binomial, 10, 1.1)
@@ -637,12 +651,18 @@ class TestRandom(TestCase):
         self._check_dist(gumbel, r.gumbel, [(0.0, 1.0), (-1.5, 3.5)])
 
     def test_numpy_hypergeometric(self):
-        # Our implementation follows Numpy's up to nsamples = 10.
+        # Our implementation follows Numpy's: sequential draws up to
+        # nsamples = 10, HRUA above.
         hg = jit_ternary("np.random.hypergeometric")
         r = self._follow_numpy(np_state_ptr)
         self._check_dist(hg, r.hypergeometric,
-                         [(1000, 5000, 10), (5000, 1000, 10)],
+                         [(1000, 5000, 10), (5000, 1000, 10),
+                          (1000, 5000, 100), (5000, 1000, 100),
+                          (50, 60, 100), (10**6, 10**6, 10**5)],
                          niters=30)
+        self.assertRaises(ValueError, hg, -1, 10, 5)
+        self.assertRaises(ValueError, hg, 10, -1, 20)
+        self.assertRaises(ValueError, hg, 10, 10, 21)
         # Sanity checks
         r = [hg(1000, 1000, 100) for i in range(100)]
         self.assertTrue(all(x >= 0 and x <= 100 for x in r), r)
@@ -826,6 +846,409 @@ class TestRandom(TestCase):
         self._check_startup_randomness("numpy_normal", (1.0, 1.0))
 
 
+def jit_size(name, argstring):
+    """
+    Compile a function calling *name* with the given arguments and a
+    *size* keyword argument.
+    """
+    params = argstring + ", size" if argstring else "size"
+    call = argstring + ", size=size" if argstring else "size=size"
+    s = """def func(%(params)s):
+        return %(name)s(%(call)s)
+""" % locals()
+    co = compile(s, "<string>", "exec")
+    ns = {}
+    eval(co, globals(), ns)
+    return jit(nopython=True)(ns['func'])
+
+def numpy_rand(a, b):
+    return np.random.rand(a, b)
+
+def numpy_randn(a):
+    return np.random.randn(a)
+
+
+class TestRandomArrays(TestCase):
+    """
+    Test the array-returning variants of the np.random functions.
+    """
+
+    # (function name, parameters)
+    distributions = [
+        ("np.random.random", ()),
+        ("np.random.uniform", (1.5, 3.0)),
+        ("np.random.standard_exponential", ()),
+        ("np.random.exponential", (2.0,)),
+        ("np.random.gumbel", (0.5, 2.0)),
+        ("np.random.pareto", (3.0,)),
+        ("np.random.weibull", (1.5,)),
+        ("np.random.normal", (1.0, 2.0)),
+        ("np.random.standard_normal", ()),
+        ("np.random.gamma", (2.0, 1.0)),
+        ("np.random.poisson", (3.0,)),
+        ("np.random.binomial", (10, 0.3)),
+        ("np.random.randint", (3, 10)),
+        ]
+
+    def _follow_numpy(self, seed=2):
+        r = np.random.RandomState(seed)
+        _copy_np_state(r, np_state_ptr)
+        return r
+
+    def check_against_scalar(self, name, params, size):
+        """
+        The array variant must draw the same numbers as repeated calls
+        to the scalar function.
+        """
+        argstring = ", ".join("abcd"[:len(params)])
+        afunc = jit_size(name, argstring)
+        sfunc = jit_with_args(name, argstring)
+        for offset in (0, 1):
+            self._follow_numpy()
+            if offset:
+                # Consume a single 32-bit integer, so that the state's
+                # index becomes odd
+                numpy_randint1(2)
+            got = afunc(*(params + (size,)))
+            self._follow_numpy()
+            if offset:
+                numpy_randint1(2)
+            shape = size if isinstance(size, tuple) else (size,)
+            expected = np.array([sfunc(*params)
+                                 for i in range(int(np.prod(shape)))])
+            self.assertEqual(got.shape, shape)
+            self.assertTrue(got.flags.c_contiguous)
+            self.assertPreciseEqual(got, expected.reshape(shape))
+
+    def test_against_scalar(self):
+        for name, params in self.distributions:
+            for size in (0, N * 2 + 7, (3, 5)):
+                self.check_against_scalar(name, params, size)
+
+    def test_against_numpy(self):
+        r = self._follow_numpy()
+        self.assertPreciseEqual(jit_size("np.random.random", "")(2000),
+                                r.random_sample(2000))
+        self.assertPreciseEqual(
+            jit_size("np.random.uniform", "a, b")(2.0, 5.0, (40, 30)),
+            r.uniform(2.0, 5.0, (40, 30)))
+        # The normal distribution involves transcendental functions
+        np.testing.assert_allclose(
+            jit_size("np.random.normal", "a, b")(1.0, 3.0, 1000),
+            r.normal(1.0, 3.0, 1000), rtol=1e-10)
+
+    def test_default_parameters(self):
+        cfunc = jit(nopython=True)(lambda n: np.random.normal(size=n))
+        r = self._follow_numpy()
+        np.testing.assert_allclose(cfunc(10), r.normal(0.0, 1.0, 10),
+                                   rtol=1e-10)
+        cfunc = jit(nopython=True)(lambda a, n: np.random.randint(a, size=n))
+        r = self._follow_numpy()
+        got = cfunc(10, 50)
+        self.assertEqual(got.shape, (50,))
+        self.assertTrue(np.all((got >= 0) & (got < 10)))
+        # size=None gives a scalar
+        cfunc = jit(nopython=True)(lambda: np.random.random(size=None))
+        self.assertIsInstance(cfunc(), float)
+
+    def test_rand_randn(self):
+        cfunc = jit(nopython=True)(numpy_rand)
+        r = self._follow_numpy()
+        self.assertPreciseEqual(cfunc(3, 4), r.rand(3, 4))
+        cfunc = jit(nopython=True)(numpy_randn)
+        r = self._follow_numpy()
+        np.testing.assert_allclose(cfunc(15), r.randn(15), rtol=1e-10)
+
+    def test_negative_size(self):
+        with self.assertRaises(ValueError):
+            jit_size("np.random.random", "")(-1)
+
+
+def numpy_permutation(x):
+    return np.random.permutation(x)
+
+def numpy_choice1(a):
+    return np.random.choice(a)
+
+def numpy_choice2(a, size):
+    return np.random.choice(a, size)
+
+def numpy_choice3(a, size, replace):
+    return np.random.choice(a, size, replace)
+
+def numpy_choice_p(a, p):
+    return np.random.choice(a, p=p)
+
+def numpy_choice_size_p(a, size, replace, p):
+    return np.random.choice(a, size, replace, p)
+
+def numpy_multinomial2(n, pvals):
+    return np.random.multinomial(n, pvals)
+
+def numpy_multinomial3(n, pvals, size):
+    return np.random.multinomial(n, pvals, size=size)
+
+
+class TestRandomSampling(TestCase):
+    """
+    Test np.random.permutation(), np.random.choice() and
+    np.random.multinomial().
+    """
+
+    def setUp(self):
+        self.live_meminfos = _helperlib.meminfo_count()
+
+    def tearDown(self):
+        # Check that no temporary was leaked by the compiled code
+        self.assertEqual(_helperlib.meminfo_count(), self.live_meminfos)
+
+    def _follow_numpy(self, seed=2):
+        r = np.random.RandomState(seed)
+        _copy_np_state(r, np_state_ptr)
+        return r
+
+    def test_permutation(self):
+        cfunc = jit(nopython=True)(numpy_permutation)
+        for x in (10, 0, np.arange(20) * 1.5, np.arange(30)[::3]):
+            r = self._follow_numpy()
+            got = cfunc(x)
+            self.assertPreciseEqual(got, r.permutation(x))
+        # The argument is left untouched
+        a = np.arange(10)
+        cfunc(a)
+        self.assertPreciseEqual(a, np.arange(10))
+
+    def test_choice(self):
+        """
+        Without weights, the same numbers as Numpy are drawn.
+        """
+        a = np.arange(10) * 2.5
+        cfunc = jit(nopython=True)(numpy_choice1)
+        for pop in (a, 10):
+            r = self._follow_numpy()
+            self.assertPreciseEqual([cfunc(pop) for i in range(20)],
+                                    [r.choice(pop) for i in range(20)])
+        cfunc = jit(nopython=True)(numpy_choice2)
+        for pop in (a, 10):
+            for size in (5, (3, 4), 0):
+                r = self._follow_numpy()
+                self.assertPreciseEqual(cfunc(pop, size), r.choice(pop, size))
+        cfunc = jit(nopython=True)(numpy_choice3)
+        for pop in (a, 10):
+            for replace in (True, False):
+                r = self._follow_numpy()
+                self.assertPreciseEqual(cfunc(pop, (2, 5), replace),
+                                        r.choice(pop, (2, 5), replace))
+
+    def test_choice_weighted(self):
+        p = np.array([0.1, 0.0, 0.5, 0.15, 0.25])
+        a = np.arange(5) * 2.5
+        # Single draws are the same as Numpy's
+        cfunc = jit(nopython=True)(numpy_choice_p)
+        for pop in (a, 5):
+            r = self._follow_numpy()
+            self.assertPreciseEqual([cfunc(pop, p) for i in range(20)],
+                                    [r.choice(pop, p=p) for i in range(20)])
+        # Arrays of draws use an alias table: check the frequencies
+        cfunc = jit(nopython=True)(numpy_choice_size_p)
+        n = 200000
+        got = cfunc(5, n, True, p)
+        self.assertEqual(got.shape, (n,))
+        freqs = np.bincount(got, minlength=5) / n
+        np.testing.assert_allclose(freqs, p, atol=0.005)
+        self.assertEqual(freqs[1], 0.0)
+        got = cfunc(a, (20, 30), True, p)
+        self.assertEqual(got.shape, (20, 30))
+        self.assertTrue(np.all(np.in1d(got, a[p > 0])))
+        # Without replacement
+        for i in range(100):
+            got = cfunc(5, 4, False, p)
+            self.assertEqual(sorted(got), [0, 2, 3, 4])
+
+    def test_choice_errors(self):
+        p = np.array([0.5, 0.6])
+        cfunc = jit(nopython=True)(numpy_choice_p)
+        with self.assertRaises(ValueError) as raises:
+            cfunc(2, p)
+        self.assertIn("probabilities do not sum to 1", str(raises.exception))
+        with self.assertRaises(ValueError) as raises:
+            cfunc(3, np.array([0.5, 0.5]))
+        self.assertIn("a and p must have same size", str(raises.exception))
+        with self.assertRaises(ValueError) as raises:
+            cfunc(2, np.array([1.5, -0.5]))
+        self.assertIn("non-negative", str(raises.exception))
+        cfunc = jit(nopython=True)(numpy_choice3)
+        with self.assertRaises(ValueError) as raises:
+            cfunc(5, 6, False)
+        self.assertIn("larger sample than population", str(raises.exception))
+        cfunc = jit(nopython=True)(numpy_choice1)
+        with self.assertRaises(ValueError) as raises:
+            cfunc(0)
+        self.assertIn("a must be non-empty", str(raises.exception))
+
+    def test_multinomial(self):
+        pvals = np.array([0.2, 0.3, 0.1, 0.4])
+        cfunc = jit(nopython=True)(numpy_multinomial2)
+        r = self._follow_numpy()
+        for n in (1, 10, 20):
+            self.assertPreciseEqual(cfunc(n, pvals), r.multinomial(n, pvals))
+        cfunc = jit(nopython=True)(numpy_multinomial3)
+        for size in (5, (2, 3)):
+            r = self._follow_numpy()
+            self.assertPreciseEqual(cfunc(10, pvals, size),
+                                    r.multinomial(10, pvals, size))
+        # Large n: the binomial draws use BTPE, like Numpy
+        r = self._follow_numpy()
+        got = cfunc(10000, pvals, 3)
+        self.assertPreciseEqual(got, r.multinomial(10000, pvals, 3))
+        self.assertPreciseEqual(got.sum(axis=1), np.array([10000] * 3))
+        with self.assertRaises(ValueError):
+            cfunc(10, np.array([0.8, 0.8, 0.1]), 2)
+
+
+class TestZiggurat(TestCase):
+    """
+    Test the Ziggurat mode (config.RANDOM_ZIGGURAT) of the np.random
+    normal and exponential functions.
+    """
+
+    def setUp(self):
+        self.old_ziggurat = config.RANDOM_ZIGGURAT
+        config.RANDOM_ZIGGURAT = 1
+
+    def tearDown(self):
+        config.RANDOM_ZIGGURAT = self.old_ziggurat
+
+    def _follow_numpy(self, seed=2):
+        """
+        Return functions drawing 64-bit integers and doubles in the same
+        way as the Numba state, reset to a fresh Numpy state.
+        """
+        r = np.random.RandomState(seed)
+        _copy_np_state(r, np_state_ptr)
+        def next_uint64():
+            a, b = struct.unpack("<II", r.bytes(8))
+            return (a << 32) | b
+        return next_uint64, r.random_sample
+
+    def check_against_reference(self, name, params, sampler, transform):
+        argstring = ", ".join("abcd"[:len(params)])
+        cfunc = jit_with_args(name, argstring)
+        sources = self._follow_numpy()
+        got = [cfunc(*params) for i in range(1000)]
+        expected = [transform(sampler(*sources), *params)
+                    for i in range(1000)]
+        np.testing.assert_allclose(got, expected, rtol=1e-12)
+
+        # The array variant draws the same numbers
+        afunc = jit_size(name, argstring)
+        sources = self._follow_numpy()
+        got = afunc(*(params + ((20, 50),)))
+        self.assertEqual(got.shape, (20, 50))
+        expected = [transform(sampler(*sources), *params)
+                    for i in range(1000)]
+        np.testing.assert_allclose(got.flatten(), expected, rtol=1e-12)
+
+    def test_normal(self):
+        normal = lambda z, mu=0.0, sigma=1.0: mu + sigma * z
+        self.check_against_reference("np.random.standard_normal", (),
+                                     prng.ziggurat_normal, normal)
+        self.check_against_reference("np.random.normal", (1.5, 2.0),
+                                     prng.ziggurat_normal, normal)
+
+    def test_exponential(self):
+        exponential = lambda z, scale=1.0: scale * z
+        self.check_against_reference("np.random.standard_exponential", (),
+                                     prng.ziggurat_exponential, exponential)
+        self.check_against_reference("np.random.exponential", (3.0,),
+                                     prng.ziggurat_exponential, exponential)
+
+    def test_moments(self):
+        n = 200000
+        self._follow_numpy()
+        a = jit_size("np.random.standard_normal", "")(n)
+        self.assertLess(abs(a.mean()), 0.01)
+        self.assertLess(abs(a.std() - 1.0), 0.01)
+        # The tail beyond R is sampled with the right frequency
+        tail = np.mean(np.abs(a) > prng.ZIGGURAT_NORMAL_R)
+        self.assertLess(tail, 1e-3)
+        a = jit_size("np.random.standard_exponential", "")(n)
+        self.assertLess(abs(a.mean() - 1.0), 0.01)
+        self.assertLess(abs(a.std() - 1.0), 0.02)
+        self.assertGreaterEqual(a.min(), 0.0)
+
+
+class TestThreads(TestCase):
+    """
+    Check the per-thread random states used by nogil functions.
+    """
+
+    n_threads = 4
+    n_numbers = N * 3 + 10
+
+    def run_in_threads(self):
+        """
+        Run numpy_fill_random() in several concurrent threads and return
+        the sets of numbers drawn by each thread.
+        """
+        results = [np.zeros(self.n_numbers) for i in range(self.n_threads)]
+        threads = [threading.Thread(target=numpy_fill_random, args=(out,))
+                   for out in results]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        return set(tuple(out) for out in results)
+
+    def expected_streams(self, seed_ints):
+        """
+        The streams expected for the threads spawned after the global
+        state was seeded into *seed_ints*.
+        """
+        streams = set()
+        for k in range(1, self.n_threads + 1):
+            key = np.array(list(seed_ints) + [k], dtype=np.uint32)
+            r = np.random.RandomState(key)
+            streams.add(tuple(r.random_sample(self.n_numbers)))
+        return streams
+
+    def test_thread_streams(self):
+        # Warm up compilation
+        numpy_fill_random(np.zeros(1))
+        numpy_seed(42)
+        seed_ints = _helperlib.rnd_get_state(np_state_ptr)[1]
+        got = self.run_in_threads()
+        self.assertEqual(len(got), self.n_threads)
+        self.assertEqual(got, self.expected_streams(seed_ints))
+        # The main thread's stream isn't disturbed by other threads
+        r = np.random.RandomState(np.uint32(42))
+        self.assertPreciseEqual(numpy_random(), r.uniform(0.0, 1.0))
+        # Reseeding the global state resets the threads' streams
+        numpy_seed(42)
+        self.assertEqual(self.run_in_threads(), got)
+        numpy_seed(43)
+        self.assertNotEqual(self.run_in_threads(), got)
+
+    def test_thread_seed(self):
+        # Seeding from another thread only affects that thread's state
+        @jit(nopython=True, nogil=True)
+        def seed_and_fill(seed, out):
+            np.random.seed(seed)
+            for i in range(out.size):
+                out[i] = np.random.random()
+
+        numpy_seed(42)
+        expected = [numpy_random() for i in range(5)]
+        out = np.zeros(5)
+        th = threading.Thread(target=seed_and_fill, args=(1, out))
+        th.start()
+        th.join()
+        r = np.random.RandomState(np.uint32(1))
+        self.assertPreciseEqual(out, r.random_sample(5))
+        numpy_seed(42)
+        self.assertPreciseEqual([numpy_random() for i in range(5)], expected)
+
+
 if __name__ == "__main__":
     unittest.main()
 
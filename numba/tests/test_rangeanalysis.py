@@ -0,0 +1,112 @@
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+import numba.unittest_support as unittest
+from numba import bytecode, compiler, rangeanalysis, types, typing
+from numba.compiler import compile_isolated, Flags
+from .support import TestCase
+
+no_pyobj_flags = Flags()
+
+
+def loops_usecase(a, n):
+    total = 0.0
+    for i in range(a.shape[0]):
+        for j in range(1, a.shape[1] - 1):
+            k = i * 2 + j // 3
+            m = j - 1
+            s = max(i, n)
+            total += a[i, j] + k + m + s
+    return total
+
+def counter_usecase(a):
+    i = 0
+    j = a.shape[0]
+    while i < a.shape[0]:
+        a[i] = i
+        i += 1
+        j -= 1
+    return j
+
+def range_usecase(n, start, stop):
+    total = 0
+    for i in range(start, n):
+        for j in range(start, stop, -1):
+            total += i + j
+    return total
+
+def shifted_usecase(a, out):
+    for i in range(a.shape[0]):
+        out[i] = a[i - 1] + a[i]
+
+def sum2d_usecase(a):
+    total = 0.0
+    for i in range(a.shape[0]):
+        for j in range(a.shape[1]):
+            total += a[i, j] * (i + j + 1)
+    return total
+
+
+class TestNonNegativeAnalysis(TestCase):
+
+    def analyze(self, pyfunc, argtys):
+        interp = compiler.translate_stage(bytecode.ByteCode(func=pyfunc))
+        typemap, _, _ = compiler.type_inference_stage(typing.Context(),
+                                                      interp, argtys, None)
+        return rangeanalysis.find_nonnegative_variables(interp.blocks,
+                                                        typemap)
+
+    def test_loops(self):
+        nonneg = self.analyze(loops_usecase,
+                              (types.Array(types.float64, 2, 'C'),
+                               types.intp))
+        self.assertIn('i', nonneg)
+        self.assertIn('j', nonneg)
+        self.assertIn('k', nonneg)
+        self.assertIn('s', nonneg)
+        self.assertNotIn('m', nonneg)
+        self.assertNotIn('n', nonneg)
+        self.assertNotIn('total', nonneg)
+
+    def test_counter(self):
+        nonneg = self.analyze(counter_usecase,
+                              (types.Array(types.intp, 1, 'C'),))
+        self.assertIn('i', nonneg)
+        self.assertNotIn('j', nonneg)
+
+    def test_range(self):
+        nonneg = self.analyze(range_usecase, (types.intp,) * 3)
+        # Depends on the sign of the start and stop arguments
+        self.assertNotIn('i', nonneg)
+        self.assertNotIn('j', nonneg)
+        nonneg = self.analyze(range_usecase, (types.intp, types.uint32,
+                                              types.intp))
+        self.assertIn('i', nonneg)
+        self.assertNotIn('j', nonneg)
+        nonneg = self.analyze(range_usecase, (types.intp, types.uint32,
+                                              types.uint32))
+        self.assertIn('j', nonneg)
+
+    def test_wraparound(self):
+        # Negative indices still wrap around
+        arrty = types.Array(types.float64, 1, 'C')
+        cres = compile_isolated(shifted_usecase, (arrty, arrty),
+                                flags=no_pyobj_flags)
+        a = np.arange(10.0)
+        got = np.zeros_like(a)
+        expected = np.zeros_like(a)
+        cres.entry_point(a, got)
+        shifted_usecase(a, expected)
+        self.assertPreciseEqual(got, expected)
+
+    def test_2d_indexing(self):
+        cres = compile_isolated(sum2d_usecase,
+                                (types.Array(types.float64, 2, 'A'),),
+                                flags=no_pyobj_flags)
+        a = np.arange(24.0).reshape((4, 6))[:, ::2]
+        self.assertPreciseEqual(cres.entry_point(a), sum2d_usecase(a))
+
+
+if __name__ == '__main__':
+    unittest.main()
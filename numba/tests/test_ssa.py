@@ -0,0 +1,118 @@
+"""
+Tests for holding variables in LLVM registers instead of stack slots.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import lowering, types
+from numba.compiler import compile_isolated, Flags
+from .support import TestCase, override_config
+
+no_pyobj_flags = Flags()
+
+
+def branch_usecase(x, y):
+    z = x * 2
+    if x > y:
+        w = z + y
+        r = w
+    else:
+        r = z - y
+    return r + z
+
+def loop_usecase(a):
+    n = a.shape[0]
+    total = 0.0
+    for i in range(n):
+        v = a[i] * 2.0
+        total += v
+    return total / n
+
+def nested_loop_usecase(n, m):
+    acc = 0
+    k = 1
+    for i in range(n):
+        j = 0
+        while j < m:
+            if (i + j) % 3 == 0:
+                k = k * 2
+            elif j > i:
+                acc -= k
+                break
+            else:
+                acc += i * j
+            j += 1
+    return acc + k
+
+
+class TestSSAVariables(TestCase):
+
+    def compile(self, pyfunc, argtys):
+        """
+        Compile *pyfunc* and return the entry point and the variables
+        held in registers.
+        """
+        found = []
+        orig = lowering.Lower.find_ssa_variables
+
+        def find_ssa_variables(lower):
+            ssa_vars = orig(lower)
+            found.append(ssa_vars)
+            return ssa_vars
+
+        lowering.Lower.find_ssa_variables = find_ssa_variables
+        try:
+            cres = compile_isolated(pyfunc, argtys, flags=no_pyobj_flags)
+        finally:
+            lowering.Lower.find_ssa_variables = orig
+        return cres.entry_point, found[0]
+
+    def test_branch(self):
+        cfunc, ssa_vars = self.compile(branch_usecase,
+                                       (types.intp, types.intp))
+        for args in [(3, 2), (2, 3)]:
+            self.assertPreciseEqual(cfunc(*args), branch_usecase(*args))
+        # z dominates its uses, w is used in its own block
+        self.assertIn('z', ssa_vars)
+        self.assertIn('w', ssa_vars)
+        # r is defined in both branches, and merged by a phi node
+        self.assertIn('r', ssa_vars)
+        self.assertIn('x', ssa_vars)
+
+    def test_loop(self):
+        cfunc, ssa_vars = self.compile(loop_usecase,
+                                       (types.Array(types.float64, 1, 'C'),))
+        a = np.linspace(0, 1, 11)
+        self.assertPreciseEqual(cfunc(a), loop_usecase(a))
+        # Assigned once, even though the loop body runs several times
+        self.assertIn('n', ssa_vars)
+        self.assertIn('i', ssa_vars)
+        self.assertIn('v', ssa_vars)
+        # Updated in the loop body
+        self.assertIn('total', ssa_vars)
+        # Arrays are refcounted
+        self.assertNotIn('a', ssa_vars)
+
+    def test_nested_loops(self):
+        cfunc, ssa_vars = self.compile(nested_loop_usecase,
+                                       (types.intp, types.intp))
+        for args in [(0, 0), (1, 5), (5, 1), (6, 7), (10, 4)]:
+            self.assertPreciseEqual(cfunc(*args), nested_loop_usecase(*args))
+        # Merged at the loop headers and after the branches
+        for name in ('acc', 'k', 'i', 'j'):
+            self.assertIn(name, ssa_vars)
+
+    def test_disabled(self):
+        with override_config('REGISTER_VARIABLES', 0):
+            cres = compile_isolated(loop_usecase,
+                                    (types.Array(types.float64, 1, 'C'),),
+                                    flags=no_pyobj_flags)
+        a = np.linspace(0, 1, 11)
+        self.assertPreciseEqual(cres.entry_point(a), loop_usecase(a))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+"""
+Tests for the branch-free math functions (config.VECTOR_MATH).
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import cmath
+import math
+import re
+
+import numpy as np
+
+from numba import unittest_support as unittest
+from numba import config, jit, utils, vectorize
+from .support import TestCase
+
+
+def exp_usecase(x):
+    return math.exp(x)
+
+def log_usecase(x):
+    return math.log(x)
+
+def sin_usecase(x):
+    return math.sin(x)
+
+def cos_usecase(x):
+    return math.cos(x)
+
+def tanh_usecase(x):
+    return math.tanh(x)
+
+def erf_usecase(x):
+    return math.erf(x)
+
+def pow_usecase(x, y):
+    return x ** y
+
+def atan2_usecase(y, x):
+    return math.atan2(y, x)
+
+def hypot_usecase(x, y):
+    return math.hypot(x, y)
+
+def cexp_usecase(z):
+    return cmath.exp(z)
+
+def clog_usecase(z):
+    return cmath.log(z)
+
+def cabs_usecase(z):
+    return abs(z)
+
+def np_exp_usecase(x):
+    return np.exp(x)
+
+def np_power_usecase(x, y):
+    return np.power(x, y)
+
+def exp_loop_usecase(a, out):
+    for i in range(a.shape[0]):
+        out[i] = math.exp(a[i]) + math.sin(a[i])
+
+
+special_values = [0.0, -0.0, 1.0, -1.0, 0.5, -2.5, 3.0, -3.0, 1e-310,
+                  1e308, -1e308, float('inf'), float('-inf'), float('nan')]
+
+
+class TestVectorMath(TestCase):
+
+    def setUp(self):
+        self.old_vector_math = config.VECTOR_MATH
+        config.VECTOR_MATH = 1
+
+    def tearDown(self):
+        config.VECTOR_MATH = self.old_vector_math
+
+    def check_unary(self, pyfunc, reference, values, ulps=3):
+        cfunc = jit(nopython=True)(pyfunc)
+        for x in values:
+            self.assertPreciseEqual(cfunc(x), reference(x), prec='double',
+                                    ulps=ulps, msg="for input %r" % (x,))
+        # float32 inputs are computed in single precision
+        f32func = jit("float32(float32)", nopython=True)(pyfunc)
+        for x in values:
+            with np.errstate(all='ignore'):
+                x32 = np.float32(x)
+            if x32 != x and (x32 == 0 or np.isinf(x32)):
+                # Out of range for single precision
+                continue
+            x = x32
+            with np.errstate(all='ignore'):
+                expected = np.float32(reference(np.float64(x)))
+            self.assertPreciseEqual(f32func(x), expected, prec='single',
+                                    ulps=2, msg="for input %r" % (x,))
+
+    def domain(self, lo, hi, n=200):
+        return list(np.random.RandomState(42).uniform(lo, hi, n))
+
+    def test_exp(self):
+        values = self.domain(-745, 709.7) + self.domain(-1, 1)
+        self.check_unary(exp_usecase, math.exp, values)
+        self.check_unary(np_exp_usecase, np.exp,
+                         values + [710.0, -746.0] + special_values)
+
+    def test_log(self):
+        values = list(np.exp(self.domain(-700, 700))) + self.domain(0.5, 2)
+        self.check_unary(log_usecase, math.log, values)
+        self.check_unary(log_usecase, np.log, [5e-324, 1e-310, 1.0])
+
+    def test_sin_cos(self):
+        values = self.domain(-10, 10) + self.domain(-1e6, 1e6) + [-0.0, 1e-300]
+        self.check_unary(sin_usecase, math.sin, values)
+        self.check_unary(cos_usecase, math.cos, values)
+        cfunc = jit(nopython=True)(sin_usecase)
+        for x in (float('inf'), float('nan')):
+            self.assertTrue(math.isnan(cfunc(x)))
+        f32func = jit("float32(float32)", nopython=True)(sin_usecase)
+        for x in (float('inf'), float('nan')):
+            self.assertTrue(math.isnan(f32func(x)))
+
+    def test_sin_cos_large(self):
+        # Large arguments use the Payne-Hanek reduction
+        values = [1e7, 1e16, 1e300, -1e300, 2.0 ** 20, 2.0 ** 51, 1e308]
+        values += list(np.exp(self.domain(14, 709)))
+        self.check_unary(sin_usecase, math.sin, values)
+        self.check_unary(cos_usecase, math.cos, values)
+
+    def test_tanh(self):
+        values = self.domain(-20, 20) + self.domain(-0.5, 0.5) + [1e-300]
+        self.check_unary(tanh_usecase, math.tanh, values + special_values)
+
+    @unittest.skipUnless(utils.PYVERSION > (2, 6), "needs Python 2.7+")
+    def test_erf(self):
+        values = self.domain(-7, 7) + self.domain(-1, 1)
+        self.check_unary(erf_usecase, math.erf, values + special_values)
+
+    def test_pow(self):
+        cfunc = jit(nopython=True)(pow_usecase)
+        npfunc = jit(nopython=True)(np_power_usecase)
+        rnd = np.random.RandomState(42)
+        xs = list(np.exp(rnd.uniform(-20, 20, 200))) + list(rnd.uniform(0.5, 2, 200))
+        ys = list(rnd.uniform(-30, 30, 200)) + list(rnd.uniform(-1000, 1000, 200))
+        for x, y in zip(xs, ys):
+            self.assertPreciseEqual(cfunc(x, y), x ** y, prec='double',
+                                    ulps=3, msg="for inputs %r" % ((x, y),))
+        # Special values follow C99, like Numpy
+        for x in special_values:
+            for y in special_values:
+                with np.errstate(all='ignore'):
+                    expected = np.power(x, y)
+                self.assertPreciseEqual(npfunc(x, y), expected, prec='double',
+                                        ulps=3, msg="for inputs %r" % ((x, y),))
+
+    def check_binary(self, pyfunc, reference, values, ulps=3):
+        cfunc = jit(nopython=True)(pyfunc)
+        f32func = jit("float32(float32, float32)", nopython=True)(pyfunc)
+        for x, y in values:
+            self.assertPreciseEqual(cfunc(x, y), reference(x, y),
+                                    prec='double', ulps=ulps,
+                                    msg="for inputs %r" % ((x, y),))
+            x, y = np.float32(x), np.float32(y)
+            expected = np.float32(reference(np.float64(x), np.float64(y)))
+            self.assertPreciseEqual(f32func(x, y), expected, prec='single',
+                                    ulps=ulps, msg="for inputs %r" % ((x, y),))
+
+    def test_atan2(self):
+        values = list(zip(self.domain(-10, 10), self.domain(-5, 5)[::-1]))
+        values += [(y, x) for y in special_values[:8] + [float('inf')]
+                   for x in special_values[:8] + [float('-inf')]]
+        self.check_binary(atan2_usecase, math.atan2, values)
+
+    def test_hypot(self):
+        values = list(zip(self.domain(-10, 10), self.domain(-1e3, 1e3)))
+        values += [(1e300, 1e300), (1e-300, 1e-310), (float('inf'), float('nan')),
+                   (0.0, -0.0), (-3.0, 0.0)]
+        self.check_binary(hypot_usecase, math.hypot, values)
+
+    def test_complex(self):
+        rnd = np.random.RandomState(42)
+        values = [complex(x, y) for x, y in zip(rnd.uniform(-20, 20, 200),
+                                               rnd.uniform(-20, 20, 200))]
+        values += [0j, -0.0j, 1.5+0j, -2.5+0j, 3j, -0.5j]
+        for pyfunc, reference in [(cexp_usecase, cmath.exp),
+                                  (clog_usecase, cmath.log),
+                                  (cabs_usecase, abs)]:
+            cfunc = jit(nopython=True)(pyfunc)
+            for z in values:
+                if pyfunc is clog_usecase and z == 0:
+                    continue
+                self.assertPreciseEqual(cfunc(z), reference(z), prec='double',
+                                        ulps=4, msg="for input %r" % (z,))
+
+    def test_vectorize(self):
+        ufunc = vectorize(["float64(float64)"])(exp_usecase)
+        a = np.linspace(-10, 10, 101)
+        got = ufunc(a)
+        for x, y in zip(a, got):
+            self.assertPreciseEqual(y, math.exp(x), prec='double', ulps=3)
+
+    @unittest.skipUnless(config.LOOP_VECTORIZE, "needs the loop vectorizer")
+    def test_loop_is_vectorized(self):
+        cfunc = jit("void(float64[::1], float64[::1])",
+                    nopython=True)(exp_loop_usecase)
+        a = np.linspace(-10, 10, 101)
+        out = np.empty_like(a)
+        cfunc(a, out)
+        np.testing.assert_allclose(out, np.exp(a) + np.sin(a),
+                                   rtol=1e-14, atol=1e-15)
+        llvm_ir = cfunc.inspect_llvm(cfunc.signatures[0])
+        self.assertTrue(re.search(r"<\d+ x double>", llvm_ir), llvm_ir)
+        self.assertNotIn("@llvm.exp", llvm_ir)
+        self.assertNotIn("@llvm.sin", llvm_ir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,6 +36,7 @@ def _init_casting_rules(tm):
     tcr.safe_unsafe(types.int64, types.float64)
     tcr.safe_unsafe(types.uint64, types.float64)
 
+    tcr.promote_unsafe(types.float16, types.float32)
     tcr.promote_unsafe(types.float32, types.float64)
 
     tcr.safe(types.float32, types.complex64)
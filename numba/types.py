@@ -331,6 +331,18 @@ class Function(Type):
     def key(self):
         return self.template
 
+    @property
+    def pysig(self):
+        """
+        The Python signature used to fold keyword arguments, if the
+        template defines one.
+        """
+        try:
+            return self.template.pysig
+        except AttributeError:
+            raise AttributeError("%s does not support keyword arguments"
+                                 % (self,))
+
     def extend(self, template):
         self.template.cases.extend(template.cases)
 
@@ -914,6 +926,24 @@ class ExceptionInstance(Phantom):
         return self.exc_class
 
 
+class RandomGenerator(Type):
+    """
+    The type of numba.prng generator objects.  *engine* is the name
+    of the generator algorithm.  The native representation is a pointer
+    to the generator's state words, which are updated in place.
+    """
+    mutable = True
+
+    def __init__(self, engine):
+        self.engine = engine
+        name = "RandomGenerator(%s)" % (engine,)
+        super(RandomGenerator, self).__init__(name, param=True)
+
+    @property
+    def key(self):
+        return self.engine
+
+
 # Utils
 
 def is_int_tuple(x):
@@ -955,6 +985,9 @@ uintc = uint32 if struct.calcsize('i') == 4 else uint64
 
 float32 = Float('float32')
 float64 = Float('float64')
+# Half precision is a storage-only type: values are computed on in
+# single precision and rounded when stored back.
+float16 = Float('float16')
 
 complex64 = Complex('complex64', float32)
 complex128 = Complex('complex128', float64)
@@ -995,6 +1028,7 @@ u2 = uint16
 u4 = uint32
 u8 = uint64
 
+f2 = float16
 f4 = float32
 f8 = float64
 
@@ -1037,6 +1071,7 @@ _type_promote_map = {
     uint32: (uint64, False),
     int64: (float64, True),
     uint64: (float64, True),
+    float16: (float32, False),
     float32: (float64, False),
     complex64: (complex128, True),
 }
@@ -1067,6 +1102,7 @@ uintp
 intc
 uintc
 boolean
+float16
 float32
 float64
 complex64
@@ -1096,6 +1132,7 @@ u1
 u2
 u4
 u8
+f2
 f4
 f8
 c8
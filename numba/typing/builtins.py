@@ -1,7 +1,7 @@
 from __future__ import print_function, division, absolute_import
 
 
-from numba import types, intrinsics
+from numba import types, intrinsics, utils, loopnest
 from numba.utils import PYVERSION
 from numba.typing.templates import (AttributeTemplate, ConcreteTemplate,
                                     AbstractTemplate, builtin_global, builtin,
@@ -198,10 +198,19 @@ class BinOpPower(ConcreteTemplate):
              for op in sorted(types.signed_domain)]
     cases += [signature(types.float64, types.float64, op)
              for op in sorted(types.unsigned_domain)]
+    # Like Numpy, float32 ** int stays in single precision
+    cases += [signature(types.float32, types.float32, op)
+             for op in sorted(types.signed_domain)]
+    cases += [signature(types.float32, types.float32, op)
+             for op in sorted(types.unsigned_domain)]
     cases += [signature(op, op, op)
              for op in sorted(types.real_domain)]
     cases += [signature(op, op, op)
              for op in sorted(types.complex_domain)]
+    # complex ** int uses repeated squaring
+    cases += [signature(op, op, intty)
+              for op in sorted(types.complex_domain)
+              for intty in sorted(types.integer_domain)]
 
 
 class PowerBuiltin(BinOpPower):
@@ -383,6 +392,23 @@ class GetItemUniTuple(AbstractTemplate):
             return signature(tup.dtype, tup, normalize_index(idx))
 
 
+def fancy_index_result(ary, idx):
+    """
+    Return the type of indexing array type *ary* with index array type
+    *idx*, or None if unsupported.  Boolean masks must have the same
+    number of dimensions as the array and select a flat sequence of
+    elements; one-dimensional integer arrays select along the first axis.
+    """
+    if ary.ndim == 0:
+        return
+    if idx.dtype == types.boolean:
+        if idx.ndim == ary.ndim:
+            return types.Array(ary.dtype, 1, 'C')
+    elif isinstance(idx.dtype, types.Integer):
+        if idx.ndim == 1:
+            return types.Array(ary.dtype, ary.ndim, 'C')
+
+
 @builtin
 class GetItemArray(AbstractTemplate):
     key = "getitem"
@@ -393,6 +419,12 @@ class GetItemArray(AbstractTemplate):
         if not isinstance(ary, types.Array):
             return
 
+        if isinstance(idx, types.Array):
+            res = fancy_index_result(ary, idx)
+            if res is not None:
+                return signature(res, ary, idx)
+            return
+
         idx = normalize_index(idx)
         if idx is None:
             return
@@ -433,6 +465,16 @@ class SetItemArray(AbstractTemplate):
         if isinstance(ary, types.Array):
             if ary.const:
                 raise TypeError("Constant array")
+            if isinstance(idx, types.Array):
+                res = fancy_index_result(ary, idx)
+                if res is None:
+                    return
+                if isinstance(val, types.Array):
+                    # Values are assigned one-to-one to the selected elements
+                    if val.ndim != res.ndim:
+                        return
+                    return signature(types.none, ary, idx, val)
+                return signature(types.none, ary, idx, ary.dtype)
             return signature(types.none, ary, normalize_index(idx), ary.dtype)
 
 
@@ -461,15 +503,54 @@ class ArrayAttribute(AttributeTemplate):
     def resolve_ndim(self, ary):
         return types.intp
 
-    # def resolve_flatten(self, ary):
-    #     return types.Method(Array_flatten, ary)
-
     def resolve_size(self, ary):
         return types.intp
 
     def resolve_flat(self, ary):
         return types.NumpyFlatType(ary)
 
+    def resolve_T(self, ary):
+        if ary.ndim <= 1:
+            return ary
+        layout = {'C': 'F', 'F': 'C'}.get(ary.layout, 'A')
+        return ary.copy(layout=layout)
+
+    @bound_function("array.transpose")
+    def resolve_transpose(self, ary, args, kws):
+        assert not args
+        assert not kws
+        return signature(self.resolve_T(ary))
+
+    @bound_function("array.reshape")
+    def resolve_reshape(self, ary, args, kws):
+        assert not kws
+        if (len(args) == 1 and
+                isinstance(args[0], (types.UniTuple, types.Tuple))):
+            shape = list(args[0])
+        else:
+            shape = args
+        if shape and all(isinstance(s, types.Integer) for s in shape):
+            retty = ary.copy(ndim=len(shape), layout='C')
+            return signature(retty, *args)
+
+    @bound_function("array.ravel")
+    def resolve_ravel(self, ary, args, kws):
+        assert not args
+        assert not kws
+        return signature(ary.copy(ndim=1, layout='C'))
+
+    @bound_function("array.copy")
+    def resolve_copy(self, ary, args, kws):
+        assert not args
+        assert not kws
+        return signature(types.Array(ary.dtype, ary.ndim, 'C'))
+
+    @bound_function("array.flatten")
+    def resolve_flatten(self, ary, args, kws):
+        assert not args
+        assert not kws
+        return signature(types.Array(ary.dtype, 1, 'C'))
+
     def generic_resolve(self, ary, attr):
         if isinstance(ary.dtype, types.Record):
             if attr in ary.dtype.fields:
@@ -489,6 +570,9 @@ def generic_expand(self, args, kws):
             return signature(max(types.intp, self.this.dtype), recvr=self.this)
         else:
             return signature(max(types.uintp, self.this.dtype), recvr=self.this)
+    elif self.this.dtype == types.float16:
+        # Accumulate half precision data in single precision
+        return signature(types.float32, recvr=self.this)
     return signature(self.this.dtype, recvr=self.this)
 
 def generic_hetero_real(self, args, kws):
@@ -496,6 +580,8 @@ def generic_hetero_real(self, args, kws):
     assert not kws
     if self.this.dtype in types.integer_domain:
         return signature(types.float64, recvr=self.this)
+    elif self.this.dtype == types.float16:
+        return signature(types.float32, recvr=self.this)
     return signature(self.this.dtype, recvr=self.this)
 
 def generic_index(self, args, kws):
@@ -503,8 +589,43 @@ def generic_index(self, args, kws):
     assert not kws
     return signature(types.intp, recvr=self.this)
 
-def install_array_method(name, generic):
+def scan_result_type(ary, axis=None):
+    """
+    Return the type of a cumulative sum or product over array type *ary*
+    along *axis* (an integer type, or None to scan the flattened array),
+    or None if unsupported.
+    """
+    dtype = ary.dtype
+    if dtype == types.boolean:
+        dtype = types.intp
+    elif isinstance(dtype, types.Integer):
+        # Expand to a machine int, not larger (like Numpy)
+        if dtype.signed:
+            dtype = max(types.intp, dtype)
+        else:
+            dtype = max(types.uintp, dtype)
+    elif dtype not in types.number_domain:
+        return
+    if axis is None or axis == types.none:
+        return types.Array(dtype, 1, 'C')
+    elif isinstance(axis, types.Integer) and ary.ndim >= 1:
+        return types.Array(dtype, ary.ndim, 'C')
+
+def _scan_method_sig(axis=None):
+    pass
+
+def generic_scan(self, args, kws):
+    assert not kws
+    if len(args) > 1:
+        return
+    res = scan_result_type(self.this, *args)
+    if res is not None:
+        return signature(res, *args, recvr=self.this)
+
+def install_array_method(name, generic, pysig=None):
     my_attr = {"key": "array." + name, "generic": generic}
+    if pysig is not None:
+        my_attr["pysig"] = pysig
     temp_class = type("Array_" + name, (AbstractTemplate,), my_attr)
 
     def array_attribute_attachment(self, ary):
@@ -528,6 +649,11 @@ for fName in ["mean", "var", "std"]:
 install_array_method("argmin", generic_index)
 install_array_method("argmax", generic_index)
 
+# Cumulative functions, optionally along an axis
+for fname in ["cumsum", "cumprod"]:
+    install_array_method(fname, generic_scan,
+                         pysig=utils.pysignature(_scan_method_sig))
+
 
 @builtin
 class CmpOpEqArray(AbstractTemplate):
@@ -881,3 +1007,15 @@ class Intrinsic_array_ravel(AbstractTemplate):
             return signature(arr.copy(ndim=1), arr)
 
 builtin_global(intrinsics.array_ravel, types.Function(Intrinsic_array_ravel))
+
+
+@builtin
+class ArraysMayOverlap(AbstractTemplate):
+    key = loopnest.arrays_may_overlap
+
+    def generic(self, args, kws):
+        assert not kws
+        if all(isinstance(a, types.Array) for a in args):
+            return signature(types.boolean, *args)
+
+builtin_global(loopnest.arrays_may_overlap, types.Function(ArraysMayOverlap))
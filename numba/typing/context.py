@@ -13,8 +13,8 @@ from . import templates
 
 # Initialize declarations
 from . import (
-    builtins, cmathdecl, mathdecl, npdatetime, npydecl, operatordecl,
-    randomdecl)
+    builtins, cmathdecl, linalgdecl, mathdecl, npdatetime, npydecl,
+    operatordecl, randomdecl)
 from numba import numpy_support, utils
 from . import ctypes_utils, cffi_utils
 
@@ -398,6 +398,7 @@ class BaseContext(object):
 class Context(BaseContext):
     def init(self):
         self.install(cmathdecl.registry)
+        self.install(linalgdecl.registry)
         self.install(mathdecl.registry)
         self.install(npydecl.registry)
         self.install(operatordecl.registry)
@@ -0,0 +1,152 @@
+"""
+Typing declarations for the np.linalg functions supported in nopython mode.
+"""
+
+from __future__ import absolute_import, print_function
+
+import numpy as np
+
+from .. import types, intrinsics
+from .templates import AbstractTemplate, Registry, signature
+
+
+registry = Registry()
+builtin = registry.register
+builtin_global = registry.register_global
+
+_lapack_dtypes = (types.float32, types.float64)
+
+
+def _is_lapack_array(a, ndim=None):
+    """
+    Whether *a* is an array type the LAPACK routines can handle.
+    """
+    return (isinstance(a, types.Array) and a.dtype in _lapack_dtypes
+            and (ndim is None or a.ndim == ndim))
+
+
+def _result_array(dtype, ndim):
+    return types.Array(dtype, ndim, 'C')
+
+
+# np.linalg functions
+
+@registry.resolves_global(np.linalg.inv, typing_key="np.linalg.inv")
+@registry.resolves_global(np.linalg.cholesky, typing_key="np.linalg.cholesky")
+class Linalg_square(AbstractTemplate):
+
+    def generic(self, args, kws):
+        assert not kws
+        [a] = args
+        if _is_lapack_array(a, ndim=2):
+            return signature(_result_array(a.dtype, 2), a)
+
+
+@registry.resolves_global(np.linalg.det, typing_key="np.linalg.det")
+class Linalg_det(AbstractTemplate):
+
+    def generic(self, args, kws):
+        assert not kws
+        [a] = args
+        if _is_lapack_array(a, ndim=2):
+            return signature(a.dtype, a)
+
+
+@registry.resolves_global(np.linalg.solve, typing_key="np.linalg.solve")
+class Linalg_solve(AbstractTemplate):
+
+    def generic(self, args, kws):
+        assert not kws
+        [a, b] = args
+        if (_is_lapack_array(a, ndim=2) and _is_lapack_array(b)
+            and b.ndim in (1, 2) and a.dtype == b.dtype):
+            return signature(_result_array(a.dtype, b.ndim), a, b)
+
+
+@registry.resolves_global(np.linalg.lstsq, typing_key="np.linalg.lstsq")
+class Linalg_lstsq(AbstractTemplate):
+
+    def generic(self, args, kws):
+        assert not kws
+        if len(args) == 2:
+            a, b = args
+        elif len(args) == 3:
+            a, b, rcond = args
+            if not isinstance(rcond, (types.Float, types.Integer)):
+                return
+        else:
+            return
+        if (_is_lapack_array(a, ndim=2) and _is_lapack_array(b)
+            and b.ndim in (1, 2) and a.dtype == b.dtype):
+            # (solution, residuals, rank, singular values)
+            restype = types.Tuple([_result_array(a.dtype, b.ndim),
+                                   _result_array(a.dtype, 1),
+                                   types.intp,
+                                   _result_array(a.dtype, 1)])
+            return signature(restype, *args)
+
+
+# LAPACK wrappers
+
+_int32_array = types.Array(types.int32, 1, 'C')
+
+
+@builtin
+class Intrinsic_lapack_getrf(AbstractTemplate):
+    key = intrinsics.lapack_getrf
+
+    def generic(self, args, kws):
+        assert not kws
+        a, ipiv = args
+        if _is_lapack_array(a, ndim=2) and a.layout == 'C':
+            return signature(types.int32, a, _int32_array)
+
+builtin_global(intrinsics.lapack_getrf,
+               types.Function(Intrinsic_lapack_getrf))
+
+
+@builtin
+class Intrinsic_lapack_getrs(AbstractTemplate):
+    key = intrinsics.lapack_getrs
+
+    def generic(self, args, kws):
+        assert not kws
+        a, ipiv, b, trans = args
+        if (_is_lapack_array(a, ndim=2) and a.layout == 'C'
+            and _is_lapack_array(b) and b.layout == 'C'
+            and b.ndim in (1, 2) and a.dtype == b.dtype):
+            return signature(types.int32, a, _int32_array, b, types.boolean)
+
+builtin_global(intrinsics.lapack_getrs,
+               types.Function(Intrinsic_lapack_getrs))
+
+
+@builtin
+class Intrinsic_lapack_potrf(AbstractTemplate):
+    key = intrinsics.lapack_potrf
+
+    def generic(self, args, kws):
+        assert not kws
+        [a] = args
+        if _is_lapack_array(a, ndim=2) and a.layout == 'C':
+            return signature(types.int32, a)
+
+builtin_global(intrinsics.lapack_potrf,
+               types.Function(Intrinsic_lapack_potrf))
+
+
+@builtin
+class Intrinsic_lapack_gelsd(AbstractTemplate):
+    key = intrinsics.lapack_gelsd
+
+    def generic(self, args, kws):
+        assert not kws
+        a, b, s, rcond, rank = args
+        if (_is_lapack_array(a, ndim=2) and a.layout == 'C'
+            and _is_lapack_array(b) and b.layout == 'C'
+            and b.ndim in (1, 2) and a.dtype == b.dtype):
+            sty = _result_array(a.dtype, 1)
+            return signature(types.int32, a, b, sty, a.dtype, _int32_array)
+
+builtin_global(intrinsics.lapack_gelsd,
+               types.Function(Intrinsic_lapack_gelsd))
@@ -116,6 +116,8 @@ class Math_pow(ConcreteTemplate):
     cases = [
         signature(types.float64, types.float64, types.int64),
         signature(types.float64, types.float64, types.uint64),
+        signature(types.float32, types.float32, types.int64),
+        signature(types.float32, types.float32, types.uint64),
         signature(types.float32, types.float32, types.float32),
         signature(types.float64, types.float64, types.float64),
     ]
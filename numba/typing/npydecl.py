@@ -2,14 +2,15 @@ from __future__ import absolute_import, print_function
 
 import numpy
 import itertools
-from .. import types
+from .. import types, utils
 from .templates import (AttributeTemplate, AbstractTemplate,
                                     Registry, signature)
 
 from ..numpy_support import (ufunc_find_matching_loop,
-                             supported_ufunc_loop, as_dtype)
+                             supported_ufunc_loop, as_dtype, from_dtype)
 
 from ..typeinfer import TypingError
+from .builtins import scan_result_type
 
 registry = Registry()
 builtin = registry.register
@@ -151,6 +152,45 @@ if numpy.divide == numpy.true_divide:
     _aliases.add("divide")
 
 
+def _ufunc_accumulate_sig(array, axis=0):
+    pass
+
+
+class Numpy_ufunc_accumulate(AbstractTemplate):
+    """
+    Typing template for the accumulate() method of binary ufuncs.
+    """
+    key = "ufunc.accumulate"
+    pysig = utils.pysignature(_ufunc_accumulate_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        arr = args[0]
+        if not isinstance(arr, types.Array) or arr.ndim == 0:
+            return
+        if len(args) > 2 or not all(isinstance(a, types.Integer)
+                                    for a in args[1:]):
+            return
+        if arr.dtype not in types.number_domain:
+            return
+        # The ufunc must have a loop mapping two elements to a
+        # single element of the same type
+        sig = self.context.resolve_function_type(self.this,
+                                                 (arr.dtype, arr.dtype), {})
+        if sig is not None and sig.return_type == arr.dtype:
+            return signature(types.Array(arr.dtype, arr.ndim, 'C'), *args,
+                             recvr=self.this)
+
+
+class Numpy_ufunc_attribute(AttributeTemplate):
+    """
+    Attributes of binary ufuncs.
+    """
+
+    def resolve_accumulate(self, fnty):
+        return types.BoundFunction(Numpy_ufunc_accumulate, fnty)
+
+
 def _numpy_ufunc(name):
     func = getattr(numpy, name)
     class typing_class(Numpy_rules_ufunc):
@@ -164,6 +204,11 @@ def _numpy_ufunc(name):
     if not name in _aliases:
         builtin_global(func, types.Function(typing_class))
 
+    if func.nin == 2 and func.nout == 1:
+        class attribute_class(Numpy_ufunc_attribute):
+            key = types.Function(typing_class)
+        builtin_attr(attribute_class)
+
 all_ufuncs = sum([_math_operations, _trigonometric_functions,
                   _bit_twiddling_functions, _comparison_functions,
                   _floating_functions], [])
@@ -268,6 +313,253 @@ for np_type in np_types:
     builtin_global(np_type, types.Function(Caster))
 
 
+# -----------------------------------------------------------------------------
+# Numpy array constructors
+
+def _parse_shape(shape):
+    """
+    Return the number of dimensions described by the *shape* type,
+    or None if it isn't a valid shape.
+    """
+    if isinstance(shape, types.Integer):
+        return 1
+    elif isinstance(shape, (types.Tuple, types.UniTuple)):
+        if all(isinstance(s, types.Integer) for s in shape):
+            return len(shape)
+
+def _parse_dtype(dtype):
+    """
+    Return the Numba type described by the *dtype* type (e.g. the type
+    of the np.float32 or float global), or None.
+    """
+    if isinstance(dtype, types.Function):
+        try:
+            return from_dtype(numpy.dtype(dtype.template.key))
+        except (TypeError, NotImplementedError):
+            return None
+
+
+def _array_constructor_sig(shape, dtype=float):
+    pass
+
+def _like_constructor_sig(a, dtype=None):
+    pass
+
+
+class NdConstructor(AbstractTemplate):
+    """
+    Typing template for np.empty(), np.zeros() and np.ones().
+    """
+    pysig = utils.pysignature(_array_constructor_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        if len(args) == 1:
+            nb_dtype = types.float64
+        elif len(args) == 2:
+            nb_dtype = _parse_dtype(args[1])
+        else:
+            return
+        ndim = _parse_shape(args[0])
+        if nb_dtype is not None and ndim is not None:
+            return signature(types.Array(dtype=nb_dtype, ndim=ndim,
+                                         layout='C'),
+                             *args)
+
+
+class NdConstructorLike(AbstractTemplate):
+    """
+    Typing template for np.empty_like(), np.zeros_like() and np.ones_like().
+    """
+    pysig = utils.pysignature(_like_constructor_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        arr = args[0]
+        if not isinstance(arr, types.Array):
+            return
+        if len(args) == 1:
+            nb_dtype = arr.dtype
+        elif len(args) == 2:
+            nb_dtype = _parse_dtype(args[1])
+        else:
+            return
+        if nb_dtype is not None:
+            return signature(types.Array(dtype=nb_dtype, ndim=arr.ndim,
+                                         layout='C'),
+                             *args)
+
+
+for func in (numpy.empty, numpy.zeros, numpy.ones):
+    class Constructor(NdConstructor):
+        key = func
+    builtin_global(func, types.Function(Constructor))
+
+for func in (numpy.empty_like, numpy.zeros_like, numpy.ones_like):
+    class Constructor(NdConstructorLike):
+        key = func
+    builtin_global(func, types.Function(Constructor))
+
+
+def _full_sig(shape, fill_value, dtype=None):
+    pass
+
+@builtin
+class NdFull(AbstractTemplate):
+    key = numpy.full
+    pysig = utils.pysignature(_full_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        if len(args) == 2 or (len(args) == 3 and args[2] == types.none):
+            # The array type is the type of the fill value
+            nb_dtype = args[1]
+        elif len(args) == 3:
+            nb_dtype = _parse_dtype(args[2])
+        else:
+            return
+        ndim = _parse_shape(args[0])
+        if (ndim is not None and nb_dtype is not None and
+                (nb_dtype in types.number_domain or
+                 nb_dtype == types.boolean)):
+            return signature(types.Array(dtype=nb_dtype, ndim=ndim,
+                                         layout='C'),
+                             *args)
+
+builtin_global(numpy.full, types.Function(NdFull))
+
+
+def _arange_sig(start, stop=None, step=None, dtype=None):
+    pass
+
+@builtin
+class NdArange(AbstractTemplate):
+    key = numpy.arange
+    pysig = utils.pysignature(_arange_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        if not 1 <= len(args) <= 4:
+            return
+        bounds = [a for a in args[:3] if a != types.none]
+        if not bounds or not all(a in types.integer_domain or
+                                 a in types.real_domain for a in bounds):
+            return
+        if len(args) == 4 and args[3] != types.none:
+            nb_dtype = _parse_dtype(args[3])
+        elif all(a in types.integer_domain for a in bounds):
+            nb_dtype = types.intp
+        else:
+            nb_dtype = types.float64
+        if nb_dtype is not None:
+            return signature(types.Array(nb_dtype, 1, 'C'), *args)
+
+builtin_global(numpy.arange, types.Function(NdArange))
+
+
+def _linspace_sig(start, stop, num=50):
+    pass
+
+@builtin
+class NdLinspace(AbstractTemplate):
+    key = numpy.linspace
+    pysig = utils.pysignature(_linspace_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        if not 2 <= len(args) <= 3:
+            return
+        bounds = args[:2]
+        if not all(a in types.integer_domain or a in types.real_domain
+                   for a in bounds):
+            return
+        if len(args) == 3 and not isinstance(args[2], types.Integer):
+            return
+        return signature(types.Array(types.float64, 1, 'C'), *args)
+
+builtin_global(numpy.linspace, types.Function(NdLinspace))
+
+
+def _sequence_of_arrays(arrays):
+    """
+    Return the list of array types in the *arrays* tuple type, or None
+    if it isn't a non-empty tuple of arrays with the same number of
+    dimensions.
+    """
+    if not isinstance(arrays, (types.UniTuple, types.Tuple)):
+        return
+    arrays = list(arrays)
+    if (not arrays or
+            not all(isinstance(a, types.Array) for a in arrays) or
+            len(set(a.ndim for a in arrays)) != 1):
+        return
+    return arrays
+
+def _combined_dtype(arrays):
+    """
+    Return the dtype resulting from combining the given array types,
+    using Numpy's type promotion rules.
+    """
+    try:
+        dtype = numpy.result_type(*[as_dtype(a.dtype) for a in arrays])
+        return from_dtype(dtype)
+    except (NotImplementedError, TypeError):
+        return
+
+
+def _concatenate_sig(arrays, axis=0):
+    pass
+
+@builtin
+class NdConcatenate(AbstractTemplate):
+    key = numpy.concatenate
+    pysig = utils.pysignature(_concatenate_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        arrays = _sequence_of_arrays(args[0])
+        if arrays is None or arrays[0].ndim == 0:
+            return
+        if len(args) > 2 or not all(isinstance(a, types.Integer)
+                                    for a in args[1:]):
+            return
+        dtype = _combined_dtype(arrays)
+        if dtype is not None:
+            return signature(types.Array(dtype, arrays[0].ndim, 'C'), *args)
+
+builtin_global(numpy.concatenate, types.Function(NdConcatenate))
+
+
+class NdStack(AbstractTemplate):
+    """
+    Typing template for np.vstack() and np.hstack().
+    """
+    min_ndim = 1
+
+    def generic(self, args, kws):
+        assert not kws
+        [arrays] = args
+        arrays = _sequence_of_arrays(arrays)
+        if arrays is None or arrays[0].ndim == 0:
+            return
+        dtype = _combined_dtype(arrays)
+        if dtype is not None:
+            ndim = max(arrays[0].ndim, self.min_ndim)
+            return signature(types.Array(dtype, ndim, 'C'), *args)
+
+@builtin
+class NdVStack(NdStack):
+    key = numpy.vstack
+    min_ndim = 2
+
+@builtin
+class NdHStack(NdStack):
+    key = numpy.hstack
+
+builtin_global(numpy.vstack, types.Function(NdVStack))
+builtin_global(numpy.hstack, types.Function(NdHStack))
+
+
 # -----------------------------------------------------------------------------
 # Miscellaneous functions
 
@@ -305,4 +597,115 @@ class NdIndex(AbstractTemplate):
 builtin_global(numpy.ndindex, types.Function(NdIndex))
 
 
+@builtin
+class NdTranspose(AbstractTemplate):
+    key = numpy.transpose
+
+    def generic(self, args, kws):
+        assert not kws
+        [arr] = args
+        if isinstance(arr, types.Array):
+            return signature(self.context.resolve_getattr(arr, 'T'), arr)
+
+builtin_global(numpy.transpose, types.Function(NdTranspose))
+
+
+@builtin
+class NdReshape(AbstractTemplate):
+    key = numpy.reshape
+
+    def generic(self, args, kws):
+        assert not kws
+        [arr, shape] = args
+        if isinstance(arr, types.Array):
+            ndim = _parse_shape(shape)
+            if ndim is not None:
+                return signature(arr.copy(ndim=ndim, layout='C'), arr, shape)
+
+builtin_global(numpy.reshape, types.Function(NdReshape))
+
+
+@builtin
+class NdRavel(AbstractTemplate):
+    key = numpy.ravel
+
+    def generic(self, args, kws):
+        assert not kws
+        [arr] = args
+        if isinstance(arr, types.Array):
+            return signature(arr.copy(ndim=1, layout='C'), arr)
+
+builtin_global(numpy.ravel, types.Function(NdRavel))
+
+
+@builtin
+class NdAsContiguousArray(AbstractTemplate):
+    key = numpy.ascontiguousarray
+
+    def generic(self, args, kws):
+        assert not kws
+        [arr] = args
+        if isinstance(arr, types.Array) and arr.ndim >= 1:
+            return signature(arr.copy(layout='C'), arr)
+
+builtin_global(numpy.ascontiguousarray, types.Function(NdAsContiguousArray))
+
+
+@builtin
+class NdCopy(AbstractTemplate):
+    key = numpy.copy
+
+    def generic(self, args, kws):
+        assert not kws
+        [arr] = args
+        if isinstance(arr, types.Array):
+            return signature(types.Array(arr.dtype, arr.ndim, 'C'), arr)
+
+builtin_global(numpy.copy, types.Function(NdCopy))
+
+
+def _scan_sig(a, axis=None):
+    pass
+
+class NdScan(AbstractTemplate):
+    """
+    Typing template for np.cumsum() and np.cumprod().
+    """
+    pysig = utils.pysignature(_scan_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        arr = args[0]
+        if isinstance(arr, types.Array) and len(args) <= 2:
+            res = scan_result_type(*args)
+            if res is not None:
+                return signature(res, *args)
+
+for func in (numpy.cumsum, numpy.cumprod):
+    class Scan(NdScan):
+        key = func
+    builtin_global(func, types.Function(Scan))
+
+
+def _diff_sig(a, n=1, axis=-1):
+    pass
+
+@builtin
+class NdDiff(AbstractTemplate):
+    key = numpy.diff
+    pysig = utils.pysignature(_diff_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        arr = args[0]
+        if not isinstance(arr, types.Array) or arr.ndim == 0:
+            return
+        if arr.dtype not in types.number_domain or len(args) > 3:
+            return
+        if all(isinstance(a, types.Integer) for a in args[1:]):
+            return signature(types.Array(arr.dtype, arr.ndim, 'C'), *args)
+
+builtin_global(numpy.diff, types.Function(NdDiff))
+
+
 builtin_global(numpy, types.Module(numpy))
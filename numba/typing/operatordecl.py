@@ -38,8 +38,15 @@ class PowerOperator(ConcreteTemplate):
              for op in sorted(types.signed_domain)]
     cases += [signature(types.float64, types.float64, op)
               for op in sorted(types.unsigned_domain)]
+    cases += [signature(types.float32, types.float32, op)
+              for op in sorted(types.signed_domain)]
+    cases += [signature(types.float32, types.float32, op)
+              for op in sorted(types.unsigned_domain)]
     cases += [signature(op, op, op) for op in sorted(types.real_domain)]
     cases += [signature(op, op, op) for op in sorted(types.complex_domain)]
+    cases += [signature(op, op, intty)
+              for op in sorted(types.complex_domain)
+              for intty in sorted(types.integer_domain)]
 
 class ComparisonOperator(ConcreteTemplate):
     cases = [signature(types.boolean, op, op) for op in sorted(types.signed_domain)]
@@ -4,9 +4,10 @@ import random
 
 import numpy as np
 
-from .. import types
+from .. import types, utils
+from .npydecl import _parse_shape
 from .templates import (ConcreteTemplate, AbstractTemplate, AttributeTemplate,
-                        Registry, signature)
+                        Registry, bound_function, signature)
 
 
 registry = Registry()
@@ -31,7 +32,6 @@ class Random_getrandbits(ConcreteTemplate):
     cases = [signature(types.uint64, types.int32)]
 
 @registry.resolves_global(random.random, typing_key="random.random")
-@registry.resolves_global(np.random.random, typing_key="np.random.random")
 class Random_random(ConcreteTemplate):
     cases = [signature(types.float64)]
 
@@ -39,11 +39,6 @@ class Random_random(ConcreteTemplate):
 class Random_randint(ConcreteTemplate):
     cases = [signature(tp, tp, tp) for tp in _int_types]
 
-@registry.resolves_global(np.random.randint, typing_key="np.random.randint")
-class Random_randint(ConcreteTemplate):
-    cases = [signature(tp, tp) for tp in _int_types]
-    cases += [signature(tp, tp, tp) for tp in _int_types]
-
 @registry.resolves_global(random.randrange, typing_key="random.randrange")
 class Random_randrange(ConcreteTemplate):
     cases = [signature(tp, tp) for tp in _int_types]
@@ -57,57 +52,6 @@ class Random_seed(ConcreteTemplate):
 
 # Distributions
 
-@registry.resolves_global(np.random.geometric, typing_key="np.random.geometric")
-@registry.resolves_global(np.random.logseries, typing_key="np.random.logseries")
-@registry.resolves_global(np.random.zipf, typing_key="np.random.zipf")
-class Numpy_geometric(ConcreteTemplate):
-    cases = [signature(types.int64, tp) for tp in _float_types]
-
-@registry.resolves_global(np.random.binomial, typing_key="np.random.binomial")
-@registry.resolves_global(np.random.negative_binomial,
-                          typing_key="np.random.negative_binomial")
-class Numpy_negative_binomial(ConcreteTemplate):
-    cases = [signature(types.int64, types.int64, tp) for tp in _float_types]
-
-@registry.resolves_global(np.random.poisson, typing_key="np.random.poisson")
-class Numpy_poisson(ConcreteTemplate):
-    cases = [signature(types.int64, tp) for tp in _float_types]
-    cases += [signature(types.int64)]
-
-@registry.resolves_global(np.random.exponential, typing_key="np.random.exponential")
-@registry.resolves_global(np.random.rayleigh, typing_key="np.random.rayleigh")
-class Numpy_exponential(ConcreteTemplate):
-    cases = [signature(tp, tp) for tp in _float_types]
-    cases += [signature(tp) for tp in _float_types]
-
-@registry.resolves_global(np.random.hypergeometric, typing_key="np.random.hypergeometric")
-class Numpy_hypergeometric(ConcreteTemplate):
-    cases = [signature(tp, tp, tp, tp) for tp in _int_types]
-
-@registry.resolves_global(np.random.laplace, typing_key="np.random.laplace")
-@registry.resolves_global(np.random.logistic, typing_key="np.random.logistic")
-@registry.resolves_global(np.random.lognormal, typing_key="np.random.lognormal")
-@registry.resolves_global(np.random.normal, typing_key="np.random.normal")
-class Numpy_normal(ConcreteTemplate):
-    cases = [signature(tp, tp, tp) for tp in _float_types]
-    cases += [signature(tp, tp) for tp in _float_types]
-    cases += [signature(tp) for tp in _float_types]
-
-@registry.resolves_global(np.random.gamma, typing_key="np.random.gamma")
-class Numpy_gamma(ConcreteTemplate):
-    cases = [signature(tp, tp, tp) for tp in _float_types]
-    cases += [signature(tp, tp) for tp in _float_types]
-
-@registry.resolves_global(np.random.triangular, typing_key="np.random.triangular")
-class Random_ternary_distribution(ConcreteTemplate):
-    cases = [signature(tp, tp, tp, tp) for tp in _float_types]
-
-@registry.resolves_global(np.random.beta, typing_key="np.random.beta")
-@registry.resolves_global(np.random.f, typing_key="np.random.f")
-@registry.resolves_global(np.random.gumbel, typing_key="np.random.gumbel")
-@registry.resolves_global(np.random.uniform, typing_key="np.random.uniform")
-@registry.resolves_global(np.random.vonmises, typing_key="np.random.vonmises")
-@registry.resolves_global(np.random.wald, typing_key="np.random.wald")
 @registry.resolves_global(random.betavariate, typing_key="random.betavariate")
 @registry.resolves_global(random.gammavariate, typing_key="random.gammavariate")
 @registry.resolves_global(random.gauss, typing_key="random.gauss")
@@ -119,33 +63,198 @@ class Random_ternary_distribution(ConcreteTemplate):
 class Random_binary_distribution(ConcreteTemplate):
     cases = [signature(tp, tp, tp) for tp in _float_types]
 
-@registry.resolves_global(np.random.chisquare, typing_key="np.random.chisquare")
-@registry.resolves_global(np.random.pareto, typing_key="np.random.pareto")
-@registry.resolves_global(np.random.power, typing_key="np.random.power")
-@registry.resolves_global(np.random.standard_gamma, typing_key="np.random.standard_gamma")
-@registry.resolves_global(np.random.standard_t, typing_key="np.random.standard_t")
-@registry.resolves_global(np.random.weibull, typing_key="np.random.weibull")
 @registry.resolves_global(random.expovariate, typing_key="random.expovariate")
 @registry.resolves_global(random.paretovariate, typing_key="random.paretovariate")
 class Random_unary_distribution(ConcreteTemplate):
     cases = [signature(tp, tp) for tp in _float_types]
 
-@registry.resolves_global(np.random.standard_cauchy,
-                          typing_key="np.random.standard_cauchy")
-@registry.resolves_global(np.random.standard_normal,
-                          typing_key="np.random.standard_normal")
-@registry.resolves_global(np.random.standard_exponential,
-                          typing_key="np.random.standard_exponential")
-@registry.resolves_global(np.random.rand, typing_key="np.random.rand")
-@registry.resolves_global(np.random.randn, typing_key="np.random.randn")
-class Random_nullary_distribution(ConcreteTemplate):
-    cases = [signature(tp) for tp in _float_types]
-
 @registry.resolves_global(random.triangular, typing_key="random.triangular")
 class Random_triangular(ConcreteTemplate):
     cases = [signature(tp, tp, tp) for tp in _float_types]
     cases += [signature(tp, tp, tp, tp) for tp in _float_types]
 
+
+# Numpy functions.  Besides the scalar signatures given by *cases*, they
+# accept a *size* argument (the last parameter of *pysig*), in which case
+# an array of draws is returned.
+
+class Numpy_random_template(AbstractTemplate):
+
+    def generic(self, args, kws):
+        assert not kws
+        has_size = len(args) == len(self.pysig.parameters)
+        if has_size:
+            size = args[-1]
+            args = args[:-1]
+        elif types.none in args:
+            return
+        # Omitted optional parameters (e.g. randint()'s *high*) are none
+        sig = self._select(self.cases,
+                           [a for a in args if a != types.none], {})
+        if sig is None:
+            return
+        scalar_args = iter(sig.args)
+        argtys = [a if a == types.none else next(scalar_args)
+                  for a in args]
+        restype = sig.return_type
+        if has_size:
+            argtys.append(size)
+            if size != types.none:
+                ndim = _parse_shape(size)
+                if ndim is None:
+                    return
+                restype = types.Array(restype, ndim, 'C')
+        return signature(restype, *argtys)
+
+
+def _numpy_random(func, typing_key, pysig_func, cases):
+    """
+    Declare np.random function *func* with the given scalar *cases*,
+    and the Python signature of *pysig_func*.
+    """
+    class Template(Numpy_random_template):
+        key = typing_key
+        pysig = utils.pysignature(pysig_func)
+
+    Template.cases = cases
+    Template.__name__ = "Numpy_random_%s" % (typing_key.split('.')[-1],)
+    builtin_global(func, types.Function(Template))
+
+
+def _size_sig(size=None):
+    pass
+
+def _loc_scale_sig(loc=0.0, scale=1.0, size=None):
+    pass
+
+def _mean_sigma_sig(mean=0.0, sigma=1.0, size=None):
+    pass
+
+def _low_high_sig(low=0.0, high=1.0, size=None):
+    pass
+
+def _scale_sig(scale=1.0, size=None):
+    pass
+
+def _lam_sig(lam=1.0, size=None):
+    pass
+
+def _shape_scale_sig(shape, scale=1.0, size=None):
+    pass
+
+def _shape_sig(shape, size=None):
+    pass
+
+def _a_sig(a, size=None):
+    pass
+
+def _df_sig(df, size=None):
+    pass
+
+def _p_sig(p, size=None):
+    pass
+
+def _a_b_sig(a, b, size=None):
+    pass
+
+def _dfnum_dfden_sig(dfnum, dfden, size=None):
+    pass
+
+def _mu_kappa_sig(mu, kappa, size=None):
+    pass
+
+def _mean_scale_sig(mean, scale, size=None):
+    pass
+
+def _n_p_sig(n, p, size=None):
+    pass
+
+def _triangular_sig(left, mode, right, size=None):
+    pass
+
+def _hypergeometric_sig(ngood, nbad, nsample, size=None):
+    pass
+
+def _randint_sig(low, high=None, size=None):
+    pass
+
+
+_nullary_float = [signature(tp) for tp in _float_types]
+_unary_float = [signature(tp, tp) for tp in _float_types]
+_binary_float = [signature(tp, tp, tp) for tp in _float_types]
+_unary_int = [signature(types.int64, tp) for tp in _float_types]
+
+for func, key, pysig_func, cases in [
+    (np.random.random, "np.random.random", _size_sig, _nullary_float),
+    (np.random.standard_cauchy, "np.random.standard_cauchy", _size_sig,
+     _nullary_float),
+    (np.random.standard_normal, "np.random.standard_normal", _size_sig,
+     _nullary_float),
+    (np.random.standard_exponential, "np.random.standard_exponential",
+     _size_sig, _nullary_float),
+    (np.random.randint, "np.random.randint", _randint_sig,
+     [signature(tp, tp) for tp in _int_types] +
+     [signature(tp, tp, tp) for tp in _int_types]),
+    (np.random.geometric, "np.random.geometric", _p_sig, _unary_int),
+    (np.random.logseries, "np.random.logseries", _p_sig, _unary_int),
+    (np.random.zipf, "np.random.zipf", _a_sig, _unary_int),
+    (np.random.binomial, "np.random.binomial", _n_p_sig,
+     [signature(types.int64, types.int64, tp) for tp in _float_types]),
+    (np.random.negative_binomial, "np.random.negative_binomial", _n_p_sig,
+     [signature(types.int64, types.int64, tp) for tp in _float_types]),
+    (np.random.poisson, "np.random.poisson", _lam_sig,
+     _unary_int + [signature(types.int64)]),
+    (np.random.exponential, "np.random.exponential", _scale_sig,
+     _unary_float + _nullary_float),
+    (np.random.rayleigh, "np.random.rayleigh", _scale_sig,
+     _unary_float + _nullary_float),
+    (np.random.hypergeometric, "np.random.hypergeometric",
+     _hypergeometric_sig, [signature(tp, tp, tp, tp) for tp in _int_types]),
+    (np.random.laplace, "np.random.laplace", _loc_scale_sig,
+     _binary_float + _unary_float + _nullary_float),
+    (np.random.logistic, "np.random.logistic", _loc_scale_sig,
+     _binary_float + _unary_float + _nullary_float),
+    (np.random.lognormal, "np.random.lognormal", _mean_sigma_sig,
+     _binary_float + _unary_float + _nullary_float),
+    (np.random.normal, "np.random.normal", _loc_scale_sig,
+     _binary_float + _unary_float + _nullary_float),
+    (np.random.gamma, "np.random.gamma", _shape_scale_sig,
+     _binary_float + _unary_float),
+    (np.random.triangular, "np.random.triangular", _triangular_sig,
+     [signature(tp, tp, tp, tp) for tp in _float_types]),
+    (np.random.beta, "np.random.beta", _a_b_sig, _binary_float),
+    (np.random.f, "np.random.f", _dfnum_dfden_sig, _binary_float),
+    (np.random.gumbel, "np.random.gumbel", _loc_scale_sig, _binary_float),
+    (np.random.uniform, "np.random.uniform", _low_high_sig, _binary_float),
+    (np.random.vonmises, "np.random.vonmises", _mu_kappa_sig, _binary_float),
+    (np.random.wald, "np.random.wald", _mean_scale_sig, _binary_float),
+    (np.random.chisquare, "np.random.chisquare", _df_sig, _unary_float),
+    (np.random.pareto, "np.random.pareto", _a_sig, _unary_float),
+    (np.random.power, "np.random.power", _a_sig, _unary_float),
+    (np.random.standard_gamma, "np.random.standard_gamma", _shape_sig,
+     _unary_float),
+    (np.random.standard_t, "np.random.standard_t", _df_sig, _unary_float),
+    (np.random.weibull, "np.random.weibull", _a_sig, _unary_float),
+    ]:
+    _numpy_random(func, key, pysig_func, cases)
+
+
+@registry.resolves_global(np.random.rand, typing_key="np.random.rand")
+@registry.resolves_global(np.random.randn, typing_key="np.random.randn")
+class Numpy_rand(AbstractTemplate):
+    """
+    np.random.rand() and np.random.randn() take the output's dimensions
+    as separate arguments.
+    """
+
+    def generic(self, args, kws):
+        assert not kws
+        if not args:
+            return signature(types.float64)
+        if all(isinstance(a, types.Integer) for a in args):
+            return signature(types.Array(types.float64, len(args), 'C'),
+                             *args)
+
 # Other
 
 @registry.resolves_global(random.shuffle, typing_key="random.shuffle")
@@ -155,3 +264,110 @@ class Random_shuffle(AbstractTemplate):
         arr, = args
         if isinstance(arr, types.Array) and arr.ndim == 1:
             return signature(types.void, arr)
+
+
+def _population_dtype(a):
+    """
+    Return the type of the elements drawn from population *a* (an
+    integer or a 1-d array), or None if unsupported.
+    """
+    if isinstance(a, types.Integer):
+        return types.int64
+    elif isinstance(a, types.Array) and a.ndim == 1:
+        return a.dtype
+
+
+@registry.resolves_global(np.random.permutation,
+                          typing_key="np.random.permutation")
+class Numpy_permutation(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        x, = args
+        dtype = _population_dtype(x)
+        if dtype is not None:
+            return signature(types.Array(dtype, 1, 'C'), x)
+
+
+def _choice_sig(a, size=None, replace=True, p=None):
+    pass
+
+@registry.resolves_global(np.random.choice, typing_key="np.random.choice")
+class Numpy_choice(AbstractTemplate):
+    pysig = utils.pysignature(_choice_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        a = args[0]
+        size, replace, p = (tuple(args[1:]) +
+                            (types.none, types.boolean, types.none))[:3]
+        dtype = _population_dtype(a)
+        if dtype is None or replace != types.boolean:
+            return
+        if p != types.none:
+            if not (isinstance(p, types.Array) and p.ndim == 1 and
+                    isinstance(p.dtype, types.Float)):
+                return
+        if size == types.none:
+            restype = dtype
+        else:
+            ndim = _parse_shape(size)
+            if ndim is None:
+                return
+            restype = types.Array(dtype, ndim, 'C')
+        return signature(restype, *args)
+
+
+def _multinomial_sig(n, pvals, size=None):
+    pass
+
+@registry.resolves_global(np.random.multinomial,
+                          typing_key="np.random.multinomial")
+class Numpy_multinomial(AbstractTemplate):
+    pysig = utils.pysignature(_multinomial_sig)
+
+    def generic(self, args, kws):
+        assert not kws
+        n, pvals = args[:2]
+        size = args[2] if len(args) > 2 else types.none
+        if not (isinstance(n, types.Integer) and
+                isinstance(pvals, types.Array) and pvals.ndim == 1 and
+                isinstance(pvals.dtype, types.Float)):
+            return
+        ndim = 1
+        if size != types.none:
+            size_ndim = _parse_shape(size)
+            if size_ndim is None:
+                return
+            ndim += size_ndim
+        return signature(types.Array(types.int64, ndim, 'C'), *args)
+
+
+# Generator objects (numba.prng)
+
+@builtin_attr
+class RandomGeneratorAttribute(AttributeTemplate):
+    key = types.RandomGenerator
+
+    @bound_function("rng.next_uint64")
+    def resolve_next_uint64(self, gen, args, kws):
+        assert not args
+        assert not kws
+        return signature(types.uint64)
+
+    @bound_function("rng.random")
+    def resolve_random(self, gen, args, kws):
+        assert not args
+        assert not kws
+        return signature(types.float64)
+
+    @bound_function("rng.standard_normal")
+    def resolve_standard_normal(self, gen, args, kws):
+        assert not args
+        assert not kws
+        return signature(types.float64)
+
+    @bound_function("rng.standard_exponential")
+    def resolve_standard_exponential(self, gen, args, kws):
+        assert not args
+        assert not kws
+        return signature(types.float64)
@@ -177,6 +177,31 @@ def resolve_ambiguous_resolution(context, cases, args):
     return max(ratings, key=lambda x: x[0])[1]
 
 
+def fold_arguments(pysig, args, kws, default_handler):
+    """
+    Fold keyword arguments *kws* into positional arguments *args*,
+    according to the Python signature *pysig*.  Parameters omitted
+    before the last given one are filled in with the result of
+    ``default_handler(index, default value)``.  A tuple of positional
+    arguments is returned; TypeError is raised if the arguments
+    don't match the signature.
+    """
+    bound = pysig.bind(*args, **kws)
+    params = list(pysig.parameters.values())
+    given = [i for i, param in enumerate(params)
+             if param.name in bound.arguments]
+    folded = []
+    for index, param in enumerate(params[:max(given) + 1] if given else []):
+        if param.kind not in (param.POSITIONAL_ONLY,
+                              param.POSITIONAL_OR_KEYWORD):
+            raise TypeError("cannot fold argument %r" % (param.name,))
+        if param.name in bound.arguments:
+            folded.append(bound.arguments[param.name])
+        else:
+            folded.append(default_handler(index, param.default))
+    return tuple(folded)
+
+
 class FunctionTemplate(object):
     def __init__(self, context):
         self.context = context
@@ -191,10 +216,23 @@ class AbstractTemplate(FunctionTemplate):
     Defines method ``generic(self, args, kws)`` which compute a possible
     signature base on input types.  The signature does not have to match the
     input types. It is compared against the input types afterwards.
+
+    If the template has a ``pysig`` attribute (a Python signature object),
+    keyword arguments are folded into positional arguments before calling
+    ``generic()``.
     """
 
     def apply(self, args, kws):
         generic = getattr(self, "generic")
+        pysig = getattr(self, "pysig", None)
+        if kws and pysig is not None:
+            def default_type(index, default):
+                return self.context.resolve_value_type(default)
+            try:
+                args = fold_arguments(pysig, args, kws, default_type)
+            except TypeError:
+                return
+            kws = {}
         sig = generic(args, kws)
 
         # Unpack optional type if no matching signature